@@ -18,7 +18,7 @@ def classify_failure(stdout: str, functional: dict):
       failure_stage ∈ {pass, pre-test, in-test}
       failure_type  ∈ {none, import_error, syntax_error, collection_error, pytest_internal_error,
                        timeout, assertion_failure, runtime_exception, test_failure, test_error,
-                       unknown_failure}
+                       oom_limit, cpu_limit, fsize_limit, nofile_limit, unknown_failure}
     """
     s = stdout or ""
     lower = s.lower()
@@ -27,6 +27,10 @@ def classify_failure(stdout: str, functional: dict):
     if functional.get("returncode", None) == 0 and functional.get("failed", 0) == 0 and "error" not in lower:
         return ("pass", "none")
 
+    # Harness-side resource limits (RLIMIT_*) recorded by measure_generated
+    if functional.get("failure_class") in {"oom_limit", "cpu_limit", "fsize_limit", "nofile_limit"}:
+        return ("in-test", functional["failure_class"])
+
     # Pre-test: pytest collection / import stage
     if ("error collecting" in lower) or ("error during collection" in lower) or ("while importing test module" in lower):
         if ("modulenotfounderror" in lower) or ("importerror" in lower) or ("cannot import name" in lower):
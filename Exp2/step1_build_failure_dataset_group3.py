@@ -20,6 +20,10 @@ def classify_failure(stdout: str, functional: dict):
     if functional.get("returncode", None) == 0 and functional.get("failed", 0) == 0 and "error" not in lower:
         return ("pass", "none")
 
+    # Harness-side resource limits (RLIMIT_*) recorded by measure_generated
+    if functional.get("failure_class") in {"oom_limit", "cpu_limit", "fsize_limit", "nofile_limit"}:
+        return ("in-test", functional["failure_class"])
+
     if ("error collecting" in lower) or ("error during collection" in lower) or ("while importing test module" in lower):
         if ("modulenotfounderror" in lower) or ("importerror" in lower) or ("cannot import name" in lower):
             return ("pre-test", "import_error")
@@ -114,6 +118,10 @@ GROUP3 = {
     "timeout": "Runtime Robustness & Efficiency",
     "test_error": "Runtime Robustness & Efficiency",
     "pytest_internal_error": "Runtime Robustness & Efficiency",
+    "oom_limit": "Runtime Robustness & Efficiency",
+    "cpu_limit": "Runtime Robustness & Efficiency",
+    "fsize_limit": "Runtime Robustness & Efficiency",
+    "nofile_limit": "Runtime Robustness & Efficiency",
 
     "unknown_failure": "Non-diagnostic (Evidence-Insufficient)",  # 临时
 }
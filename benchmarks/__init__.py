@@ -0,0 +1,3 @@
+"""
+Self-benchmarks for the evaluation harness (see benchmarks/run.py).
+"""
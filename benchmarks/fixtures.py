@@ -0,0 +1,208 @@
+"""
+Synthetic inputs for the harness self-benchmarks.
+
+Everything is generated deterministically from a seed, so a timing change
+between two runs comes from the code under test, not from different inputs.
+"""
+
+from __future__ import annotations
+
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import psutil
+
+SUITE_NAMES = ["functional", "performance", "resource", "robustness", "security", "maintainability"]
+
+# 一段典型的失败输出：traceback + 断言 + 摘要行
+_FAILURE_BLOCK = (
+    "____________________________ test_case_{i} ____________________________\n"
+    "\n"
+    "    def test_case_{i}():\n"
+    ">       assert encode(payload) == expected\n"
+    "E       AssertionError: assert b'\\x00\\x01' == b'\\x00\\x02'\n"
+    "E         At index 1 diff: b'\\x01' != b'\\x02'\n"
+    "\n"
+    "tests/Project/functional_test.py:{i}: AssertionError\n"
+)
+
+
+def pytest_output(size_bytes: int, n_tests: int = 400, fail_ratio: float = 0.1, seed: int = 0) -> str:
+    """
+    pytest ``-q`` style output of roughly ``size_bytes``: progress dots, a
+    FAILURES section padded with captured stdout, and the final summary line.
+    """
+    rng = random.Random(seed)
+    failed = int(n_tests * fail_ratio)
+    passed = n_tests - failed
+    parts: List[str] = [f"collected {n_tests} items\n\n"]
+    progress = "".join("F" if rng.random() < fail_ratio else "." for _ in range(n_tests))
+    for k in range(0, len(progress), 80):
+        parts.append(progress[k:k + 80] + "\n")
+    parts.append("\n=================================== FAILURES ===================================\n")
+    # 小体积时只保留放得下的失败块，保证输出大小接近 size_bytes
+    n_blocks = max(1, min(failed, size_bytes // (4 * len(_FAILURE_BLOCK))))
+    blocks = [_FAILURE_BLOCK.format(i=i) for i in range(n_blocks)]
+    size = sum(len(p) for p in parts) + sum(len(b) for b in blocks)
+    # 剩余体积用被捕获的打印填满（失控输出的生成代码就是这个样子）
+    noise_line = "----------------------------- Captured stdout call -----------------------------\n"
+    filler: List[str] = []
+    while size < size_bytes - 200:
+        line = f"debug: step={rng.randrange(10 ** 6)} value={rng.random():.6f} state=ok\n"
+        filler.append(line)
+        size += len(line)
+    if filler:
+        blocks.insert(len(blocks) // 2, noise_line + "".join(filler))
+    parts.extend(blocks)
+    parts.append("=========================== short test summary info ============================\n")
+    parts.append("FAILED tests/Project/functional_test.py::test_case_0 - AssertionError\n")
+    parts.append(f"{failed} failed, {passed} passed, 3 skipped in 12.34s\n")
+    return "".join(parts)
+
+
+def synthetic_repo(root: Path, n_files: int = 500, seed: int = 0) -> Path:
+    """
+    A package tree of ``n_files`` modules under ``root/pkg`` with internal
+    ``import`` / ``from ... import`` edges (what import_gate analyses).
+    """
+    rng = random.Random(seed)
+    pkg = root / "pkg"
+    per_dir = 25
+    modules: List[str] = []
+    for i in range(n_files):
+        sub = f"sub{i // per_dir}"
+        d = pkg / sub
+        if not (d / "__init__.py").exists():
+            d.mkdir(parents=True, exist_ok=True)
+            (d / "__init__.py").write_text("", encoding="utf-8")
+        modules.append(f"pkg.{sub}.mod{i}")
+    (pkg / "__init__.py").write_text('__version__ = "0.0.0"\n', encoding="utf-8")
+
+    for i, mod in enumerate(modules):
+        lines = ["import os", "import json", ""]
+        # 只依赖编号更小的模块：无环，import_gate 的 SCC 检查走完整图
+        for j in sorted({rng.randrange(i) for _ in range(min(i, 4))}):
+            lines.append(f"from {modules[j]} import func_{j}")
+        lines.append("")
+        for k in range(6):
+            lines.append(f"CONST_{k} = {rng.randrange(1000)}")
+        lines.append("")
+        lines.append(f"class Thing{i}:")
+        lines.append("    def method(self, x):")
+        lines.append("        return x + CONST_0")
+        lines.append("")
+        lines.append(f"def func_{i}(value=None):")
+        lines.append(f'    """Synthetic function {i}."""')
+        lines.append("    return json.dumps({'value': value, 'cwd': os.getcwd()})")
+        path = pkg / mod.split(".")[1] / f"mod{i}.py"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return root
+
+
+def results_document(stdout_bytes: int, n_suites: int = 6, seed: int = 0) -> Dict[str, Any]:
+    """A run_all_tests-shaped output document whose suites carry ``stdout_bytes`` of output each."""
+    rng = random.Random(seed)
+    results: Dict[str, Any] = {}
+    for i, name in enumerate(SUITE_NAMES[:n_suites]):
+        results[name] = {
+            "returncode": 1,
+            "stdout": pytest_output(stdout_bytes, seed=seed + i),
+            "elapsed_time_s": round(rng.uniform(1, 60), 6),
+            "avg_memory_mb": round(rng.uniform(20, 400), 2),
+            "avg_cpu_percent": round(rng.uniform(0, 200), 2),
+            "passed": 360,
+            "failed": 40,
+            "skipped": 3,
+            "total": 403,
+            "score": round(rng.random(), 4),
+        }
+    return {
+        "project_name": "Synthetic",
+        "generated_repo": "/tmp/synthetic",
+        "timestamp": "2026-01-01 00:00:00",
+        "functional_score": 0.9,
+        "non_functional_score": 0.8,
+        "results": results,
+    }
+
+
+def failure_records(n: int, stdout_bytes: int = 8 * 1024, seed: int = 0) -> List[Dict[str, Any]]:
+    """(stdout, functional) pairs in the shape Exp2's classify_failure consumes."""
+    kinds = ["assert", "import", "timeout", "pass", "error"]
+    records: List[Dict[str, Any]] = []
+    for i in range(n):
+        kind = kinds[i % len(kinds)]
+        out = pytest_output(stdout_bytes, n_tests=50, seed=seed + i)
+        functional: Dict[str, Any] = {"returncode": 1, "passed": 45, "failed": 5}
+        if kind == "import":
+            out = "ERROR collecting tests/Project/functional_test.py\nModuleNotFoundError: No module named 'pkg'\n" + out
+        elif kind == "timeout":
+            out = out + "\n+++++ Timeout +++++\n"
+        elif kind == "pass":
+            out = "collected 50 items\n\n" + "." * 50 + "\n50 passed in 1.00s\n"
+            functional = {"returncode": 0, "passed": 50, "failed": 0}
+        elif kind == "error":
+            out = out.replace("AssertionError", "ValueError")
+        records.append({"stdout": out, "functional": functional})
+    return records
+
+
+def score_maps(n_models: int, n_maps: int, seed: int = 0) -> List[Dict[str, float]]:
+    """Per-model score maps (as produced by each rerun / budget / noise condition)."""
+    rng = random.Random(seed)
+    base = {f"model-{i:03d}": rng.random() for i in range(n_models)}
+    return [{k: v + rng.gauss(0, 0.02) for k, v in base.items()} for _ in range(n_maps)]
+
+
+class ProcessTree:
+    """``n`` sleeping Python children under one parent, like a pytest run with workers."""
+
+    def __init__(self, n_children: int) -> None:
+        code = (
+            "import subprocess, sys, time\n"
+            f"ps = [subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(600)']) for _ in range({int(n_children)})]\n"
+            "print('ready', flush=True)\n"
+            "time.sleep(600)\n"
+        )
+        self.proc = psutil.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+        assert self.proc.stdout is not None
+        self.proc.stdout.readline()
+        deadline = time.time() + 30
+        while len(self.proc.children(recursive=True)) < n_children and time.time() < deadline:
+            time.sleep(0.05)
+
+    def close(self) -> None:
+        try:
+            procs = [self.proc] + self.proc.children(recursive=True)
+        except Exception:
+            procs = [self.proc]
+        for p in procs:
+            try:
+                p.kill()
+            except Exception:
+                pass
+        psutil.wait_procs(procs, timeout=5)
+
+    def __enter__(self) -> "ProcessTree":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def pytest_suite(root: Path, n_tests: int = 50, sleep_s: float = 0.0) -> Path:
+    """A trivial test file for the end-to-end harness-overhead benchmark."""
+    root.mkdir(parents=True, exist_ok=True)
+    body = ["import time", ""]
+    for i in range(n_tests):
+        body.append(f"def test_{i}():")
+        body.append(f"    time.sleep({sleep_s!r})" if sleep_s else "    pass")
+        body.append(f"    assert {i} + 1 == {i + 1}")
+        body.append("")
+    path = root / "synthetic_test.py"
+    path.write_text("\n".join(body), encoding="utf-8")
+    return path
@@ -0,0 +1,280 @@
+"""
+Harness self-benchmarks.
+
+Each benchmark is a generator: everything before ``yield`` is setup (not
+timed), the yielded callable is what gets timed, everything after is
+teardown. ``budget_s`` is the stated per-call ceiling; benchmarks registered
+with ``measures=True`` return the measured quantity themselves (e.g. harness
+overhead = harness wall time - bare pytest wall time) instead of being timed
+from the outside; those are compared on their median, timed ones on best-of-N.
+"""
+
+from __future__ import annotations
+
+import ast
+import io
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    from . import fixtures  # type: ignore
+except Exception:
+    import fixtures  # type: ignore
+
+from evaluation import confidence_experiments as ce
+from evaluation.import_gate import run_import_gate
+from evaluation.log_capture import LogCapture
+from evaluation.measure_generated import (
+    _parse_pytest_counts,
+    _run_pytest_with_sampling_and_stream,
+    _sample_process_tree,
+)
+
+MB = 1024 * 1024
+KB = 1024
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable[[], Iterator[Callable[[], Any]]]
+    budget_s: Optional[float] = None
+    repeat: int = 7
+    number: int = 1
+    quick: bool = True
+    measures: bool = False
+    note: str = ""
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, **kw: Any) -> Callable[[Callable[[], Iterator[Callable[[], Any]]]], Callable[[], Iterator[Callable[[], Any]]]]:
+    def deco(func: Callable[[], Iterator[Callable[[], Any]]]) -> Callable[[], Iterator[Callable[[], Any]]]:
+        if name in BENCHMARKS:
+            raise ValueError(f"duplicate benchmark name: {name}")
+        BENCHMARKS[name] = Benchmark(name=name, func=func, **kw)
+        return func
+    return deco
+
+
+def _tempdir(prefix: str) -> Path:
+    return Path(tempfile.mkdtemp(prefix=f"racb_bench_{prefix}_"))
+
+
+# ----------------------------
+# Output handling
+# ----------------------------
+
+def _register_parse_counts(size: int, budget_s: float, quick: bool) -> None:
+    label = f"{size // MB}MB" if size >= MB else f"{size // KB}KB"
+
+    @benchmark(f"parse_pytest_counts[{label}]", budget_s=budget_s, quick=quick, repeat=3 if size >= 10 * MB else 7,
+               number=200 if size < 256 * KB else 1)
+    def _bench() -> Iterator[Callable[[], Any]]:
+        out = fixtures.pytest_output(size)
+        yield lambda: _parse_pytest_counts(out)
+
+
+# 摘要行在输出末尾：每个正则都要扫完整个输出。实际输入被 LogCapture 截到 256KB，
+# 更大的尺寸用来发现截断失效或解析退化
+for _size, _budget, _quick in [(KB, 0.001, True), (256 * KB, 0.1, True), (MB, 0.4, True), (10 * MB, 4.0, True),
+                               (50 * MB, 20.0, False)]:
+    _register_parse_counts(_size, _budget, _quick)
+
+
+def _register_log_capture(size: int, budget_s: float, quick: bool) -> None:
+    @benchmark(f"log_capture[{size // MB}MB]", budget_s=budget_s, quick=quick, repeat=3,
+               note="pump-thread line sink + gzip log + text()")
+    def _bench() -> Iterator[Callable[[], Any]]:
+        lines = fixtures.pytest_output(size).splitlines(keepends=True)
+        tmp = _tempdir("log")
+
+        def run() -> str:
+            cap = LogCapture(tmp / "suite.log", echo=False)
+            for line in lines:
+                cap.write(line)
+            text = cap.text()
+            cap.close()
+            return text
+
+        yield run
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+for _size, _budget, _quick in [(MB, 0.25, True), (50 * MB, 10.0, False)]:
+    _register_log_capture(_size, _budget, _quick)
+
+
+def _register_yaml_dump(stdout_bytes: int, budget_s: float, quick: bool) -> None:
+    label = f"{stdout_bytes // MB}MB" if stdout_bytes >= MB else f"{stdout_bytes // KB}KB"
+
+    @benchmark(f"yaml_dump_results[6x{label}]", budget_s=budget_s, quick=quick, repeat=3,
+               note="yaml.safe_dump as in run_all_tests")
+    def _bench() -> Iterator[Callable[[], Any]]:
+        doc = fixtures.results_document(stdout_bytes)
+
+        def run() -> int:
+            buf = io.StringIO()
+            yaml.safe_dump(doc, buf, allow_unicode=True, sort_keys=False)
+            return len(buf.getvalue())
+
+        yield run
+
+
+# 256KB 是 LogCapture 默认保留的头尾大小，也就是结果 YAML 里 stdout 的常见上限
+for _size, _budget, _quick in [(256 * KB, 3.0, True), (MB, 12.0, False)]:
+    _register_yaml_dump(_size, _budget, _quick)
+
+
+# ----------------------------
+# Sampling loop
+# ----------------------------
+
+def _register_sample_tree(n_children: int, budget_s: float) -> None:
+    @benchmark(f"sample_process_tree[{n_children} children]", budget_s=budget_s, number=20,
+               note="one sampling tick of _run_pytest_with_sampling_and_stream (default interval 0.1s)")
+    def _bench() -> Iterator[Callable[[], Any]]:
+        import psutil
+
+        with fixtures.ProcessTree(n_children) as tree:
+            proc = psutil.Process(tree.proc.pid)
+            _sample_process_tree(proc)
+            yield lambda: _sample_process_tree(proc)
+
+
+# 采样本身占用的时间不能超过采样间隔（0.1s）的 10%
+for _n, _budget in [(0, 0.01), (8, 0.01), (32, 0.01)]:
+    _register_sample_tree(_n, _budget)
+
+
+# ----------------------------
+# Static analysis / classification
+# ----------------------------
+
+@benchmark("import_gate[500 files]", budget_s=1.5, repeat=5)
+def _bench_import_gate() -> Iterator[Callable[[], Any]]:
+    tmp = _tempdir("gate")
+    repo = fixtures.synthetic_repo(tmp, n_files=500)
+    yield lambda: run_import_gate(repo)
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _load_function(path: Path, name: str) -> Callable[..., Any]:
+    """
+    Compile a single top-level function out of a script without importing the
+    script (Exp2's step scripts import pandas at module level).
+    """
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == name:
+            mod = ast.Module(body=[node], type_ignores=[])
+            ns: Dict[str, Any] = {"re": re}
+            exec(compile(mod, str(path), "exec"), ns)
+            return ns[name]
+    raise LookupError(f"{name} not found in {path}")
+
+
+@benchmark("exp2_classify_failure[500x8KB]", budget_s=0.25, repeat=5)
+def _bench_classify_failure() -> Iterator[Callable[[], Any]]:
+    classify = _load_function(ROOT / "Exp2" / "step1_build_dataset.py", "classify_failure")
+    records = fixtures.failure_records(500)
+
+    def run() -> int:
+        return sum(1 for r in records if classify(r["stdout"], r["functional"])[0] != "pass")
+
+    yield run
+
+
+# ----------------------------
+# confidence_experiments statistics
+# ----------------------------
+
+@benchmark("confidence_stats[16 models x 200 maps]", budget_s=0.1, repeat=5)
+def _bench_confidence_stats() -> Iterator[Callable[[], Any]]:
+    maps = fixtures.score_maps(16, 200)
+    ref = maps[0]
+
+    def run() -> float:
+        r_ref = ce.ranks_desc(ref)
+        acc = 0.0
+        for m in maps[1:]:
+            acc += ce.spearman_rho(r_ref, ce.ranks_desc(m))
+            acc += ce.pairwise_flip_rate(ref, m)
+            ce.top1(m)
+        return acc
+
+    yield run
+
+
+# percentile 每次都排序整个列表：100k 个点在慢机器上约 0.2s，预算按约 3 倍中位数给
+@benchmark("confidence_percentile[100k]", budget_s=0.6, repeat=5)
+def _bench_percentile() -> Iterator[Callable[[], Any]]:
+    import random
+
+    rng = random.Random(0)
+    xs = [rng.random() for _ in range(100_000)]
+    yield lambda: [ce.percentile(xs, p) for p in (0.05, 0.5, 0.95)]
+
+
+# ----------------------------
+# End-to-end
+# ----------------------------
+
+def _bare_pytest(test_path: Path) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "pytest", "-q", str(test_path)], cwd=str(ROOT),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+@benchmark("e2e_suite_overhead[50 tests]", budget_s=0.6, repeat=5, measures=True,
+           note="harness wall time minus bare `pytest -q` wall time for the same suite")
+def _bench_e2e_overhead() -> Iterator[Callable[[], Any]]:
+    tmp = _tempdir("e2e")
+    test_path = fixtures.pytest_suite(tmp, n_tests=50)
+    old_quiet = os.environ.get("RACB_QUIET")
+    os.environ["RACB_QUIET"] = "1"
+
+    def run() -> float:
+        bare = _bare_pytest(test_path)
+        start = time.perf_counter()
+        res = _run_pytest_with_sampling_and_stream(test_path, tmp, {}, timeout_s=120)
+        harness = time.perf_counter() - start
+        if res.get("passed") != 50:
+            raise RuntimeError(f"synthetic suite did not pass under the harness: {res.get('stdout', '')[-2000:]}")
+        return harness - bare
+
+    try:
+        yield run
+    finally:
+        if old_quiet is None:
+            os.environ.pop("RACB_QUIET", None)
+        else:
+            os.environ["RACB_QUIET"] = old_quiet
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def select(pattern: Optional[str] = None, quick: bool = False) -> List[Benchmark]:
+    out = []
+    for b in BENCHMARKS.values():
+        if quick and not b.quick:
+            continue
+        if pattern and not re.search(pattern, b.name):
+            continue
+        out.append(b)
+    return out
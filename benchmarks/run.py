@@ -0,0 +1,241 @@
+"""
+Run the harness self-benchmarks, keep a history, and fail on regressions.
+
+  python -m benchmarks.run                 # full suite, append to history
+  python -m benchmarks.run --quick         # skip the 50MB-class fixtures
+  python -m benchmarks.run -k parse        # regex filter on benchmark names
+  python -m benchmarks.run --no-save       # compare only, do not record
+
+Every run appends one JSON line to the history file (default
+results/benchmarks/history.jsonl) with per-benchmark min/median/stdev and the
+machine fingerprint. A benchmark fails when
+
+  - its median exceeds the stated ``budget_s`` (harness_bench.py), or
+  - its best-of-N time (median for self-measuring benchmarks) is more than
+    ``--threshold`` slower than the baseline, i.e. the median of that value
+    over the last ``--window`` passing runs on the same machine fingerprint
+    (at least ``--min-history`` of them; the slowdown must also exceed
+    ``--min-delta-ms``, so microsecond-scale jitter is ignored).
+
+Runs flagged as regressions are still recorded but never used as a baseline,
+so repeated runs of a regressed tree keep failing. Exit code 1 on any failure.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+try:
+    from .harness_bench import Benchmark, select  # type: ignore
+except Exception:
+    from harness_bench import Benchmark, select  # type: ignore
+
+DEFAULT_HISTORY = ROOT / "results" / "benchmarks" / "history.jsonl"
+# 共享机器上 best-of-N 的波动可达 ±40%；真正要抓的退化（二次复杂度、截断失效）都是数倍级别
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_WINDOW = 5
+DEFAULT_MIN_HISTORY = 3
+DEFAULT_MIN_DELTA_MS = 0.5
+
+
+def fingerprint() -> Dict[str, Any]:
+    return {
+        "host": socket.gethostname(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": sys.platform,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count() or 0,
+    }
+
+
+def _git_rev() -> str:
+    try:
+        p = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), stdout=subprocess.PIPE,
+                           stderr=subprocess.DEVNULL, text=True, timeout=10)
+        rev = p.stdout.strip()
+        p = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=str(ROOT),
+                           stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=30)
+        return rev + ("-dirty" if p.stdout.strip() else "")
+    except Exception:
+        return ""
+
+
+def measure(b: Benchmark, repeat: Optional[int] = None) -> Dict[str, Any]:
+    """Per-call times (seconds) for one benchmark: setup, one warmup, ``repeat`` timed rounds, teardown."""
+    gen = b.func()
+    fn = next(gen)
+    times: List[float] = []
+    try:
+        fn()  # warmup：首次调用的 import / 缓存填充不计入
+        for _ in range(repeat or b.repeat):
+            # 与 timeit 相同：计时期间关闭 GC，避免其它测量留下的垃圾随机落在某一轮
+            gc_was_enabled = gc.isenabled()
+            gc.collect()
+            gc.disable()
+            try:
+                if b.measures:
+                    times.append(float(fn()))
+                else:
+                    start = time.perf_counter()
+                    for _ in range(b.number):
+                        fn()
+                    times.append((time.perf_counter() - start) / b.number)
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+    finally:
+        try:
+            next(gen)
+        except StopIteration:
+            pass
+    median = statistics.median(times)
+    return {
+        "min_s": min(times),
+        "median_s": median,
+        # 自报测量值（差值）噪声大，用中位数；计时类用 best-of-N
+        "compare_s": median if b.measures else min(times),
+        "stdev_s": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "rounds": len(times),
+        "number": b.number,
+        "budget_s": b.budget_s,
+    }
+
+
+def load_history(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    out: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                out.append(json.loads(line))
+            except Exception:
+                continue
+    return out
+
+
+def baseline_for(
+    history: List[Dict[str, Any]], name: str, fp: Dict[str, Any], window: int, min_history: int = 1
+) -> Optional[float]:
+    """
+    Median comparison value of ``name`` over the last ``window`` passing runs
+    on this machine; None while fewer than ``min_history`` such runs exist.
+    """
+    vals: List[float] = []
+    for entry in reversed(history):
+        if entry.get("fingerprint") != fp:
+            continue
+        r = (entry.get("results") or {}).get(name)
+        if not r or r.get("status") not in ("ok", "new"):
+            continue
+        vals.append(float(r.get("compare_s", r["min_s"])))
+        if len(vals) >= window:
+            break
+    return statistics.median(vals) if vals and len(vals) >= max(1, min_history) else None
+
+
+def judge(r: Dict[str, Any], baseline: Optional[float], threshold: float, min_delta_s: float) -> Tuple[str, str]:
+    budget = r.get("budget_s")
+    if budget is not None and r["median_s"] > budget:
+        return "over_budget", f"median {r['median_s'] * 1e3:.2f}ms > budget {budget * 1e3:.2f}ms"
+    if baseline is None:
+        return "new", ""
+    cur = r["compare_s"]
+    if baseline > 0 and cur - baseline > min_delta_s and cur > baseline * (1.0 + threshold):
+        return "regression", f"{cur / baseline:.2f}x baseline {baseline * 1e3:.2f}ms"
+    return "ok", ""
+
+
+def _fmt_ms(x: Optional[float]) -> str:
+    return "-" if x is None else f"{x * 1e3:10.3f}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Harness self-benchmarks with history and regression check")
+    ap.add_argument("-k", "--filter", default=None, help="Regex on benchmark names")
+    ap.add_argument("--quick", action="store_true", help="Skip the large (50MB-class) fixtures")
+    ap.add_argument("--repeat", type=int, default=None, help="Override timed rounds per benchmark")
+    ap.add_argument("--history", default=str(DEFAULT_HISTORY))
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown vs baseline (0.5 = 50%%)")
+    ap.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Passing runs the baseline is taken over")
+    ap.add_argument("--min-history", type=int, default=DEFAULT_MIN_HISTORY,
+                    help="Passing runs needed before regressions are judged (budgets always apply)")
+    ap.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    ap.add_argument("--no-save", action="store_true", help="Do not append this run to the history")
+    ap.add_argument("--list", action="store_true", help="List benchmarks and budgets, then exit")
+    args = ap.parse_args(argv)
+
+    benches = select(args.filter, quick=args.quick)
+    if args.list:
+        for b in benches:
+            budget = f"{b.budget_s * 1e3:.1f}ms" if b.budget_s is not None else "-"
+            print(f"{b.name:45s} budget={budget:>10s}  {b.note}")
+        return 0
+    if not benches:
+        print("No benchmarks selected.")
+        return 0
+
+    history_path = Path(args.history)
+    history = load_history(history_path)
+    fp = fingerprint()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    failures = 0
+    print(f"{'benchmark':45s} {'min ms':>10s} {'median ms':>10s} {'base ms':>10s} {'budget ms':>10s}  status")
+    for b in benches:
+        try:
+            r = measure(b, args.repeat)
+        except Exception as e:
+            results[b.name] = {"status": "error", "detail": f"{type(e).__name__}: {e}"}
+            failures += 1
+            print(f"{b.name:45s} ERROR {type(e).__name__}: {e}")
+            continue
+        base = baseline_for(history, b.name, fp, args.window, args.min_history)
+        status, detail = judge(r, base, args.threshold, args.min_delta_ms / 1e3)
+        r.update({"status": status, "baseline_s": base, **({"detail": detail} if detail else {})})
+        results[b.name] = r
+        if status in ("over_budget", "regression"):
+            failures += 1
+        print(f"{b.name:45s} {_fmt_ms(r['min_s'])} {_fmt_ms(r['median_s'])} {_fmt_ms(base)} "
+              f"{_fmt_ms(b.budget_s)}  {status}{('  ' + detail) if detail else ''}", flush=True)
+
+    if not args.no_save:
+        entry = {
+            "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "git_rev": _git_rev(),
+            "fingerprint": fp,
+            "quick": bool(args.quick),
+            "results": results,
+        }
+        history_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(history_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, sort_keys=True) + "\n")
+        print(f"History: {history_path}")
+
+    if failures:
+        print(f"{failures} benchmark(s) failed (regression / over budget / error).")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Append-only checkpoints for long sweeps (run_all_benchmarks, confidence_experiments).
+
+Every finished unit of work -- e.g. (model, mode, project) or
+("reruns", model, project, run) -- is appended as one JSON line:
+
+  {"unit": [...], "config_hash": "...", "ts": ..., "record": {...}}
+
+and fsync'ed, so an interrupted sweep loses at most the unit in flight. With
+``resume=True`` a unit whose last record has the same config hash (task yaml
+contents, repo path, relevant CLI knobs) is returned by get() and the caller
+skips it; without resume the file is started afresh.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+
+def config_hash(obj: Any) -> str:
+    data = json.dumps(obj, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def file_digest(path: Path) -> str:
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:16]
+    except Exception:
+        return ""
+
+
+def _unit_key(unit: Sequence[Any]) -> Tuple[str, ...]:
+    return tuple(str(u) for u in unit)
+
+
+class Checkpoint:
+    def __init__(self, path: Path, resume: bool = False) -> None:
+        self.path = Path(path)
+        self.resume = bool(resume)
+        self._done: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.resume:
+            self._load()
+        else:
+            self.path.write_text("", encoding="utf-8")
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except Exception:
+                    # 中断时写了一半的最后一行：忽略
+                    continue
+                if isinstance(entry, dict) and "unit" in entry:
+                    self._done[_unit_key(entry["unit"])] = entry
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def get(self, unit: Sequence[Any], cfg_hash: str) -> Optional[Any]:
+        """Committed record for ``unit`` under the same config, else None."""
+        entry = self._done.get(_unit_key(unit))
+        if entry is None or entry.get("config_hash") != cfg_hash:
+            return None
+        return entry.get("record")
+
+    def commit(self, unit: Sequence[Any], cfg_hash: str, record: Any) -> None:
+        entry = {"unit": list(unit), "config_hash": cfg_hash, "ts": time.time(), "record": record}
+        line = json.dumps(entry, default=str, ensure_ascii=False)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            try:
+                os.fsync(f.fileno())
+            except Exception:
+                pass
+        self._done[_unit_key(unit)] = entry
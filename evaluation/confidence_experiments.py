@@ -4,6 +4,10 @@ Confidence experiments for RAL-Bench / RealAppCodeBench style evaluation.
 
 Implements three validations over FIXED generated repositories (no regeneration):
   1) Stability across reruns (same model, same task, same environment).
+     --rerun-allocation adaptive starts with --initial-reruns per (model,
+     project) and spends further reruns only where they sharpen the model
+     ranking (noisy pairs of models whose neighbours' scores overlap), until
+     the ranking reaches --rank-confidence.
   2) Sensitivity to test budget (subsampling functional & robustness tests).
   3) Robustness to noise (idle vs. synthetic CPU load).
 
@@ -13,6 +17,11 @@ Outputs:
   - noise_details.csv / noise_summary.csv
   - report.md (high-level summary)
 
+Every finished unit (one rerun, one subsample, one noise rep) is appended to
+<out-dir>/checkpoint.jsonl and the *_details.csv files are rewritten as the
+phase progresses; after an interruption, re-run with --resume to skip the units
+that are already done.
+
 Usage (examples):
   # Auto-discover models from generated_root (subfolders)
   python -m evaluation.confidence_experiments \
@@ -48,7 +57,7 @@ import subprocess
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 import yaml
 
@@ -57,8 +66,10 @@ import yaml
 #   2) python evaluation/confidence_experiments.py
 try:
     from . import measure_generated as mg  # type: ignore
+    from .checkpoint import Checkpoint, config_hash, file_digest  # type: ignore
 except Exception:  # pragma: no cover
     import evaluation.measure_generated as mg  # type: ignore
+    from evaluation.checkpoint import Checkpoint, config_hash, file_digest  # type: ignore
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -101,11 +112,30 @@ def write_csv(path: Path, rows: List[Dict[str, Any]], fieldnames: Optional[List[
         base = list(rows[0].keys())
         extra = sorted({k for r in rows for k in r.keys()} - set(base))
         fieldnames = base + extra
-    with open(path, "w", newline="", encoding="utf-8") as f:
+    # 先写临时文件再替换：中途被打断也不会留下半个 CSV
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
         for r in rows:
             w.writerow(r)
+    os.replace(tmp, path)
+
+
+# 进度 CSV 最多每隔这么多秒重写一次（每个 phase 结束时总会强制写一次）
+PROGRESS_FLUSH_S = 30.0
+_last_flush: Dict[str, float] = {}
+
+
+def flush_progress(path: Optional[Path], rows: List[Dict[str, Any]], force: bool = False) -> None:
+    """Rewrite a partial details CSV, throttled to PROGRESS_FLUSH_S."""
+    if path is None:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush.get(str(path), float("-inf")) < PROGRESS_FLUSH_S:
+        return
+    write_csv(path, rows)
+    _last_flush[str(path)] = now
 
 
 def percentile(xs: Sequence[float], p: float) -> float:
@@ -427,6 +457,55 @@ def extract_run_result(full_output: Dict[str, Any]) -> RunResult:
     )
 
 
+def _unit_hash(task_yaml: Path, repo: Path, **knobs: Any) -> str:
+    """Config hash of one checkpointed unit: task yaml contents, repo path and phase knobs."""
+    return config_hash({"task": file_digest(task_yaml), "repo": str(repo), **knobs})
+
+
+def _rerun_row(project: str, model: str, run: int, rr: RunResult, repo: Path, task_yaml: Path, package_name: Optional[str]) -> Dict[str, Any]:
+    return {
+        "phase": "reruns",
+        "project": project,
+        "model": model,
+        "run": run,
+        "functional_score": rr.functional,
+        "non_functional_score": rr.non_functional,
+        "maintainability": rr.subscores.get("maintainability", 0.0),
+        "security": rr.subscores.get("security", 0.0),
+        "robustness": rr.subscores.get("robustness", 0.0),
+        "performance": rr.subscores.get("performance", 0.0),
+        "resource": rr.subscores.get("resource", 0.0),
+        "perf_elapsed_time_s": _safe_float(rr.raw.get("perf_elapsed_time_s"), 0.0),
+        "avg_memory_mb": _safe_float(rr.raw.get("avg_memory_mb"), 0.0),
+        "avg_cpu_percent": _safe_float(rr.raw.get("avg_cpu_percent"), 0.0),
+        "high_risk_count": _safe_int(rr.raw.get("high_risk_count"), 0),
+        "mi_min": _safe_float(rr.raw.get("mi_min"), 0.0),
+        "robust_passed": _safe_int(rr.raw.get("robust_passed"), 0),
+        "robust_total": _safe_int(rr.raw.get("robust_total"), 0),
+        "repo_path": str(repo),
+        "task_yaml": str(task_yaml),
+        "package_name": package_name or "",
+    }
+
+
+def _run_result_from_row(row: Dict[str, Any]) -> RunResult:
+    """Inverse of _rerun_row (used when a rerun is restored from the checkpoint)."""
+    return RunResult(
+        functional=_safe_float(row.get("functional_score")),
+        non_functional=_safe_float(row.get("non_functional_score")),
+        subscores={k: _safe_float(row.get(k)) for k in ["maintainability", "security", "robustness", "performance", "resource"]},
+        raw={
+            "perf_elapsed_time_s": row.get("perf_elapsed_time_s"),
+            "avg_memory_mb": row.get("avg_memory_mb"),
+            "avg_cpu_percent": row.get("avg_cpu_percent"),
+            "high_risk_count": row.get("high_risk_count"),
+            "mi_min": row.get("mi_min"),
+            "robust_passed": row.get("robust_passed"),
+            "robust_total": row.get("robust_total"),
+        },
+    )
+
+
 def compute_nf_from_subscores(subscores: Dict[str, float]) -> float:
     ws = 0.0
     s = 0.0
@@ -437,6 +516,270 @@ def compute_nf_from_subscores(subscores: Dict[str, float]) -> float:
     return (s / ws) if ws > 0 else 0.0
 
 
+RERUN_METRICS = ["maintainability", "security", "robustness", "performance", "resource"]
+
+
+def _rerun_once(
+    task_yaml: Path,
+    model: str,
+    project: str,
+    repo: Path,
+    package_name: Optional[str],
+    run: int,
+    unit_hash: str,
+    out_dir: Path,
+    checkpoint: Optional[Checkpoint],
+) -> Tuple[Dict[str, Any], RunResult]:
+    """One full evaluation (1-based ``run``), restored from ``checkpoint`` when already committed."""
+    unit = ("reruns", model, project, run)
+    row = checkpoint.get(unit, unit_hash) if checkpoint is not None else None
+    if row is not None:
+        return row, _run_result_from_row(row)
+    out_yaml = out_dir / "reruns" / model / project / f"run_{run:02d}.yaml"
+    full_out = run_full_once(task_yaml, repo, out_yaml)
+    rr = extract_run_result(full_out)
+    row = _rerun_row(project, model, run, rr, repo, task_yaml, package_name)
+    if checkpoint is not None:
+        checkpoint.commit(unit, unit_hash, row)
+    return row, rr
+
+
+def _summarize_reruns(project: str, model: str, run_results: List[RunResult]) -> Tuple[Dict[str, Any], RunResult]:
+    """Summary row (mean/std/cv/p05/p95 per metric) and the mean RunResult of one (model, project)."""
+    def series(getter) -> List[float]:
+        return [float(getter(x)) for x in run_results]
+
+    metrics = {
+        "functional_score": series(lambda x: x.functional),
+        "non_functional_score": series(lambda x: x.non_functional),
+        "maintainability": series(lambda x: x.subscores.get("maintainability", 0.0)),
+        "security": series(lambda x: x.subscores.get("security", 0.0)),
+        "robustness": series(lambda x: x.subscores.get("robustness", 0.0)),
+        "performance": series(lambda x: x.subscores.get("performance", 0.0)),
+        "resource": series(lambda x: x.subscores.get("resource", 0.0)),
+        "perf_elapsed_time_s": series(lambda x: _safe_float(x.raw.get("perf_elapsed_time_s"), 0.0)),
+        "avg_memory_mb": series(lambda x: _safe_float(x.raw.get("avg_memory_mb"), 0.0)),
+        "avg_cpu_percent": series(lambda x: _safe_float(x.raw.get("avg_cpu_percent"), 0.0)),
+        "mi_min": series(lambda x: _safe_float(x.raw.get("mi_min"), 0.0)),
+    }
+
+    sum_row: Dict[str, Any] = {"phase": "reruns", "project": project, "model": model, "reruns": len(run_results)}
+    for k, xs in metrics.items():
+        m = statistics.mean(xs) if xs else 0.0
+        sd = statistics.pstdev(xs) if len(xs) >= 2 else 0.0
+        cv = (sd / m) if m != 0.0 else 0.0
+        sum_row[f"{k}_mean"] = m
+        sum_row[f"{k}_std"] = sd
+        sum_row[f"{k}_cv"] = cv
+        sum_row[f"{k}_p05"] = percentile(xs, 0.05) if xs else 0.0
+        sum_row[f"{k}_p95"] = percentile(xs, 0.95) if xs else 0.0
+
+    # mean cache for later (use mean subscores)
+    mean_sub = {k: _safe_float(sum_row.get(f"{k}_mean", 0.0)) for k in RERUN_METRICS}
+    mean = RunResult(
+        functional=_safe_float(sum_row.get("functional_score_mean", 0.0)),
+        non_functional=_safe_float(sum_row.get("non_functional_score_mean", 0.0)),
+        subscores=mean_sub,
+        raw={
+            "perf_elapsed_time_s": _safe_float(sum_row.get("perf_elapsed_time_s_mean", 0.0)),
+            "avg_memory_mb": _safe_float(sum_row.get("avg_memory_mb_mean", 0.0)),
+            "avg_cpu_percent": _safe_float(sum_row.get("avg_cpu_percent_mean", 0.0)),
+            "mi_min": _safe_float(sum_row.get("mi_min_mean", 0.0)),
+        },
+    )
+    return sum_row, mean
+
+
+def _metric_of(rr: RunResult, metric: str) -> float:
+    if metric == "functional_score":
+        return float(rr.functional)
+    if metric == "non_functional_score":
+        return float(rr.non_functional)
+    return float(rr.subscores.get(metric, 0.0))
+
+
+# 自适应重跑：每个 (model, project) 至少先跑这么多次，样本方差才有意义
+MIN_INITIAL_RERUNS = 3
+# 方差收缩的先验自由度：零散度的小样本不当作"确定"，而向全体的合并方差收缩
+PRIOR_DF = 2.0
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    # 不完全 Beta 函数的连分式（Numerical Recipes 6.4）
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        for num in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                    -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + num * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + num / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1e-12:
+            break
+    return h
+
+
+def _student_t_cdf(t: float, df: float) -> float:
+    """P(T <= t) for Student's t with ``df`` (> 0, may be fractional) degrees of freedom."""
+    if math.isinf(df):
+        return 0.5 * (1.0 + math.erf(t / math.sqrt(2.0)))
+    if t == 0.0:
+        return 0.5
+    x, y = df / (df + t * t), t * t / (df + t * t)
+    a, b = df / 2.0, 0.5
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(y))
+    # I_x(a, b)，按收敛更快的一侧计算
+    if x < (a + 1.0) / (a + b + 2.0):
+        ibeta = front * _betacf(a, b, x) / a
+    else:
+        ibeta = 1.0 - front * _betacf(b, a, y) / b
+    tail = 0.5 * ibeta
+    return 1.0 - tail if t >= 0 else tail
+
+
+def _cell_variances(
+    values: Dict[Tuple[str, str], List[float]], deterministic: Optional[Set[Tuple[str, str]]] = None
+) -> Dict[Tuple[str, str], Tuple[float, float]]:
+    """
+    Per (model, project): (variance of one run, degrees of freedom).
+
+    Cells in ``deterministic`` (known to repeat exactly, e.g. repos failing the
+    import gate) get (0, inf). Every other cell's s^2 is shrunk towards the
+    pooled within-cell variance with PRIOR_DF prior degrees of freedom, so two
+    identical runs read as "not measured yet", not as "no noise". When no cell
+    has any spread yet, the variance of the other cells is unknown (inf).
+    """
+    deterministic = deterministic or set()
+    ss = dof = 0.0
+    for key, xs in values.items():
+        if key not in deterministic and len(xs) >= 2:
+            ss += statistics.variance(xs) * (len(xs) - 1)
+            dof += len(xs) - 1
+    pooled = ss / dof if dof > 0 and ss > 0 else None
+
+    out: Dict[Tuple[str, str], Tuple[float, float]] = {}
+    for key, xs in values.items():
+        if not xs:
+            continue
+        if key in deterministic:
+            out[key] = (0.0, math.inf)
+            continue
+        n1 = len(xs) - 1
+        s2 = statistics.variance(xs) if n1 > 0 else 0.0
+        if pooled is None:
+            out[key] = (s2, float(n1)) if s2 > 0 else (math.inf, 1.0)
+        else:
+            out[key] = ((n1 * s2 + PRIOR_DF * pooled) / (n1 + PRIOR_DF), n1 + PRIOR_DF)
+    return out
+
+
+def ranking_confidence(
+    values: Dict[Tuple[str, str], List[float]],
+    models: List[str],
+    deterministic: Optional[Set[Tuple[str, str]]] = None,
+) -> Tuple[float, Dict[str, float], Dict[str, float], List[Dict[str, Any]]]:
+    """
+    Confidence of the model ranking by mean-over-projects.
+
+    Each (model, project) contributes its rerun mean with variance s^2/n, s^2
+    from _cell_variances (0 only for ``deterministic`` cells). For every pair
+    of models adjacent in the ranking, P(order correct) is the Student-t CDF of
+    |diff| / se_diff with Welch-Satterthwaite degrees of freedom; the ranking
+    confidence is the minimum over those pairs (1.0 when the ranking has a
+    single model).
+
+    Returns (confidence, score per model, se^2 per model, adjacent pairs).
+    """
+    cell_var = _cell_variances(values, deterministic)
+    score: Dict[str, float] = {}
+    var: Dict[str, float] = {}
+    # Welch-Satterthwaite 分母：sum(v^2 / dof)
+    dof_term: Dict[str, float] = {}
+    for m in models:
+        cells = [(key, xs) for key, xs in values.items() if key[0] == m and xs]
+        if not cells:
+            continue
+        k = len(cells)
+        score[m] = sum(statistics.mean(xs) for _key, xs in cells) / k
+        var[m] = dof_term[m] = 0.0
+        for key, xs in cells:
+            s2, dof = cell_var[key]
+            v = s2 / len(xs) / (k * k)
+            var[m] += v
+            if v > 0 and not math.isinf(v):
+                dof_term[m] += v * v / dof
+    order = sorted(score, key=lambda m: -score[m])
+    adjacent: List[Dict[str, Any]] = []
+    conf = 1.0
+    for a, b in zip(order, order[1:]):
+        diff = score[a] - score[b]
+        se2 = var[a] + var[b]
+        if se2 == 0.0:
+            # 两边都已知是确定的：名次顺序（或并列）是确定的
+            c, df = 1.0, math.inf
+        elif math.isinf(se2):
+            c, df = 0.5, 1.0
+        else:
+            den = dof_term[a] + dof_term[b]
+            df = se2 * se2 / den if den > 0 else math.inf
+            c = _student_t_cdf(abs(diff) / math.sqrt(se2), df)
+        adjacent.append({"upper": a, "lower": b, "diff": diff, "se": math.sqrt(se2), "df": df, "confidence": c})
+        conf = min(conf, c)
+    return conf, score, var, adjacent
+
+
+def allocate_reruns(
+    values: Dict[Tuple[str, str], List[float]],
+    models: List[str],
+    max_reruns: int,
+    batch: int,
+    target: float,
+    deterministic: Optional[Set[Tuple[str, str]]] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Pick up to ``batch`` (model, project) pairs for the next reruns: those whose
+    extra run most reduces the variance of models in adjacent comparisons that
+    are still below ``target``, weighted by how uncertain that comparison is.
+    Pairs known to be deterministic and pairs at ``max_reruns`` are never
+    picked; a pair whose runs merely agree so far still can be.
+    """
+    _conf, _score, _var, adjacent = ranking_confidence(values, models, deterministic)
+    cell_var = _cell_variances(values, deterministic)
+    weight: Dict[str, float] = {}
+    for adj in adjacent:
+        if adj["confidence"] >= target:
+            continue
+        w = 1.0 - adj["confidence"]
+        weight[adj["upper"]] = weight.get(adj["upper"], 0.0) + w
+        weight[adj["lower"]] = weight.get(adj["lower"], 0.0) + w
+    n_proj = {m: sum(1 for (mm, _p), xs in values.items() if mm == m and xs) for m in models}
+
+    gains: List[Tuple[float, Tuple[str, str]]] = []
+    for (m, p), xs in values.items():
+        if m not in weight or not xs or len(xs) >= max_reruns:
+            continue
+        s2, _dof = cell_var[(m, p)]
+        if s2 <= 0.0:
+            continue
+        n = len(xs)
+        # 多跑一次使该模型均分的方差减少 s^2/(n(n+1)) / k^2
+        gain = weight[m] * s2 / (n * (n + 1)) / (n_proj[m] ** 2)
+        gains.append((gain, (m, p)))
+    gains.sort(key=lambda g: (-g[0], g[1]))
+    return [pair for _g, pair in gains[: max(1, batch)]]
+
+
+def _known_deterministic(rrs: List[RunResult], metric: str) -> bool:
+    # 每次功能分都为 0 且排名指标完全相同：仓库根本跑不起来（如 import gate 失败），
+    # 剩下的分数来自静态分析或全部失败的 suite，重跑也不会变
+    return len(rrs) >= MIN_INITIAL_RERUNS and all(rr.functional == 0.0 for rr in rrs) \
+        and len({_metric_of(rr, metric) for rr in rrs}) == 1
+
+
 def stability_across_reruns(
     tasks: List[Path],
     models: List[str],
@@ -445,18 +788,43 @@ def stability_across_reruns(
     out_dir: Path,
     reruns: int,
     seed: int,
+    checkpoint: Optional[Checkpoint] = None,
+    progress_csv: Optional[Path] = None,
+    allocation: str = "fixed",
+    initial_reruns: int = MIN_INITIAL_RERUNS,
+    rank_metric: str = "non_functional_score",
+    rank_confidence_target: float = 0.95,
+    rerun_budget: int = 0,
+    batch: int = 0,
+    allocation_log: Optional[List[Dict[str, Any]]] = None,
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[Tuple[str, str], RunResult]]:
     """
     Returns:
       - details_rows (one row per run)
       - summary_rows (mean/std/cv per (model, project))
       - full_mean_cache[(model, project)] = RunResult(mean over runs)  (for later experiments)
+
+    Runs already committed to ``checkpoint`` are restored instead of re-run;
+    ``progress_csv`` is rewritten with the details after every run.
+
+    allocation="fixed" runs every (model, project) ``reruns`` times.
+    allocation="adaptive" runs ``initial_reruns`` (at least MIN_INITIAL_RERUNS)
+    per pair, then spends further
+    reruns (one per selected pair per round, ``batch`` pairs per round, at most
+    ``reruns`` per pair and ``rerun_budget`` in total) on the pairs that
+    matter for the ranking by ``rank_metric`` (allocate_reruns), until
+    ranking_confidence() reaches ``rank_confidence_target``. Each round is
+    appended to ``allocation_log``.
     """
     random.seed(seed)
     details: List[Dict[str, Any]] = []
     summary: List[Dict[str, Any]] = []
     mean_cache: Dict[Tuple[str, str], RunResult] = {}
 
+    # (task_yaml, model, project, repo, package_name, unit_hash)，按任务 x 模型的顺序
+    pairs: List[Tuple[Path, str, str, Path, Optional[str], str]] = []
+    # details 里找不到仓库的行保持原来的位置（排在该 pair 的运行行之间）
+    missing_before: Dict[int, List[Dict[str, Any]]] = {}
     for task_yaml in tasks:
         project = task_yaml.parent.name
         config = mg.load_task_config(task_yaml)
@@ -469,7 +837,7 @@ def stability_across_reruns(
         for model in models:
             repo = find_generated_repo(generated_root, model, project, repo_template)
             if repo is None:
-                details.append({
+                missing_before.setdefault(len(pairs), []).append({
                     "phase": "reruns",
                     "project": project,
                     "model": model,
@@ -477,87 +845,71 @@ def stability_across_reruns(
                     "error": "generated_repo_not_found",
                 })
                 continue
-
-            run_results: List[RunResult] = []
-            for r in range(reruns):
-                out_yaml = out_dir / "reruns" / model / project / f"run_{r+1:02d}.yaml"
-                full_out = run_full_once(task_yaml, repo, out_yaml)
-                rr = extract_run_result(full_out)
-                run_results.append(rr)
-
-                row = {
-                    "phase": "reruns",
-                    "project": project,
-                    "model": model,
-                    "run": r + 1,
-                    "functional_score": rr.functional,
-                    "non_functional_score": rr.non_functional,
-                    "maintainability": rr.subscores.get("maintainability", 0.0),
-                    "security": rr.subscores.get("security", 0.0),
-                    "robustness": rr.subscores.get("robustness", 0.0),
-                    "performance": rr.subscores.get("performance", 0.0),
-                    "resource": rr.subscores.get("resource", 0.0),
-                    "perf_elapsed_time_s": _safe_float(rr.raw.get("perf_elapsed_time_s"), 0.0),
-                    "avg_memory_mb": _safe_float(rr.raw.get("avg_memory_mb"), 0.0),
-                    "avg_cpu_percent": _safe_float(rr.raw.get("avg_cpu_percent"), 0.0),
-                    "high_risk_count": _safe_int(rr.raw.get("high_risk_count"), 0),
-                    "mi_min": _safe_float(rr.raw.get("mi_min"), 0.0),
-                    "robust_passed": _safe_int(rr.raw.get("robust_passed"), 0),
-                    "robust_total": _safe_int(rr.raw.get("robust_total"), 0),
-                    "repo_path": str(repo),
-                    "task_yaml": str(task_yaml),
-                    "package_name": package_name or "",
-                }
-                details.append(row)
-
-            # summary stats
-            if not run_results:
-                continue
-
-            def series(getter) -> List[float]:
-                return [float(getter(x)) for x in run_results]
-
-            metrics = {
-                "functional_score": series(lambda x: x.functional),
-                "non_functional_score": series(lambda x: x.non_functional),
-                "maintainability": series(lambda x: x.subscores.get("maintainability", 0.0)),
-                "security": series(lambda x: x.subscores.get("security", 0.0)),
-                "robustness": series(lambda x: x.subscores.get("robustness", 0.0)),
-                "performance": series(lambda x: x.subscores.get("performance", 0.0)),
-                "resource": series(lambda x: x.subscores.get("resource", 0.0)),
-                "perf_elapsed_time_s": series(lambda x: _safe_float(x.raw.get("perf_elapsed_time_s"), 0.0)),
-                "avg_memory_mb": series(lambda x: _safe_float(x.raw.get("avg_memory_mb"), 0.0)),
-                "avg_cpu_percent": series(lambda x: _safe_float(x.raw.get("avg_cpu_percent"), 0.0)),
-                "mi_min": series(lambda x: _safe_float(x.raw.get("mi_min"), 0.0)),
-            }
-
-            sum_row: Dict[str, Any] = {"phase": "reruns", "project": project, "model": model, "reruns": reruns}
-            for k, xs in metrics.items():
-                m = statistics.mean(xs) if xs else 0.0
-                sd = statistics.pstdev(xs) if len(xs) >= 2 else 0.0
-                cv = (sd / m) if m != 0.0 else 0.0
-                sum_row[f"{k}_mean"] = m
-                sum_row[f"{k}_std"] = sd
-                sum_row[f"{k}_cv"] = cv
-                sum_row[f"{k}_p05"] = percentile(xs, 0.05) if xs else 0.0
-                sum_row[f"{k}_p95"] = percentile(xs, 0.95) if xs else 0.0
-            summary.append(sum_row)
-
-            # mean cache for later (use mean subscores)
-            mean_sub = {k: _safe_float(sum_row.get(f"{k}_mean", 0.0)) for k in ["maintainability", "security", "robustness", "performance", "resource"]}
-            mean_nf = _safe_float(sum_row.get("non_functional_score_mean", 0.0))
-            mean_func = _safe_float(sum_row.get("functional_score_mean", 0.0))
-            mean_cache[(model, project)] = RunResult(
-                functional=mean_func,
-                non_functional=mean_nf,
-                subscores=mean_sub,
-                raw={
-                    "perf_elapsed_time_s": _safe_float(sum_row.get("perf_elapsed_time_s_mean", 0.0)),
-                    "avg_memory_mb": _safe_float(sum_row.get("avg_memory_mb_mean", 0.0)),
-                    "avg_cpu_percent": _safe_float(sum_row.get("avg_cpu_percent_mean", 0.0)),
-                    "mi_min": _safe_float(sum_row.get("mi_min_mean", 0.0)),
-                },
-            )
+            pairs.append((task_yaml, model, project, repo, package_name, _unit_hash(task_yaml, repo)))
+
+    results: Dict[Tuple[str, str], List[RunResult]] = {}
+
+    def run_pair(pair: Tuple[Path, str, str, Path, Optional[str], str]) -> None:
+        task_yaml, model, project, repo, package_name, unit_hash = pair
+        rrs = results.setdefault((model, project), [])
+        row, rr = _rerun_once(task_yaml, model, project, repo, package_name, len(rrs) + 1, unit_hash, out_dir, checkpoint)
+        rrs.append(rr)
+        details.append(row)
+        flush_progress(progress_csv, details)
+
+    if allocation == "adaptive":
+        for rows in missing_before.values():
+            details.extend(rows)
+        max_reruns = max(1, int(reruns))
+        first = min(max(int(initial_reruns), MIN_INITIAL_RERUNS), max_reruns)
+        if first != int(initial_reruns):
+            print(f"[reruns] initial reruns per pair: {first} (at least {MIN_INITIAL_RERUNS}, at most --reruns)")
+        budget = int(rerun_budget) if rerun_budget and rerun_budget > 0 else max_reruns * len(pairs)
+        by_key = {(p[1], p[2]): p for p in pairs}
+        for pair in pairs:
+            for _ in range(first):
+                run_pair(pair)
+        spent = first * len(pairs)
+        round_no = 0
+        while True:
+            values = {k: [_metric_of(rr, rank_metric) for rr in rrs] for k, rrs in results.items()}
+            deterministic = {k for k, rrs in results.items() if _known_deterministic(rrs, rank_metric)}
+            conf, _score, _var, _adj = ranking_confidence(values, models, deterministic)
+            remaining = budget - spent
+            picks: List[Tuple[str, str]] = []
+            if conf < rank_confidence_target and remaining > 0:
+                picks = allocate_reruns(values, models, max_reruns, min(int(batch) or len(models), remaining),
+                                        rank_confidence_target, deterministic)
+            if allocation_log is not None:
+                allocation_log.append({
+                    "round": round_no,
+                    "runs_total": spent,
+                    "rank_confidence": round(conf, 6),
+                    "selected": ";".join(f"{m}/{p}" for m, p in picks),
+                })
+            print(f"[reruns] round {round_no}: {spent} runs, ranking confidence {conf:.4f}"
+                  + (f", next: {len(picks)} pair(s)" if picks else ""))
+            if not picks:
+                break
+            for key in picks:
+                run_pair(by_key[key])
+            spent += len(picks)
+            round_no += 1
+    else:
+        for i, pair in enumerate(pairs):
+            details.extend(missing_before.get(i, []))
+            for _ in range(reruns):
+                run_pair(pair)
+        details.extend(missing_before.get(len(pairs), []))
+
+    for _task_yaml, model, project, _repo, _pkg, _h in pairs:
+        run_results = results.get((model, project)) or []
+        # summary stats
+        if not run_results:
+            continue
+        sum_row, mean = _summarize_reruns(project, model, run_results)
+        summary.append(sum_row)
+        mean_cache[(model, project)] = mean
 
     return details, summary, mean_cache
 
@@ -572,6 +924,8 @@ def sensitivity_to_test_budget(
     ratios: List[float],
     repeats: int,
     seed: int,
+    checkpoint: Optional[Checkpoint] = None,
+    progress_csv: Optional[Path] = None,
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
     Subsample functional+robustness tests by nodeid and evaluate stability of rankings.
@@ -582,6 +936,10 @@ def sensitivity_to_test_budget(
     Returns:
       - budget_details rows: per (project, model, ratio, rep)
       - budget_summary rows: per (project, ratio): rank correlation, top1 stability, flip rate
+
+    With a checkpoint, collected nodeids and the scores of each sampled subset
+    are restored on resume. Subsets are still drawn in the same order, so a
+    resumed sweep samples exactly what an uninterrupted one would.
     """
     random.seed(seed)
     details: List[Dict[str, Any]] = []
@@ -622,8 +980,16 @@ def sensitivity_to_test_budget(
                 key = (project, model, ttype)
                 if key in nodeids_cache:
                     continue
+                unit = ("nodeids", project, model, ttype)
+                unit_hash = _unit_hash(task_yaml, repo)
+                cached = checkpoint.get(unit, unit_hash) if checkpoint is not None else None
+                if cached is not None:
+                    nodeids_cache[key] = list(cached)
+                    continue
                 try:
                     nodeids_cache[key] = collect_nodeids(tfile, repo, project, package_name)
+                    if checkpoint is not None:
+                        checkpoint.commit(unit, unit_hash, nodeids_cache[key])
                 except Exception as e:
                     nodeids_cache[key] = []
                     details.append({
@@ -670,17 +1036,27 @@ def sensitivity_to_test_budget(
                         sf = random.sample(func_nodeids, min(kf, len(func_nodeids)))
                         sr = random.sample(rob_nodeids, min(kr, len(rob_nodeids)))
 
-                        tr_func = run_pytest_nodeids(
-                            sf, repo, project, package_name,
-                            timeout_s=float(timeouts.get("functional", default_timeout)),
-                        )
-                        s_func = float(mg.calculate_score("functional", tr_func, cfg.get("baseline_metrics", {}) or {}))
+                        # 样本本身进哈希：只有抽到完全相同的子集时才复用检查点
+                        unit = ("budget", project, model, ratio, rep + 1)
+                        unit_hash = _unit_hash(task_yaml, repo, functional=sf, robustness=sr)
+                        cached = checkpoint.get(unit, unit_hash) if checkpoint is not None else None
+                        if cached is not None:
+                            s_func = _safe_float(cached.get("sampled_func"))
+                            s_rob = _safe_float(cached.get("sampled_robust"))
+                        else:
+                            tr_func = run_pytest_nodeids(
+                                sf, repo, project, package_name,
+                                timeout_s=float(timeouts.get("functional", default_timeout)),
+                            )
+                            s_func = float(mg.calculate_score("functional", tr_func, cfg.get("baseline_metrics", {}) or {}))
 
-                        tr_rob = run_pytest_nodeids(
-                            sr, repo, project, package_name,
-                            timeout_s=float(timeouts.get("robustness", default_timeout)),
-                        )
-                        s_rob = float(mg.calculate_score("robustness", tr_rob, cfg.get("baseline_metrics", {}) or {}))
+                            tr_rob = run_pytest_nodeids(
+                                sr, repo, project, package_name,
+                                timeout_s=float(timeouts.get("robustness", default_timeout)),
+                            )
+                            s_rob = float(mg.calculate_score("robustness", tr_rob, cfg.get("baseline_metrics", {}) or {}))
+                            if checkpoint is not None:
+                                checkpoint.commit(unit, unit_hash, {"sampled_func": s_func, "sampled_robust": s_rob})
 
                     # NF budgeted: keep other subscores fixed from mean_cache; replace robustness
                     base = mean_cache.get((model, project))
@@ -708,6 +1084,7 @@ def sensitivity_to_test_budget(
                         "func_tests_total": len(nodeids_cache.get((project, model, "functional"), [])),
                         "rob_tests_total": len(nodeids_cache.get((project, model, "robustness"), [])),
                     })
+                    flush_progress(progress_csv, details)
 
                 # ranking stability (NF)
                 rho = spearman_rho(ref_rank_nf, ranks_desc(sampled_nf_scores))
@@ -745,6 +1122,8 @@ def robustness_to_noise(
     noise_mode: str,
     noise_cores: int,
     seed: int,
+    checkpoint: Optional[Checkpoint] = None,
+    progress_csv: Optional[Path] = None,
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
     Idle vs. noisy runs for performance/resource suites; evaluate whether rankings flip.
@@ -752,6 +1131,8 @@ def robustness_to_noise(
     Returns:
       - noise_details: per (project, model, condition, rep)
       - noise_summary: per project: rank correlations idle vs noisy, top1 flips
+
+    Each (condition, rep) is one checkpoint unit; restored reps spawn no noise.
     """
     random.seed(seed)
     details: List[Dict[str, Any]] = []
@@ -791,7 +1172,21 @@ def robustness_to_noise(
                 perfs: List[float] = []
                 ress: List[float] = []
 
+                unit_hash = _unit_hash(task_yaml, repo, noise_mode=noise_mode, noise_cores=noise_cores)
                 for rep in range(repeats):
+                    unit = ("noise", project, model, cond, rep + 1)
+                    cached = checkpoint.get(unit, unit_hash) if checkpoint is not None else None
+                    if cached is not None:
+                        if cached.get("performance") is not None:
+                            perfs.append(_safe_float(cached["performance"]))
+                        if cached.get("resource") is not None:
+                            ress.append(_safe_float(cached["resource"]))
+                        details.extend(cached.get("rows") or [])
+                        continue
+
+                    rep_rows: List[Dict[str, Any]] = []
+                    rep_scores: Dict[str, Optional[float]] = {"performance": None, "resource": None}
+
                     # spawn noise for the whole suite run
                     dur = float(timeouts.get("performance", default_timeout)) if perf_test else 0.0
                     dur = max(dur, float(timeouts.get("resource", default_timeout)) if res_test else 0.0)
@@ -815,7 +1210,8 @@ def robustness_to_noise(
                             )
                             s = float(mg.calculate_score("performance", tr, baseline_metrics))
                             perfs.append(s)
-                            details.append({
+                            rep_scores["performance"] = s
+                            rep_rows.append({
                                 "phase": "noise",
                                 "project": project,
                                 "model": model,
@@ -840,7 +1236,8 @@ def robustness_to_noise(
                             )
                             s = float(mg.calculate_score("resource", tr, baseline_metrics))
                             ress.append(s)
-                            details.append({
+                            rep_scores["resource"] = s
+                            rep_rows.append({
                                 "phase": "noise",
                                 "project": project,
                                 "model": model,
@@ -856,6 +1253,11 @@ def robustness_to_noise(
                         if procs:
                             kill_noise(procs)
 
+                    details.extend(rep_rows)
+                    if checkpoint is not None:
+                        checkpoint.commit(unit, unit_hash, {**rep_scores, "rows": rep_rows})
+                    flush_progress(progress_csv, details)
+
                 # aggregate: use mean score across repeats (you can switch to median if desired)
                 agg = 0.0
                 parts = 0
@@ -901,6 +1303,7 @@ def build_report(
     rerun_summary: List[Dict[str, Any]],
     budget_summary: List[Dict[str, Any]],
     noise_summary: List[Dict[str, Any]],
+    allocation_log: Optional[List[Dict[str, Any]]] = None,
 ) -> str:
     lines: List[str] = []
     lines.append("# Confidence Experiments Report\n")
@@ -919,6 +1322,12 @@ def build_report(
     lines.append(f"- Non-functional score CV: {agg_stats(cvs_nf)}\n")
     lines.append(f"- Performance subscore CV: {agg_stats(cvs_perf)}\n")
     lines.append(f"- Resource subscore CV: {agg_stats(cvs_res)}\n")
+    if allocation_log:
+        runs = [int(r.get("reruns", 0)) for r in rerun_summary if r.get("phase") == "reruns"]
+        last = allocation_log[-1]
+        lines.append(f"- Adaptive allocation: {sum(runs)} runs over {len(runs)} pairs "
+                     f"(min={min(runs) if runs else 0}, max={max(runs) if runs else 0}), "
+                     f"{len(allocation_log)} rounds, final ranking confidence={float(last['rank_confidence']):.4f}\n")
 
     # Budget sensitivity
     lines.append("## 2) Sensitivity to Test Budget (Functional/Robustness Subsampling)\n")
@@ -955,7 +1364,16 @@ def parse_args() -> argparse.Namespace:
     ap.add_argument("--repo-template", default=None,
                     help="Optional repo path template, e.g., '{generated_root}/{model}/{project}' or '{generated_root}/{project}/{model}'")
 
-    ap.add_argument("--reruns", type=int, default=5, help="Number of reruns for stability")
+    ap.add_argument("--reruns", type=int, default=5, help="Number of reruns for stability (per-pair cap with --rerun-allocation adaptive)")
+    ap.add_argument("--rerun-allocation", choices=["fixed", "adaptive"], default="fixed",
+                    help="fixed: --reruns per (model, project); adaptive: spend reruns where the ranking is uncertain")
+    ap.add_argument("--initial-reruns", type=int, default=MIN_INITIAL_RERUNS,
+                    help=f"Adaptive: reruns per pair before allocation starts (at least {MIN_INITIAL_RERUNS})")
+    ap.add_argument("--rank-metric", default="non_functional_score", help="Adaptive: score the ranking is judged on")
+    ap.add_argument("--rank-confidence", type=float, default=0.95,
+                    help="Adaptive: stop when every adjacent pair of the ranking is ordered with this confidence")
+    ap.add_argument("--rerun-budget", type=int, default=0, help="Adaptive: total rerun cap (0 = reruns x pairs)")
+    ap.add_argument("--rerun-batch", type=int, default=0, help="Adaptive: pairs rerun per round (0 = number of models)")
     ap.add_argument("--seed", type=int, default=1234)
 
     ap.add_argument("--budget-ratios", nargs="*", type=float, default=[0.25, 0.5, 0.75, 1.0], help="Subsampling ratios")
@@ -965,11 +1383,16 @@ def parse_args() -> argparse.Namespace:
     ap.add_argument("--noise-mode", choices=["none", "cpu"], default="cpu", help="Noise type (synthetic)")
     ap.add_argument("--noise-cores", type=int, default=2, help="How many CPU burners to spawn")
     ap.add_argument("--tasks-limit", type=int, default=0, help="For debugging: limit number of tasks (0=all)")
+    ap.add_argument("--quiet", action="store_true", help="Do not echo pytest output to the console")
+    ap.add_argument("--resume", action="store_true",
+                    help="Reuse units already committed to <out-dir>/checkpoint.jsonl (same task yaml / repo / knobs)")
     return ap.parse_args()
 
 
 def main() -> None:
     args = parse_args()
+    if args.quiet:
+        os.environ["RACB_QUIET"] = "1"
     tasks_dir = Path(args.tasks_dir).resolve()
     gen_root = Path(args.generated_root).resolve()
     out_dir = Path(args.out_dir).resolve()
@@ -986,7 +1409,12 @@ def main() -> None:
     if not models:
         raise SystemExit(f"No models found. Provide --models or ensure subdirs exist under: {gen_root}")
 
+    checkpoint = Checkpoint(out_dir / "checkpoint.jsonl", resume=bool(args.resume))
+    if args.resume:
+        print(f"[INFO] Resuming: {len(checkpoint)} committed units in {checkpoint.path}")
+
     # 1) Rerun stability (also builds mean_cache)
+    allocation_log: List[Dict[str, Any]] = []
     rerun_details, rerun_summary, mean_cache = stability_across_reruns(
         tasks=tasks,
         models=models,
@@ -995,9 +1423,20 @@ def main() -> None:
         out_dir=out_dir,
         reruns=int(args.reruns),
         seed=int(args.seed),
+        checkpoint=checkpoint,
+        progress_csv=out_dir / "reruns_details.csv",
+        allocation=str(args.rerun_allocation),
+        initial_reruns=int(args.initial_reruns),
+        rank_metric=str(args.rank_metric),
+        rank_confidence_target=float(args.rank_confidence),
+        rerun_budget=int(args.rerun_budget),
+        batch=int(args.rerun_batch),
+        allocation_log=allocation_log,
     )
     write_csv(out_dir / "reruns_details.csv", rerun_details)
     write_csv(out_dir / "reruns_summary.csv", rerun_summary)
+    if allocation_log:
+        write_csv(out_dir / "reruns_allocation.csv", allocation_log)
 
     # 2) Budget sensitivity (uses mean_cache)
     budget_details, budget_summary = sensitivity_to_test_budget(
@@ -1010,6 +1449,8 @@ def main() -> None:
         ratios=list(args.budget_ratios),
         repeats=int(args.budget_repeats),
         seed=int(args.seed),
+        checkpoint=checkpoint,
+        progress_csv=out_dir / "budget_details.csv",
     )
     write_csv(out_dir / "budget_details.csv", budget_details)
     write_csv(out_dir / "budget_summary.csv", budget_summary)
@@ -1025,15 +1466,17 @@ def main() -> None:
         noise_mode=str(args.noise_mode),
         noise_cores=int(args.noise_cores),
         seed=int(args.seed),
+        checkpoint=checkpoint,
+        progress_csv=out_dir / "noise_details.csv",
     )
     write_csv(out_dir / "noise_details.csv", noise_details)
     write_csv(out_dir / "noise_summary.csv", noise_summary)
 
-    report = build_report(out_dir, rerun_summary, budget_summary, noise_summary)
+    report = build_report(out_dir, rerun_summary, budget_summary, noise_summary, allocation_log)
     (out_dir / "report.md").write_text(report, encoding="utf-8")
 
     print(f"[OK] Wrote: {out_dir}")
-    print(f"  - reruns_details.csv / reruns_summary.csv")
+    print(f"  - reruns_details.csv / reruns_summary.csv" + (" / reruns_allocation.csv" if allocation_log else ""))
     print(f"  - budget_details.csv / budget_summary.csv")
     print(f"  - noise_details.csv / noise_summary.csv")
     print(f"  - report.md")
@@ -0,0 +1,275 @@
+"""
+Cached dependency environments for generated repos (the s2 / M3 pipeline).
+
+Instead of ``pip install -r requirements.txt`` into the harness interpreter for
+every task (slow, needs network, and leaks packages into later tasks' import
+time / memory measurements):
+
+  1. the requirement set is normalised and hashed (together with the
+     interpreter tag);
+  2. wheels are fetched once into a local wheelhouse (RACB_WHEELHOUSE), and
+     each unique requirement set gets one venv built from it, cached under
+     RACB_VENV_ROOT/<hash> (``--system-site-packages``, so pytest/psutil and the
+     other harness dependencies stay visible);
+  3. every task gets a private clone of that venv, so a task that installs,
+     deletes or rewrites packages cannot alter the cache: a reflink copy where
+     the filesystem supports it, otherwise a real copy of site-packages with
+     hard links for the rest (interpreter links, scripts, pyvenv.cfg);
+  4. the suites run with the clone's interpreter (run_all_tests(python_executable=...)),
+     and the clone is removed with remove_env() once the task is evaluated.
+
+RACB_OFFLINE=1 installs from the wheelhouse only (no index access).
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+try:  # POSIX only
+    import fcntl
+except Exception:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+try:
+    from . import tracing  # type: ignore
+except Exception:
+    import tracing  # type: ignore
+
+ROOT = Path(__file__).resolve().parents[1]
+
+VENV_ROOT_ENV = "RACB_VENV_ROOT"
+WHEELHOUSE_ENV = "RACB_WHEELHOUSE"
+OFFLINE_ENV = "RACB_OFFLINE"
+
+DEFAULT_VENV_ROOT = ROOT / "results" / ".venvs"
+DEFAULT_WHEELHOUSE = ROOT / "results" / ".wheelhouse"
+
+READY_MARKER = ".racb-ready.json"
+
+
+def venv_root() -> Path:
+    return Path(os.environ.get(VENV_ROOT_ENV, "").strip() or DEFAULT_VENV_ROOT)
+
+
+def wheelhouse() -> Path:
+    return Path(os.environ.get(WHEELHOUSE_ENV, "").strip() or DEFAULT_WHEELHOUSE)
+
+
+def offline() -> bool:
+    return os.environ.get(OFFLINE_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def normalize_requirements(text: str) -> List[str]:
+    """Sorted, de-duplicated requirement lines (comments/blank lines dropped, names lower-cased)."""
+    out = set()
+    for line in (text or "").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        m = re.match(r"^([A-Za-z0-9][A-Za-z0-9._-]*)(.*)$", line)
+        if m:
+            name = re.sub(r"[-_.]+", "-", m.group(1)).lower()
+            line = name + re.sub(r"\s+", "", m.group(2))
+        out.add(line)
+    return sorted(out)
+
+
+def requirements_hash(requirements: List[str]) -> str:
+    tag = f"{sys.implementation.cache_tag}-{sys.platform}-{os.path.realpath(sys.executable)}"
+    data = json.dumps({"python": tag, "requirements": requirements}, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def venv_python(venv: Path) -> Path:
+    if os.name == "nt":
+        return venv / "Scripts" / "python.exe"
+    return venv / "bin" / "python"
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _pip(python: str, args: List[str], log: List[str], timeout_s: float) -> bool:
+    env = os.environ.copy()
+    env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
+    env["PIP_NO_INPUT"] = "1"
+    cmd = [python, "-m", "pip"] + args
+    log.append(f"$ {' '.join(cmd)}\n")
+    try:
+        with tracing.span(f"pip {args[0]}", cat="deps", args=args) as t:
+            p = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, timeout=timeout_s)
+            t["returncode"] = p.returncode
+    except subprocess.TimeoutExpired:
+        log.append("TIMEOUT\n")
+        return False
+    except Exception as e:
+        log.append(f"ERROR: {e}\n")
+        return False
+    log.append(p.stdout or "")
+    log.append(f"[returncode={p.returncode}]\n")
+    return p.returncode == 0
+
+
+def build_cached_venv(requirements: List[str], timeout_s: float = 900) -> Dict[str, Any]:
+    """
+    Return info about the cached venv for ``requirements`` (building it when
+    missing). ``info["venv"]`` is None when the install failed; nothing is
+    cached in that case.
+    """
+    key = requirements_hash(requirements)
+    venv = venv_root() / key
+    marker = venv / READY_MARKER
+    info: Dict[str, Any] = {"key": key, "venv": str(venv), "cached": True, "build_time_s": 0.0}
+    if marker.exists():
+        return info
+
+    with _file_lock(venv_root() / f"{key}.lock"):
+        # 另一个进程可能在我们等锁时已经建好
+        if marker.exists():
+            return info
+        info["cached"] = False
+        start = time.perf_counter()
+        if venv.exists():
+            shutil.rmtree(venv, ignore_errors=True)
+        log: List[str] = []
+        venv.parent.mkdir(parents=True, exist_ok=True)
+        req_file = venv.parent / f"{key}.requirements.txt"
+        req_file.write_text("\n".join(requirements) + "\n", encoding="utf-8")
+
+        ok = True
+        try:
+            with tracing.span("venv create", cat="deps", key=key):
+                subprocess.run([sys.executable, "-m", "venv", "--system-site-packages", str(venv)], check=True,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=300)
+        except Exception as e:
+            log.append(f"venv creation failed: {e}\n")
+            ok = False
+
+        if ok and requirements:
+            wh = wheelhouse()
+            wh.mkdir(parents=True, exist_ok=True)
+            py = str(venv_python(venv))
+            if not offline():
+                # 只补齐 wheelhouse 里缺的文件；失败不致命（可能全部已在 wheelhouse 里）
+                _pip(py, ["download", "-q", "-r", str(req_file), "-d", str(wh)], log, timeout_s)
+            ok = _pip(py, ["install", "-q", "--no-index", "--find-links", str(wh), "-r", str(req_file)], log, timeout_s)
+            if not ok and not offline():
+                ok = _pip(py, ["install", "-q", "--find-links", str(wh), "-r", str(req_file)], log, timeout_s)
+
+        info["build_time_s"] = round(time.perf_counter() - start, 3)
+        (venv_root() / f"{key}.log").write_text("".join(log), encoding="utf-8")
+        if not ok:
+            shutil.rmtree(venv, ignore_errors=True)
+            info["venv"] = None
+            info["log"] = str(venv_root() / f"{key}.log")
+            return info
+        marker.write_text(json.dumps({
+            "requirements": requirements,
+            "python": sys.executable,
+            "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "build_time_s": info["build_time_s"],
+        }, indent=2), encoding="utf-8")
+    return info
+
+
+def _hardlink_tree(src: Path, dst: Path) -> None:
+    """
+    Clone ``src`` to ``dst`` with hard links, except the files under
+    site-packages, which are copied: the code under test may write to them in
+    place, and a hard link would rewrite the cached venv's inode.
+    """
+    for dirpath, dirnames, filenames in os.walk(src, followlinks=False):
+        rel = Path(dirpath).relative_to(src)
+        in_site_packages = "site-packages" in rel.parts
+        target_dir = dst / rel
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for name in list(dirnames):
+            s = Path(dirpath) / name
+            if s.is_symlink():
+                os.symlink(os.readlink(s), target_dir / name)
+                dirnames.remove(name)
+        for name in filenames:
+            s = Path(dirpath) / name
+            d = target_dir / name
+            if s.is_symlink():
+                os.symlink(os.readlink(s), d)
+                continue
+            if in_site_packages:
+                shutil.copy2(s, d)
+                continue
+            try:
+                os.link(s, d)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+                shutil.copy2(s, d)
+
+
+def clone_venv(src: Path, dst: Path) -> str:
+    """Materialise a private copy of ``src`` at ``dst``; returns the method used."""
+    if dst.exists():
+        shutil.rmtree(dst, ignore_errors=True)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if sys.platform.startswith("linux"):
+        try:
+            # reflink：写时复制，任务改动不会影响缓存
+            p = subprocess.run(["cp", "-a", "--reflink=always", str(src), str(dst)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=300)
+            if p.returncode == 0:
+                return "reflink"
+        except Exception:
+            pass
+        shutil.rmtree(dst, ignore_errors=True)
+    _hardlink_tree(src, dst)
+    return "hardlink"
+
+
+def materialize_env(requirements_file: Path, dest: Path, timeout_s: float = 900) -> Dict[str, Any]:
+    """
+    Cached venv for ``requirements_file`` cloned to ``dest``. ``info["python"]``
+    is the interpreter to run the suites with, or None when the environment
+    could not be built (callers fall back to the harness interpreter).
+    """
+    text = requirements_file.read_text(encoding="utf-8", errors="ignore") if requirements_file.exists() else ""
+    requirements = normalize_requirements(text)
+    info = build_cached_venv(requirements, timeout_s=timeout_s)
+    info["requirements"] = requirements
+    if info.get("venv") is None:
+        info["python"] = None
+        return info
+    start = time.perf_counter()
+    with tracing.span("venv clone", cat="deps", key=info["key"]) as t:
+        info["clone_method"] = t["method"] = clone_venv(Path(info["venv"]), dest)
+    info["clone_time_s"] = round(time.perf_counter() - start, 3)
+    info["env"] = str(dest)
+    info["python"] = str(venv_python(dest))
+    return info
+
+
+def remove_env(dest: Path) -> None:
+    """Delete a task clone made by materialize_env (never the cached venvs it was cloned from)."""
+    dest = Path(dest)
+    if dest.resolve().parent != (venv_root() / "tasks").resolve():
+        raise ValueError(f"not a task environment: {dest}")
+    shutil.rmtree(dest, ignore_errors=True)
@@ -52,11 +52,18 @@ def _run_test_suite(test_rel_path: str, repo_under_test: Path) -> Dict[str, Any]
     plugin = _PytestCollector()
 
     prev_cwd = os.getcwd()
+    prev_repo_root = os.environ.get("RACB_REPO_ROOT")
     try:
         os.chdir(ROOT)
+        # Suites resolve the repo under test from RACB_REPO_ROOT (tests/racb_target.py).
+        os.environ["RACB_REPO_ROOT"] = str(repo_under_test)
         pytest.main([str(test_path)], plugins=[plugin])
     finally:
         os.chdir(prev_cwd)
+        if prev_repo_root is None:
+            os.environ.pop("RACB_REPO_ROOT", None)
+        else:
+            os.environ["RACB_REPO_ROOT"] = prev_repo_root
 
     return {
         "path": str(test_path),
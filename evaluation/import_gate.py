@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import ast
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Set, Tuple
 
@@ -19,6 +19,11 @@ class ModuleInfo:
     provides: Set[str]
     internal_imports: Set[str]
     syntax_error: Optional[str] = None
+    # Imports as Python resolves them: relative imports in a package __init__.py
+    # start at the package itself, and "from pkg import sub" also loads pkg.sub.
+    # Used by test_impact only; the gate keeps its own resolution (internal_imports)
+    # so that its pass/fail decisions, and thus functional scores, do not change.
+    impact_imports: Set[str] = field(default_factory=set)
 
 
 @dataclass
@@ -162,19 +167,19 @@ def _collect_provides(tree: ast.Module) -> Set[str]:
     return provides
 
 
-def _resolve_from_import(current_mod: str, node: ast.ImportFrom) -> Optional[str]:
+def _resolve_from_import(current_mod: str, node: ast.ImportFrom, is_package: bool = False) -> Optional[str]:
     # Absolute import.
     if node.level == 0:
         return node.module or None
 
     # Relative import.
     parts = current_mod.split(".")
-    # If current_mod is a package module (i.e. __init__), it already matches package.
-    # Our module naming for __init__.py is the package name, so it's fine.
-    up = node.level
+    # Our module naming for __init__.py is the package name itself, so inside a
+    # package "." already means current_mod (one level less to strip).
+    up = node.level - 1 if is_package else node.level
     if up > len(parts):
         return None
-    base = parts[:-up]
+    base = parts[:len(parts) - up]
     if node.module:
         base += node.module.split(".")
     return ".".join([p for p in base if p]) or None
@@ -211,6 +216,7 @@ def analyze_modules(repo_root: Path) -> Tuple[Dict[str, ModuleInfo], List[GateIs
 
         provides: Set[str] = set()
         internal_imports: Set[str] = set()
+        impact_imports: Set[str] = set()
         if tree is not None:
             provides = _collect_provides(tree)
 
@@ -225,15 +231,30 @@ def analyze_modules(repo_root: Path) -> Tuple[Dict[str, ModuleInfo], List[GateIs
                         if root0 in internal_roots and not _is_probably_stdlib(root0):
                             # use full module if possible
                             internal_imports.add(name)
+                            impact_imports.add(name)
                 elif isinstance(node, ast.ImportFrom):
                     base = _resolve_from_import(mod, node)
-                    if not base:
-                        continue
-                    root0 = base.split(".")[0]
-                    if root0 in internal_roots and not _is_probably_stdlib(root0):
-                        internal_imports.add(base)
-
-        infos[mod] = ModuleInfo(module=mod, file_path=path, provides=provides, internal_imports=internal_imports, syntax_error=syntax_err)
+                    if base:
+                        root0 = base.split(".")[0]
+                        if root0 in internal_roots and not _is_probably_stdlib(root0):
+                            internal_imports.add(base)
+                    base = _resolve_from_import(mod, node, is_package=path.name == "__init__.py")
+                    if base:
+                        root0 = base.split(".")[0]
+                        if root0 in internal_roots and not _is_probably_stdlib(root0):
+                            impact_imports.add(base)
+                            for a in node.names:
+                                if f"{base}.{a.name}" in module_map:
+                                    impact_imports.add(f"{base}.{a.name}")
+
+        infos[mod] = ModuleInfo(
+            module=mod,
+            file_path=path,
+            provides=provides,
+            internal_imports=internal_imports,
+            syntax_error=syntax_err,
+            impact_imports=impact_imports,
+        )
 
         if _module_text_is_empty(text, tree):
             issues.append(GateIssue(kind="empty_module", message=f"{mod} appears empty or docstring-only", file_path=path))
@@ -0,0 +1,561 @@
+"""
+Durable job queue for benchmark sweeps.
+
+Jobs live in a SQLite database in WAL mode (no external service). Workers lease
+one job at a time, keep the lease alive with heartbeats, and commit the result
+exactly once; a job whose worker died (lease expired) or raised is retried with
+backoff up to ``max_attempts``.
+
+Every job has a caller-chosen idempotency ``key`` -- enqueueing the same key
+again is a no-op for pending/leased/done jobs, so re-running a sweep resumes it
+(failed jobs are reset with the new payload and retried). Callers put everything
+the result depends on into the key (run_all_benchmarks adds a hash of the task
+YAML and generated_root), so a changed configuration is a new job.
+
+A job's ``handler`` is a ``"module:function"`` string; the function receives the
+JSON payload and returns a JSON-serialisable result. Only handlers under
+HANDLER_PREFIXES (the harness's own ``evaluation.`` package) are accepted, both
+when a job is enqueued and when a worker runs it.
+
+Sharing:
+  - processes on one host share the database file directly;
+  - other hosts talk to ``serve`` (a small HTTP coordinator in front of the
+    same database) through RemoteQueue -- SQLite WAL must not be shared over
+    network filesystems. ``serve`` refuses to bind a non-loopback address
+    without a shared token (--token or RACB_QUEUE_TOKEN, also read by workers).
+
+CLI:
+  python -m evaluation.job_queue serve  --db results/queue/jobs.db --port 8765
+  RACB_QUEUE_TOKEN=... python -m evaluation.job_queue serve --host 0.0.0.0
+  python -m evaluation.job_queue worker --db results/queue/jobs.db --workers 4
+  python -m evaluation.job_queue worker --url http://coordinator:8765
+  python -m evaluation.job_queue status --db results/queue/jobs.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import hmac
+import importlib
+import ipaddress
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_DB = ROOT / "results" / "queue" / "jobs.db"
+DEFAULT_LEASE_S = 300.0
+DEFAULT_HEARTBEAT_S = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BACKOFF_S = 30.0
+TOKEN_ENV = "RACB_QUEUE_TOKEN"
+# handler 只能来自 harness 自己的包：worker 会 import 并执行它
+HANDLER_PREFIXES = ("evaluation.",)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    key           TEXT NOT NULL UNIQUE,
+    handler       TEXT NOT NULL,
+    payload       TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL DEFAULT 3,
+    not_before    REAL NOT NULL DEFAULT 0,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    result        TEXT,
+    error         TEXT,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, not_before, id);
+"""
+
+# status: pending -> leased -> done | (pending again on retry) | failed
+TERMINAL = {"done", "failed"}
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def check_handler(spec: str) -> str:
+    """Return ``spec`` if it is an allowed ``"module:function"`` handler, else raise ValueError."""
+    module_name, sep, func_name = str(spec).partition(":")
+    if not sep or not module_name or not func_name.isidentifier():
+        raise ValueError(f"handler must be 'module:function', got {spec!r}")
+    if not module_name.startswith(HANDLER_PREFIXES):
+        raise ValueError(f"handler {spec!r} is not under {', '.join(HANDLER_PREFIXES)}")
+    return spec
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    for k in ("payload", "result"):
+        if job.get(k) is not None:
+            try:
+                job[k] = json.loads(job[k])
+            except Exception:
+                pass
+    return job
+
+
+class JobQueue:
+    """SQLite-backed queue. Safe to use from several processes on one host."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _tx(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        # BEGIN IMMEDIATE：拿到写锁后再读，避免两个 worker 租到同一个 job
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return out
+
+    def enqueue(self, key: str, handler: str, payload: Dict[str, Any], max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> bool:
+        """
+        Add a job; returns False if ``key`` already exists. A failed job is reset
+        for another try with the given handler, payload and max_attempts.
+        """
+        check_handler(handler)
+        now = time.time()
+        data = json.dumps(payload, ensure_ascii=False)
+
+        def _do(c: sqlite3.Connection) -> bool:
+            cur = c.execute(
+                "INSERT OR IGNORE INTO jobs(key, handler, payload, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, handler, data, int(max_attempts), now, now),
+            )
+            if cur.rowcount:
+                return True
+            c.execute(
+                "UPDATE jobs SET status='pending', attempts=0, not_before=0, error=NULL, "
+                "handler=?, payload=?, max_attempts=?, updated_at=? "
+                "WHERE key=? AND status='failed'",
+                (handler, data, int(max_attempts), now, key),
+            )
+            return False
+
+        return bool(self._tx(_do))
+
+    def lease(self, owner: str, lease_s: float = DEFAULT_LEASE_S) -> Optional[Dict[str, Any]]:
+        """Take the oldest runnable job (expired leases are reclaimed first), or None."""
+        now = time.time()
+
+        def _do(c: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+            # worker 失联：租约过期的 job 重新排队（或次数用尽后记为 failed）
+            c.execute(
+                "UPDATE jobs SET status=CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END, "
+                "error=COALESCE(error, 'lease expired'), lease_owner=NULL, lease_expires=NULL, updated_at=? "
+                "WHERE status='leased' AND lease_expires < ?",
+                (now, now),
+            )
+            row = c.execute(
+                "SELECT * FROM jobs WHERE status='pending' AND not_before <= ? ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            c.execute(
+                "UPDATE jobs SET status='leased', attempts=attempts+1, lease_owner=?, lease_expires=?, updated_at=? "
+                "WHERE id=?",
+                (owner, now + lease_s, now, row["id"]),
+            )
+            job = _row_to_job(row)
+            job.update({"status": "leased", "attempts": row["attempts"] + 1, "lease_owner": owner})
+            return job
+
+        return self._tx(_do)
+
+    def heartbeat(self, job_id: int, owner: str, lease_s: float = DEFAULT_LEASE_S) -> bool:
+        """Extend a lease; False means the lease was lost (expired and re-leased elsewhere)."""
+        now = time.time()
+
+        def _do(c: sqlite3.Connection) -> bool:
+            cur = c.execute(
+                "UPDATE jobs SET lease_expires=?, updated_at=? WHERE id=? AND status='leased' AND lease_owner=?",
+                (now + lease_s, now, int(job_id), owner),
+            )
+            return cur.rowcount == 1
+
+        return bool(self._tx(_do))
+
+    def complete(self, job_id: int, owner: str, result: Any) -> bool:
+        """
+        Commit a result exactly once. A repeated commit of an already-done job
+        returns True without overwriting; a commit after losing the lease returns False.
+        """
+        now = time.time()
+
+        def _do(c: sqlite3.Connection) -> bool:
+            cur = c.execute(
+                "UPDATE jobs SET status='done', result=?, error=NULL, lease_owner=?, lease_expires=NULL, updated_at=? "
+                "WHERE id=? AND status='leased' AND lease_owner=?",
+                (json.dumps(result, ensure_ascii=False), owner, now, int(job_id), owner),
+            )
+            if cur.rowcount == 1:
+                return True
+            row = c.execute("SELECT status, lease_owner FROM jobs WHERE id=?", (int(job_id),)).fetchone()
+            return row is not None and row["status"] == "done" and row["lease_owner"] == owner
+
+        return bool(self._tx(_do))
+
+    def fail(self, job_id: int, owner: str, error: str, retry: bool = True) -> str:
+        """Record a failed attempt; returns the new status ('pending' for a retry, else 'failed')."""
+        now = time.time()
+
+        def _do(c: sqlite3.Connection) -> str:
+            row = c.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id=? AND status='leased' AND lease_owner=?",
+                (int(job_id), owner),
+            ).fetchone()
+            if row is None:
+                return "lost"
+            again = retry and row["attempts"] < row["max_attempts"]
+            status = "pending" if again else "failed"
+            not_before = now + RETRY_BACKOFF_S * (2 ** max(0, row["attempts"] - 1)) if again else 0
+            c.execute(
+                "UPDATE jobs SET status=?, error=?, not_before=?, lease_owner=NULL, lease_expires=NULL, updated_at=? "
+                "WHERE id=?",
+                (status, str(error)[-4000:], not_before, now, int(job_id)),
+            )
+            return status
+
+        return str(self._tx(_do))
+
+    def jobs(self, keys: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            if keys is None:
+                rows = self._conn.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+            else:
+                keys = list(keys)
+                rows = []
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    rows.extend(self._conn.execute(
+                        f"SELECT * FROM jobs WHERE key IN ({','.join('?' * len(chunk))}) ORDER BY id", chunk
+                    ).fetchall())
+        return [_row_to_job(r) for r in rows]
+
+    def counts(self, keys: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        out = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for job in self.jobs(keys):
+            out[job["status"]] = out.get(job["status"], 0) + 1
+        return out
+
+
+class RemoteQueue:
+    """Same interface as JobQueue, talking to ``job_queue serve`` over HTTP."""
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout_s: float = 30.0) -> None:
+        self.url = url.rstrip("/")
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV, "")
+        self.timeout_s = timeout_s
+
+    def _call(self, method: str, **kwargs: Any) -> Any:
+        req = urllib.request.Request(
+            f"{self.url}/{method}",
+            data=json.dumps(kwargs).encode("utf-8"),
+            headers={"Content-Type": "application/json", "X-RACB-Token": self.token or ""},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout_s) as resp:
+            return json.loads(resp.read().decode("utf-8"))["result"]
+
+    def enqueue(self, key: str, handler: str, payload: Dict[str, Any], max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> bool:
+        return bool(self._call("enqueue", key=key, handler=handler, payload=payload, max_attempts=max_attempts))
+
+    def lease(self, owner: str, lease_s: float = DEFAULT_LEASE_S) -> Optional[Dict[str, Any]]:
+        return self._call("lease", owner=owner, lease_s=lease_s)
+
+    def heartbeat(self, job_id: int, owner: str, lease_s: float = DEFAULT_LEASE_S) -> bool:
+        return bool(self._call("heartbeat", job_id=job_id, owner=owner, lease_s=lease_s))
+
+    def complete(self, job_id: int, owner: str, result: Any) -> bool:
+        return bool(self._call("complete", job_id=job_id, owner=owner, result=result))
+
+    def fail(self, job_id: int, owner: str, error: str, retry: bool = True) -> str:
+        return str(self._call("fail", job_id=job_id, owner=owner, error=error, retry=retry))
+
+    def jobs(self, keys: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        return self._call("jobs", keys=list(keys) if keys is not None else None)
+
+    def counts(self, keys: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        return self._call("counts", keys=list(keys) if keys is not None else None)
+
+    def close(self) -> None:
+        pass
+
+
+def open_queue(db: Optional[Path] = None, url: Optional[str] = None) -> Any:
+    if url:
+        return RemoteQueue(url)
+    return JobQueue(Path(db) if db else DEFAULT_DB)
+
+
+# ----------------------------
+# HTTP coordinator
+# ----------------------------
+
+_RPC_METHODS = {"enqueue", "lease", "heartbeat", "complete", "fail", "jobs", "counts"}
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve(db_path: Path, host: str = "127.0.0.1", port: int = 8765, token: Optional[str] = None) -> None:
+    token = token if token is not None else os.environ.get(TOKEN_ENV, "")
+    # 对外监听时必须有 token：否则能连上端口的人都可以提交 job
+    if not token and not _is_loopback(host):
+        raise ValueError(f"refusing to serve on {host} without a token (--token or {TOKEN_ENV})")
+    queue = JobQueue(db_path)
+
+    class _Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.rstrip("/") in {"", "/status"}:
+                self._reply(200, {"result": queue.counts()})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            if token and not hmac.compare_digest(self.headers.get("X-RACB-Token", ""), token):
+                self._reply(403, {"error": "bad token"})
+                return
+            method = self.path.strip("/")
+            if method not in _RPC_METHODS:
+                self._reply(404, {"error": f"unknown method {method!r}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                kwargs = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+                self._reply(200, {"result": getattr(queue, method)(**kwargs)})
+            except Exception as e:
+                self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def log_message(self, fmt: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    print(f"[INFO] job queue coordinator on http://{host}:{port} (db={db_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        queue.close()
+
+
+# ----------------------------
+# Workers
+# ----------------------------
+
+def resolve_handler(spec: str) -> Callable[[Dict[str, Any]], Any]:
+    module_name, _, func_name = check_handler(spec).partition(":")
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def run_worker(
+    queue: Any,
+    owner: Optional[str] = None,
+    lease_s: float = DEFAULT_LEASE_S,
+    heartbeat_s: float = DEFAULT_HEARTBEAT_S,
+    poll_s: float = 2.0,
+    exit_when_idle: bool = True,
+) -> int:
+    """
+    Lease and run jobs until the queue has nothing pending or leased
+    (or forever with exit_when_idle=False). Returns the number of jobs run.
+    """
+    owner = owner or default_owner()
+    ran = 0
+    while True:
+        job = queue.lease(owner, lease_s)
+        if job is None:
+            if exit_when_idle:
+                c = queue.counts()
+                if c.get("pending", 0) == 0 and c.get("leased", 0) == 0:
+                    return ran
+            time.sleep(poll_s)
+            continue
+
+        ran += 1
+        job_id = int(job["id"])
+        print(f"[INFO] {owner} running job {job_id} {job['key']} (attempt {job['attempts']})")
+
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def _beat() -> None:
+            while not stop.wait(heartbeat_s):
+                try:
+                    if not queue.heartbeat(job_id, owner, lease_s):
+                        lost.set()
+                        print(f"[WARN] {owner} lost the lease on job {job_id} {job['key']}")
+                        return
+                except Exception as e:
+                    print(f"[WARN] heartbeat failed for job {job_id}: {e}")
+
+        beat = threading.Thread(target=_beat, daemon=True)
+        beat.start()
+        try:
+            result = resolve_handler(job["handler"])(job["payload"])
+        except KeyboardInterrupt:
+            stop.set()
+            queue.fail(job_id, owner, "interrupted", retry=True)
+            raise
+        except Exception:
+            stop.set()
+            status = queue.fail(job_id, owner, traceback.format_exc(), retry=True)
+            print(f"[WARN] job {job_id} {job['key']} failed -> {status}")
+            continue
+        finally:
+            stop.set()
+            beat.join(timeout=5.0)
+
+        if not queue.complete(job_id, owner, result):
+            print(f"[WARN] result of job {job_id} {job['key']} discarded (lease lost)")
+
+
+def _worker_main(db: Optional[str], url: Optional[str], lease_s: float, heartbeat_s: float, exit_when_idle: bool) -> None:
+    queue = open_queue(Path(db) if db else None, url)
+    try:
+        run_worker(queue, lease_s=lease_s, heartbeat_s=heartbeat_s, exit_when_idle=exit_when_idle)
+    finally:
+        queue.close()
+
+
+def start_local_workers(
+    n: int,
+    db: Optional[Path] = None,
+    url: Optional[str] = None,
+    lease_s: float = DEFAULT_LEASE_S,
+    heartbeat_s: float = DEFAULT_HEARTBEAT_S,
+    exit_when_idle: bool = True,
+) -> List[multiprocessing.Process]:
+    procs: List[multiprocessing.Process] = []
+    for _ in range(max(0, int(n))):
+        p = multiprocessing.Process(
+            target=_worker_main,
+            args=(str(db) if db else None, url, lease_s, heartbeat_s, exit_when_idle),
+            daemon=False,
+        )
+        p.start()
+        procs.append(p)
+    return procs
+
+
+def wait_for(queue: Any, keys: List[str], poll_s: float = 5.0, workers: Optional[List[multiprocessing.Process]] = None) -> List[Dict[str, Any]]:
+    """Block until every job in ``keys`` is done or failed; returns those jobs."""
+    last = None
+    while True:
+        jobs = queue.jobs(keys)
+        c = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for j in jobs:
+            c[j["status"]] = c.get(j["status"], 0) + 1
+        if c != last:
+            print(f"[INFO] queue: {c}")
+            last = c
+        if c["pending"] == 0 and c["leased"] == 0:
+            return jobs
+        if workers is not None and workers and not any(p.is_alive() for p in workers):
+            # 本地 worker 全部退出但仍有未完成 job（例如在等待重试退避）：补一个 worker
+            workers.extend(start_local_workers(1, getattr(queue, "db_path", None), getattr(queue, "url", None)))
+        time.sleep(poll_s)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="RACB durable job queue")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def _common(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--db", default=str(DEFAULT_DB), help="SQLite queue file (WAL)")
+
+    p_serve = sub.add_parser("serve", help="HTTP coordinator in front of the queue file")
+    _common(p_serve)
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--token", default=None, help=f"Shared token (default: ${TOKEN_ENV}); required off loopback")
+
+    p_worker = sub.add_parser("worker", help="Run jobs")
+    _common(p_worker)
+    p_worker.add_argument("--url", default=None, help="Coordinator URL (instead of --db)")
+    p_worker.add_argument("--workers", type=int, default=1)
+    p_worker.add_argument("--lease-s", type=float, default=DEFAULT_LEASE_S)
+    p_worker.add_argument("--heartbeat-s", type=float, default=DEFAULT_HEARTBEAT_S)
+    p_worker.add_argument("--forever", action="store_true", help="Keep polling when the queue is empty")
+
+    p_status = sub.add_parser("status", help="Print job counts and failures")
+    _common(p_status)
+    p_status.add_argument("--url", default=None)
+
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        try:
+            serve(Path(args.db), args.host, args.port, args.token)
+        except ValueError as e:
+            ap.error(str(e))
+    elif args.cmd == "worker":
+        db = None if args.url else Path(args.db)
+        procs = start_local_workers(args.workers, db, args.url, args.lease_s, args.heartbeat_s, not args.forever)
+        for p in procs:
+            p.join()
+    else:
+        queue = open_queue(None if args.url else Path(args.db), args.url)
+        print(json.dumps(queue.counts(), indent=2))
+        for j in queue.jobs():
+            if j["status"] == "failed":
+                err = (j.get("error") or "").strip().splitlines()
+                print(f"[FAILED] {j['key']}: {err[-1] if err else ''}")
+
+
+if __name__ == "__main__":
+    main()
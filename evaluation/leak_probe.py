@@ -0,0 +1,264 @@
+"""
+Memory-growth (leak) probe for resource scoring.
+
+Average RSS over a pytest run cannot tell a repo that leaks per operation from
+one with a slightly larger constant footprint. The probe instead runs a
+task-declared workload callable for N iterations under tracemalloc and RSS
+tracking and fits the per-iteration growth slope.
+
+Task YAML:
+
+  leak_probe:
+    workload: ./tests/<Project>/leak_workload.py:workload   # or "module:function"
+    iterations: 300        # measured iterations (default 200)
+    warmup: 30             # untracked iterations first (caches, lazy imports)
+    sample_every: 5
+    timeout_s: 120
+
+The workload module may define ``setup()``; its return value is then passed to
+every ``workload(state)`` call. The probe runs in its own interpreter with the
+same target environment as the suites (run_probe_subprocess) and reports:
+
+  leak_bytes_per_iter   slope of tracemalloc-traced bytes (after gc) per iteration
+  rss_bytes_per_iter    slope of process RSS per iteration
+  top_allocations       call sites with the largest growth over the run
+
+measure_reference stores the reference repo's leak_bytes_per_iter under
+baseline_metrics.resource; calculate_score("resource") compares against it.
+
+Suites can run the same probe in-process via the ``racb_leak_probe`` fixture
+(tests/conftest.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import array
+import gc
+import importlib
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import psutil
+
+ROOT = Path(__file__).resolve().parents[1]
+
+LEAK_PROBE_KEY = "leak_probe"
+DEFAULT_ITERATIONS = 200
+DEFAULT_WARMUP = 20
+DEFAULT_SAMPLE_EVERY = 5
+DEFAULT_TIMEOUT_S = 120.0
+TRACE_FRAMES = 10
+TOP_N = 10
+
+# 低于这个斜率（字节/次）视为噪声：interning、小对象池等
+LEAK_NOISE_BYTES_PER_ITER = 64.0
+
+_IGNORED_FILES = (
+    __file__,
+    tracemalloc.__file__,
+    importlib.util.__file__,
+    "*/psutil/*",
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+)
+
+
+def load_workload(spec: str) -> Tuple[Callable[..., Any], Optional[Callable[[], Any]]]:
+    """``path/to/file.py:func`` (relative to the repo root) or ``module:func`` -> (workload, setup)."""
+    target, _, func = spec.rpartition(":")
+    if not target:
+        raise ValueError(f"leak_probe workload must be 'file.py:func' or 'module:func', got {spec!r}")
+    if target.endswith(".py"):
+        path = Path(target)
+        if not path.is_absolute():
+            path = (ROOT / path).resolve()
+        # 与 tests/conftest.py 相同：workload 模块可以 import racb_target
+        tests_dir = str(ROOT / "tests")
+        if tests_dir not in sys.path:
+            sys.path.insert(0, tests_dir)
+        mod_spec = importlib.util.spec_from_file_location(f"racb_leak_workload_{path.stem}", path)
+        if mod_spec is None or mod_spec.loader is None:
+            raise ImportError(f"cannot load leak workload {path}")
+        module = importlib.util.module_from_spec(mod_spec)
+        mod_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(target)
+    setup = getattr(module, "setup", None)
+    return getattr(module, func), (setup if callable(setup) else None)
+
+
+def _slope(xs: Sequence[float], ys: Sequence[float]) -> float:
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mx = sum(xs) / n
+    my = sum(ys) / n
+    den = sum((x - mx) ** 2 for x in xs)
+    if den <= 0.0:
+        return 0.0
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / den
+
+
+def probe(
+    workload: Callable[..., Any],
+    iterations: int = DEFAULT_ITERATIONS,
+    warmup: int = DEFAULT_WARMUP,
+    setup: Optional[Callable[[], Any]] = None,
+    sample_every: int = DEFAULT_SAMPLE_EVERY,
+    top_n: int = TOP_N,
+) -> Dict[str, Any]:
+    """Run ``workload`` in-process and fit per-iteration memory growth."""
+    state = setup() if setup is not None else None
+
+    def call() -> None:
+        if setup is not None:
+            workload(state)
+        else:
+            workload()
+
+    for _ in range(max(0, int(warmup))):
+        call()
+
+    proc = psutil.Process()
+    sample_every = max(1, int(sample_every))
+    # 采样数组在开始追踪前一次性分配，探针自身不产生随迭代增长的内存
+    n_samples = int(iterations) // sample_every + 2
+    xs = array.array("d", [0.0]) * n_samples
+    traced = array.array("d", [0.0]) * n_samples
+    rss = array.array("d", [0.0]) * n_samples
+    n = 0
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(TRACE_FRAMES)
+    start = time.perf_counter()
+    try:
+        gc.collect()
+        snap0 = tracemalloc.take_snapshot()
+        traced[0] = tracemalloc.get_traced_memory()[0]
+        rss[0] = proc.memory_info().rss
+        n = 1
+        for i in range(1, int(iterations) + 1):
+            call()
+            if i % sample_every == 0 or i == iterations:
+                # 先回收：斜率只反映真正被持有的内存
+                gc.collect()
+                xs[n] = i
+                traced[n] = tracemalloc.get_traced_memory()[0]
+                rss[n] = proc.memory_info().rss
+                n += 1
+        snap1 = tracemalloc.take_snapshot()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(False, f) for f in _IGNORED_FILES]
+    top: List[Dict[str, Any]] = []
+    for stat in snap1.filter_traces(filters).compare_to(snap0.filter_traces(filters), "lineno"):
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        top.append({
+            "site": f"{frame.filename}:{frame.lineno}",
+            "size_diff_bytes": int(stat.size_diff),
+            "count_diff": int(stat.count_diff),
+        })
+        if len(top) >= top_n:
+            break
+
+    return {
+        "iterations": int(iterations),
+        "warmup": int(warmup),
+        "elapsed_s": round(time.perf_counter() - start, 6),
+        "leak_bytes_per_iter": round(_slope(xs[:n], traced[:n]), 3),
+        "rss_bytes_per_iter": round(_slope(xs[:n], rss[:n]), 3),
+        "traced_growth_bytes": int(traced[n - 1] - traced[0]),
+        "top_allocations": top,
+    }
+
+
+def leak_score(actual: Optional[float], baseline: Optional[float]) -> Optional[float]:
+    """1.0 up to max(baseline, noise floor) bytes/iter, then floor/actual. None without a baseline."""
+    if baseline is None or actual is None:
+        return None
+    floor = max(float(baseline), LEAK_NOISE_BYTES_PER_ITER)
+    if actual <= floor:
+        return 1.0
+    return float(floor / float(actual))
+
+
+def run_probe_subprocess(
+    cfg: Dict[str, Any],
+    repo_root: Path,
+    extra_env: Dict[str, str],
+    python_executable: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run the probe for a task's ``leak_probe`` config in a fresh interpreter."""
+    timeout_s = float(cfg.get("timeout_s") or DEFAULT_TIMEOUT_S)
+    env = os.environ.copy()
+    env.update(extra_env)
+    existing_pp = env.get("PYTHONPATH", "")
+    env["PYTHONPATH"] = str(repo_root) + (os.pathsep + existing_pp if existing_pp else "")
+
+    fd, out_name = tempfile.mkstemp(prefix="racb_leak_", suffix=".json")
+    os.close(fd)
+    out_path = Path(out_name)
+    cmd = [
+        python_executable or sys.executable, "-m", "evaluation.leak_probe",
+        "--workload", str(cfg["workload"]),
+        "--iterations", str(int(cfg.get("iterations") or DEFAULT_ITERATIONS)),
+        "--warmup", str(int(cfg.get("warmup") if cfg.get("warmup") is not None else DEFAULT_WARMUP)),
+        "--sample-every", str(int(cfg.get("sample_every") or DEFAULT_SAMPLE_EVERY)),
+        "--out", str(out_path),
+    ]
+    try:
+        p = subprocess.run(cmd, cwd=str(ROOT), env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                           text=True, timeout=timeout_s)
+        try:
+            result = json.loads(out_path.read_text(encoding="utf-8") or "{}")
+        except Exception:
+            result = {}
+        if p.returncode != 0 or not result:
+            tail = (p.stdout or "").strip().splitlines()[-20:]
+            result = {"error": f"probe exited with {p.returncode}", "output_tail": "\n".join(tail)}
+    except subprocess.TimeoutExpired:
+        result = {"error": f"timeout after {timeout_s}s"}
+    finally:
+        try:
+            out_path.unlink()
+        except Exception:
+            pass
+    result["workload"] = str(cfg["workload"])
+    return result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Memory-growth probe for a workload callable")
+    ap.add_argument("--workload", required=True, help="file.py:func or module:func")
+    ap.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    ap.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    ap.add_argument("--sample-every", type=int, default=DEFAULT_SAMPLE_EVERY)
+    ap.add_argument("--out", default=None, help="Write the JSON result here (default: stdout)")
+    args = ap.parse_args()
+
+    workload, setup = load_workload(args.workload)
+    result = probe(workload, args.iterations, args.warmup, setup=setup, sample_every=args.sample_every)
+    data = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).write_text(data, encoding="utf-8")
+    else:
+        print(data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Cost and latency of the generation layer.
+
+Every chat completion made by run_benchmark / _s1 / _s2 / _s3 goes through
+chat_completion(), which
+
+  - streams the response (``stream_options={"include_usage": True}``) to
+    measure time-to-first-token; endpoints that reject streaming fall back
+    to a plain request for the rest of the process (RACB_LLM_STREAM=0 turns
+    streaming off up front);
+  - retries transient failures (429 / 5xx / timeouts / connection errors)
+    with exponential backoff, RACB_LLM_RETRIES times (default 2, the
+    OpenAI client's own default, whose internal retries are disabled so
+    they can be counted here);
+  - records one LLMCall: stage, prompt/completion tokens (``usage`` from the
+    API, estimated with prompt_budget when the endpoint sends none), TTFT,
+    total latency, completion tokens per second of decoding, retries.
+
+``with stage("plan"):`` labels the calls made inside it and times the stage
+itself, so pipelines also get wall time for the non-LLM steps (agent tests,
+pip install, evaluation). After set_output(repo) every call and stage is
+flushed to ``<repo>/_llm_usage.json``; the run_all_benchmarks* sweeps read it
+back with usage_columns() and add the cost columns to their CSV, including
+functional score per 1k tokens and per second of generation.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+try:
+    from .prompt_budget import estimate_tokens  # type: ignore
+except Exception:
+    from prompt_budget import estimate_tokens  # type: ignore
+
+ROOT = Path(__file__).resolve().parents[1]
+
+USAGE_FILE = "_llm_usage.json"
+RETRIES_ENV = "RACB_LLM_RETRIES"
+STREAM_ENV = "RACB_LLM_STREAM"
+DEFAULT_RETRIES = 2
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 30.0
+
+TRANSIENT_ERRORS = {"RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError", "Timeout"}
+EVALUATE_STAGE = "evaluate"
+
+USAGE_FIELDS = [
+    "llm_calls",
+    "llm_retries",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "llm_latency_s",
+    "ttft_s",
+    "tokens_per_s",
+    "generation_s",
+    "evaluation_s",
+    "functional_per_1k_tokens",
+    "functional_per_generation_s",
+]
+
+
+@dataclass
+class LLMCall:
+    stage: str
+    model: str
+    ok: bool
+    streamed: bool
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    usage_source: str  # api | estimated
+    ttft_s: Optional[float]
+    latency_s: float
+    tokens_per_s: float
+    retries: int
+    started_at: float
+    error: str = ""
+
+
+_lock = threading.Lock()
+_calls: List[LLMCall] = []
+_stages: List[Dict[str, Any]] = []
+_stage_name = "generate"
+_output: Optional[Path] = None
+_stream_supported = True
+
+
+def current_stage() -> str:
+    return _stage_name
+
+
+def set_output(repo_dir: Optional[Path]) -> None:
+    """Persist this process's calls and stages to ``<repo_dir>/_llm_usage.json`` (starts a fresh record)."""
+    global _output
+    with _lock:
+        _calls.clear()
+        _stages.clear()
+        _output = Path(repo_dir) if repo_dir is not None else None
+        _flush()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    global _stage_name
+    prev = _stage_name
+    _stage_name = name
+    start = time.time()
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        _stage_name = prev
+        with _lock:
+            _stages.append({"stage": name, "started_at": round(start, 3),
+                            "seconds": round(time.perf_counter() - t0, 3), "ok": ok})
+            _flush()
+
+
+def _flush() -> None:
+    # 调用方持有 _lock
+    if _output is None:
+        return
+    data = {"calls": [asdict(c) for c in _calls], "stages": list(_stages), "summary": summarize([asdict(c) for c in _calls], _stages)}
+    try:
+        _output.mkdir(parents=True, exist_ok=True)
+        path = _output / USAGE_FILE
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def _record(call: LLMCall) -> None:
+    with _lock:
+        _calls.append(call)
+        _flush()
+
+
+def _is_transient(e: BaseException) -> bool:
+    if type(e).__name__ in TRANSIENT_ERRORS:
+        return True
+    status = getattr(e, "status_code", None)
+    return isinstance(status, int) and (status in (408, 409, 429) or status >= 500)
+
+
+def _max_retries() -> int:
+    try:
+        return max(0, int(os.environ.get(RETRIES_ENV, DEFAULT_RETRIES)))
+    except ValueError:
+        return DEFAULT_RETRIES
+
+
+def _streaming_enabled() -> bool:
+    return _stream_supported and os.environ.get(STREAM_ENV, "1").strip().lower() not in ("0", "false", "no")
+
+
+def _usage_of(obj: Any) -> Tuple[Optional[int], Optional[int]]:
+    usage = getattr(obj, "usage", None)
+    if usage is None:
+        return None, None
+    return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+
+
+def _request(client: Any, stream: bool, **kwargs: Any) -> Tuple[str, Optional[float], Optional[int], Optional[int]]:
+    """One attempt: (text, ttft seconds, prompt tokens, completion tokens); token counts None when not reported."""
+    t0 = time.perf_counter()
+    if not stream:
+        resp = client.chat.completions.create(**kwargs)
+        p, c = _usage_of(resp)
+        return (resp.choices[0].message.content or ""), None, p, c
+    parts: List[str] = []
+    ttft: Optional[float] = None
+    p = c = None
+    for chunk in client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs):
+        if getattr(chunk, "usage", None) is not None:
+            p, c = _usage_of(chunk)
+        for choice in getattr(chunk, "choices", None) or []:
+            delta = getattr(choice, "delta", None)
+            text = getattr(delta, "content", None) if delta is not None else None
+            if text:
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+                parts.append(text)
+    return "".join(parts), ttft, p, c
+
+
+def chat_completion(client: Any, model: str, messages: List[Dict[str, str]], **kwargs: Any) -> Tuple[str, LLMCall]:
+    """Run one chat completion with retries and record it; raises the last error when all attempts fail."""
+    global _stream_supported
+    retries = 0
+    started = time.time()
+    t0 = time.perf_counter()
+    attempts = _max_retries() + 1
+    last_error: Optional[BaseException] = None
+    stream = _streaming_enabled()
+    for attempt in range(attempts):
+        try:
+            text, ttft, p, c = _request(client, stream, model=model, messages=messages, **kwargs)
+        except Exception as e:
+            if stream and not _is_transient(e):
+                # 不支持流式（或 stream_options）的端点：本进程内改用普通请求，不计入重试
+                _stream_supported = stream = False
+                try:
+                    text, ttft, p, c = _request(client, False, model=model, messages=messages, **kwargs)
+                except Exception as e2:
+                    e = e2
+                else:
+                    last_error = None
+                    break
+            last_error = e
+            if not _is_transient(e) or attempt == attempts - 1:
+                break
+            retries += 1
+            time.sleep(min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt) * (0.5 + random.random()))
+            continue
+        last_error = None
+        break
+
+    latency = time.perf_counter() - t0
+    if last_error is not None:
+        call = LLMCall(stage=_stage_name, model=model, ok=False, streamed=stream, prompt_tokens=0,
+                       completion_tokens=0, total_tokens=0, usage_source="none", ttft_s=None,
+                       latency_s=round(latency, 3), tokens_per_s=0.0, retries=retries,
+                       started_at=round(started, 3), error=f"{type(last_error).__name__}: {last_error}"[:500])
+        _record(call)
+        raise last_error
+
+    source = "api"
+    if p is None or c is None:
+        source = "estimated"
+        p = p if p is not None else estimate_tokens("\n".join(m.get("content", "") for m in messages))
+        c = c if c is not None else estimate_tokens(text)
+    # 解码速度：流式时去掉首 token 前的排队/预填充时间
+    decode_s = latency - ttft if ttft is not None and latency > ttft else latency
+    call = LLMCall(stage=_stage_name, model=model, ok=True, streamed=stream, prompt_tokens=int(p),
+                   completion_tokens=int(c), total_tokens=int(p) + int(c), usage_source=source,
+                   ttft_s=round(ttft, 3) if ttft is not None else None, latency_s=round(latency, 3),
+                   tokens_per_s=round(c / decode_s, 2) if decode_s > 0 else 0.0, retries=retries,
+                   started_at=round(started, 3))
+    _record(call)
+    return text, call
+
+
+# ----------------------------
+# Aggregation
+# ----------------------------
+
+def summarize(calls: List[Dict[str, Any]], stages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [c for c in calls if c.get("ok")]
+    completion = sum(int(c.get("completion_tokens") or 0) for c in ok)
+    decode = sum(float(c["latency_s"]) - float(c.get("ttft_s") or 0.0) for c in ok)
+    ttfts = [float(c["ttft_s"]) for c in ok if c.get("ttft_s") is not None]
+    by_stage: Dict[str, Dict[str, Any]] = {}
+    for c in calls:
+        s = by_stage.setdefault(c.get("stage") or "", {"calls": 0, "total_tokens": 0, "llm_latency_s": 0.0})
+        s["calls"] += 1
+        s["total_tokens"] += int(c.get("total_tokens") or 0)
+        s["llm_latency_s"] = round(s["llm_latency_s"] + float(c.get("latency_s") or 0.0), 3)
+    stage_s: Dict[str, float] = {}
+    for st in stages:
+        stage_s[st["stage"]] = round(stage_s.get(st["stage"], 0.0) + float(st["seconds"]), 3)
+    return {
+        "llm_calls": len(calls),
+        "llm_failed": len(calls) - len(ok),
+        "llm_retries": sum(int(c.get("retries") or 0) for c in calls),
+        "prompt_tokens": sum(int(c.get("prompt_tokens") or 0) for c in ok),
+        "completion_tokens": completion,
+        "total_tokens": sum(int(c.get("total_tokens") or 0) for c in ok),
+        "llm_latency_s": round(sum(float(c.get("latency_s") or 0.0) for c in calls), 3),
+        "ttft_s": round(sum(ttfts) / len(ttfts), 3) if ttfts else None,
+        "tokens_per_s": round(completion / decode, 2) if decode > 0 else None,
+        "estimated_usage": any(c.get("usage_source") == "estimated" for c in ok),
+        "generation_s": round(sum(v for k, v in stage_s.items() if k != EVALUATE_STAGE), 3),
+        "evaluation_s": stage_s.get(EVALUATE_STAGE),
+        "by_stage": by_stage,
+        "stage_seconds": stage_s,
+    }
+
+
+def load_usage(repo_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((Path(repo_dir) / USAGE_FILE).read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
+def generated_repo_for(task_yaml: Path, generated_root: Optional[str] = None) -> Path:
+    """Where run_benchmark* puts the repo of ``task_yaml`` (same rule as their --generated-root)."""
+    project = task_yaml.parent.name
+    if generated_root:
+        return (ROOT / generated_root / project).resolve()
+    try:
+        with open(task_yaml, "r", encoding="utf-8") as f:
+            task = yaml.safe_load(f) or {}
+    except Exception:
+        task = {}
+    return (ROOT / Path(task.get("generated_repository", f"./generation/{project}"))).resolve()
+
+
+def usage_columns(repo_dir: Path, functional_score: float) -> Dict[str, Any]:
+    """USAGE_FIELDS for a sweep CSV row; empty strings when the repo has no usage record."""
+    data = load_usage(repo_dir)
+    if not data:
+        return {k: "" for k in USAGE_FIELDS}
+    s = data.get("summary") or summarize(data.get("calls") or [], data.get("stages") or [])
+    tokens = s.get("total_tokens") or 0
+    gen_s = s.get("generation_s") or 0.0
+    out = {k: ("" if s.get(k) is None else s.get(k)) for k in USAGE_FIELDS}
+    out["functional_per_1k_tokens"] = round(functional_score * 1000.0 / tokens, 4) if tokens else ""
+    out["functional_per_generation_s"] = round(functional_score / gen_s, 5) if gen_s else ""
+    return out
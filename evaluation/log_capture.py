@@ -0,0 +1,203 @@
+"""
+Bounded capture of a suite subprocess's combined stdout/stderr.
+
+- In memory only the first ``head_bytes`` and the last ``tail_bytes`` are kept;
+  text() joins them with a truncation marker (this is what ends up in the
+  results YAML).
+- On disk the log is compressed (zstd when the optional ``zstandard`` package is
+  installed, gzip otherwise) through a buffered writer, capped at ``max_bytes``
+  of uncompressed text plus the retained tail.
+- Console echo can be switched off with RACB_QUIET=1 (``--quiet`` in the runners).
+- pump() reads a pipe by chunks of ``READ_CHUNK`` bytes, and a piece of output
+  larger than the tail keeps only its end: a line without newline (progress
+  bar, dumped blob) is never held whole.
+"""
+
+from __future__ import annotations
+
+import codecs
+import collections
+import gzip
+import io
+import os
+import sys
+from pathlib import Path
+from typing import IO, Any, Deque, List, Optional, Tuple
+
+try:  # optional dependency
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+QUIET_ENV = "RACB_QUIET"
+LOG_MAX_BYTES_ENV = "RACB_LOG_MAX_BYTES"
+LOG_KEEP_BYTES_ENV = "RACB_LOG_KEEP_BYTES"
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_KEEP_BYTES = 256 * 1024
+
+_WRITE_BUFFER = 1 << 16
+READ_CHUNK = 1 << 16
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, "").strip() or default)
+    except Exception:
+        return default
+
+
+def quiet_from_env() -> bool:
+    return os.environ.get(QUIET_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def compressed_log_path(log_file: Path) -> Path:
+    suffix = ".zst" if zstandard is not None else ".gz"
+    return log_file.with_name(log_file.name + suffix)
+
+
+def read_log_text(path: Optional[Path]) -> str:
+    """Read a plain, .gz or .zst log back as text ('' if missing/unreadable)."""
+    if path is None:
+        return ""
+    try:
+        if not path.exists():
+            return ""
+        if path.suffix == ".gz":
+            with gzip.open(path, "rt", encoding="utf-8", errors="ignore") as f:
+                return f.read()
+        if path.suffix == ".zst":
+            if zstandard is None:
+                return ""
+            with open(path, "rb") as raw:
+                reader = zstandard.ZstdDecompressor().stream_reader(raw)
+                return io.TextIOWrapper(reader, encoding="utf-8", errors="ignore").read()
+        return path.read_text(encoding="utf-8", errors="ignore")
+    except Exception:
+        return ""
+
+
+def _open_compressed(path: Path) -> Any:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".zst" and zstandard is not None:
+        raw = open(path, "wb")
+        stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.BufferedWriter(stream, buffer_size=_WRITE_BUFFER)
+    return io.BufferedWriter(gzip.open(path, "wb", compresslevel=6), buffer_size=_WRITE_BUFFER)
+
+
+class LogCapture:
+    """Output sink with a byte cap: head+tail in memory, compressed file on disk."""
+
+    def __init__(
+        self,
+        log_file: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+        keep_bytes: Optional[int] = None,
+        echo: Optional[bool] = None,
+    ) -> None:
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int(LOG_MAX_BYTES_ENV, DEFAULT_MAX_BYTES)
+        keep = keep_bytes if keep_bytes is not None else _env_int(LOG_KEEP_BYTES_ENV, DEFAULT_KEEP_BYTES)
+        # 头部 1/4、尾部 3/4：失败摘要和 METRICS 行都在输出末尾
+        self.head_bytes = keep // 4
+        self.tail_bytes = keep - self.head_bytes
+        self.echo = (not quiet_from_env()) if echo is None else bool(echo)
+
+        self.total_bytes = 0
+        self._head: List[str] = []
+        self._head_size = 0
+        self._tail: Deque[Tuple[str, int]] = collections.deque()
+        self._tail_size = 0
+        self._dropped = 0
+
+        self.path: Optional[Path] = compressed_log_path(log_file) if log_file is not None else None
+        self._fh: Any = _open_compressed(self.path) if self.path is not None else None
+        self._disk_bytes = 0
+        self._disk_tail: Deque[bytes] = collections.deque()
+        self._disk_tail_size = 0
+        self._disk_dropped = 0
+
+    def write(self, line: str) -> None:
+        if not line:
+            return
+        data = line.encode("utf-8", errors="replace")
+        n = len(data)
+        self.total_bytes += n
+
+        if self.echo:
+            try:
+                sys.stdout.write(line)
+            except Exception:
+                pass
+
+        if self._head_size + n <= self.head_bytes and not self._tail:
+            self._head.append(line)
+            self._head_size += n
+        else:
+            if n > self.tail_bytes:
+                # 超过整个尾部的单段输出只留末尾
+                kept = data[n - self.tail_bytes:].decode("utf-8", errors="ignore")
+                k = len(kept.encode("utf-8"))
+                self._dropped += n - k
+                self._tail.append((kept, k))
+                self._tail_size += k
+            else:
+                self._tail.append((line, n))
+                self._tail_size += n
+            while self._tail_size > self.tail_bytes and len(self._tail) > 1:
+                _, k = self._tail.popleft()
+                self._tail_size -= k
+                self._dropped += k
+
+        if self._fh is not None:
+            if self._disk_bytes + n <= self.max_bytes and not self._disk_tail:
+                self._fh.write(data)
+                self._disk_bytes += n
+            else:
+                if n > self.tail_bytes:
+                    self._disk_dropped += n - self.tail_bytes
+                    data = data[n - self.tail_bytes:]
+                    n = len(data)
+                self._disk_tail.append(data)
+                self._disk_tail_size += n
+                while self._disk_tail_size > self.tail_bytes and len(self._disk_tail) > 1:
+                    old_b = self._disk_tail.popleft()
+                    self._disk_tail_size -= len(old_b)
+                    self._disk_dropped += len(old_b)
+
+    def pump(self, stream: IO[bytes]) -> None:
+        """Copy a binary pipe until EOF, by chunks of at most READ_CHUNK bytes,
+        decoded as UTF-8 with universal newlines (as a text-mode pipe would)."""
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+        read = getattr(stream, "read1", stream.read)
+        while True:
+            data = read(READ_CHUNK)
+            if not data:
+                break
+            self.write(decoder.decode(data))
+        self.write(decoder.decode(b"", final=True))
+
+    @property
+    def dropped_bytes(self) -> int:
+        """Bytes cut from the middle of the in-memory text."""
+        return self._dropped
+
+    def text(self) -> str:
+        parts = list(self._head)
+        if self._dropped:
+            parts.append(f"\n... [{self._dropped} bytes of output truncated by harness] ...\n")
+        parts.extend(text for text, _ in self._tail)
+        return "".join(parts)
+
+    def close(self) -> None:
+        if self._fh is None:
+            return
+        try:
+            if self._disk_dropped:
+                self._fh.write(f"\n... [{self._disk_dropped} bytes of output truncated by harness] ...\n".encode("utf-8"))
+            for data in self._disk_tail:
+                self._fh.write(data)
+            self._fh.close()
+        except Exception:
+            pass
+        self._fh = None
@@ -1,15 +1,39 @@
 import os
 import re
+import errno
 import sys
+import math
+import signal
 import time
+import json
+import hashlib
+import shutil
+import tempfile
+import threading
 import yaml
 import subprocess
 from pathlib import Path
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 
 import psutil
 import statistics
 
+# Robust import: supports BOTH
+#   1) python -m evaluation.<script>
+#   2) python evaluation/<script>.py
+try:
+    from .suite_process import RLIMIT_KEYS, create_suite_cgroup, find_leaked, isolate_suite, popen_isolation_kwargs, terminate_suite  # type: ignore
+    from .log_capture import LogCapture, read_log_text  # type: ignore
+    from . import telemetry  # type: ignore
+    from . import tracing  # type: ignore
+    from .leak_probe import LEAK_PROBE_KEY, leak_score, run_probe_subprocess  # type: ignore
+except Exception:
+    from suite_process import RLIMIT_KEYS, create_suite_cgroup, find_leaked, isolate_suite, popen_isolation_kwargs, terminate_suite  # type: ignore
+    from log_capture import LogCapture, read_log_text  # type: ignore
+    import telemetry  # type: ignore
+    import tracing  # type: ignore
+    from leak_probe import LEAK_PROBE_KEY, leak_score, run_probe_subprocess  # type: ignore
+
 ROOT = Path(__file__).resolve().parents[1]
 
 TEST_TYPES: List[str] = [
@@ -33,6 +57,46 @@ _NON_TYPES: List[str] = ["maintainability", "security", "robustness", "performan
 
 REPO_ROOT_ENV = "RACB_REPO_ROOT"
 PKG_NAME_ENV = "RACB_PACKAGE_NAME"
+# 每次评测独立的可写目录（tests/racb_target.py: scratch_dir），并发评测同一项目时互不干扰
+SCRATCH_DIR_ENV = "RACB_SCRATCH_DIR"
+
+# 字节码缓存：每次评测只编译一次，所有 suite 共享同一个 PYTHONPYCACHEPREFIX
+PYCACHE_ROOT_ENV = "RACB_PYCACHE_ROOT"
+DEFAULT_PYCACHE_ROOT = ROOT / "results" / ".pycache"
+
+# 单个测试的时间预算（由 evaluation/pytest_harness_plugin.py 在子进程里执行）
+HARNESS_PLUGIN = "evaluation.pytest_harness_plugin"
+TEST_TIMEOUT_ENV = "RACB_TEST_TIMEOUT_S"
+MAX_HUNG_ENV = "RACB_MAX_HUNG_TESTS"
+TEST_REPORT_ENV = "RACB_TEST_REPORT"
+DEFAULT_TEST_TIMEOUT_S = 30.0
+DEFAULT_MAX_HUNG_TESTS = 3
+
+# 每个 suite 的资源限制（子进程启动后由 harness 用 prlimit 设置，参考仓库与生成仓库相同）；task YAML 的 resource_limits 可覆盖
+DEFAULT_RESOURCE_LIMITS: Dict[str, Any] = {
+    "address_space_mb": 8192,
+    "open_files": 1024,
+    "file_size_mb": 1024,
+}
+# 未配置 cpu_s 时按 suite 超时推算（多线程测试的 CPU 时间可以超过墙钟时间）
+CPU_LIMIT_PER_TIMEOUT = 2.0
+
+# MemoryError 只有在采样到的单进程 VMS 峰值接近 address_space_mb 时才算超限
+OOM_VMS_FRACTION = 0.8
+
+# functional / robustness 可按 nodeid 分片、多进程并发执行；计时类 suite（performance/resource）永远不分片
+SHARDABLE_TYPES = {"functional", "robustness"}
+SHARDS_ENV = "RACB_SUITE_SHARDS"
+# 历史单测耗时（分片负载均衡用），每个项目/suite 一个 JSON
+DURATIONS_DIR_ENV = "RACB_DURATIONS_DIR"
+DEFAULT_DURATIONS_DIR = ROOT / "results" / ".durations"
+DURATION_EWMA_ALPHA = 0.5
+COLLECT_TIMEOUT_S = 120.0
+# 每个分片都要付一次解释器启动 + 导入 + 收集的代价；历史耗时不够分时不分片
+MIN_SHARD_WORK_S = 5.0
+
+_PRECOMPILE_SKIP_DIRS = {"__pycache__", ".git", ".pytest_cache", ".venv", "venv", "site-packages", "node_modules"}
+_PRECOMPILE_SKIP_RE = r"[\\/](__pycache__|\.git|\.pytest_cache|\.venv|venv|site-packages|node_modules)[\\/]"
 
 
 def load_task_config(task_file: Path) -> Dict[str, Any]:
@@ -50,6 +114,75 @@ def _resolve_test_path(project_name: str, test_path: str) -> Path:
     return (ROOT / "tests" / project_name / Path(test_path).name).resolve()
 
 
+def _interpreter_tag() -> str:
+    exe = os.path.realpath(sys.executable)
+    return f"{sys.implementation.cache_tag}-{hashlib.sha1(exe.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _hash_python_sources(roots: List[Path]) -> str:
+    # PYTHONPYCACHEPREFIX 按绝对路径镜像源码树，所以 key 里同时包含路径和内容
+    h = hashlib.sha1()
+    for base in roots:
+        if not base.exists():
+            continue
+        for f in sorted(base.rglob("*.py")):
+            if any(seg in _PRECOMPILE_SKIP_DIRS for seg in f.parts):
+                continue
+            h.update(str(f.resolve()).encode("utf-8", errors="ignore"))
+            h.update(b"\0")
+            try:
+                h.update(f.read_bytes())
+            except Exception:
+                pass
+    return h.hexdigest()[:16]
+
+
+def prepare_bytecode_cache(repo_root: Path, test_dirs: List[Path]) -> Dict[str, Any]:
+    """
+    Compile the repository under test and its test modules once into a shared
+    PYTHONPYCACHEPREFIX keyed by source hash and interpreter.
+
+    Every suite of the run points at the same prefix, so the cold-start compile
+    cost is paid (and reported) once, and no suite writes __pycache__ into the
+    repository under test.
+    """
+    roots: List[Path] = []
+    for p in [repo_root] + list(test_dirs):
+        p = p.resolve()
+        if p.exists() and p not in roots:
+            roots.append(p)
+
+    base = Path(os.environ.get(PYCACHE_ROOT_ENV, "").strip() or DEFAULT_PYCACHE_ROOT)
+    prefix = (base / _interpreter_tag() / _hash_python_sources(roots)).resolve()
+    marker = prefix / ".complete"
+
+    info: Dict[str, Any] = {
+        "pycache_prefix": str(prefix),
+        "precompile_time_s": 0.0,
+        "precompile_cached": marker.exists(),
+    }
+    if marker.exists():
+        return info
+
+    prefix.mkdir(parents=True, exist_ok=True)
+    env = os.environ.copy()
+    env["PYTHONPYCACHEPREFIX"] = str(prefix)
+    cmd = [sys.executable, "-m", "compileall", "-q", "-j", "0", "-x", _PRECOMPILE_SKIP_RE] + [str(p) for p in roots]
+
+    start = time.perf_counter()
+    try:
+        # 生成代码可能有语法错误，compileall 返回非 0 也照常继续
+        with tracing.span("precompile", cat="setup", roots=[str(r) for r in roots]):
+            subprocess.run(cmd, cwd=str(ROOT), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=600)
+    except Exception as e:
+        info["precompile_error"] = str(e)
+    info["precompile_time_s"] = round(time.perf_counter() - start, 6)
+
+    if "precompile_error" not in info:
+        marker.write_text(f"{time.strftime('%Y-%m-%d %H:%M:%S')}\n", encoding="utf-8")
+    return info
+
+
 def _parse_pytest_counts(output: str) -> Dict[str, int]:
     passed = failed = skipped = 0
     total = 0
@@ -77,31 +210,171 @@ def _parse_pytest_counts(output: str) -> Dict[str, int]:
     return {"passed": passed, "failed": failed, "skipped": skipped, "total": total}
 
 
-def _kill_process_tree(proc: psutil.Popen) -> None:
+def _summarize_test_report(report_file: Optional[Path]) -> Dict[str, Any]:
+    """
+    Aggregate the per-test JSON-lines report written by pytest_harness_plugin.
+
+    A test that has begun but never reported its teardown was still running
+    when the suite ended (killed or hung) and is counted as failed.
+    """
+    summary: Dict[str, Any] = {"available": False, "collected": 0, "stopped": "", "finished": False}
+    if report_file is None or not report_file.exists():
+        return summary
+
+    outcomes: Dict[str, str] = {}
+    begun: List[str] = []
+    done: set = set()
+    timed_out: List[str] = []
+    durations: Dict[str, float] = {}
+    crashes: List[str] = []
+    exceptions: List[Dict[str, Any]] = []
     try:
-        children = proc.children(recursive=True)
+        lines = report_file.read_text(encoding="utf-8", errors="ignore").splitlines()
     except Exception:
-        children = []
-    for c in children:
+        return summary
+
+    for line in lines:
         try:
-            c.kill()
+            rec = json.loads(line)
         except Exception:
-            pass
-    try:
-        proc.kill()
-    except Exception:
-        pass
+            continue
+        ev = rec.get("event")
+        nodeid = rec.get("nodeid") or ""
+        if ev == "collected":
+            summary["collected"] = int(rec.get("count") or 0)
+        elif ev == "begin":
+            begun.append(nodeid)
+        elif ev == "report":
+            when = rec.get("when")
+            outcome = rec.get("outcome")
+            durations[nodeid] = durations.get(nodeid, 0.0) + float(rec.get("duration") or 0.0)
+            if rec.get("timeout") and nodeid not in timed_out:
+                timed_out.append(nodeid)
+            if rec.get("crash") and len(crashes) < 50:
+                crashes.append(str(rec["crash"]))
+            if rec.get("exc_type") and len(exceptions) < 50:
+                exceptions.append({"type": str(rec["exc_type"]), "errno": rec.get("errno")})
+            if outcome == "failed":
+                outcomes[nodeid] = "failed"
+            elif outcome == "skipped" and outcomes.get(nodeid) != "failed":
+                outcomes[nodeid] = "skipped"
+            elif when == "call" and outcome == "passed" and nodeid not in outcomes:
+                outcomes[nodeid] = "passed"
+            if when == "teardown":
+                done.add(nodeid)
+        elif ev == "hung":
+            if nodeid not in timed_out:
+                timed_out.append(nodeid)
+        elif ev == "finish":
+            summary["finished"] = True
+            summary["stopped"] = rec.get("stopped") or ""
+
+    for nodeid in begun:
+        if nodeid not in done:
+            outcomes[nodeid] = "failed"
+
+    passed = sum(1 for v in outcomes.values() if v == "passed")
+    failed = sum(1 for v in outcomes.values() if v == "failed")
+    skipped = sum(1 for v in outcomes.values() if v == "skipped")
+    ran = passed + failed + skipped
+    total = max(int(summary["collected"]), ran)
+
+    summary.update({
+        "available": True,
+        "passed": passed,
+        "failed": failed,
+        "skipped": skipped,
+        "total": total,
+        "not_run": total - ran,
+        "timed_out_tests": timed_out,
+        "durations": durations,
+        "crashes": crashes,
+        "exceptions": exceptions,
+    })
+    return summary
+
+
+def _salvaged_counts(report: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {k: report[k] for k in ("passed", "failed", "skipped", "total", "not_run")}
+    if report.get("timed_out_tests"):
+        out["hung_tests"] = list(report["timed_out_tests"])
+    return out
+
+
+def suite_test_budgets(config: Dict[str, Any], test_type: str, timeout_s: float) -> Tuple[float, int]:
+    """
+    Per-test budget and hung-test cap of one suite: ``test_timeouts_s`` (same
+    shape as suite_timeouts_s, default min(DEFAULT_TEST_TIMEOUT_S, suite
+    timeout)) and ``max_hung_tests`` from the task YAML. measure_reference uses
+    the same values so the plugin overhead lands on both sides of the ratio.
+    """
+    test_timeouts = config.get("test_timeouts_s", {}) or {}
+    test_timeout_s = _as_float(test_timeouts.get(test_type, test_timeouts.get("default")))
+    if test_timeout_s is None:
+        test_timeout_s = min(DEFAULT_TEST_TIMEOUT_S, float(timeout_s))
+    return test_timeout_s, _as_int_preserve_zero(config.get("max_hung_tests"), DEFAULT_MAX_HUNG_TESTS)
+
+
+def harness_plugin_env(env: Dict[str, str], test_timeout_s: float, max_hung_tests: int, report_file: Path) -> None:
+    """Configure pytest_harness_plugin (loaded with ``-p HARNESS_PLUGIN``) through ``env``."""
+    env[TEST_TIMEOUT_ENV] = str(float(test_timeout_s))
+    env[MAX_HUNG_ENV] = str(int(max_hung_tests))
+    env[TEST_REPORT_ENV] = str(report_file)
+
+
+def suite_resource_limits(config: Dict[str, Any], test_type: str, timeout_s: float) -> Dict[str, Any]:
+    """
+    Limits for one suite: DEFAULT_RESOURCE_LIMITS, then ``resource_limits.default``,
+    then ``resource_limits.<test_type>`` from the task YAML. A value of 0/null
+    lifts that limit; ``resource_limits: false`` disables all of them.
+    measure_reference applies the same limits to the reference run.
+    """
+    cfg = config.get("resource_limits")
+    if cfg is False:
+        return {}
+    cfg = cfg if isinstance(cfg, dict) else {}
+
+    limits: Dict[str, Any] = dict(DEFAULT_RESOURCE_LIMITS)
+    limits["cpu_s"] = int(math.ceil(float(timeout_s) * CPU_LIMIT_PER_TIMEOUT))
+    for section in (cfg.get("default"), cfg.get(test_type)):
+        if isinstance(section, dict):
+            limits.update({k: v for k, v in section.items() if k in RLIMIT_KEYS})
+    return {k: v for k, v in limits.items() if (_as_float(v) or 0.0) > 0}
+
+
+def _classify_limit_violation(
+    returncode: int, report: Dict[str, Any], limits: Dict[str, Any], peak_vms_bytes: int = 0
+) -> Optional[str]:
+    """
+    Which applied limit made the suite fail, on hard evidence only: the
+    SIGXCPU/SIGXFSZ exit status, or the type and errno of an exception in the
+    plugin's per-test records (EFBIG, EMFILE; MemoryError/ENOMEM only with a
+    sampled per-process VMS peak close to address_space_mb). The suite output
+    is never searched: tests routinely mention these errors.
+    """
+    if not limits or returncode == 0:
+        return None
+    sig = -returncode if returncode < 0 else None
+    if sig is not None and sig == getattr(signal, "SIGXCPU", None) and "cpu_s" in limits:
+        return "cpu_limit"
+    if sig is not None and sig == getattr(signal, "SIGXFSZ", None) and "file_size_mb" in limits:
+        return "fsize_limit"
+    as_mb = _as_float(limits.get("address_space_mb")) or 0.0
+    near_as_limit = as_mb > 0 and peak_vms_bytes >= OOM_VMS_FRACTION * as_mb * 1024 * 1024
+    for exc in report.get("exceptions") or []:
+        err = exc.get("errno")
+        if err == errno.EFBIG and "file_size_mb" in limits:
+            return "fsize_limit"
+        if err == errno.EMFILE and "open_files" in limits:
+            return "nofile_limit"
+        if (exc.get("type") == "MemoryError" or err == errno.ENOMEM) and near_as_limit:
+            return "oom_limit"
+    return None
 
 
 def _read_text_file_safely(p: Optional[Path]) -> str:
-    if p is None:
-        return ""
-    try:
-        if p.exists():
-            return p.read_text(encoding="utf-8", errors="ignore")
-    except Exception:
-        pass
-    return ""
+    # 支持 .log / .log.gz / .log.zst
+    return read_log_text(p)
 
 
 def _parse_kv_metrics_line(output: str, prefix: str) -> Dict[str, float]:
@@ -151,6 +424,45 @@ def _extract_and_attach_metrics_force(result: Dict[str, Any], log_file: Optional
         result.setdefault("metrics", {}).update(maint)
 
 
+def _sample_process_tree(proc: psutil.Process) -> Tuple[int, float, int]:
+    """
+    Summed RSS (bytes) and CPU percent of ``proc`` and all its descendants,
+    and the largest VMS (bytes) among them (RLIMIT_AS applies per process).
+    """
+    rss_total = 0
+    cpu_total = 0.0
+    vms_max = 0
+    try:
+        children = proc.children(recursive=True)
+    except Exception:
+        children = []
+    for p in [proc] + children:
+        try:
+            mem = p.memory_info()
+            rss_total += mem.rss
+            vms_max = max(vms_max, mem.vms)
+        except Exception:
+            pass
+        try:
+            cpu_total += p.cpu_percent(interval=None)
+        except Exception:
+            pass
+    return rss_total, cpu_total, vms_max
+
+
+def _suite_env(repo_root: Path, extra_env: Dict[str, str], python_executable: Optional[str] = None) -> Dict[str, str]:
+    env = os.environ.copy()
+    env.update(extra_env)
+
+    # 依赖环境（evaluation/dep_env.py）：suite 用该 venv 的解释器跑，子进程里的 python 也指向它
+    if python_executable:
+        env["PATH"] = str(Path(python_executable).parent) + os.pathsep + env.get("PATH", "")
+
+    existing_pp = env.get("PYTHONPATH", "")
+    env["PYTHONPATH"] = str(repo_root) + (os.pathsep + existing_pp if existing_pp else "")
+    return env
+
+
 def _run_pytest_with_sampling_and_stream(
     test_path: Path,
     repo_root: Path,
@@ -159,126 +471,162 @@ def _run_pytest_with_sampling_and_stream(
     sample_interval_s: float = 0.10,
     log_file: Optional[Path] = None,
     add_s: bool = False,
+    test_timeout_s: Optional[float] = None,
+    max_hung_tests: int = DEFAULT_MAX_HUNG_TESTS,
+    resource_limits: Optional[Dict[str, Any]] = None,
+    telemetry_labels: Optional[Dict[str, str]] = None,
+    python_executable: Optional[str] = None,
+    nodeids: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
-    env = os.environ.copy()
-    env.update(extra_env)
+    env = _suite_env(repo_root, extra_env, python_executable)
 
-    existing_pp = env.get("PYTHONPATH", "")
-    env["PYTHONPATH"] = str(repo_root) + (os.pathsep + existing_pp if existing_pp else "")
-
-    cmd = [sys.executable, "-m", "pytest", str(test_path)]
+    # 每个测试的结果实时写入 report，超时被 kill 时据此回收已完成的测试
+    if log_file is not None:
+        report_file = log_file.with_suffix(".tests.jsonl")
+        report_file.parent.mkdir(parents=True, exist_ok=True)
+    else:
+        fd, tmp_name = tempfile.mkstemp(prefix="racb_", suffix=".tests.jsonl")
+        os.close(fd)
+        report_file = Path(tmp_name)
+    report_file.write_text("", encoding="utf-8")
+
+    if test_timeout_s is None:
+        test_timeout_s = min(DEFAULT_TEST_TIMEOUT_S, float(timeout_s))
+    harness_plugin_env(env, test_timeout_s, max_hung_tests, report_file)
+
+    # nodeids：只运行 suite 的一个分片（见 run_test_suite 的 shards）
+    targets = list(nodeids) if nodeids else [str(test_path)]
+    cmd = [python_executable or sys.executable, "-m", "pytest", "-p", HARNESS_PLUGIN] + targets
     if add_s:
         cmd.append("-s")
     cmd.append("-q")
 
+    # 每个 suite 独立 session/进程组（可用时再加一个 cgroup），结束时整体回收
+    cgroup = create_suite_cgroup(test_path.stem)
     proc = psutil.Popen(
         cmd,
         cwd=str(ROOT),
         env=env,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-        universal_newlines=True,
+        **popen_isolation_kwargs(),
     )
+    # 只记录真正生效的限制（prlimit 不可用的平台上为空），超限归类也只看这些
+    resource_limits = isolate_suite(proc, cgroup, resource_limits)
 
     try:
         proc.cpu_percent(interval=None)
     except Exception:
         pass
 
+    labels = telemetry_labels or {}
+    suite_id = telemetry.suite_started(
+        labels.get("project", test_path.parent.name),
+        labels.get("suite", test_path.stem),
+        timeout_s,
+        proc.pid,
+    )
+    outcome = "failed"
+    trace_name = f"{labels.get('project', test_path.parent.name)}:{labels.get('suite', test_path.stem)}"
+    trace_start = tracing.now_us()
+    trace_args: Dict[str, Any] = {"pytest_pid": proc.pid, "timeout_s": timeout_s, **({"tests": len(nodeids)} if nodeids else {})}
+
     mem_samples: List[int] = []
     cpu_samples: List[float] = []
-    stdout_chunks: List[str] = []
+    peak_vms = 0
 
     start = time.perf_counter()
     deadline = start + timeout_s
 
-    lf = None
-    if log_file is not None:
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-        lf = open(log_file, "w", encoding="utf-8")
+    # 输出有上限：内存只保留头尾，磁盘日志压缩写入（失控打印的生成代码不会撑爆 harness）
+    capture = LogCapture(log_file)
+    log_info: Dict[str, Any] = {}
+    if capture.path is not None:
+        log_info["log_file"] = str(capture.path)
+    if resource_limits:
+        log_info["resource_limits"] = dict(resource_limits)
+
+    # 独立线程读取 stdout：主循环不会阻塞在 readline 上，suite 级 deadline 才能按时生效
+    def _pump() -> None:
+        if proc.stdout is None:
+            return
+        try:
+            # 二进制管道按块读取：没有换行的超长输出也不会整行缓存
+            capture.pump(proc.stdout)
+        except Exception:
+            pass
+
+    pump = threading.Thread(target=_pump, daemon=True)
+    pump.start()
 
     try:
         while True:
             now = time.perf_counter()
             if now > deadline:
-                _kill_process_tree(proc)
+                terminate_suite(proc, cgroup)
+                pump.join(timeout=5.0)
                 elapsed = now - start
-                out = "".join(stdout_chunks)
+                out = capture.text()
+                counts: Dict[str, Any] = {"passed": 0, "failed": 1, "skipped": 0, "total": 1}
+                report = _summarize_test_report(report_file)
+                if report["available"] and report["total"] > 0:
+                    counts = _salvaged_counts(report)
+                failure_class = _classify_limit_violation(124, report, resource_limits or {}, peak_vms)
+                outcome = "timeout"
                 return {
                     "returncode": 124,
                     "stdout": out,
                     "elapsed_time_s": round(elapsed, 6),
                     "avg_memory_mb": round((statistics.mean(mem_samples) / (1024 * 1024)) if mem_samples else 0.0, 2),
                     "avg_cpu_percent": round(statistics.mean(cpu_samples) if cpu_samples else 0.0, 2),
-                    "passed": 0,
-                    "failed": 1,
-                    "skipped": 0,
-                    "total": 1,
+                    **counts,
+                    **log_info,
+                    **({"failure_class": failure_class} if failure_class else {}),
                     "timeout": True,
                 }
 
             if proc.poll() is not None:
                 break
 
-            if proc.stdout is not None:
-                try:
-                    line = proc.stdout.readline()
-                except Exception:
-                    line = ""
-                if line:
-                    stdout_chunks.append(line)
-                    print(line, end="")
-                    if lf:
-                        lf.write(line)
-                        lf.flush()
-
-            rss_total = 0
-            cpu_total = 0.0
-            try:
-                children = proc.children(recursive=True)
-            except Exception:
-                children = []
-            for p in [proc] + children:
-                try:
-                    rss_total += p.memory_info().rss
-                except Exception:
-                    pass
-                try:
-                    cpu_total += p.cpu_percent(interval=None)
-                except Exception:
-                    pass
+            t_sample = time.perf_counter()
+            rss_total, cpu_total, vms_max = _sample_process_tree(proc)
+            peak_vms = max(peak_vms, vms_max)
 
             mem_samples.append(rss_total)
             cpu_samples.append(cpu_total)
+            telemetry.suite_sample(suite_id, rss_total, cpu_total, time.perf_counter() - t_sample)
+            tracing.counter(f"{trace_name} RSS (MB)", {"rss_mb": rss_total / (1024 * 1024)})
+            tracing.counter(f"{trace_name} CPU (%)", {"cpu_percent": cpu_total})
 
             time.sleep(sample_interval_s)
 
         elapsed = time.perf_counter() - start
 
-        tail = ""
-        if proc.stdout is not None:
-            try:
-                tail = proc.stdout.read() or ""
-            except Exception:
-                tail = ""
-        if tail:
-            stdout_chunks.append(tail)
-            print(tail, end="")
-            if lf:
-                lf.write(tail)
-                lf.flush()
-
-        out = "".join(stdout_chunks)
+        # pytest 已退出：先记录遗留进程/监听端口，再整体回收（遗留进程可能还占着 stdout 管道）
+        leaks = find_leaked(proc, cgroup)
+        terminate_suite(proc, cgroup)
+        pump.join(timeout=5.0)
+
+        out = capture.text()
         counts = _parse_pytest_counts(out)
 
+        # 因挂起测试提前结束（或 watchdog 直接结束进程）时，未运行的测试也计入 total
+        report = _summarize_test_report(report_file)
+        if report["available"]:
+            if report["stopped"] or not report["finished"]:
+                if report["total"] > 0:
+                    counts = _salvaged_counts(report)
+            elif report.get("timed_out_tests"):
+                counts["hung_tests"] = list(report["timed_out_tests"])
+
         avg_mem_mb = (statistics.mean(mem_samples) / (1024 * 1024)) if mem_samples else 0.0
         avg_cpu = statistics.mean(cpu_samples) if cpu_samples else 0.0
 
         # 注意：proc.returncode 为 0 是合法值，不能用 `or 1`
         rc = proc.returncode
         returncode = int(rc) if rc is not None else 1
+        failure_class = _classify_limit_violation(returncode, report, resource_limits or {}, peak_vms)
+        outcome = "passed" if returncode == 0 else "failed"
 
         return {
             "returncode": returncode,
@@ -287,10 +635,268 @@ def _run_pytest_with_sampling_and_stream(
             "avg_memory_mb": round(avg_mem_mb, 2),
             "avg_cpu_percent": round(avg_cpu, 2),
             **counts,
+            **log_info,
+            **({"stdout_truncated_bytes": capture.dropped_bytes} if capture.dropped_bytes else {}),
+            **({"failure_class": failure_class} if failure_class else {}),
+            **({"leaks": leaks} if leaks["leaked_processes"] else {}),
         }
     finally:
-        if lf:
-            lf.close()
+        if proc.poll() is None:
+            terminate_suite(proc, cgroup)
+        capture.close()
+        telemetry.suite_finished(suite_id, time.perf_counter() - start, outcome)
+        tracing.complete(trace_name, trace_start, cat="suite", outcome=outcome, returncode=proc.returncode, **trace_args)
+        if log_file is None:
+            try:
+                report_file.unlink()
+            except Exception:
+                pass
+
+
+# ----------------------------
+# Sharded suites (functional / robustness)
+# ----------------------------
+
+def durations_file_for(project_name: str, test_type: str) -> Path:
+    base = Path(os.environ.get(DURATIONS_DIR_ENV, "").strip() or DEFAULT_DURATIONS_DIR)
+    return base / project_name / f"{test_type}.json"
+
+
+def _duration_key(nodeid: str) -> str:
+    # nodeid 的路径部分取决于 pytest rootdir；只保留文件名，历史数据在不同运行方式之间通用
+    path, sep, rest = nodeid.partition("::")
+    return Path(path.replace("\\", "/")).name + sep + rest
+
+
+def load_test_durations(path: Optional[Path]) -> Dict[str, float]:
+    if path is None or not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return {str(k): float(v) for k, v in (data or {}).items()}
+    except Exception:
+        return {}
+
+
+def update_test_durations(path: Path, report_files: List[Path]) -> None:
+    """Fold the per-test durations of finished runs into the history (EWMA)."""
+    fresh: Dict[str, float] = {}
+    for rf in report_files:
+        for nodeid, d in (_summarize_test_report(rf).get("durations") or {}).items():
+            fresh[_duration_key(nodeid)] = float(d)
+    if not fresh:
+        return
+    history = load_test_durations(path)
+    for k, d in fresh.items():
+        old = history.get(k)
+        history[k] = round(d if old is None else DURATION_EWMA_ALPHA * d + (1 - DURATION_EWMA_ALPHA) * old, 6)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(history, indent=0, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def collect_nodeids(
+    test_path: Path,
+    repo_root: Path,
+    extra_env: Dict[str, str],
+    python_executable: Optional[str] = None,
+    timeout_s: float = COLLECT_TIMEOUT_S,
+) -> Optional[List[str]]:
+    """Absolute nodeids of ``test_path`` in collection order; None when collection fails."""
+    env = _suite_env(repo_root, extra_env, python_executable)
+    cmd = [python_executable or sys.executable, "-m", "pytest", "--collect-only", "-q", str(test_path)]
+    try:
+        with tracing.span("collect", cat="suite", test_path=str(test_path)):
+            p = subprocess.run(cmd, cwd=str(ROOT), env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, timeout=timeout_s)
+    except Exception:
+        return None
+    if p.returncode != 0:
+        return None
+    # nodeid 的路径相对于 pytest 自己选的 rootdir（取决于 ini 文件位置），这里统一换成绝对路径
+    test_path = test_path.resolve()
+    bases = [test_path] + list(test_path.parents) if test_path.is_dir() else list(test_path.parents)
+    nodeids: List[str] = []
+    seen: set = set()
+    for line in (p.stdout or "").splitlines():
+        line = line.strip()
+        if "::" not in line or line.startswith("<"):
+            continue
+        path, _, rest = line.partition("::")
+        if test_path.is_file():
+            full = test_path
+        else:
+            found = next((b / path for b in bases if path and (b / path).is_file()), None)
+            if found is None:
+                return None
+            full = found.resolve()
+        nodeid = f"{full}::{rest}"
+        if nodeid not in seen:
+            seen.add(nodeid)
+            nodeids.append(nodeid)
+    return nodeids
+
+
+def partition_shards(nodeids: List[str], durations: Dict[str, float], shards: int) -> List[List[str]]:
+    """
+    Longest-processing-time-first split of ``nodeids`` into at most ``shards``
+    groups. Tests of one class stay together (class-scoped state/fixtures), and
+    every shard keeps the original collection order.
+    """
+    units: Dict[str, List[str]] = {}
+    for n in nodeids:
+        parts = n.split("::")
+        key = "::".join(parts[:2]) if len(parts) > 2 else n
+        units.setdefault(key, []).append(n)
+
+    known = [durations[_duration_key(n)] for n in nodeids if _duration_key(n) in durations]
+    # 没有历史的测试按已知中位数估计；完全没有历史时就是按测试个数均分
+    default = statistics.median(known) if known else 1.0
+
+    def cost(group: List[str]) -> float:
+        return sum(durations.get(_duration_key(n), default) for n in group)
+
+    k = max(1, min(int(shards), len(units)))
+    loads = [0.0] * k
+    assigned: List[List[str]] = [[] for _ in range(k)]
+    for group in sorted(units.values(), key=cost, reverse=True):
+        i = min(range(k), key=lambda j: (loads[j], j))
+        assigned[i].extend(group)
+        loads[i] += cost(group)
+    order = {n: i for i, n in enumerate(nodeids)}
+    return [sorted(a, key=order.__getitem__) for a in assigned if a]
+
+
+def _shard_log_file(log_file: Optional[Path], k: int) -> Optional[Path]:
+    if log_file is None:
+        return None
+    return log_file.with_name(f"{log_file.stem}.shard{k}{log_file.suffix}")
+
+
+def _merge_shard_results(parts: List[Dict[str, Any]], plan: List[List[str]], wall_s: float) -> Dict[str, Any]:
+    """Combine per-shard results into one suite result (counts summed, wall time = whole sharded run)."""
+    n = len(parts)
+    merged: Dict[str, Any] = {"passed": 0, "failed": 0, "skipped": 0, "total": 0}
+    stdout_parts: List[str] = []
+    shard_info: List[Dict[str, Any]] = []
+    hung: List[str] = []
+    metrics: Dict[str, float] = {}
+    leaks: Dict[str, List[Any]] = {"leaked_processes": [], "leaked_listeners": []}
+    not_run = 0
+    truncated = 0
+    returncode = 0
+    timed_out = False
+    failure_class: Optional[str] = None
+
+    for k, (r, ids) in enumerate(zip(parts, plan)):
+        # 分片进程崩溃时没跑到的测试仍计入 total（与未分片时的 salvage 语义一致）
+        total = max(int(r.get("total", 0) or 0), len(ids))
+        for key in ("passed", "failed", "skipped"):
+            merged[key] += int(r.get(key, 0) or 0)
+        merged["total"] += total
+        not_run += int(r.get("not_run", 0) or 0) + (total - int(r.get("total", 0) or 0))
+        hung.extend(r.get("hung_tests") or [])
+        metrics.update(r.get("metrics") or {})
+        for key in leaks:
+            leaks[key].extend((r.get("leaks") or {}).get(key) or [])
+        truncated += int(r.get("stdout_truncated_bytes", 0) or 0)
+        rc = int(r.get("returncode", 1))
+        if r.get("timeout"):
+            timed_out = True
+        elif rc != 0 and returncode == 0:
+            returncode = rc
+        failure_class = failure_class or r.get("failure_class")
+        stdout_parts.append(f"===== shard {k + 1}/{n}: {len(ids)} tests =====\n{r.get('stdout', '')}")
+        shard_info.append({
+            "tests": len(ids),
+            "returncode": rc,
+            "elapsed_time_s": r.get("elapsed_time_s", 0.0),
+            "passed": int(r.get("passed", 0) or 0),
+            "failed": int(r.get("failed", 0) or 0),
+            **({"log_file": r["log_file"]} if r.get("log_file") else {}),
+            **({"timeout": True} if r.get("timeout") else {}),
+        })
+
+    merged.update({
+        "returncode": 124 if timed_out else returncode,
+        "stdout": "\n".join(stdout_parts),
+        "elapsed_time_s": round(wall_s, 6),
+        # 分片并发运行：内存/CPU 取各分片之和（同一时刻的总占用）
+        "avg_memory_mb": round(sum(float(r.get("avg_memory_mb", 0.0) or 0.0) for r in parts), 2),
+        "avg_cpu_percent": round(sum(float(r.get("avg_cpu_percent", 0.0) or 0.0) for r in parts), 2),
+        "shards": shard_info,
+    })
+    if not_run:
+        merged["not_run"] = not_run
+    if hung:
+        merged["hung_tests"] = hung
+    if metrics:
+        merged["metrics"] = metrics
+    if leaks["leaked_processes"]:
+        merged["leaks"] = leaks
+    if truncated:
+        merged["stdout_truncated_bytes"] = truncated
+    if failure_class:
+        merged["failure_class"] = failure_class
+    if timed_out:
+        merged["timeout"] = True
+    return merged
+
+
+def _run_sharded(
+    test_path: Path,
+    repo_root: Path,
+    extra_env: Dict[str, str],
+    plan: List[List[str]],
+    timeout_s: float,
+    log_file: Optional[Path],
+    scratch_dir: Optional[Path],
+    telemetry_labels: Optional[Dict[str, str]],
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    labels = telemetry_labels or {}
+    results: List[Optional[Dict[str, Any]]] = [None] * len(plan)
+
+    def run_one(k: int) -> None:
+        env = dict(extra_env)
+        if scratch_dir is not None:
+            # 每个分片独立 scratch：测试写的文件互不覆盖
+            shard_scratch = scratch_dir / f"shard{k}"
+            shard_scratch.mkdir(parents=True, exist_ok=True)
+            env[SCRATCH_DIR_ENV] = str(shard_scratch)
+        shard_log = _shard_log_file(log_file, k)
+        try:
+            r = _run_pytest_with_sampling_and_stream(
+                test_path=test_path,
+                repo_root=repo_root,
+                extra_env=env,
+                timeout_s=timeout_s,
+                log_file=shard_log,
+                telemetry_labels={
+                    "project": labels.get("project", test_path.parent.name),
+                    "suite": f"{labels.get('suite', test_path.stem)}#{k}",
+                },
+                nodeids=plan[k],
+                **kwargs,
+            )
+            written = r.get("log_file")
+            _extract_and_attach_metrics_force(r, Path(written) if written else shard_log)
+        except Exception as e:
+            r = {"returncode": 1, "stdout": f"shard {k} failed to run: {e}\n", "passed": 0, "failed": len(plan[k]),
+                 "skipped": 0, "total": len(plan[k])}
+        results[k] = r
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run_one, args=(k,), name=f"shard{k}", daemon=True) for k in range(len(plan))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return _merge_shard_results([r or {} for r in results], plan, time.perf_counter() - start)
 
 
 def run_test_suite(
@@ -302,28 +908,88 @@ def run_test_suite(
     log_file: Optional[Path],
     package_name: Optional[str],
     add_s: bool,
+    pycache_prefix: Optional[str] = None,
+    test_timeout_s: Optional[float] = None,
+    max_hung_tests: int = DEFAULT_MAX_HUNG_TESTS,
+    resource_limits: Optional[Dict[str, Any]] = None,
+    scratch_dir: Optional[Path] = None,
+    telemetry_labels: Optional[Dict[str, str]] = None,
+    python_executable: Optional[str] = None,
+    shards: int = 1,
+    durations_file: Optional[Path] = None,
 ) -> Dict[str, Any]:
+    """
+    Run one suite. ``shards`` > 1 splits the collected tests into up to that
+    many concurrently running, process-isolated pytest runs balanced by the
+    per-test history in ``durations_file`` -- only for suites whose score does
+    not depend on timing (SHARDABLE_TYPES; the caller decides). The shard count
+    is capped by the CPU count and by MIN_SHARD_WORK_S of recorded work per
+    shard; a single run is used without history, when collection fails, or
+    when there is only one test unit.
+    """
     extra_env: Dict[str, str] = {}
     if target_env_var:
         extra_env[target_env_var] = target_value
     extra_env[REPO_ROOT_ENV] = str(repo_root)
+    if scratch_dir is not None:
+        scratch_dir.mkdir(parents=True, exist_ok=True)
+        extra_env[SCRATCH_DIR_ENV] = str(scratch_dir)
     if package_name:
         extra_env[PKG_NAME_ENV] = package_name
+    if pycache_prefix:
+        extra_env["PYTHONPYCACHEPREFIX"] = pycache_prefix
 
     repo_str = str(repo_root)
     if repo_str not in sys.path:
         sys.path.insert(0, repo_str)
 
-    result = _run_pytest_with_sampling_and_stream(
-        test_path=test_path,
-        repo_root=repo_root,
-        extra_env=extra_env,
-        timeout_s=timeout_s,
-        log_file=log_file,
-        add_s=add_s,
-    )
+    plan: List[List[str]] = []
+    history = load_test_durations(durations_file) if int(shards or 1) > 1 else {}
+    # 没有历史时先完整跑一次，只为积累耗时；分片数不超过 CPU 数
+    shards = min(int(shards or 1), os.cpu_count() or 1, int(sum(history.values()) // MIN_SHARD_WORK_S))
+    if shards > 1:
+        nodeids = collect_nodeids(test_path, repo_root, extra_env, python_executable)
+        if nodeids:
+            plan = partition_shards(nodeids, history, shards)
+
+    if len(plan) > 1:
+        result = _run_sharded(
+            test_path,
+            repo_root,
+            extra_env,
+            plan,
+            timeout_s=timeout_s,
+            log_file=log_file,
+            scratch_dir=scratch_dir,
+            telemetry_labels=telemetry_labels,
+            add_s=add_s,
+            test_timeout_s=test_timeout_s,
+            max_hung_tests=max_hung_tests,
+            resource_limits=resource_limits,
+            python_executable=python_executable,
+        )
+        report_files = [f.with_suffix(".tests.jsonl") for f in (_shard_log_file(log_file, k) for k in range(len(plan))) if f]
+    else:
+        result = _run_pytest_with_sampling_and_stream(
+            test_path=test_path,
+            repo_root=repo_root,
+            extra_env=extra_env,
+            timeout_s=timeout_s,
+            log_file=log_file,
+            add_s=add_s,
+            test_timeout_s=test_timeout_s,
+            max_hung_tests=max_hung_tests,
+            resource_limits=resource_limits,
+            telemetry_labels=telemetry_labels,
+            python_executable=python_executable,
+        )
 
-    _extract_and_attach_metrics_force(result, log_file)
+        written = result.get("log_file")
+        _extract_and_attach_metrics_force(result, Path(written) if written else log_file)
+        report_files = [log_file.with_suffix(".tests.jsonl")] if log_file is not None else []
+
+    if durations_file is not None:
+        update_test_durations(durations_file, report_files)
 
     if result.get("returncode", 1) != 0 and int(result.get("total", 0)) == 0:
         result["failed"] = 1
@@ -449,24 +1115,46 @@ def calculate_score(test_type: str, test_result: Dict[str, Any], baseline_metric
         test_result["score_inputs_actual_mem_mb"] = actual_mem
         test_result["score_inputs_actual_cpu_pct"] = actual_cpu
 
+        # 可选的内存增长探针（task YAML 的 leak_probe）：与参考仓库的每次迭代增长斜率比较
+        probe = test_result.get(LEAK_PROBE_KEY)
+        s_leak: Optional[float] = None
+        if isinstance(probe, dict):
+            baseline_leak = _get_baseline_metric(baseline_for_type, "leak_bytes_per_iter")
+            if baseline_leak is not None:
+                # 探针本身跑不起来（workload 抛异常/超时）记 0 分
+                actual_leak = None if probe.get("error") else _as_float(probe.get("leak_bytes_per_iter"))
+                s_leak = 0.0 if actual_leak is None else leak_score(actual_leak, baseline_leak)
+                test_result["score_inputs_baseline_leak_bytes_per_iter"] = baseline_leak
+                test_result["score_inputs_actual_leak_bytes_per_iter"] = actual_leak
+                test_result["leak_subscore"] = round(float(s_leak), 4)
+
         if failed_suite:
             return 0.0
 
         if baseline_mem is None or actual_mem is None or baseline_mem <= 0.0 or actual_mem <= 0.0:
             return 0.0
 
-        s_mem = min(1.0, float(baseline_mem) / float(actual_mem))
+        parts = [min(1.0, float(baseline_mem) / float(actual_mem))]
 
-        if baseline_cpu is None or actual_cpu is None or baseline_cpu <= 0.0 or actual_cpu <= 0.0:
-            return float(s_mem)
+        if not (baseline_cpu is None or actual_cpu is None or baseline_cpu <= 0.0 or actual_cpu <= 0.0):
+            parts.append(min(1.0, float(baseline_cpu) / float(actual_cpu)))
 
-        s_cpu = min(1.0, float(baseline_cpu) / float(actual_cpu))
-        return float((s_mem + s_cpu) / 2.0)
+        if s_leak is not None:
+            parts.append(float(s_leak))
+
+        return float(sum(parts) / len(parts))
 
     return 0.0
 
 
-def run_all_tests(task_file: Path, generated_repo: Path, output_file: Path) -> Dict[str, Any]:
+def run_all_tests(
+    task_file: Path,
+    generated_repo: Path,
+    output_file: Path,
+    logs_dir: Optional[Path] = None,
+    python_executable: Optional[str] = None,
+    shards: Optional[int] = None,
+) -> Dict[str, Any]:
     config = load_task_config(task_file)
     baseline_metrics = config.get("baseline_metrics", {}) or {}
     test_suite = config.get("test_suite", {}) or {}
@@ -474,6 +1162,11 @@ def run_all_tests(task_file: Path, generated_repo: Path, output_file: Path) -> D
     timeouts = config.get("suite_timeouts_s", {}) or {}
     default_timeout = float(timeouts.get("default", 60))
 
+    # 可选：suite_shards 与 suite_timeouts_s 同结构；RACB_SUITE_SHARDS / shards 参数覆盖 default
+    suite_shards = config.get("suite_shards", {}) or {}
+    if shards is None:
+        shards = _as_int_preserve_zero(os.environ.get(SHARDS_ENV, "").strip() or None, 0) or None
+
     project_name = task_file.parent.name
     target_env_var = f"{project_name.upper()}_TARGET"
 
@@ -486,46 +1179,112 @@ def run_all_tests(task_file: Path, generated_repo: Path, output_file: Path) -> D
     results: Dict[str, Any] = {}
     scores: Dict[str, float] = {}
 
-    logs_dir = ROOT / "results" / project_name / "pytest_logs"
+    # 日志跟随结果文件（results/<Project>_results.yaml -> results/<Project>/pytest_logs）
+    if logs_dir is None:
+        logs_dir = output_file.parent / project_name / "pytest_logs"
     logs_dir.mkdir(parents=True, exist_ok=True)
 
+    test_dirs: List[Path] = []
     for test_type in TEST_TYPES:
-        test_path = test_suite.get(test_type)
-        if not test_path:
-            continue
+        if test_suite.get(test_type):
+            d = _resolve_test_path(project_name, str(test_suite[test_type])).parent
+            if d not in test_dirs:
+                test_dirs.append(d)
+    bytecode_cache = prepare_bytecode_cache(generated_repo, test_dirs)
+    print(
+        f"Bytecode cache: {bytecode_cache['pycache_prefix']} "
+        f"(cached={bytecode_cache['precompile_cached']}, precompile={bytecode_cache['precompile_time_s']}s)"
+    )
 
-        test_full_path = _resolve_test_path(project_name, str(test_path))
-        if not test_full_path.exists():
-            results[test_type] = {
-                "error": f"Test file not found: {test_full_path}",
-                "passed": 0,
-                "failed": 1,
-                "skipped": 0,
-                "total": 1,
-                "elapsed_time_s": 0.0,
-                "avg_memory_mb": 0.0,
-                "avg_cpu_percent": 0.0,
+    scratch_root = Path(tempfile.mkdtemp(prefix=f"racb-{project_name}-"))
+    telemetry.task_started(project_name)
+    try:
+        for test_type in TEST_TYPES:
+            test_path = test_suite.get(test_type)
+            if not test_path:
+                continue
+
+            test_full_path = _resolve_test_path(project_name, str(test_path))
+            if not test_full_path.exists():
+                results[test_type] = {
+                    "error": f"Test file not found: {test_full_path}",
+                    "passed": 0,
+                    "failed": 1,
+                    "skipped": 0,
+                    "total": 1,
+                    "elapsed_time_s": 0.0,
+                    "avg_memory_mb": 0.0,
+                    "avg_cpu_percent": 0.0,
+                }
+                scores[test_type] = 0.0
+                continue
+
+            timeout_s = float(timeouts.get(test_type, default_timeout))
+            # 可选：test_timeouts_s 与 suite_timeouts_s 同结构；max_hung_tests 为挂起测试的上限
+            test_timeout_s, max_hung_tests = suite_test_budgets(config, test_type, timeout_s)
+            resource_limits = suite_resource_limits(config, test_type, timeout_s)
+            log_file = logs_dir / f"{test_type}.log"
+            add_s = test_type in {"security", "maintainability"}
+
+            n_shards = 1
+            if test_type in SHARDABLE_TYPES:
+                n_shards = shards if shards is not None else _as_int_preserve_zero(
+                    suite_shards.get(test_type, suite_shards.get("default")), 1)
+
+            print(f"Running {project_name}:{test_type} -> {test_full_path} (timeout={timeout_s}s"
+                  + (f", shards={n_shards})" if n_shards > 1 else ")"))
+            test_result = run_test_suite(
+                test_path=test_full_path,
+                repo_root=generated_repo,
+                target_env_var=target_env_var,
+                target_value="generated",
+                timeout_s=timeout_s,
+                log_file=log_file,
+                package_name=package_name,
+                add_s=add_s,
+                pycache_prefix=bytecode_cache["pycache_prefix"],
+                test_timeout_s=test_timeout_s,
+                max_hung_tests=max_hung_tests,
+                resource_limits=resource_limits,
+                scratch_dir=scratch_root / test_type,
+                telemetry_labels={"project": project_name, "suite": test_type},
+                python_executable=python_executable,
+                shards=n_shards,
+                durations_file=durations_file_for(project_name, test_type),
+            )
+            results[test_type] = test_result
+            with tracing.span("score", cat="scoring", project=project_name, suite=test_type):
+                scores[test_type] = calculate_score(test_type, test_result, baseline_metrics)
+
+        leak_cfg = config.get(LEAK_PROBE_KEY)
+        if isinstance(leak_cfg, dict) and leak_cfg.get("workload") and isinstance(results.get("resource"), dict):
+            print(f"Running {project_name}:leak_probe -> {leak_cfg['workload']}")
+            probe_env = {
+                target_env_var: "generated",
+                REPO_ROOT_ENV: str(generated_repo),
+                SCRATCH_DIR_ENV: str(scratch_root / "leak_probe"),
             }
-            scores[test_type] = 0.0
-            continue
-
-        timeout_s = float(timeouts.get(test_type, default_timeout))
-        log_file = logs_dir / f"{test_type}.log"
-        add_s = test_type in {"security", "maintainability"}
+            if package_name:
+                probe_env[PKG_NAME_ENV] = package_name
+            (scratch_root / "leak_probe").mkdir(parents=True, exist_ok=True)
+            with tracing.span(f"{project_name}:leak_probe", cat="suite"):
+                probe = run_probe_subprocess(leak_cfg, generated_repo, probe_env, python_executable=python_executable)
+            results["resource"][LEAK_PROBE_KEY] = probe
+            scores["resource"] = calculate_score("resource", results["resource"], baseline_metrics)
+            if probe.get("error"):
+                print(f"[WARN] {project_name}:leak_probe failed: {probe['error']}")
+            else:
+                print(f"{project_name}:leak_probe leak_bytes_per_iter={probe['leak_bytes_per_iter']}")
+    finally:
+        shutil.rmtree(scratch_root, ignore_errors=True)
+        telemetry.task_finished(project_name)
 
-        print(f"Running {project_name}:{test_type} -> {test_full_path} (timeout={timeout_s}s)")
-        test_result = run_test_suite(
-            test_path=test_full_path,
-            repo_root=generated_repo,
-            target_env_var=target_env_var,
-            target_value="generated",
-            timeout_s=timeout_s,
-            log_file=log_file,
-            package_name=package_name,
-            add_s=add_s,
-        )
-        results[test_type] = test_result
-        scores[test_type] = calculate_score(test_type, test_result, baseline_metrics)
+    # 任何 suite 遗留的进程/监听端口都作为 resource 维度的 finding 记录（不影响打分）
+    leak_findings = {t: r["leaks"] for t, r in results.items() if isinstance(r, dict) and r.get("leaks")}
+    if leak_findings and isinstance(results.get("resource"), dict):
+        results["resource"]["leak_findings"] = leak_findings
+        for t, lk in leak_findings.items():
+            print(f"[WARN] {project_name}:{t} leaked {len(lk['leaked_processes'])} process(es), listeners={lk['leaked_listeners']}")
 
     functional_score = float(scores.get("functional", 0.0) or 0.0)
 
@@ -552,10 +1311,12 @@ def run_all_tests(task_file: Path, generated_repo: Path, output_file: Path) -> D
         "results": results,
         "baseline_metrics": baseline_metrics,
         "pytest_logs_dir": str(logs_dir),
+        "bytecode_cache": bytecode_cache,
+        **({"python_executable": python_executable} if python_executable else {}),
     }
 
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_file, "w", encoding="utf-8") as f:
+    with tracing.span("write_results_yaml", cat="io", path=str(output_file)), open(output_file, "w", encoding="utf-8") as f:
         yaml.safe_dump(output, f, allow_unicode=True, sort_keys=False)
 
     print(f"Wrote results to: {output_file}")
@@ -2,15 +2,32 @@ import argparse
 import os
 import re
 import sys
+import shutil
+import tempfile
 import time
 import yaml
 import subprocess
+import threading
 from pathlib import Path
 from typing import Any, Dict, Optional, List
 
 import psutil
 import statistics
 
+# Robust import: supports BOTH
+#   1) python -m evaluation.measure_reference
+#   2) python evaluation/measure_reference.py
+try:
+    from .measure_generated import HARNESS_PLUGIN, SCRATCH_DIR_ENV, harness_plugin_env, prepare_bytecode_cache, suite_resource_limits, suite_test_budgets  # type: ignore
+    from .suite_process import create_suite_cgroup, isolate_suite, popen_isolation_kwargs, terminate_suite  # type: ignore
+    from .log_capture import QUIET_ENV, LogCapture  # type: ignore
+    from .leak_probe import LEAK_PROBE_KEY, run_probe_subprocess  # type: ignore
+except Exception:
+    from measure_generated import HARNESS_PLUGIN, SCRATCH_DIR_ENV, harness_plugin_env, prepare_bytecode_cache, suite_resource_limits, suite_test_budgets  # type: ignore
+    from suite_process import create_suite_cgroup, isolate_suite, popen_isolation_kwargs, terminate_suite  # type: ignore
+    from log_capture import QUIET_ENV, LogCapture  # type: ignore
+    from leak_probe import LEAK_PROBE_KEY, run_probe_subprocess  # type: ignore
+
 ROOT = Path(__file__).resolve().parents[1]
 
 REPO_ROOT_ENV = "RACB_REPO_ROOT"
@@ -84,28 +101,16 @@ def _parse_kv_metrics_line(output: str, prefix: str) -> Dict[str, float]:
     return metrics
 
 
-def _kill_process_tree(proc: psutil.Popen) -> None:
-    try:
-        children = proc.children(recursive=True)
-    except Exception:
-        children = []
-    for c in children:
-        try:
-            c.kill()
-        except Exception:
-            pass
-    try:
-        proc.kill()
-    except Exception:
-        pass
-
-
 def _run_pytest_with_sampling(
     test_path: Path,
     repo_root: Path,
     extra_env: Dict[str, str],
     timeout_s: float,
     add_s: bool,
+    test_timeout_s: float,
+    max_hung_tests: int,
+    report_file: Path,
+    resource_limits: Optional[Dict[str, Any]] = None,
     sample_interval_s: float = 0.10,
 ) -> Dict[str, Any]:
     env = os.environ.copy()
@@ -114,21 +119,25 @@ def _run_pytest_with_sampling(
     existing_pp = env.get("PYTHONPATH", "")
     env["PYTHONPATH"] = str(repo_root) + (os.pathsep + existing_pp if existing_pp else "")
 
-    cmd = [sys.executable, "-m", "pytest", str(test_path)]
+    # 与 measure_generated 相同：加载 harness 插件（单测预算 + 每个测试一行 JSON），
+    # 性能分是两边耗时之比，插件的开销必须同时计入基线
+    harness_plugin_env(env, test_timeout_s, max_hung_tests, report_file)
+    cmd = [sys.executable, "-m", "pytest", "-p", HARNESS_PLUGIN, str(test_path)]
     if add_s:
         cmd.append("-s")
     cmd.append("-q")
 
+    cgroup = create_suite_cgroup(test_path.stem)
     proc = psutil.Popen(
         cmd,
         cwd=str(ROOT),
         env=env,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-        universal_newlines=True,
+        **popen_isolation_kwargs(),
     )
+    # 与生成仓库相同的资源限制，否则生成仓库可能因 MemoryError / EMFILE 失败而参考仓库不会
+    isolate_suite(proc, cgroup, resource_limits)
 
     try:
         proc.cpu_percent(interval=None)
@@ -137,16 +146,29 @@ def _run_pytest_with_sampling(
 
     mem_samples: List[int] = []
     cpu_samples: List[float] = []
-    stdout_chunks: List[str] = []
+    capture = LogCapture()
 
     start = time.perf_counter()
     deadline = start + timeout_s
 
+    # 与 measure_generated 相同：独立线程读取 stdout，采样节奏不受输出行影响
+    def _pump() -> None:
+        if proc.stdout is None:
+            return
+        try:
+            capture.pump(proc.stdout)
+        except Exception:
+            pass
+
+    pump = threading.Thread(target=_pump, daemon=True)
+    pump.start()
+
     while True:
         now = time.perf_counter()
         if now > deadline:
-            _kill_process_tree(proc)
-            out = "".join(stdout_chunks)
+            terminate_suite(proc, cgroup)
+            pump.join(timeout=5.0)
+            out = capture.text()
             return {
                 "returncode": 124,
                 "stdout": out,
@@ -163,15 +185,6 @@ def _run_pytest_with_sampling(
         if proc.poll() is not None:
             break
 
-        if proc.stdout is not None:
-            try:
-                line = proc.stdout.readline()
-            except Exception:
-                line = ""
-            if line:
-                stdout_chunks.append(line)
-                print(line, end="")
-
         # sample rss/cpu of proc + children
         rss_total = 0
         cpu_total = 0.0
@@ -195,17 +208,10 @@ def _run_pytest_with_sampling(
 
     elapsed = time.perf_counter() - start
 
-    tail = ""
-    if proc.stdout is not None:
-        try:
-            tail = proc.stdout.read() or ""
-        except Exception:
-            tail = ""
-    if tail:
-        stdout_chunks.append(tail)
-        print(tail, end="")
+    terminate_suite(proc, cgroup)
+    pump.join(timeout=5.0)
 
-    out = "".join(stdout_chunks)
+    out = capture.text()
     counts = _parse_pytest_counts(out)
 
     avg_mem_mb = (statistics.mean(mem_samples) / (1024 * 1024)) if mem_samples else 0.0
@@ -237,7 +243,10 @@ def main() -> None:
     ap.add_argument("task_file", type=Path)
     ap.add_argument("--target-env", required=True)
     ap.add_argument("--reference-value", default="reference")
+    ap.add_argument("--quiet", action="store_true", help="Do not echo pytest output to the console.")
     args = ap.parse_args()
+    if args.quiet:
+        os.environ[QUIET_ENV] = "1"
 
     task_file: Path = args.task_file
     task = load_task_config(task_file)
@@ -256,43 +265,82 @@ def main() -> None:
     baseline: Dict[str, Any] = task.get("baseline_metrics") or {}
     task["baseline_metrics"] = baseline
 
-    for test_type, test_rel in test_suite.items():
-        test_path = _resolve_test_path(project_name, str(test_rel))
-        timeout_s = float(timeouts.get(test_type, default_timeout))
-        add_s = test_type in {"security", "maintainability"}
-
-        extra_env = {
-            args.target_env: args.reference_value,
-            REPO_ROOT_ENV: str(ref_repo),
-        }
-        if package_name:
-            extra_env[PKG_NAME_ENV] = package_name
-
-        print("=" * 132)
-        print(f"Running reference {project_name}:{test_type} -> {test_path} (timeout={timeout_s}s)")
-
-        r = _run_pytest_with_sampling(
-            test_path=test_path,
-            repo_root=ref_repo,
-            extra_env=extra_env,
-            timeout_s=timeout_s,
-            add_s=add_s,
-        )
-
-        entry: Dict[str, Any] = baseline.get(test_type) or {}
-        entry[f"{test_type}_suite_time_s"] = float(r.get("elapsed_time_s", 0.0) or 0.0)
-        entry[f"{test_type}_tests_total"] = int(r.get("total", 0) or 0)
-
-        if test_type == "resource":
-            entry["avg_memory_mb"] = float(r.get("avg_memory_mb", 0.0) or 0.0)
-            entry["avg_cpu_percent"] = float(r.get("avg_cpu_percent", 0.0) or 0.0)
-
-        if test_type in {"security", "maintainability"}:
-            metrics = r.get("metrics") or {}
-            if metrics:
-                entry["metrics"] = metrics
-
-        baseline[test_type] = entry
+    # 与 measure_generated 一致：先统一预编译，基线与生成仓库在同样的 warm 条件下计时
+    test_dirs: List[Path] = []
+    for test_rel in test_suite.values():
+        d = _resolve_test_path(project_name, str(test_rel)).parent
+        if d not in test_dirs:
+            test_dirs.append(d)
+    bytecode_cache = prepare_bytecode_cache(ref_repo, test_dirs)
+    print(f"Bytecode cache: {bytecode_cache['pycache_prefix']} (precompile={bytecode_cache['precompile_time_s']}s)")
+
+    scratch_root = Path(tempfile.mkdtemp(prefix=f"racb-{project_name}-ref-"))
+    try:
+        for test_type, test_rel in test_suite.items():
+            test_path = _resolve_test_path(project_name, str(test_rel))
+            timeout_s = float(timeouts.get(test_type, default_timeout))
+            test_timeout_s, max_hung_tests = suite_test_budgets(task, test_type, timeout_s)
+            add_s = test_type in {"security", "maintainability"}
+
+            extra_env = {
+                args.target_env: args.reference_value,
+                REPO_ROOT_ENV: str(ref_repo),
+                SCRATCH_DIR_ENV: str(scratch_root / test_type),
+                "PYTHONPYCACHEPREFIX": bytecode_cache["pycache_prefix"],
+            }
+            if package_name:
+                extra_env[PKG_NAME_ENV] = package_name
+
+            print("=" * 132)
+            print(f"Running reference {project_name}:{test_type} -> {test_path} (timeout={timeout_s}s)")
+
+            r = _run_pytest_with_sampling(
+                test_path=test_path,
+                repo_root=ref_repo,
+                extra_env=extra_env,
+                timeout_s=timeout_s,
+                add_s=add_s,
+                test_timeout_s=test_timeout_s,
+                max_hung_tests=max_hung_tests,
+                report_file=scratch_root / f"{test_type}.tests.jsonl",
+                resource_limits=suite_resource_limits(task, test_type, timeout_s),
+            )
+
+            entry: Dict[str, Any] = baseline.get(test_type) or {}
+            entry[f"{test_type}_suite_time_s"] = float(r.get("elapsed_time_s", 0.0) or 0.0)
+            entry[f"{test_type}_tests_total"] = int(r.get("total", 0) or 0)
+
+            if test_type == "resource":
+                entry["avg_memory_mb"] = float(r.get("avg_memory_mb", 0.0) or 0.0)
+                entry["avg_cpu_percent"] = float(r.get("avg_cpu_percent", 0.0) or 0.0)
+
+            if test_type in {"security", "maintainability"}:
+                metrics = r.get("metrics") or {}
+                if metrics:
+                    entry["metrics"] = metrics
+
+            baseline[test_type] = entry
+
+        leak_cfg = task.get(LEAK_PROBE_KEY)
+        if isinstance(leak_cfg, dict) and leak_cfg.get("workload"):
+            print(f"Running reference {project_name}:leak_probe -> {leak_cfg['workload']}")
+            probe_env = {
+                args.target_env: args.reference_value,
+                REPO_ROOT_ENV: str(ref_repo),
+                SCRATCH_DIR_ENV: str(scratch_root / "leak_probe"),
+            }
+            if package_name:
+                probe_env[PKG_NAME_ENV] = package_name
+            (scratch_root / "leak_probe").mkdir(parents=True, exist_ok=True)
+            probe = run_probe_subprocess(leak_cfg, ref_repo, probe_env)
+            if probe.get("error"):
+                print(f"[WARN] reference leak_probe failed: {probe['error']}\n{probe.get('output_tail', '')}")
+            else:
+                entry = baseline.get("resource") or {}
+                entry["leak_bytes_per_iter"] = float(probe["leak_bytes_per_iter"])
+                baseline["resource"] = entry
+    finally:
+        shutil.rmtree(scratch_root, ignore_errors=True)
 
     print("Measured baseline_metrics:")
     print(task["baseline_metrics"])
@@ -0,0 +1,419 @@
+"""
+Token budgets for generation / repair prompts.
+
+Prompt sections (task description, API contract, plan, agent test output)
+each get a token budget; the section budgets are scaled down when their sum
+would exceed the total budget, so an assembled prompt stays within it:
+
+  - the API contract (hand-written or from api_contract_extractor, which lists
+    every function of every module) keeps the entries the official tests under
+    tests/<Project>/ actually reference first -- counted with
+    preflight_from_tests (imported names, attribute chains on imported
+    symbols), plain identifier occurrences in the test sources break ties --
+    and drops the rest, noting how many were left out;
+  - pytest output is reduced in stages, each applied only while the output is
+    still over budget: identical failure blocks are merged ("same failure in N
+    more tests"), tracebacks are compacted to locations, ``>`` source lines and
+    ``E`` lines, then whole blocks are dropped from the end (the first one is
+    always kept), and only then is the list of failed tests in the short test
+    summary shortened; the final counts line is kept;
+  - anything else is cut with an explicit omission marker.
+
+Budgets come from DEFAULT_BUDGETS, the task yaml (``prompt_budget: {total:
+..., api_contract: ...}``) and RACB_PROMPT_BUDGET (total tokens). Tokens are
+counted with tiktoken when it is installed, otherwise estimated as
+characters / CHARS_PER_TOKEN.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .preflight_from_tests import build_preflight_spec_from_tests  # type: ignore
+except Exception:
+    from preflight_from_tests import build_preflight_spec_from_tests  # type: ignore
+
+try:  # optional: exact token counts
+    import tiktoken  # type: ignore
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # pragma: no cover
+    _ENCODING = None
+
+ROOT = Path(__file__).resolve().parents[1]
+
+PROMPT_BUDGET_ENV = "RACB_PROMPT_BUDGET"
+CHARS_PER_TOKEN = 4.0
+
+DEFAULT_BUDGETS: Dict[str, int] = {
+    "total": 24000,
+    "description": 4000,
+    "api_contract": 6000,
+    "plan": 3000,
+    "test_output": 4000,
+}
+# 模板本身（规则、输出格式说明）预留的 token
+TEMPLATE_RESERVE = 1500
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        try:
+            return len(_ENCODING.encode(text, disallowed_special=()))
+        except Exception:
+            pass
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def truncate_to_tokens(text: str, budget: int, keep: str = "head") -> str:
+    """Cut ``text`` to about ``budget`` tokens, keeping the head, the tail or both ends."""
+    if estimate_tokens(text) <= budget:
+        return text
+    n = len(text)
+    tokens = max(1, estimate_tokens(text))
+    chars = max(0, int(budget * n / tokens) - 60)
+    for _ in range(4):
+        if keep == "tail":
+            out = f"[... {n - chars} chars omitted ...]\n" + text[n - chars:]
+        elif keep == "both":
+            head = chars // 2
+            out = text[:head] + f"\n[... {n - chars} chars omitted ...]\n" + text[n - (chars - head):]
+        else:
+            out = text[:chars] + f"\n[... {n - chars} chars omitted ...]"
+        if estimate_tokens(out) <= budget or chars == 0:
+            return out
+        chars = int(chars * 0.9)
+    return out
+
+
+def budgets_for(task: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    budgets = dict(DEFAULT_BUDGETS)
+    cfg = (task or {}).get("prompt_budget") or {}
+    if isinstance(cfg, dict):
+        for k, v in cfg.items():
+            try:
+                budgets[str(k)] = int(v)
+            except Exception:
+                continue
+    env = os.environ.get(PROMPT_BUDGET_ENV, "").strip()
+    if env:
+        try:
+            budgets["total"] = int(env)
+        except ValueError:
+            pass
+    # 各段预算之和不超过 total：等比例缩小
+    sections = {k: v for k, v in budgets.items() if k != "total"}
+    room = max(1, budgets["total"] - TEMPLATE_RESERVE)
+    used = sum(sections.values())
+    if used > room:
+        for k, v in sections.items():
+            budgets[k] = max(1, int(v * room / used))
+    return budgets
+
+
+# ----------------------------
+# API contract ranking
+# ----------------------------
+
+def project_test_files(task: Dict[str, Any]) -> List[Path]:
+    """The task's own test files (tests/<Project>/*.py; the shared tests/_generic suites are skipped)."""
+    dirs: List[Path] = []
+    for v in ((task or {}).get("test_suite") or {}).values():
+        if not v:
+            continue
+        p = Path(str(v))
+        p = p if p.is_absolute() else (ROOT / p)
+        d = p.resolve().parent
+        if d.name.startswith("_") or not d.is_dir() or d in dirs:
+            continue
+        dirs.append(d)
+    return sorted({f for d in dirs for f in d.glob("*.py") if f.is_file()})
+
+
+@lru_cache(maxsize=64)
+def _reference_counts(test_files: Tuple[str, ...]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    paths = [Path(f) for f in test_files]
+    spec = build_preflight_spec_from_tests(paths)
+    refs: Counter = Counter()
+    for imp in spec.imports:
+        for part in imp.module.split("."):
+            refs[part] += 1
+        if imp.name:
+            refs[imp.name] += 1
+    for req in spec.attr_requirements:
+        for attr in req.attr_chain:
+            refs[attr] += 1
+    words: Counter = Counter()
+    for p in paths:
+        try:
+            words.update(re.findall(r"[A-Za-z_]\w*", p.read_text(encoding="utf-8", errors="ignore")))
+        except Exception:
+            continue
+    return dict(refs), dict(words)
+
+
+def reference_counts(test_files: List[Path]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """(preflight references, plain identifier occurrences) over ``test_files``."""
+    return _reference_counts(tuple(sorted(str(p) for p in test_files)))
+
+
+_ENTRY_RE = re.compile(r"^(?P<indent>\s*)-\s+(?P<name>[A-Za-z_][\w.]*)\s*(?P<kind>\(|:|\s+exports:)")
+
+
+def compact_contract(text: str, refs: Dict[str, int], words: Dict[str, int], budget: int) -> str:
+    """
+    Keep the contract entries (``- name(args)``, ``- module:``, ``- module
+    exports: ...`` lines) most referenced by the tests, in their original
+    order, within ``budget`` tokens. Other lines (headers, rules) are kept;
+    a module line is kept when any of its entries is.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    lines = text.splitlines()
+    entries: Dict[int, Tuple[float, List[int]]] = {}  # line -> (score, parent lines)
+    parents: List[Tuple[int, int]] = []  # (indent, line) 的栈
+    for i, line in enumerate(lines):
+        m = _ENTRY_RE.match(line)
+        if not m:
+            if line.strip() and not line.startswith(" "):
+                parents = []
+            continue
+        indent = len(m.group("indent"))
+        while parents and parents[-1][0] >= indent:
+            parents.pop()
+        if m.group("kind").strip() == "exports:":
+            names = re.findall(r"[A-Za-z_]\w*", line.split("exports:", 1)[1])
+        else:
+            names = [m.group("name").split(".")[-1]]
+        score = sum(2.0 * refs.get(n, 0) + 0.01 * words.get(n, 0) for n in names)
+        entries[i] = (score, [ln for _ind, ln in parents])
+        if line.rstrip().endswith(":"):
+            parents.append((indent, i))
+
+    # 模块行本身不按分数入选，只随其条目保留
+    leaves = [i for i in entries if not lines[i].rstrip().endswith(":")]
+    keep = {i for i in range(len(lines)) if i not in entries}
+    used = estimate_tokens("\n".join(lines[i] for i in sorted(keep))) + 20
+    for i in sorted(leaves, key=lambda i: (-entries[i][0], i)):
+        extra = [i] + [p for p in entries[i][1] if p not in keep]
+        cost = sum(estimate_tokens(lines[j]) + 1 for j in extra)
+        if used + cost > budget:
+            continue
+        keep.update(extra)
+        used += cost
+    dropped = len(leaves) - sum(1 for i in leaves if i in keep)
+    out = "\n".join(lines[i] for i in sorted(keep))
+    if dropped:
+        out += f"\n(... {dropped} contract entries not referenced by the tests omitted for length)"
+    return truncate_to_tokens(out, budget)
+
+
+def task_contract(task: Dict[str, Any], budget: Optional[int] = None) -> str:
+    text = ((task or {}).get("api_contract") or "").strip()
+    if not text:
+        return ""
+    budget = budgets_for(task)["api_contract"] if budget is None else budget
+    if estimate_tokens(text) <= budget:
+        return text
+    refs, words = reference_counts(project_test_files(task))
+    return compact_contract(text, refs, words, budget)
+
+
+def task_description(task: Dict[str, Any], budget: Optional[int] = None) -> str:
+    text = ((task or {}).get("description") or "").strip()
+    return truncate_to_tokens(text, budgets_for(task)["description"] if budget is None else budget)
+
+
+# ----------------------------
+# pytest output
+# ----------------------------
+
+_SECTION_RE = re.compile(r"^={3,} (?P<title>.+?) ={3,}$")
+_BLOCK_RE = re.compile(r"^_{3,} (?P<title>.+?) _{3,}$")
+_LOCATION_RE = re.compile(r"^\S.*:\d+: ")
+_VOLATILE_RE = re.compile(r"0x[0-9a-fA-F]+|\d+(\.\d+)?")
+
+
+def _split_sections(text: str) -> List[Tuple[str, List[str]]]:
+    """[(section title or "", lines)] in order; the title line itself starts the section's lines."""
+    out: List[Tuple[str, List[str]]] = [("", [])]
+    for line in text.splitlines():
+        m = _SECTION_RE.match(line)
+        if m:
+            out.append((m.group("title").strip(), [line]))
+        else:
+            out[-1][1].append(line)
+    return out
+
+
+def _split_blocks(lines: List[str]) -> Tuple[List[str], List[Tuple[str, List[str]]]]:
+    head: List[str] = []
+    blocks: List[Tuple[str, List[str]]] = []
+    for line in lines:
+        m = _BLOCK_RE.match(line)
+        if m:
+            blocks.append((m.group("title").strip(), [line]))
+        elif blocks:
+            blocks[-1][1].append(line)
+        else:
+            head.append(line)
+    return head, blocks
+
+
+def _signature(block: List[str]) -> str:
+    errors = [ln for ln in block if ln.startswith("E ")]
+    where = [ln for ln in block if _LOCATION_RE.match(ln)]
+    key = "\n".join(errors[-3:]) + "|" + (where[-1].split(":", 1)[0] + ":" + where[-1].rsplit(":", 1)[-1] if where else "")
+    return _VOLATILE_RE.sub("#", key)
+
+
+def compact_traceback(block: List[str], max_captured_lines: int = 5) -> List[str]:
+    """Keep block title, frame locations, ``>`` lines and ``E`` lines; captured output is cut short."""
+    out: List[str] = []
+    captured = 0
+    in_captured = False
+    for ln in block:
+        if _BLOCK_RE.match(ln):
+            out.append(ln)
+            continue
+        if ln.startswith("-" * 5) and "Captured" in ln:
+            in_captured = True
+            captured = 0
+            out.append(ln)
+            continue
+        if in_captured:
+            captured += 1
+            if captured <= max_captured_lines:
+                out.append(ln)
+            elif captured == max_captured_lines + 1:
+                out.append("[... captured output truncated ...]")
+            continue
+        if ln.startswith("[same failure in "):
+            out.append(ln)
+            continue
+        if ln.startswith("E ") or ln.startswith(">") or _LOCATION_RE.match(ln):
+            if "site-packages" in ln and not ln.startswith("E "):
+                continue
+            out.append(ln)
+    return out
+
+
+def compact_pytest_output(text: str, budget: int) -> str:
+    if estimate_tokens(text) <= budget:
+        return text
+    sections = _split_sections(text or "")
+    failure_idx = [i for i, (t, _l) in enumerate(sections) if t in ("FAILURES", "ERRORS")]
+
+    parsed: Dict[int, Tuple[List[str], List[Tuple[str, List[str]]]]] = {}
+    for i in failure_idx:
+        parsed[i] = _split_blocks(sections[i][1])
+
+    # 各 section 之后追加的说明行（如省略了多少失败块）
+    notes: Dict[int, List[str]] = {}
+
+    def render() -> str:
+        parts: List[str] = []
+        for i, (_t, lines) in enumerate(sections):
+            if i in parsed:
+                head, blocks = parsed[i]
+                parts.extend(head)
+                for _title, bl in blocks:
+                    parts.extend(bl)
+            else:
+                parts.extend(lines)
+            parts.extend(notes.get(i, []))
+        return "\n".join(parts)
+
+    # 1) 合并相同的失败块
+    for i, (head, blocks) in parsed.items():
+        merged: List[Tuple[str, List[str]]] = []
+        seen: Dict[str, int] = {}
+        dup_titles: Dict[int, List[str]] = {}
+        for title, bl in blocks:
+            sig = _signature(bl)
+            if sig in seen:
+                dup_titles.setdefault(seen[sig], []).append(title)
+                continue
+            seen[sig] = len(merged)
+            merged.append((title, bl))
+        for k, titles in dup_titles.items():
+            title, bl = merged[k]
+            shown = ", ".join(titles[:10]) + (f", ... (+{len(titles) - 10})" if len(titles) > 10 else "")
+            merged[k] = (title, bl + [f"[same failure in {len(titles)} more test(s): {shown}]"])
+        parsed[i] = (head, merged)
+    out = render()
+    if estimate_tokens(out) <= budget:
+        return out
+
+    # 2) 压缩 traceback
+    for i, (head, blocks) in parsed.items():
+        parsed[i] = (head, [(t, compact_traceback(bl)) for t, bl in blocks])
+    out = render()
+    if estimate_tokens(out) <= budget:
+        return out
+
+    # 3) 从后往前丢整块，但第一个（合并后的）失败块总是保留：它往往是唯一的 traceback。
+    #    按预先算好的每块 token 数扣减，只在最后渲染一次（逐块重渲染是平方复杂度）
+    total = estimate_tokens(out)
+    note_tokens = estimate_tokens("[... 99999 more failure block(s) omitted for length ...]") + 1
+    first = min((i for i, (_h, blocks) in parsed.items() if blocks), default=None)
+    dropped = 0
+    for i in sorted(parsed, reverse=True):
+        head, blocks = parsed[i]
+        keep = 1 if i == first else 0
+        while len(blocks) > keep and total + note_tokens > budget:
+            total -= estimate_tokens("\n".join(blocks[-1][1])) + 1
+            blocks = blocks[:-1]
+            dropped += 1
+        parsed[i] = (head, blocks)
+    if dropped:
+        notes[max(parsed)] = [f"[... {dropped} more failure block(s) omitted for length ...]"]
+        out = render()
+    if estimate_tokens(out) <= budget:
+        return out
+
+    # 4) 仍然超出：截短 short test summary 里的 FAILED/ERROR 列表，保留标题和末尾的计数行
+    for i, (title, lines) in enumerate(sections):
+        if "short test summary" not in title:
+            continue
+        listed = [k for k, ln in enumerate(lines) if ln.startswith(("FAILED ", "ERROR "))]
+        marker = "[... 99999 more FAILED/ERROR line(s) omitted ...]"
+        excess = estimate_tokens(out) - budget + estimate_tokens(marker) + 1
+        cut = len(listed)
+        while cut > 0 and excess > 0:
+            cut -= 1
+            excess -= estimate_tokens(lines[listed[cut]]) + 1
+        omitted = set(listed[cut:])
+        if omitted:
+            kept = [ln for k, ln in enumerate(lines) if k not in omitted]
+            kept.insert(listed[cut], f"[... {len(omitted)} more FAILED/ERROR line(s) omitted ...]")
+            sections[i] = (title, kept)
+            out = render()
+        break
+    if estimate_tokens(out) <= budget or not failure_idx:
+        return truncate_to_tokens(out, budget, keep="both")
+
+    # 5) 最后才动失败块之前的部分（session 头、很长的进度行），使保留的失败块不被截掉
+    excess = estimate_tokens(out) - budget
+    for i in range(failure_idx[0] - 1, -1, -1):
+        if excess <= 0:
+            break
+        title, lines = sections[i]
+        text = "\n".join(lines)
+        tokens = estimate_tokens(text)
+        if tokens == 0:
+            continue
+        cut = truncate_to_tokens(text, max(0, tokens - excess), keep="head")
+        sections[i] = (title, cut.split("\n"))
+        excess -= tokens - estimate_tokens(cut)
+    out = render()
+    return truncate_to_tokens(out, budget, keep="both")
@@ -0,0 +1,231 @@
+"""
+Harness-side pytest plugin for benchmark suites.
+
+measure_generated loads it into every suite subprocess with
+``-p evaluation.pytest_harness_plugin``. It is configured only through env vars
+so the suite files under tests/ stay untouched:
+
+  RACB_TEST_TIMEOUT_S   per-test time budget in seconds (<= 0 disables)
+  RACB_MAX_HUNG_TESTS   stop the session after this many tests hit the budget
+  RACB_TEST_REPORT      JSON-lines file receiving one record per test phase
+                        (failed phases carry the crash message, and the
+                        exception type and errno when an exception was raised)
+
+A test that exceeds its budget is failed on its own and the session continues
+with the next test. The JSON-lines report is written as tests finish, so the
+runner can salvage partial counts even if the whole process tree is killed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import faulthandler
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import pytest
+
+TEST_TIMEOUT_ENV = "RACB_TEST_TIMEOUT_S"
+MAX_HUNG_ENV = "RACB_MAX_HUNG_TESTS"
+TEST_REPORT_ENV = "RACB_TEST_REPORT"
+
+# Exit code used by the thread-based watchdog when the test cannot be interrupted.
+HUNG_EXIT_CODE = 75
+
+
+class TestTimeout(BaseException):
+    """
+    Raised inside a test that exceeded its budget.
+
+    BaseException on purpose: generated code often wraps everything in
+    ``except Exception`` and would otherwise swallow the interruption.
+    """
+
+    __test__ = False
+
+
+_state: Dict[str, Any] = {
+    "timeout_s": 0.0,
+    "max_hung": 0,
+    "hung": 0,
+    "report": None,
+    "deadline": None,
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, "").strip() or default)
+    except Exception:
+        return default
+
+
+def _write(record: Dict[str, Any]) -> None:
+    f = _state.get("report")
+    if f is None:
+        return
+    try:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+    except Exception:
+        pass
+
+
+def _use_signal() -> bool:
+    return hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+
+
+def _on_alarm(signum, frame) -> None:  # pragma: no cover - signal context
+    # 测试若吞掉了 TestTimeout（bare except），1s 后再次打断
+    signal.setitimer(signal.ITIMER_REAL, 1.0)
+    raise TestTimeout(f"test exceeded per-test time budget of {_state['timeout_s']:.1f}s")
+
+
+def _on_thread_timeout(nodeid: str) -> None:  # pragma: no cover - watchdog thread
+    # 没有 SIGALRM（Windows / 非主线程）时无法打断测试本身：记录后结束进程，由 runner 回收已完成的结果
+    _write({"event": "hung", "nodeid": nodeid, "timeout_s": _state["timeout_s"], "fatal": True})
+    try:
+        faulthandler.dump_traceback(file=sys.stderr, all_threads=True)
+        sys.stderr.flush()
+        sys.stdout.flush()
+    except Exception:
+        pass
+    os._exit(HUNG_EXIT_CODE)
+
+
+@contextlib.contextmanager
+def _phase_alarm():
+    """
+    Arm SIGALRM for the remaining budget of the current test around a single
+    setup/call/teardown phase, so TestTimeout is raised inside pytest's
+    CallInfo wrapper and reported as an ordinary failure of that test.
+    """
+    deadline = _state.get("deadline")
+    if deadline is None or not _use_signal():
+        yield
+        return
+    remaining = max(0.001, deadline - time.monotonic())
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def pytest_configure(config) -> None:
+    _state["timeout_s"] = _env_float(TEST_TIMEOUT_ENV, 0.0)
+    _state["max_hung"] = int(_env_float(MAX_HUNG_ENV, 0.0))
+    _state["hung"] = 0
+
+    report_path = os.environ.get(TEST_REPORT_ENV, "").strip()
+    if report_path and _state.get("report") is None:
+        try:
+            _state["report"] = open(report_path, "a", encoding="utf-8")
+        except Exception:
+            _state["report"] = None
+    _write({"event": "start", "pid": os.getpid(), "timeout_s": _state["timeout_s"], "ts": time.time()})
+
+
+def pytest_collection_finish(session) -> None:
+    _write({"event": "collected", "count": len(session.items)})
+
+
+def pytest_runtest_logstart(nodeid: str, location) -> None:
+    _write({"event": "begin", "nodeid": nodeid})
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    timeout_s = _state["timeout_s"]
+    timer = None
+    if timeout_s > 0:
+        _state["deadline"] = time.monotonic() + timeout_s
+        if not _use_signal():
+            timer = threading.Timer(timeout_s, _on_thread_timeout, args=(item.nodeid,))
+            timer.daemon = True
+            timer.start()
+    try:
+        yield
+    finally:
+        _state["deadline"] = None
+        if timer is not None:
+            timer.cancel()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    with _phase_alarm():
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    with _phase_alarm():
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    with _phase_alarm():
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    excinfo: Optional[pytest.ExceptionInfo] = call.excinfo
+    if excinfo is not None and report.failed:
+        # 异常类型和 errno 是 runner 判断资源超限的依据（不看输出文本）
+        report.racb_exc_type = excinfo.typename
+        err = getattr(excinfo.value, "errno", None)
+        report.racb_errno = err if isinstance(err, int) else None
+    if excinfo is not None and excinfo.errisinstance(TestTimeout):
+        report.racb_timeout = True
+        if not getattr(item, "_racb_hung", False):
+            item._racb_hung = True
+            _state["hung"] += 1
+            max_hung = _state["max_hung"]
+            if max_hung > 0 and _state["hung"] >= max_hung:
+                item.session.shouldstop = f"{_state['hung']} tests exceeded the per-test time budget"
+
+
+def pytest_runtest_logreport(report) -> None:
+    record: Dict[str, Any] = {
+        "event": "report",
+        "nodeid": report.nodeid,
+        "when": report.when,
+        "outcome": report.outcome,
+        "duration": round(float(getattr(report, "duration", 0.0) or 0.0), 6),
+        "timeout": bool(getattr(report, "racb_timeout", False)),
+    }
+    if report.failed:
+        # 只记录异常摘要（如 MemoryError / Too many open files），供 runner 做失败归类
+        crash = getattr(getattr(report, "longrepr", None), "reprcrash", None)
+        message = getattr(crash, "message", None)
+        if message:
+            record["crash"] = str(message)[:500]
+        exc_type = getattr(report, "racb_exc_type", None)
+        if exc_type:
+            record["exc_type"] = exc_type
+            record["errno"] = getattr(report, "racb_errno", None)
+    _write(record)
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    stopped = session.shouldstop if isinstance(session.shouldstop, str) else ""
+    _write({"event": "finish", "exitstatus": int(exitstatus), "hung": _state["hung"], "stopped": stopped})
+    f = _state.get("report")
+    if f is not None:
+        try:
+            f.close()
+        except Exception:
+            pass
+        _state["report"] = None
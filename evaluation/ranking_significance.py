@@ -0,0 +1,390 @@
+"""
+Significance of model rankings over the benchmark tasks.
+
+confidence_experiments measures how stable a ranking is across reruns, test
+budgets and noise; this module asks whether two models' mean scores over the
+tasks actually differ. It loads the per-(model, task) scores once into one
+models x tasks matrix per strategy and metric, then, with NumPy and all
+model pairs at once:
+
+  - paired bootstrap over tasks: every resample is a multinomial weight vector
+    over the tasks, so B resampled means of all models are one matrix product
+    (weights @ scores.T); model-mean CIs, pairwise mean-difference CIs and the
+    distribution of every model's rank come from the same resamples;
+  - paired sign-flip permutation test of the mean difference (under H0 the
+    sign of each task's difference is exchangeable), again one matrix product
+    per block of pairs; p-values are Holm-adjusted over the pairs of a
+    (strategy, metric);
+  - a significance-aware leaderboard: ``sig_rank`` = 1 + number of models that
+    are better with Holm-adjusted p < alpha, so models that cannot be told
+    apart share a rank.
+
+Pairs are compared on the tasks both models have (the intersection over all
+models of a strategy; --missing zero instead scores a missing task 0.0, as
+run_all_benchmarks does for a task without a results file).
+
+Inputs: run_all_benchmarks CSVs (model, mode, project, <metric>...; the
+strategy is the ``mode`` column unless given as ``STRATEGY=GLOB``) and/or
+directories of <Project>_results.yaml files (--results-dir MODEL STRATEGY DIR).
+
+  python -m evaluation.ranking_significance "Exp1/*/results/*.csv" \
+    --resamples 20000 --out-dir results/significance
+
+Outputs: leaderboard.csv, pairwise.csv, report.md under --out-dir.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import glob
+import math
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_METRICS = ["functional_score", "non_functional_score"]
+DEFAULT_RESAMPLES = 20000
+DEFAULT_ALPHA = 0.05
+# 单个 (resamples x pairs) 块的元素上限：1e5 次重采样 x 120 对时按块算，内存约 64MB
+BLOCK_ELEMENTS = 8_000_000
+
+
+def _safe_float(x: Any) -> Optional[float]:
+    try:
+        if x is None or x == "":
+            return None
+        v = float(x)
+        return v if math.isfinite(v) else None
+    except Exception:
+        return None
+
+
+@dataclass
+class ScoreTable:
+    """Raw scores: strategy -> model -> project -> metric -> value."""
+
+    scores: Dict[str, Dict[str, Dict[str, Dict[str, float]]]] = field(default_factory=dict)
+
+    def add(self, strategy: str, model: str, project: str, values: Dict[str, Any]) -> None:
+        cell = self.scores.setdefault(strategy, {}).setdefault(model, {}).setdefault(project, {})
+        for k, v in values.items():
+            f = _safe_float(v)
+            if f is not None:
+                cell[k] = f
+
+
+def load_csv(table: ScoreTable, path: Path, strategy: Optional[str] = None) -> int:
+    n = 0
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            model = (row.get("model") or "").strip()
+            project = (row.get("project") or "").strip()
+            if not model or not project:
+                continue
+            table.add(strategy or (row.get("mode") or "").strip() or "default", model, project, row)
+            n += 1
+    return n
+
+
+def load_results_dir(table: ScoreTable, model: str, strategy: str, results_dir: Path) -> int:
+    n = 0
+    for p in sorted(results_dir.glob("*_results.yaml")):
+        try:
+            with open(p, "r", encoding="utf-8") as f:
+                doc = yaml.safe_load(f) or {}
+        except Exception:
+            continue
+        project = str(doc.get("project_name") or p.name[: -len("_results.yaml")])
+        values: Dict[str, Any] = {
+            "functional_score": doc.get("functional_score"),
+            "non_functional_score": doc.get("non_functional_score"),
+            **(doc.get("non_functional_subscores") or {}),
+        }
+        table.add(strategy, model, project, values)
+        n += 1
+    return n
+
+
+def score_matrix(
+    table: ScoreTable, strategy: str, metric: str, missing: str = "drop"
+) -> Tuple[List[str], List[str], np.ndarray, List[str]]:
+    """(models, projects, scores[models, projects], dropped projects) for one strategy/metric."""
+    per_model = table.scores.get(strategy, {})
+    models = sorted(m for m, cells in per_model.items() if any(metric in c for c in cells.values()))
+    all_projects = sorted({p for m in models for p, c in per_model[m].items() if metric in c})
+    if missing == "zero":
+        projects = all_projects
+    else:
+        projects = [p for p in all_projects if all(metric in per_model[m].get(p, {}) for m in models)]
+    dropped = [p for p in all_projects if p not in projects]
+    x = np.array([[per_model[m].get(p, {}).get(metric, 0.0) for p in projects] for m in models], dtype=np.float64)
+    return models, projects, x.reshape(len(models), len(projects)), dropped
+
+
+# ----------------------------
+# Resampling
+# ----------------------------
+
+def bootstrap_weights(rng: np.random.Generator, n_tasks: int, resamples: int) -> np.ndarray:
+    """(resamples, n_tasks) task multiplicities / n_tasks: ``w @ x`` is the resampled mean."""
+    counts = rng.multinomial(n_tasks, np.full(n_tasks, 1.0 / n_tasks), size=resamples)
+    return counts.astype(np.float64) / n_tasks
+
+
+def sign_flips(rng: np.random.Generator, n_tasks: int, resamples: int) -> np.ndarray:
+    """(resamples, n_tasks) random +-1 / n_tasks: ``s @ d`` is the mean of a sign-flipped difference."""
+    return (rng.integers(0, 2, size=(resamples, n_tasks), dtype=np.int8) * 2 - 1).astype(np.float64) / n_tasks
+
+
+def _blocks(n: int, rows: int) -> List[slice]:
+    step = max(1, BLOCK_ELEMENTS // max(1, rows))
+    return [slice(i, min(n, i + step)) for i in range(0, n, step)]
+
+
+def holm(pvalues: np.ndarray) -> np.ndarray:
+    """Holm-Bonferroni adjusted p-values (same order as the input)."""
+    m = len(pvalues)
+    if m == 0:
+        return pvalues.copy()
+    order = np.argsort(pvalues, kind="stable")
+    adj = np.minimum(1.0, (m - np.arange(m)) * pvalues[order])
+    adj = np.maximum.accumulate(adj)
+    out = np.empty(m)
+    out[order] = adj
+    return out
+
+
+@dataclass
+class Analysis:
+    strategy: str
+    metric: str
+    models: List[str]
+    projects: List[str]
+    dropped: List[str]
+    leaderboard: List[Dict[str, Any]]
+    pairwise: List[Dict[str, Any]]
+    elapsed_s: float
+
+
+def analyze(
+    strategy: str,
+    metric: str,
+    models: List[str],
+    projects: List[str],
+    x: np.ndarray,
+    weights: np.ndarray,
+    flips: np.ndarray,
+    alpha: float = DEFAULT_ALPHA,
+    dropped: Optional[List[str]] = None,
+) -> Analysis:
+    start = time.perf_counter()
+    n_models, n_tasks = x.shape
+    lo_q, hi_q = alpha / 2, 1 - alpha / 2
+    means = x.mean(axis=1)
+
+    # 所有模型的重采样均值：(B, M)
+    boot = weights @ x.T
+    mean_ci = np.quantile(boot, [lo_q, hi_q], axis=0)
+
+    # 每次重采样中的名次：1 + 严格更好的模型数（并列共享名次）
+    ranks = np.empty(boot.shape, dtype=np.int32)
+    for sl in _blocks(boot.shape[0], n_models * n_models):
+        b = boot[sl]
+        ranks[sl] = 1 + (b[:, None, :] > b[:, :, None]).sum(axis=2)
+    rank_ci = np.quantile(ranks, [lo_q, hi_q], axis=0)
+    p_top1 = (ranks == 1).mean(axis=0)
+
+    iu0, iu1 = np.triu_indices(n_models, k=1)
+    d = x[iu0] - x[iu1]  # (P, T) 每对模型在每个任务上的差
+    obs = d.mean(axis=1)
+    n_pairs = len(obs)
+    diff_ci = np.empty((2, n_pairs))
+    p_boot = np.empty(n_pairs)
+    p_perm = np.empty(n_pairs)
+    tol = 1e-12 * max(1.0, float(np.abs(x).max()) if x.size else 1.0)
+    for sl in _blocks(n_pairs, max(weights.shape[0], flips.shape[0])):
+        bd = weights @ d[sl].T  # (B, p)
+        diff_ci[:, sl] = np.quantile(bd, [lo_q, hi_q], axis=0)
+        p_boot[sl] = np.minimum(1.0, 2 * np.minimum((bd <= 0).mean(axis=0), (bd >= 0).mean(axis=0)))
+        perm = flips @ d[sl].T  # (R, p)
+        extreme = (np.abs(perm) >= np.abs(obs[sl]) - tol).sum(axis=0)
+        p_perm[sl] = (1 + extreme) / (1 + flips.shape[0])
+    p_adj = holm(p_perm)
+
+    better_sig = np.zeros(n_models, dtype=np.int32)
+    pairwise: List[Dict[str, Any]] = []
+    for k in range(n_pairs):
+        a, b = int(iu0[k]), int(iu1[k])
+        sig = bool(p_adj[k] < alpha)
+        if sig:
+            better_sig[b if obs[k] > 0 else a] += 1
+        pairwise.append({
+            "strategy": strategy,
+            "metric": metric,
+            "model_a": models[a],
+            "model_b": models[b],
+            "mean_a": round(float(means[a]), 6),
+            "mean_b": round(float(means[b]), 6),
+            "mean_diff": round(float(obs[k]), 6),
+            "diff_ci_low": round(float(diff_ci[0, k]), 6),
+            "diff_ci_high": round(float(diff_ci[1, k]), 6),
+            "p_bootstrap": round(float(p_boot[k]), 6),
+            "p_permutation": round(float(p_perm[k]), 6),
+            "p_holm": round(float(p_adj[k]), 6),
+            "significant": sig,
+            "n_tasks": n_tasks,
+        })
+
+    order = sorted(range(n_models), key=lambda i: (-means[i], models[i]))
+    leaderboard: List[Dict[str, Any]] = []
+    for pos, i in enumerate(order, start=1):
+        leaderboard.append({
+            "strategy": strategy,
+            "metric": metric,
+            "rank": pos,
+            "sig_rank": int(1 + better_sig[i]),
+            "model": models[i],
+            "mean": round(float(means[i]), 6),
+            "ci_low": round(float(mean_ci[0, i]), 6),
+            "ci_high": round(float(mean_ci[1, i]), 6),
+            "rank_ci_low": int(rank_ci[0, i]),
+            "rank_ci_high": int(rank_ci[1, i]),
+            "p_top1": round(float(p_top1[i]), 4),
+            "n_tasks": n_tasks,
+        })
+    return Analysis(strategy, metric, models, projects, list(dropped or []), leaderboard, pairwise,
+                    round(time.perf_counter() - start, 3))
+
+
+def run_analysis(
+    table: ScoreTable,
+    metrics: Sequence[str] = DEFAULT_METRICS,
+    resamples: int = DEFAULT_RESAMPLES,
+    permutations: Optional[int] = None,
+    alpha: float = DEFAULT_ALPHA,
+    seed: int = 0,
+    missing: str = "drop",
+) -> List[Analysis]:
+    rng = np.random.default_rng(seed)
+    out: List[Analysis] = []
+    for strategy in sorted(table.scores):
+        # 同一策略下所有指标共用同一组重采样（任务集合相同时），各指标的区间彼此可比
+        cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for metric in metrics:
+            models, projects, x, dropped = score_matrix(table, strategy, metric, missing)
+            if len(models) < 2 or len(projects) < 2:
+                continue
+            n = len(projects)
+            if n not in cache:
+                cache[n] = (bootstrap_weights(rng, n, resamples), sign_flips(rng, n, permutations or resamples))
+            w, s = cache[n]
+            out.append(analyze(strategy, metric, models, projects, x, w, s, alpha=alpha, dropped=dropped))
+    return out
+
+
+# ----------------------------
+# Output
+# ----------------------------
+
+def write_csv(path: Path, rows: List[Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fieldnames: List[str] = []
+    for r in rows:
+        for k in r:
+            if k not in fieldnames:
+                fieldnames.append(k)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames)
+        w.writeheader()
+        w.writerows(rows)
+
+
+def build_report(analyses: List[Analysis], alpha: float, resamples: int, permutations: int) -> str:
+    lines = [
+        "# Ranking significance",
+        "",
+        f"Paired bootstrap over tasks ({resamples} resamples, {int((1 - alpha) * 100)}% intervals) and paired "
+        f"sign-flip permutation test ({permutations} permutations), Holm-adjusted per strategy/metric at "
+        f"alpha={alpha}. `sig rank` = 1 + number of models significantly better.",
+        "",
+    ]
+    for a in analyses:
+        lines.append(f"## {a.strategy} / {a.metric}")
+        lines.append("")
+        lines.append(f"{len(a.models)} models x {len(a.projects)} tasks"
+                     + (f" (dropped, not scored for every model: {', '.join(a.dropped)})" if a.dropped else ""))
+        lines.append("")
+        lines.append("| rank | sig rank | model | mean | CI | rank CI | P(top-1) |")
+        lines.append("|---:|---:|---|---:|---|---|---:|")
+        for r in a.leaderboard:
+            lines.append(f"| {r['rank']} | {r['sig_rank']} | {r['model']} | {r['mean']:.4f} | "
+                         f"[{r['ci_low']:.4f}, {r['ci_high']:.4f}] | {r['rank_ci_low']}-{r['rank_ci_high']} | {r['p_top1']:.3f} |")
+        n_sig = sum(1 for p in a.pairwise if p["significant"])
+        lines.append("")
+        lines.append(f"Significant pairs: {n_sig}/{len(a.pairwise)}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Paired bootstrap / permutation significance of model rankings")
+    ap.add_argument("inputs", nargs="*", help="run_all_benchmarks CSV files or globs, optionally STRATEGY=GLOB")
+    ap.add_argument("--results-dir", nargs=3, action="append", default=[], metavar=("MODEL", "STRATEGY", "DIR"),
+                    help="Directory of <Project>_results.yaml files (repeatable)")
+    ap.add_argument("--metrics", nargs="+", default=DEFAULT_METRICS)
+    ap.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES, help="Bootstrap resamples")
+    ap.add_argument("--permutations", type=int, default=None, help="Sign-flip permutations (default: --resamples)")
+    ap.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    ap.add_argument("--missing", choices=["drop", "zero"], default="drop",
+                    help="Tasks not scored for every model: drop them (paired) or score them 0.0")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out-dir", default=str(ROOT / "results" / "significance"))
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    table = ScoreTable()
+    for spec in args.inputs:
+        strategy: Optional[str] = None
+        pattern = spec
+        if "=" in spec and not Path(spec).exists():
+            strategy, pattern = spec.split("=", 1)
+        paths = sorted(glob.glob(pattern if Path(pattern).is_absolute() else str(ROOT / pattern))) or sorted(glob.glob(pattern))
+        if not paths:
+            print(f"[WARN] No files match: {pattern}")
+        for p in paths:
+            load_csv(table, Path(p), strategy)
+    for model, strategy, d in args.results_dir:
+        if load_results_dir(table, model, strategy, Path(d)) == 0:
+            print(f"[WARN] No *_results.yaml in {d}")
+    if not table.scores:
+        raise SystemExit("No scores loaded.")
+
+    start = time.perf_counter()
+    analyses = run_analysis(table, args.metrics, args.resamples, args.permutations, args.alpha, args.seed, args.missing)
+    elapsed = time.perf_counter() - start
+
+    out_dir = Path(args.out_dir)
+    write_csv(out_dir / "leaderboard.csv", [r for a in analyses for r in a.leaderboard])
+    write_csv(out_dir / "pairwise.csv", [r for a in analyses for r in a.pairwise])
+    (out_dir / "report.md").write_text(
+        build_report(analyses, args.alpha, args.resamples, args.permutations or args.resamples), encoding="utf-8")
+
+    for a in analyses:
+        top = [r["model"] for r in a.leaderboard if r["sig_rank"] == 1]
+        print(f"{a.strategy}/{a.metric}: {len(a.models)} models x {len(a.projects)} tasks, "
+              f"{sum(p['significant'] for p in a.pairwise)}/{len(a.pairwise)} significant pairs, "
+              f"sig-rank-1: {', '.join(top)} ({a.elapsed_s}s)")
+    print(f"Done in {elapsed:.2f}s. Wrote: {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
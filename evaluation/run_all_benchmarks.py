@@ -3,8 +3,22 @@ import subprocess
 import yaml
 import csv
 import os
+import re
 from pathlib import Path
 
+try:
+    from .checkpoint import Checkpoint, config_hash, file_digest  # type: ignore
+    from .job_queue import DEFAULT_DB, open_queue, start_local_workers, wait_for  # type: ignore
+    from . import telemetry  # type: ignore
+    from . import tracing  # type: ignore
+    from .llm_usage import USAGE_FIELDS, generated_repo_for, usage_columns  # type: ignore
+except Exception:
+    from checkpoint import Checkpoint, config_hash, file_digest  # type: ignore
+    from job_queue import DEFAULT_DB, open_queue, start_local_workers, wait_for  # type: ignore
+    import telemetry  # type: ignore
+    import tracing  # type: ignore
+    from llm_usage import USAGE_FIELDS, generated_repo_for, usage_columns  # type: ignore
+
 ROOT = Path(__file__).resolve().parents[1]
 TASKS_DIR = ROOT / "tasks"
 RESULTS_DIR = ROOT / "results"
@@ -14,7 +28,30 @@ def find_all_tasks():
     return sorted(TASKS_DIR.glob("*/**/*.yaml"))
 
 
-def run_single_task(task_yaml: Path, model_name: str, skip_generation: bool) -> bool:
+QUEUE_HANDLER = "evaluation.run_all_benchmarks:run_queued_task"
+
+FIELDNAMES = [
+    "model",
+    "mode",
+    "project",
+    "functional_score",
+    "non_functional_score",
+    "maintainability",
+    "security",
+    "robustness",
+    "performance",
+    "resource",
+] + USAGE_FIELDS
+
+
+def run_single_task(
+    task_yaml: Path,
+    model_name: str,
+    skip_generation: bool,
+    quiet: bool = False,
+    results_root: str = None,
+    generated_root: str = None,
+) -> bool:
     cmd = [
         "python",
         "-m",
@@ -25,12 +62,19 @@ def run_single_task(task_yaml: Path, model_name: str, skip_generation: bool) ->
 
     if skip_generation:
         cmd.append("--skip-generation")
+    if quiet:
+        cmd.append("--quiet")
+    if results_root:
+        cmd += ["--results-root", results_root]
+    if generated_root:
+        cmd += ["--generated-root", generated_root]
 
     env = os.environ.copy()
     env["RACB_MODEL"] = model_name
 
     try:
-        subprocess.run(cmd, check=True, env=env)
+        with tracing.span(f"task {task_yaml.parent.name}", cat="task", model=model_name):
+            subprocess.run(cmd, check=True, env=env, cwd=str(ROOT))
         return True
     except subprocess.CalledProcessError as e:
         print(f"[WARN] Task failed: {task_yaml} (exit={e.returncode})")
@@ -40,8 +84,8 @@ def run_single_task(task_yaml: Path, model_name: str, skip_generation: bool) ->
         return False
 
 
-def load_result_or_default(project: str) -> dict:
-    result_file = RESULTS_DIR / f"{project}_results.yaml"
+def load_result_or_default(project: str, results_dir: Path = RESULTS_DIR) -> dict:
+    result_file = results_dir / f"{project}_results.yaml"
     if not result_file.exists():
         print(f"[WARN] Result file not found for {project}, using zero scores")
         return {
@@ -64,70 +108,232 @@ def _f(x, default=0.0) -> float:
         return float(default)
 
 
-def main(model_name: str, skip_generation: bool):
-    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+def result_row(model_name: str, mode_str: str, project: str, result: dict, generated_repo: Path = None) -> dict:
+    # ✅ FIX: subscores may be stored separately (e.g. non_functional_subscores)
+    scores = result.get("scores", {}) or {}
+    nf_sub = result.get("non_functional_subscores", {}) or {}
 
-    suffix = "eval_only" if skip_generation else "gen_and_eval"
-    csv_path = RESULTS_DIR / f"{model_name}__{suffix}.csv"
+    # Prefer explicit non_functional_subscores; fallback to scores
+    def get_sub(k: str) -> float:
+        if k in nf_sub:
+            return _f(nf_sub.get(k), 0.0)
+        return _f(scores.get(k), 0.0)
 
-    fieldnames = [
-        "model",
-        "mode",
-        "project",
-        "functional_score",
-        "non_functional_score",
-        "maintainability",
-        "security",
-        "robustness",
-        "performance",
-        "resource",
-    ]
+    row = {
+        "model": model_name,
+        "mode": mode_str,
+        "project": project,
+        "functional_score": _f(result.get("functional_score"), 0.0),
+        "non_functional_score": _f(result.get("non_functional_score"), 0.0),
+        "maintainability": get_sub("maintainability"),
+        "security": get_sub("security"),
+        "robustness": get_sub("robustness"),
+        "performance": get_sub("performance"),
+        "resource": get_sub("resource"),
+    }
+    # 生成阶段的 token / 耗时（run_benchmark 写在生成仓库的 _llm_usage.json）；失败的任务也计成本
+    row.update(usage_columns(generated_repo, row["functional_score"]) if generated_repo else {k: "" for k in USAGE_FIELDS})
+    return row
 
-    rows = []
 
-    for task_yaml in find_all_tasks():
-        project = task_yaml.parent.name
-        mode_str = "eval_only" if skip_generation else "gen_and_eval"
-        print(f"\n=== Running {project} ({mode_str}) ===")
+def run_queued_task(payload: dict) -> dict:
+    """Job-queue handler: run one task and return its CSV row (raises so the queue retries)."""
+    project = payload["project"]
+    results_root = payload["results_root"]
+    ok = run_single_task(
+        ROOT / payload["task"],
+        payload["model"],
+        bool(payload.get("skip_generation")),
+        bool(payload.get("quiet")),
+        results_root=results_root,
+        generated_root=payload.get("generated_root"),
+    )
+    if not ok:
+        raise RuntimeError(f"run_benchmark failed for {project}")
+    result_file = ROOT / results_root / f"{project}_results.yaml"
+    if not result_file.exists():
+        raise RuntimeError(f"no result file written: {result_file}")
+    repo = generated_repo_for(ROOT / payload["task"], payload.get("generated_root"))
+    return result_row(payload["model"], payload["mode"], project, load_result_or_default(project, result_file.parent), repo)
 
-        run_single_task(task_yaml, model_name, skip_generation)
 
-        result = load_result_or_default(project)
+def _safe_name(s: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", s)
 
-        # ✅ FIX: subscores may be stored separately (e.g. non_functional_subscores)
-        scores = result.get("scores", {}) or {}
-        nf_sub = result.get("non_functional_subscores", {}) or {}
 
-        # Prefer explicit non_functional_subscores; fallback to scores
-        def get_sub(k: str) -> float:
-            if k in nf_sub:
-                return _f(nf_sub.get(k), 0.0)
-            return _f(scores.get(k), 0.0)
+def run_via_queue(
+    model_name: str,
+    skip_generation: bool,
+    quiet: bool = False,
+    queue_db: Path = None,
+    queue_url: str = None,
+    workers: int = 0,
+    generated_root: str = None,
+) -> list:
+    """
+    Enqueue one job per task, optionally start local workers, wait, and return
+    the rows of the committed results (zero rows for jobs that failed for good).
+    Re-running the same sweep only executes jobs that are not done yet; the
+    job key includes the task YAML digest and generated_root, so a changed
+    configuration is enqueued (and run) as a new job.
+    """
+    mode_str = "eval_only" if skip_generation else "gen_and_eval"
+    queue = open_queue(queue_db, queue_url)
+    # 每个 model/mode 单独的结果目录：并发 sweep 不会互相覆盖 results/<P>_results.yaml
+    results_root = Path("results") / "queue" / _safe_name(model_name) / mode_str
 
-        rows.append({
+    keys = []
+    projects = {}
+    repos = {}
+    for task_yaml in find_all_tasks():
+        project = task_yaml.parent.name
+        # 与检查点相同的配置哈希：改了 task YAML 或 --generated-root 就是新 job，旧的 done 结果不会被当成新结果
+        unit_hash = config_hash({"task": file_digest(task_yaml), "generated_root": generated_root})
+        key = f"{model_name}|{mode_str}|{project}|{unit_hash}"
+        payload = {
+            "task": task_yaml.relative_to(ROOT).as_posix(),
+            "project": project,
             "model": model_name,
             "mode": mode_str,
-            "project": project,
-            "functional_score": _f(result.get("functional_score"), 0.0),
-            "non_functional_score": _f(result.get("non_functional_score"), 0.0),
-            "maintainability": get_sub("maintainability"),
-            "security": get_sub("security"),
-            "robustness": get_sub("robustness"),
-            "performance": get_sub("performance"),
-            "resource": get_sub("resource"),
-        })
-
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+            "skip_generation": skip_generation,
+            "quiet": quiet,
+            "results_root": results_root.as_posix(),
+            "generated_root": generated_root,
+        }
+        queue.enqueue(key, QUEUE_HANDLER, payload)
+        keys.append(key)
+        projects[key] = project
+        repos[key] = generated_repo_for(task_yaml, generated_root)
+    print(f"[INFO] Enqueued {len(keys)} tasks for {model_name} ({mode_str})")
+
+    procs = start_local_workers(workers, None if queue_url else (queue_db or DEFAULT_DB), queue_url) if workers > 0 else None
+    try:
+        jobs = wait_for(queue, keys, workers=procs)
+    finally:
+        for p in procs or []:
+            p.join()
+        queue.close()
+
+    by_key = {j["key"]: j for j in jobs}
+    rows = []
+    for key in keys:
+        job = by_key.get(key) or {}
+        if job.get("status") == "done" and isinstance(job.get("result"), dict):
+            rows.append(job["result"])
+        else:
+            print(f"[WARN] Task failed for {projects[key]}, using zero scores")
+            rows.append(result_row(model_name, mode_str, projects[key], {}, repos[key]))
+    return rows
+
+
+def write_rows(csv_path: Path, rows: list) -> None:
+    tmp = csv_path.with_name(csv_path.name + ".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
         writer.writerows(rows)
+    os.replace(tmp, csv_path)
+
+
+def main(
+    model_name: str,
+    skip_generation: bool,
+    quiet: bool = False,
+    queue_db: Path = None,
+    queue_url: str = None,
+    workers: int = 0,
+    generated_root: str = None,
+    resume: bool = False,
+    metrics_port: int = 0,
+    status_dir: str = None,
+    trace: str = None,
+):
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    suffix = "eval_only" if skip_generation else "gen_and_eval"
+    csv_path = RESULTS_DIR / f"{model_name}__{suffix}.csv"
+
+    # 任务子进程（以及本机 queue worker）继承 RACB_STATUS_DIR，各自写状态文件
+    if metrics_port or status_dir:
+        sdir = Path(status_dir) if status_dir else RESULTS_DIR / "telemetry" / f"{model_name}__{suffix}"
+        sdir = sdir if sdir.is_absolute() else ROOT / sdir
+        telemetry.reset_status_dir(sdir)
+        os.environ[telemetry.STATUS_DIR_ENV] = str(sdir)
+        if metrics_port:
+            use_queue = queue_db is not None or (workers > 0 and not queue_url)
+            telemetry.start_background_server(sdir, metrics_port, queue_db=(queue_db or DEFAULT_DB) if use_queue else None)
+
+    # 同上：任务子进程继承 RACB_TRACE_DIR，各写一个事件文件，结束时合并成一个 trace JSON
+    trace_file = None
+    if trace:
+        trace_file = Path(trace) if Path(trace).is_absolute() else ROOT / trace
+        tdir = RESULTS_DIR / "traces" / f"{model_name}__{suffix}"
+        tracing.reset_trace_dir(tdir)
+        os.environ[tracing.TRACE_DIR_ENV] = str(tdir)
+
+    if queue_db is not None or queue_url or workers > 0:
+        # 队列本身按 key 幂等，重跑即续跑
+        rows = run_via_queue(model_name, skip_generation, quiet, queue_db, queue_url, workers, generated_root)
+    else:
+        rows = []
+        mode_str = suffix
+        checkpoint = Checkpoint(RESULTS_DIR / f"{model_name}__{suffix}.checkpoint.jsonl", resume=resume)
+
+        for task_yaml in find_all_tasks():
+            project = task_yaml.parent.name
+            repo = generated_repo_for(task_yaml, generated_root)
+            unit = (model_name, mode_str, project)
+            unit_hash = config_hash({"task": file_digest(task_yaml), "generated_root": generated_root})
+
+            row = checkpoint.get(unit, unit_hash)
+            if row is not None:
+                print(f"\n=== Skipping {project} ({mode_str}): already in checkpoint ===")
+            else:
+                print(f"\n=== Running {project} ({mode_str}) ===")
+
+                if run_single_task(task_yaml, model_name, skip_generation, quiet, generated_root=generated_root):
+                    result = load_result_or_default(project)
+                    row = result_row(model_name, mode_str, project, result, repo)
+                    checkpoint.commit(unit, unit_hash, row)
+                else:
+                    # 失败的任务不写检查点：--resume 时会重跑
+                    row = result_row(model_name, mode_str, project, load_result_or_default(project), repo)
+
+            rows.append(row)
+            write_rows(csv_path, rows)
+
+    write_rows(csv_path, rows)
 
     print(f"\nAll results written to: {csv_path}")
+    if trace_file is not None:
+        n = tracing.merge_traces(Path(os.environ[tracing.TRACE_DIR_ENV]), trace_file)
+        print(f"Trace ({n} events) written to: {trace_file} (open in https://ui.perfetto.dev or chrome://tracing)")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--model", required=True)
     parser.add_argument("--skip-generation", action="store_true")
+    parser.add_argument("--quiet", action="store_true", help="Do not echo pytest output to the console")
+    parser.add_argument("--generated-root", default=None, help="Generate into <root>/<Project> instead of each task's generated_repository")
+    parser.add_argument("--queue", nargs="?", const=str(DEFAULT_DB), default=None, help="Run through the durable job queue (SQLite file)")
+    parser.add_argument("--queue-url", default=None, help="Job queue coordinator URL (python -m evaluation.job_queue serve)")
+    parser.add_argument("--workers", type=int, default=0, help="Local queue workers to start (0: rely on external workers)")
+    parser.add_argument("--resume", action="store_true", help="Skip tasks already committed to the sweep's checkpoint file")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus /metrics and JSON /status on this port")
+    parser.add_argument("--status-dir", default=None, help="Directory for per-process telemetry status files")
+    parser.add_argument("--trace", default=None, help="Write a Chrome trace (Trace Event Format JSON) of the sweep to this file")
     args = parser.parse_args()
-    main(args.model, args.skip_generation)
+    main(
+        args.model,
+        args.skip_generation,
+        args.quiet,
+        Path(args.queue) if args.queue else None,
+        args.queue_url,
+        args.workers,
+        args.generated_root,
+        args.resume,
+        args.metrics_port,
+        args.status_dir,
+        args.trace,
+    )
@@ -5,6 +5,11 @@ import csv
 import os
 from pathlib import Path
 
+try:
+    from .llm_usage import USAGE_FIELDS, generated_repo_for, usage_columns  # type: ignore
+except Exception:
+    from llm_usage import USAGE_FIELDS, generated_repo_for, usage_columns  # type: ignore
+
 ROOT = Path(__file__).resolve().parents[1]
 TASKS_DIR = ROOT / "tasks"
 
@@ -15,7 +20,9 @@ def find_all_tasks():
 
 def run_single_task(task_yaml: Path, model_name: str, skip_generation: bool,
                     generated_root: str, results_root: str,
-                    agent_timeout_s: int, always_fix_once: bool) -> bool:
+                    agent_timeout_s: int, always_fix_once: bool,
+                    repair_rounds: int = 1, agent_selection: str = "impact",
+                    agent_full_final: bool = False) -> bool:
     cmd = [
         "python",
         "-m",
@@ -28,11 +35,17 @@ def run_single_task(task_yaml: Path, model_name: str, skip_generation: bool,
         results_root,
         "--agent-timeout-s",
         str(agent_timeout_s),
+        "--repair-rounds",
+        str(repair_rounds),
+        "--agent-selection",
+        agent_selection,
     ]
     if skip_generation:
         cmd.append("--skip-generation")
     if always_fix_once:
         cmd.append("--always-fix-once")
+    if agent_full_final:
+        cmd.append("--agent-full-final")
 
     env = os.environ.copy()
     env["RACB_MODEL"] = model_name
@@ -69,6 +82,9 @@ def main():
     parser.add_argument("--results-root", default="results_m1")
     parser.add_argument("--agent-timeout-s", type=int, default=180)
     parser.add_argument("--always-fix-once", action="store_true")
+    parser.add_argument("--repair-rounds", type=int, default=1)
+    parser.add_argument("--agent-selection", default="impact", choices=["impact", "full"])
+    parser.add_argument("--agent-full-final", action="store_true")
     args = parser.parse_args()
 
     results_dir = (ROOT / args.results_root).resolve()
@@ -81,7 +97,7 @@ def main():
         "model", "mode", "strategy", "project",
         "functional_score", "non_functional_score",
         "maintainability", "security", "robustness", "performance", "resource",
-    ]
+    ] + USAGE_FIELDS
 
     rows = []
     for task_yaml in find_all_tasks():
@@ -97,6 +113,9 @@ def main():
             args.results_root,
             args.agent_timeout_s,
             args.always_fix_once,
+            repair_rounds=args.repair_rounds,
+            agent_selection=args.agent_selection,
+            agent_full_final=args.agent_full_final,
         )
 
         result = load_result_or_default(project, results_dir)
@@ -119,6 +138,7 @@ def main():
             "performance": get_sub("performance"),
             "resource": get_sub("resource"),
         })
+        rows[-1].update(usage_columns(generated_repo_for(task_yaml, args.generated_root), rows[-1]["functional_score"]))
 
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
@@ -5,6 +5,11 @@ import csv
 import os
 from pathlib import Path
 
+try:
+    from .llm_usage import USAGE_FIELDS, generated_repo_for, usage_columns  # type: ignore
+except Exception:
+    from llm_usage import USAGE_FIELDS, generated_repo_for, usage_columns  # type: ignore
+
 ROOT = Path(__file__).resolve().parents[1]
 TASKS_DIR = ROOT / "tasks"
 
@@ -77,7 +82,7 @@ def main():
         "model", "mode", "strategy", "project",
         "functional_score", "non_functional_score",
         "maintainability", "security", "robustness", "performance", "resource",
-    ]
+    ] + USAGE_FIELDS
 
     rows = []
     for task_yaml in find_all_tasks():
@@ -114,6 +119,7 @@ def main():
             "performance": get_sub("performance"),
             "resource": get_sub("resource"),
         })
+        rows[-1].update(usage_columns(generated_repo_for(task_yaml, args.generated_root), rows[-1]["functional_score"]))
 
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
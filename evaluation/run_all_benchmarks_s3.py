@@ -5,6 +5,11 @@ import csv
 import os
 from pathlib import Path
 
+try:
+    from .llm_usage import USAGE_FIELDS, generated_repo_for, usage_columns  # type: ignore
+except Exception:
+    from llm_usage import USAGE_FIELDS, generated_repo_for, usage_columns  # type: ignore
+
 ROOT = Path(__file__).resolve().parents[1]
 TASKS_DIR = ROOT / "tasks"
 RESULTS_DIR_DEFAULT = ROOT / "results_m4"
@@ -90,7 +95,7 @@ def main(model_name: str, skip_generation: bool, generated_root: str, results_ro
         "robustness",
         "performance",
         "resource",
-    ]
+    ] + USAGE_FIELDS
 
     rows = []
 
@@ -124,6 +129,7 @@ def main(model_name: str, skip_generation: bool, generated_root: str, results_ro
             "performance": get_sub("performance"),
             "resource": get_sub("resource"),
         })
+        rows[-1].update(usage_columns(generated_repo_for(task_yaml, None if use_task_generated_repo else generated_root), rows[-1]["functional_score"]))
 
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
@@ -3,6 +3,7 @@ from __future__ import annotations
 import argparse
 import os
 import re
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -13,9 +14,19 @@ from openai import OpenAI
 #   1) python -m evaluation.run_benchmark
 #   2) python evaluation/run_benchmark.py
 try:
-    from .measure_generated import run_all_tests  # type: ignore
+    from .measure_generated import run_all_tests, SHARDS_ENV  # type: ignore
+    from .log_capture import QUIET_ENV  # type: ignore
+    from . import telemetry  # type: ignore
+    from . import tracing  # type: ignore
+    from . import llm_usage  # type: ignore
+    from .prompt_budget import task_contract, task_description  # type: ignore
 except Exception:
-    from measure_generated import run_all_tests  # type: ignore
+    from measure_generated import run_all_tests, SHARDS_ENV  # type: ignore
+    from log_capture import QUIET_ENV  # type: ignore
+    import telemetry  # type: ignore
+    import tracing  # type: ignore
+    import llm_usage  # type: ignore
+    from prompt_budget import task_contract, task_description  # type: ignore
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -58,11 +69,11 @@ def parse_file_blocks(raw: str) -> List[Tuple[str, str]]:
 
 
 def build_prompt_from_task(task: Dict[str, Any]) -> str:
-    desc = task.get("description", "") or ""
+    desc = task_description(task)
     files = task.get("files", []) or []
     file_list = "\n".join([f"- {x.get('path')}" for x in files if isinstance(x, dict) and x.get("path")])
 
-    api_contract = task.get("api_contract", "") or ""
+    api_contract = task_contract(task)
     api_contract_block = ""
     if api_contract.strip():
         api_contract_block = "\n\n[API CONTRACT]\n" + api_contract.strip() + "\n"
@@ -98,21 +109,37 @@ def call_model(prompt: str, model: str) -> str:
     if api_key:
         client_kwargs["api_key"] = api_key
 
+    # 重试由 llm_usage 负责（计入 retries）
+    client_kwargs["max_retries"] = 0
+
     client = OpenAI(**client_kwargs)
 
     print("Using API configuration:")
     print(f"  Base URL: {base_url or '(default)'}")
     print(f"  Model: {model}")
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a helpful code generator."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
-    )
-    return (resp.choices[0].message.content or "").strip()
+    t0 = time.perf_counter()
+    trace_start = tracing.now_us()
+    ok = False
+    usage: Dict[str, Any] = {}
+    try:
+        text, call = llm_usage.chat_completion(
+            client,
+            model,
+            [
+                {"role": "system", "content": "You are a helpful code generator."},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.2,
+        )
+        ok = True
+        usage = {"prompt_tokens": call.prompt_tokens, "completion_tokens": call.completion_tokens,
+                 "ttft_s": call.ttft_s, "retries": call.retries}
+    finally:
+        telemetry.observe_llm(model, time.perf_counter() - t0, ok)
+        tracing.complete("llm_call", trace_start, cat="llm", model=model, ok=ok, prompt_chars=len(prompt),
+                         stage=llm_usage.current_stage(), **usage)
+    return text.strip()
 
 
 def generate_code_with_model(task: Dict[str, Any], output_repo: Path, model: str) -> None:
@@ -126,11 +153,12 @@ def generate_code_with_model(task: Dict[str, Any], output_repo: Path, model: str
         save_text(debug_file, raw)
         raise ValueError(f"Model output did not contain any <file:name=...> blocks. Saved: {debug_file}")
 
-    for rel_path, content in blocks:
-        rel_path = rel_path.lstrip("/\\")
-        dst = output_repo / rel_path
-        save_text(dst, content)
-        print(f"Saved file: {dst}")
+    with tracing.span("write_files", cat="io", files=len(blocks)):
+        for rel_path, content in blocks:
+            rel_path = rel_path.lstrip("/\\")
+            dst = output_repo / rel_path
+            save_text(dst, content)
+            print(f"Saved file: {dst}")
 
 
 def try_extract_api_contract(task: Dict[str, Any]) -> Optional[str]:
@@ -163,14 +191,25 @@ def main() -> None:
     parser.add_argument("--model", default=os.environ.get("RACB_MODEL", "gpt-4o-mini"), type=str)
     parser.add_argument("--auto-api-contract", action="store_true", help="Auto extract API contract from reference repo")
     parser.add_argument("--skip-generation", action="store_true", help="Skip code generation and evaluate existing generated repo")
+    parser.add_argument("--quiet", action="store_true", help="Do not echo pytest output to the console")
+    parser.add_argument("--generated-root", default=None, type=str, help="Put the generated repo at <root>/<Project> instead of the task's generated_repository")
+    parser.add_argument("--results-root", default="results", type=str)
+    parser.add_argument("--shards", type=int, default=None, help="Split functional/robustness suites into N parallel pytest runs")
 
     args = parser.parse_args()
+    if args.quiet:
+        os.environ[QUIET_ENV] = "1"
+    if args.shards is not None:
+        os.environ[SHARDS_ENV] = str(args.shards)
 
     task_file = Path(args.task).resolve()
     task = load_yaml(task_file)
 
     project_name = task_file.parent.name
-    generated_repo = (ROOT / Path(task.get("generated_repository", f"./generation/{project_name}"))).resolve()
+    if args.generated_root:
+        generated_repo = (ROOT / args.generated_root / project_name).resolve()
+    else:
+        generated_repo = (ROOT / Path(task.get("generated_repository", f"./generation/{project_name}"))).resolve()
 
     _ensure_empty_dir(generated_repo)
 
@@ -183,15 +222,19 @@ def main() -> None:
 
     # Generation
     if not args.skip_generation:
-        generate_code_with_model(task, generated_repo, args.model)
+        llm_usage.set_output(generated_repo)
+        with llm_usage.stage("generate"):
+            generate_code_with_model(task, generated_repo, args.model)
     else:
         print(f"跳过代码生成，直接评估已存在的代码仓库: {generated_repo}")
 
     # Evaluation (authoritative scoring/printing is inside run_all_tests)
-    result_file = ROOT / f"results/{project_name}_results.yaml"
-    result_file.parent.mkdir(parents=True, exist_ok=True)
+    results_root = (ROOT / args.results_root).resolve()
+    results_root.mkdir(parents=True, exist_ok=True)
+    result_file = results_root / f"{project_name}_results.yaml"
 
-    run_all_tests(task_file, generated_repo, result_file)
+    with tracing.span("evaluate", cat="task", project=project_name), llm_usage.stage(llm_usage.EVALUATE_STAGE):
+        run_all_tests(task_file, generated_repo, result_file)
 
     # Do NOT re-compute / re-print scores here to avoid duplicate/conflicting output.
     # Only keep a single definitive output source (measure_generated.py).
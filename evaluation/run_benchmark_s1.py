@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import argparse
+import json
 import os
 import re
+import time
 import sys
 import subprocess
+import tempfile
 from pathlib import Path
 from typing import Any, Dict, List, Tuple, Optional
 
@@ -14,8 +17,22 @@ from openai import OpenAI
 # 复用原评测逻辑（不改 measure_generated.py）
 try:
     from .measure_generated import run_all_tests  # type: ignore
+    from .log_capture import QUIET_ENV  # type: ignore
+    from . import telemetry  # type: ignore
+    from . import tracing  # type: ignore
+    from . import llm_usage  # type: ignore
+    from .prompt_budget import budgets_for, compact_pytest_output, task_contract, task_description, truncate_to_tokens  # type: ignore
+    from .pytest_harness_plugin import TEST_REPORT_ENV  # type: ignore
+    from .test_impact import AgentTestSession, read_test_report  # type: ignore
 except Exception:
     from measure_generated import run_all_tests  # type: ignore
+    from log_capture import QUIET_ENV  # type: ignore
+    import telemetry  # type: ignore
+    import tracing  # type: ignore
+    import llm_usage  # type: ignore
+    from prompt_budget import budgets_for, compact_pytest_output, task_contract, task_description, truncate_to_tokens  # type: ignore
+    from pytest_harness_plugin import TEST_REPORT_ENV  # type: ignore
+    from test_impact import AgentTestSession, read_test_report  # type: ignore
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -79,35 +96,65 @@ def call_model(prompt: str, model: str) -> str:
     if api_key:
         client_kwargs["api_key"] = api_key
 
+    # 重试由 llm_usage 负责（计入 retries）
+    client_kwargs["max_retries"] = 0
+
     client = OpenAI(**client_kwargs)
 
     print("Using API configuration:")
     print(f"  Base URL: {base_url or '(default)'}")
     print(f"  Model: {model}")
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a careful software engineer who follows instructions exactly."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
-    )
-    return (resp.choices[0].message.content or "").strip()
+    t0 = time.perf_counter()
+    trace_start = tracing.now_us()
+    ok = False
+    usage: Dict[str, Any] = {}
+    try:
+        text, call = llm_usage.chat_completion(
+            client,
+            model,
+            [
+                {"role": "system", "content": "You are a careful software engineer who follows instructions exactly."},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.2,
+        )
+        ok = True
+        usage = {"prompt_tokens": call.prompt_tokens, "completion_tokens": call.completion_tokens,
+                 "ttft_s": call.ttft_s, "retries": call.retries}
+    finally:
+        telemetry.observe_llm(model, time.perf_counter() - t0, ok)
+        tracing.complete("llm_call", trace_start, cat="llm", model=model, ok=ok, prompt_chars=len(prompt),
+                         stage=llm_usage.current_stage(), **usage)
+    return text.strip()
 
 
 # ----------------------------
 # Agent self-tests runner (generated tests)
 # ----------------------------
-def run_agent_tests(repo_root: Path, tests_dir: Path, timeout_s: int = 180) -> Dict[str, Any]:
+def run_agent_tests(
+    repo_root: Path,
+    tests_dir: Path,
+    timeout_s: int = 180,
+    targets: Optional[List[Path]] = None,
+) -> Dict[str, Any]:
     """
     只用于 agent 的自测（生成的测试用例），不参与 benchmark 计分。
+
+    ``targets`` limits the run to those test files (see evaluation/test_impact.py);
+    ``tests`` in the result maps nodeid -> outcome from the harness plugin report.
     """
     env = os.environ.copy()
     existing_pp = env.get("PYTHONPATH", "")
     env["PYTHONPATH"] = str(repo_root) + (os.pathsep + existing_pp if existing_pp else "")
 
-    cmd = [sys.executable, "-m", "pytest", str(tests_dir), "-q"]
+    fd, report_name = tempfile.mkstemp(prefix="racb_agent_", suffix=".tests.jsonl")
+    os.close(fd)
+    report_file = Path(report_name)
+    env[TEST_REPORT_ENV] = str(report_file)
+
+    paths = [str(t) for t in targets] if targets else [str(tests_dir)]
+    cmd = [sys.executable, "-m", "pytest", "-p", "evaluation.pytest_harness_plugin"] + paths + ["-q"]
     print(f"[M1] Running agent tests: {' '.join(cmd)}")
 
     try:
@@ -120,20 +167,25 @@ def run_agent_tests(repo_root: Path, tests_dir: Path, timeout_s: int = 180) -> D
             text=True,
             timeout=timeout_s,
         )
-        return {"returncode": p.returncode, "stdout": p.stdout or "", "timeout": False}
+        return {"returncode": p.returncode, "stdout": p.stdout or "", "timeout": False, "tests": read_test_report(report_file)}
     except subprocess.TimeoutExpired as e:
         out = (e.stdout or "") if isinstance(e.stdout, str) else ""
-        return {"returncode": 124, "stdout": out + "\n[M1] TIMEOUT\n", "timeout": True}
+        return {"returncode": 124, "stdout": out + "\n[M1] TIMEOUT\n", "timeout": True, "tests": read_test_report(report_file)}
     except Exception as e:
-        return {"returncode": 1, "stdout": f"[M1] ERROR running pytest: {e}\n", "timeout": False}
+        return {"returncode": 1, "stdout": f"[M1] ERROR running pytest: {e}\n", "timeout": False, "tests": {}}
+    finally:
+        try:
+            report_file.unlink()
+        except Exception:
+            pass
 
 
 # ----------------------------
 # Prompts (M1)
 # ----------------------------
 def build_plan_prompt(task: Dict[str, Any]) -> str:
-    desc = (task.get("description") or "").strip()
-    api_contract = (task.get("api_contract") or "").strip()
+    desc = task_description(task)
+    api_contract = task_contract(task)
     api_block = f"\n\n[API CONTRACT]\n{api_contract}\n" if api_contract else ""
 
     files = task.get("files", []) or []
@@ -161,14 +213,14 @@ Return ONLY raw text, no markdown, inside exactly one block:
 
 
 def build_generate_prompt(task: Dict[str, Any], plan: str) -> str:
-    desc = (task.get("description") or "").strip()
-    api_contract = (task.get("api_contract") or "").strip()
+    desc = task_description(task)
+    api_contract = task_contract(task)
     api_block = f"\n\n[API CONTRACT]\n{api_contract}\n" if api_contract else ""
 
     files = task.get("files", []) or []
     file_list = "\n".join([f"- {x.get('path')}" for x in files if isinstance(x, dict) and x.get("path")])
 
-    plan = (plan or "").strip()
+    plan = truncate_to_tokens((plan or "").strip(), budgets_for(task)["plan"])
     plan_block = f"\n\n[PLAN]\n{plan}\n" if plan else ""
 
     return f"""You are generating a Python repository AND a small internal test suite for one-round self-verification.
@@ -201,19 +253,24 @@ Each <file:...> block MUST contain the complete content of that file.
 """
 
 
-def build_fix_prompt(task: Dict[str, Any], plan: str, agent_test_output: str) -> str:
-    desc = (task.get("description") or "").strip()
-    api_contract = (task.get("api_contract") or "").strip()
+def build_fix_prompt(task: Dict[str, Any], plan: str, agent_test_output: str, round_no: int = 1, max_rounds: int = 1) -> str:
+    desc = task_description(task)
+    api_contract = task_contract(task)
     api_block = f"\n\n[API CONTRACT]\n{api_contract}\n" if api_contract else ""
-    plan = (plan or "").strip()
+    plan = truncate_to_tokens((plan or "").strip(), budgets_for(task)["plan"])
     plan_block = f"\n\n[PLAN]\n{plan}\n" if plan else ""
 
-    # 控制反馈长度，避免 prompt 过大
-    agent_test_output = (agent_test_output or "")
-    if len(agent_test_output) > 12000:
-        agent_test_output = agent_test_output[-12000:]
+    # 控制反馈长度，避免 prompt 过大：合并重复失败、压缩 traceback，保留 summary
+    agent_test_output = compact_pytest_output(agent_test_output or "", budgets_for(task)["test_output"])
+
+    if max_rounds <= 1:
+        header = "You are performing ONE repair iteration based on internal agent tests."
+        attempt_rule = "- You have only ONE repair attempt."
+    else:
+        header = f"You are performing repair iteration {round_no} of {max_rounds} based on internal agent tests."
+        attempt_rule = f"- This is repair attempt {round_no} of {max_rounds}; earlier attempts are already applied to the repository."
 
-    return f"""You are performing ONE repair iteration based on internal agent tests.
+    return f"""{header}
 
 [Task]
 {desc}{api_block}{plan_block}
@@ -222,7 +279,7 @@ def build_fix_prompt(task: Dict[str, Any], plan: str, agent_test_output: str) ->
 {agent_test_output}
 
 [Rules]
-- You have only ONE repair attempt.
+{attempt_rule}
 - Fix the repository implementation so that agent tests pass.
 - DO NOT weaken or delete tests. Prefer fixing code.
 - Do not introduce new third-party dependencies.
@@ -239,15 +296,25 @@ Return ONLY raw text, no markdown. Output ONLY the files you changed, using bloc
 # ----------------------------
 # Main M1 pipeline
 # ----------------------------
-def write_files_from_blocks(repo_root: Path, blocks: List[Tuple[str, str]], skip_paths: Optional[set] = None) -> None:
+def write_files_from_blocks(repo_root: Path, blocks: List[Tuple[str, str]], skip_paths: Optional[set] = None) -> List[str]:
+    """Write the blocks; returns the repo-relative paths whose content actually changed."""
     skip_paths = skip_paths or set()
-    for rel_path, content in blocks:
-        rel_path = rel_path.lstrip("/\\")
-        if rel_path in skip_paths:
-            continue
-        dst = repo_root / rel_path
-        save_text(dst, content)
-        print(f"Saved file: {dst}")
+    changed: List[str] = []
+    with tracing.span("write_files", cat="io", files=len(blocks)):
+        for rel_path, content in blocks:
+            rel_path = rel_path.lstrip("/\\")
+            if rel_path in skip_paths:
+                continue
+            dst = repo_root / rel_path
+            try:
+                unchanged = dst.read_text(encoding="utf-8") == content
+            except Exception:
+                unchanged = False
+            save_text(dst, content)
+            print(f"Saved file: {dst}")
+            if not unchanged and rel_path not in changed:
+                changed.append(rel_path)
+    return changed
 
 
 def main() -> None:
@@ -264,8 +331,17 @@ def main() -> None:
     # Agent tests runtime knobs
     parser.add_argument("--agent-timeout-s", default=180, type=int, help="Timeout for running agent tests")
     parser.add_argument("--always-fix-once", action="store_true", help="Run the fix step once even if agent tests pass")
+    parser.add_argument("--repair-rounds", default=1, type=int,
+                        help="Maximum repair iterations; stops early once agent tests pass")
+    parser.add_argument("--agent-selection", default="impact", choices=["impact", "full"],
+                        help="After a fix, rerun only the agent tests affected by the changed files (impact) or all of them")
+    parser.add_argument("--agent-full-final", action="store_true",
+                        help="With --agent-selection impact: finish with one full agent-test run")
+    parser.add_argument("--quiet", action="store_true", help="Do not echo pytest output to the console")
 
     args = parser.parse_args()
+    if args.quiet:
+        os.environ[QUIET_ENV] = "1"
 
     task_file = Path(args.task).resolve()
     task = load_yaml(task_file)
@@ -280,16 +356,20 @@ def main() -> None:
     agent_after = {"returncode": 1, "stdout": "", "timeout": False}
 
     if not args.skip_generation:
+        llm_usage.set_output(generated_repo)
+
         # Stage-0: Analysis/Plan
         print("[M1] Stage-0: analysis / planning...")
-        raw_plan = call_model(build_plan_prompt(task), model=args.model)
+        with llm_usage.stage("plan"):
+            raw_plan = call_model(build_plan_prompt(task), model=args.model)
         plan_text = parse_plan(raw_plan)
         save_text(generated_repo / "_m1_plan_raw.txt", raw_plan)
         save_text(generated_repo / "_m1_plan.txt", plan_text)
 
         # Stage-1: Generate code + internal tests
         print("[M1] Stage-1: generating code + agent tests...")
-        raw_gen = call_model(build_generate_prompt(task, plan_text), model=args.model)
+        with llm_usage.stage("generate"):
+            raw_gen = call_model(build_generate_prompt(task, plan_text), model=args.model)
         save_text(generated_repo / "_m1_raw_model_output.txt", raw_gen)
 
         blocks = parse_file_blocks(raw_gen)
@@ -300,44 +380,73 @@ def main() -> None:
 
         # Stage-2: Run agent tests (before fix)
         print("[M1] Stage-2: running agent tests (before fix)...")
+        session = AgentTestSession(
+            generated_repo,
+            agent_tests_dir,
+            runner=lambda targets: run_agent_tests(generated_repo, agent_tests_dir, timeout_s=args.agent_timeout_s, targets=targets),
+        )
         if not agent_tests_dir.exists():
             save_text(generated_repo / "_m1_agent_before.log", "[M1] No _agent_tests directory generated.\n")
             agent_before = {"returncode": 1, "stdout": "[M1] No _agent_tests directory generated.\n", "timeout": False}
         else:
-            agent_before = run_agent_tests(generated_repo, agent_tests_dir, timeout_s=args.agent_timeout_s)
+            with llm_usage.stage("agent_tests"):
+                agent_before = session.run_full()
             save_text(generated_repo / "_m1_agent_before.log", agent_before.get("stdout", ""))
 
-        # Stage-3: One repair (conditional)
+        # Stage-3: Repair rounds (conditional). 每轮只重跑受本轮改动影响的 agent tests
+        rounds = max(1, int(args.repair_rounds))
+        current = agent_before
+        rounds_done = 0
         need_fix = args.always_fix_once or (int(agent_before.get("returncode", 1)) != 0)
-        if need_fix:
-            print("[M1] Stage-3: one-shot repair...")
-            raw_fix = call_model(build_fix_prompt(task, plan_text, agent_before.get("stdout", "")), model=args.model)
-            save_text(generated_repo / "_m1_fix_raw_model_output.txt", raw_fix)
-
+        if not need_fix:
+            save_text(generated_repo / "_m1_fix_apply_status.txt", "Agent tests passed; fix step skipped.\n")
+        while need_fix and rounds_done < rounds:
+            rounds_done += 1
+            suffix = "" if rounds_done == 1 else f"_r{rounds_done}"
+            print(f"[M1] Stage-3: repair round {rounds_done}/{rounds}...")
+            with llm_usage.stage(f"fix_{rounds_done}"):
+                raw_fix = call_model(
+                    build_fix_prompt(task, plan_text, current.get("stdout", ""), round_no=rounds_done, max_rounds=rounds),
+                    model=args.model,
+                )
+            save_text(generated_repo / f"_m1_fix_raw_model_output{suffix}.txt", raw_fix)
+
+            changed: List[str] = []
             fix_blocks = parse_file_blocks(raw_fix)
             if not fix_blocks:
-                save_text(generated_repo / "_m1_fix_apply_status.txt", "No file blocks in fix output; nothing applied.\n")
+                save_text(generated_repo / f"_m1_fix_apply_status{suffix}.txt", "No file blocks in fix output; nothing applied.\n")
             else:
                 # 修复阶段原则上不允许改 agent tests；只修代码
-                write_files_from_blocks(generated_repo, fix_blocks, skip_paths={"_agent_tests/test_agent_basic.py"} if False else set())
+                changed = write_files_from_blocks(generated_repo, fix_blocks, skip_paths={"_agent_tests/test_agent_basic.py"} if False else set())
 
             # Stage-3b: Run agent tests (after fix)
-            print("[M1] Stage-3b: running agent tests (after fix)...")
+            print(f"[M1] Stage-3b: running agent tests (after repair round {rounds_done})...")
             if agent_tests_dir.exists():
-                agent_after = run_agent_tests(generated_repo, agent_tests_dir, timeout_s=args.agent_timeout_s)
-                save_text(generated_repo / "_m1_agent_after.log", agent_after.get("stdout", ""))
+                with llm_usage.stage("agent_tests"):
+                    if args.agent_selection == "impact":
+                        current = session.run_changed(changed, round_no=rounds_done)
+                    else:
+                        current = session.run_full(round_no=rounds_done)
             else:
-                agent_after = {"returncode": 1, "stdout": "[M1] No _agent_tests directory.\n", "timeout": False}
-                save_text(generated_repo / "_m1_agent_after.log", agent_after["stdout"])
-
-        else:
-            save_text(generated_repo / "_m1_fix_apply_status.txt", "Agent tests passed; fix step skipped.\n")
+                current = {"returncode": 1, "stdout": "[M1] No _agent_tests directory.\n", "timeout": False}
+            save_text(generated_repo / f"_m1_agent_round{rounds_done}.log", current.get("stdout", ""))
+            need_fix = int(current.get("returncode", 1)) != 0
+
+        if rounds_done:
+            if args.agent_full_final and args.agent_selection == "impact" and agent_tests_dir.exists():
+                print("[M1] Stage-3c: final full agent-test run...")
+                with llm_usage.stage("agent_tests"):
+                    current = session.run_full(round_no=rounds_done)
+            agent_after = current
+            save_text(generated_repo / "_m1_agent_after.log", agent_after.get("stdout", ""))
+            save_text(generated_repo / "_m1_agent_impact.json", json.dumps(session.history, indent=2))
 
         # Record status summary
         save_text(
             generated_repo / "_m1_status.txt",
             f"agent_before_returncode={agent_before.get('returncode')}\n"
             f"agent_after_returncode={agent_after.get('returncode')}\n"
+            f"repair_rounds={rounds_done}\n"
         )
 
     else:
@@ -349,7 +458,8 @@ def main() -> None:
     results_root.mkdir(parents=True, exist_ok=True)
     result_file = results_root / f"{project_name}_results.yaml"
 
-    run_all_tests(task_file, generated_repo, result_file)
+    with tracing.span("evaluate", cat="task", project=project_name), llm_usage.stage(llm_usage.EVALUATE_STAGE):
+        run_all_tests(task_file, generated_repo, result_file)
     print(f"Wrote results to: {result_file}")
 
 
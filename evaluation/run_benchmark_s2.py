@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
 import os
 import re
+import time
 import sys
 import subprocess
 from pathlib import Path
@@ -14,8 +17,20 @@ from openai import OpenAI
 # 复用原评测逻辑（不改 measure_generated.py）
 try:
     from .measure_generated import run_all_tests  # type: ignore
+    from .log_capture import QUIET_ENV  # type: ignore
+    from . import telemetry  # type: ignore
+    from . import tracing  # type: ignore
+    from . import llm_usage  # type: ignore
+    from .prompt_budget import task_contract, task_description  # type: ignore
+    from .dep_env import materialize_env, remove_env, venv_root  # type: ignore
 except Exception:
     from measure_generated import run_all_tests  # type: ignore
+    from log_capture import QUIET_ENV  # type: ignore
+    import telemetry  # type: ignore
+    import tracing  # type: ignore
+    import llm_usage  # type: ignore
+    from prompt_budget import task_contract, task_description  # type: ignore
+    from dep_env import materialize_env, remove_env, venv_root  # type: ignore
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -89,32 +104,48 @@ def call_model(prompt: str, model: str) -> str:
     if api_key:
         client_kwargs["api_key"] = api_key
 
+    # 重试由 llm_usage 负责（计入 retries）
+    client_kwargs["max_retries"] = 0
+
     client = OpenAI(**client_kwargs)
 
     print("Using API configuration:")
     print(f"  Base URL: {base_url or '(default)'}")
     print(f"  Model: {model}")
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a helpful code generator."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
-    )
-    return (resp.choices[0].message.content or "").strip()
+    t0 = time.perf_counter()
+    trace_start = tracing.now_us()
+    ok = False
+    usage: Dict[str, Any] = {}
+    try:
+        text, call = llm_usage.chat_completion(
+            client,
+            model,
+            [
+                {"role": "system", "content": "You are a helpful code generator."},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.2,
+        )
+        ok = True
+        usage = {"prompt_tokens": call.prompt_tokens, "completion_tokens": call.completion_tokens,
+                 "ttft_s": call.ttft_s, "retries": call.retries}
+    finally:
+        telemetry.observe_llm(model, time.perf_counter() - t0, ok)
+        tracing.complete("llm_call", trace_start, cat="llm", model=model, ok=ok, prompt_chars=len(prompt),
+                         stage=llm_usage.current_stage(), **usage)
+    return text.strip()
 
 
 # ----------------------------
 # prompts (M3)
 # ----------------------------
 def build_dependency_prompt(task: Dict[str, Any]) -> str:
-    desc = (task.get("description") or "").strip()
+    desc = task_description(task)
     files = task.get("files", []) or []
     file_list = "\n".join([f"- {x.get('path')}" for x in files if isinstance(x, dict) and x.get("path")])
 
-    api_contract = (task.get("api_contract") or "").strip()
+    api_contract = task_contract(task)
     api_contract_block = f"\n\n[API CONTRACT]\n{api_contract}\n" if api_contract else ""
 
     return f"""You are preparing Python third-party dependencies for a repository.
@@ -144,11 +175,11 @@ package3==a.b.c
 
 
 def build_code_prompt_with_dep_hint(task: Dict[str, Any], requirements_txt: str) -> str:
-    desc = (task.get("description") or "").strip()
+    desc = task_description(task)
     files = task.get("files", []) or []
     file_list = "\n".join([f"- {x.get('path')}" for x in files if isinstance(x, dict) and x.get("path")])
 
-    api_contract = (task.get("api_contract") or "").strip()
+    api_contract = task_contract(task)
     api_contract_block = f"\n\n[API CONTRACT]\n{api_contract}\n" if api_contract else ""
 
     req_block = (requirements_txt or "").strip()
@@ -217,6 +248,33 @@ def pip_install_requirements(repo_root: Path, timeout_s: int = 900) -> bool:
         return False
 
 
+def task_env_dir(repo_root: Path, project_name: str) -> Path:
+    # 每个生成仓库一份克隆：不同模型并发评测同一项目互不影响
+    tag = hashlib.sha1(str(repo_root.resolve()).encode("utf-8")).hexdigest()[:8]
+    return venv_root() / "tasks" / f"{project_name}-{tag}"
+
+
+def prepare_dep_env(repo_root: Path, project_name: str, timeout_s: int = 900) -> Optional[str]:
+    """
+    Cached venv (evaluation/dep_env.py) for the repo's requirements.txt, cloned
+    for this task. Returns the interpreter to evaluate with (None -> harness interpreter).
+    """
+    req = repo_root / "requirements.txt"
+    if not req.exists():
+        print("[M3] No requirements.txt found, evaluate with the harness interpreter.")
+        return None
+    info = materialize_env(req, task_env_dir(repo_root, project_name), timeout_s=timeout_s)
+    if info.get("python") is None:
+        print(f"[M3] dependency env build FAILED (key={info['key']}), log={info.get('log')}")
+    else:
+        print(
+            f"[M3] dependency env key={info['key']} cached={info['cached']} build={info['build_time_s']}s "
+            f"clone={info['clone_method']} {info['clone_time_s']}s -> {info['env']}"
+        )
+    save_text(repo_root / "_m3_env.json", json.dumps(info, indent=2))
+    return info.get("python")
+
+
 # ----------------------------
 # generation (M3)
 # ----------------------------
@@ -234,14 +292,15 @@ def generate_code_with_model_m3(task: Dict[str, Any], output_repo: Path, model:
     # 防止模型覆盖我们自动生成的依赖文件（确保“生成依赖→安装→测试”链路稳定）
     skip_names = {"requirements.txt", "pyproject.toml", "setup.py", "setup.cfg"}
 
-    for rel_path, content in blocks:
-        rel_path = rel_path.lstrip("/\\")
-        if rel_path in skip_names:
-            print(f"[M3] Skip writing {rel_path} (managed by M3 pipeline).")
-            continue
-        dst = output_repo / rel_path
-        save_text(dst, content)
-        print(f"Saved file: {dst}")
+    with tracing.span("write_files", cat="io", files=len(blocks)):
+        for rel_path, content in blocks:
+            rel_path = rel_path.lstrip("/\\")
+            if rel_path in skip_names:
+                print(f"[M3] Skip writing {rel_path} (managed by M3 pipeline).")
+                continue
+            dst = output_repo / rel_path
+            save_text(dst, content)
+            print(f"Saved file: {dst}")
 
 
 def main() -> None:
@@ -251,12 +310,19 @@ def main() -> None:
 
     parser.add_argument("--skip-generation", action="store_true", help="Skip generation and evaluate existing repo")
     parser.add_argument("--skip-install", action="store_true", help="Skip pip install even if requirements.txt exists")
+    # 默认 system：参考基线是在 harness 解释器里测的，venv 模式需显式开启
+    parser.add_argument("--dep-env", choices=["venv", "system"], default="system",
+                        help="system: pip install into the harness interpreter (default, same environment as the "
+                             "reference baselines); venv: cached per-requirements venv cloned per task")
 
     # 输出隔离（默认不覆盖 baseline）
     parser.add_argument("--generated-root", default="generation_m3", type=str)
     parser.add_argument("--results-root", default="results_m3", type=str)
+    parser.add_argument("--quiet", action="store_true", help="Do not echo pytest output to the console")
 
     args = parser.parse_args()
+    if args.quiet:
+        os.environ[QUIET_ENV] = "1"
 
     task_file = Path(args.task).resolve()
     task = load_yaml(task_file)
@@ -266,25 +332,30 @@ def main() -> None:
     _ensure_dir(generated_repo)
 
     if not args.skip_generation:
+        llm_usage.set_output(generated_repo)
+
         # Stage-1: 生成依赖列表
         print("[M3] Stage-1: generating requirements.txt ...")
         dep_prompt = build_dependency_prompt(task)
-        raw_req = call_model(dep_prompt, model=args.model)
+        with llm_usage.stage("dependencies"):
+            raw_req = call_model(dep_prompt, model=args.model)
         req_txt = parse_requirements(raw_req)
 
         save_text(generated_repo / "_m3_requirements_raw.txt", raw_req)
         save_text(generated_repo / "requirements.txt", req_txt + ("\n" if req_txt else ""))
 
-        # Stage-2: 安装依赖
-        if not args.skip_install:
-            ok = pip_install_requirements(generated_repo)
-            save_text(generated_repo / "_m3_install_status.txt", f"ok={ok}\n")
-        else:
+        # Stage-2: 安装依赖（venv 模式在评测前准备，见 Stage-4）
+        if args.skip_install:
             print("[M3] Skip pip install by --skip-install")
+        elif args.dep_env == "system":
+            with llm_usage.stage("install"):
+                ok = pip_install_requirements(generated_repo)
+            save_text(generated_repo / "_m3_install_status.txt", f"ok={ok}\n")
 
         # Stage-3: 生成仓库代码（带依赖提示）
         print("[M3] Stage-3: generating code with dependency hint ...")
-        generate_code_with_model_m3(task, generated_repo, args.model, req_txt)
+        with llm_usage.stage("generate"):
+            generate_code_with_model_m3(task, generated_repo, args.model, req_txt)
 
     else:
         print(f"跳过代码生成，直接评估已存在的代码仓库: {generated_repo}")
@@ -294,7 +365,17 @@ def main() -> None:
     results_root.mkdir(parents=True, exist_ok=True)
     result_file = results_root / f"{project_name}_results.yaml"
 
-    run_all_tests(task_file, generated_repo, result_file)
+    python_executable = None
+    if args.dep_env == "venv" and not args.skip_install:
+        with llm_usage.stage("install"):
+            python_executable = prepare_dep_env(generated_repo, project_name)
+
+    try:
+        with tracing.span("evaluate", cat="task", project=project_name), llm_usage.stage(llm_usage.EVALUATE_STAGE):
+            run_all_tests(task_file, generated_repo, result_file, python_executable=python_executable)
+    finally:
+        if python_executable is not None:
+            remove_env(task_env_dir(generated_repo, project_name))
     print(f"Wrote results to: {result_file}")
 
 
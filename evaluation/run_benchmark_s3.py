@@ -3,6 +3,7 @@ from __future__ import annotations
 import argparse
 import os
 import re
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -12,8 +13,18 @@ from openai import OpenAI
 # 复用原评测逻辑（不改 measure_generated.py）
 try:
     from .measure_generated import run_all_tests  # type: ignore
+    from .log_capture import QUIET_ENV  # type: ignore
+    from . import telemetry  # type: ignore
+    from . import tracing  # type: ignore
+    from . import llm_usage  # type: ignore
+    from .prompt_budget import task_contract, task_description  # type: ignore
 except Exception:
     from measure_generated import run_all_tests  # type: ignore
+    from log_capture import QUIET_ENV  # type: ignore
+    import telemetry  # type: ignore
+    import tracing  # type: ignore
+    import llm_usage  # type: ignore
+    from prompt_budget import task_contract, task_description  # type: ignore
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -66,11 +77,11 @@ def parse_contract(raw: str) -> str:
 
 
 def build_contract_prompt(task: Dict[str, Any]) -> str:
-    desc = (task.get("description") or "").strip()
+    desc = task_description(task)
     files = task.get("files", []) or []
     file_list = "\n".join([f"- {x.get('path')}" for x in files if isinstance(x, dict) and x.get("path")])
 
-    api_contract = (task.get("api_contract") or "").strip()
+    api_contract = task_contract(task)
     api_contract_block = f"\n\n[API CONTRACT]\n{api_contract}\n" if api_contract else ""
 
     return f"""You are analyzing requirements for a Python repository.
@@ -103,11 +114,11 @@ Inside <contract>, include (in order):
 
 
 def build_code_prompt(task: Dict[str, Any], derived_contract: str) -> str:
-    desc = (task.get("description") or "").strip()
+    desc = task_description(task)
     files = task.get("files", []) or []
     file_list = "\n".join([f"- {x.get('path')}" for x in files if isinstance(x, dict) and x.get("path")])
 
-    api_contract = (task.get("api_contract") or "").strip()
+    api_contract = task_contract(task)
     api_contract_block = f"\n\n[API CONTRACT]\n{api_contract}\n" if api_contract else ""
 
     derived_contract = (derived_contract or "").strip()
@@ -142,21 +153,37 @@ def call_model(prompt: str, model: str) -> str:
     if api_key:
         client_kwargs["api_key"] = api_key
 
+    # 重试由 llm_usage 负责（计入 retries）
+    client_kwargs["max_retries"] = 0
+
     client = OpenAI(**client_kwargs)
 
     print("Using API configuration:")
     print(f"  Base URL: {base_url or '(default)'}")
     print(f"  Model: {model}")
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a helpful code generator."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
-    )
-    return (resp.choices[0].message.content or "").strip()
+    t0 = time.perf_counter()
+    trace_start = tracing.now_us()
+    ok = False
+    usage: Dict[str, Any] = {}
+    try:
+        text, call = llm_usage.chat_completion(
+            client,
+            model,
+            [
+                {"role": "system", "content": "You are a helpful code generator."},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.2,
+        )
+        ok = True
+        usage = {"prompt_tokens": call.prompt_tokens, "completion_tokens": call.completion_tokens,
+                 "ttft_s": call.ttft_s, "retries": call.retries}
+    finally:
+        telemetry.observe_llm(model, time.perf_counter() - t0, ok)
+        tracing.complete("llm_call", trace_start, cat="llm", model=model, ok=ok, prompt_chars=len(prompt),
+                         stage=llm_usage.current_stage(), **usage)
+    return text.strip()
 
 
 def try_extract_api_contract(task: Dict[str, Any]) -> Optional[str]:
@@ -190,7 +217,8 @@ def generate_m4(task: Dict[str, Any], output_repo: Path, model: str) -> None:
     # Stage-1: contract
     print("[M4] Stage-1: generating derived contract...")
     p1 = build_contract_prompt(task)
-    raw_contract = call_model(p1, model=model)
+    with llm_usage.stage("contract"):
+        raw_contract = call_model(p1, model=model)
     contract = parse_contract(raw_contract)
 
     save_text(output_repo / "_m4_contract_raw.txt", raw_contract)
@@ -199,7 +227,8 @@ def generate_m4(task: Dict[str, Any], output_repo: Path, model: str) -> None:
     # Stage-2: code
     print("[M4] Stage-2: generating repository code with derived contract...")
     p2 = build_code_prompt(task, contract)
-    raw_code = call_model(p2, model=model)
+    with llm_usage.stage("generate"):
+        raw_code = call_model(p2, model=model)
 
     save_text(output_repo / "_m4_raw_model_output.txt", raw_code)
 
@@ -210,11 +239,12 @@ def generate_m4(task: Dict[str, Any], output_repo: Path, model: str) -> None:
             f"Saved raw output to: {output_repo / '_m4_raw_model_output.txt'}"
         )
 
-    for rel_path, content in blocks:
-        rel_path = rel_path.lstrip("/\\")
-        dst = output_repo / rel_path
-        save_text(dst, content)
-        print(f"Saved file: {dst}")
+    with tracing.span("write_files", cat="io", files=len(blocks)):
+        for rel_path, content in blocks:
+            rel_path = rel_path.lstrip("/\\")
+            dst = output_repo / rel_path
+            save_text(dst, content)
+            print(f"Saved file: {dst}")
 
 
 def main() -> None:
@@ -230,8 +260,11 @@ def main() -> None:
 
     # 如你确实想沿用 YAML 里的 generated_repository（会覆盖），可显式打开
     parser.add_argument("--use-task-generated-repo", action="store_true", help="Use task['generated_repository'] path (may overwrite baseline)")
+    parser.add_argument("--quiet", action="store_true", help="Do not echo pytest output to the console")
 
     args = parser.parse_args()
+    if args.quiet:
+        os.environ[QUIET_ENV] = "1"
 
     task_file = Path(args.task).resolve()
     task = load_yaml(task_file)
@@ -254,6 +287,7 @@ def main() -> None:
 
     # Generation
     if not args.skip_generation:
+        llm_usage.set_output(generated_repo)
         generate_m4(task, generated_repo, args.model)
     else:
         print(f"跳过代码生成，直接评估已存在的代码仓库: {generated_repo}")
@@ -263,7 +297,8 @@ def main() -> None:
     results_root.mkdir(parents=True, exist_ok=True)
     result_file = results_root / f"{project_name}_results.yaml"
 
-    run_all_tests(task_file, generated_repo, result_file)
+    with tracing.span("evaluate", cat="task", project=project_name), llm_usage.stage(llm_usage.EVALUATE_STAGE):
+        run_all_tests(task_file, generated_repo, result_file)
     print(f"Wrote results to: {result_file}")
 
 
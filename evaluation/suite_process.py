@@ -0,0 +1,301 @@
+"""
+Process isolation for suite subprocesses.
+
+Each pytest suite is started in its own session / process group (and, when the
+harness is allowed to create one, its own cgroup v2 leaf), so it can be torn
+down atomically with killpg / cgroup.kill instead of walking a process tree
+that daemonized helpers have already escaped.
+
+isolate_suite() moves a started suite into its cgroup and applies per-suite
+resource limits (address space, CPU seconds, open files, file size) with
+prlimit from the harness side, right after Popen.
+
+After a suite exits, find_leaked() lists whatever it left running (processes
+still in the session or cgroup, and any listening sockets they hold) so the
+runner can report them before tearing them down.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+try:  # POSIX only
+    import resource
+except Exception:  # pragma: no cover
+    resource = None  # type: ignore
+
+# resource_limits 配置项 -> (RLIMIT 名称, 单位换算)
+RLIMIT_KEYS: Dict[str, Any] = {
+    "address_space_mb": ("RLIMIT_AS", 1024 * 1024),
+    "cpu_s": ("RLIMIT_CPU", 1),
+    "open_files": ("RLIMIT_NOFILE", 1),
+    "file_size_mb": ("RLIMIT_FSIZE", 1024 * 1024),
+}
+
+# CPU 软限制先发 SIGXCPU（便于归类），宽限若干秒后硬限制再 SIGKILL
+CPU_HARD_GRACE_S = 5
+
+# 可选：指定一个已委托（delegated）的 cgroup v2 目录；不设置时尝试在当前进程所在 cgroup 下创建
+CGROUP_ROOT_ENV = "RACB_CGROUP_ROOT"
+
+
+def _cgroup2_mount() -> Optional[Path]:
+    try:
+        with open("/proc/self/mountinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                left, _, right = line.partition(" - ")
+                if right.split(" ", 1)[0] == "cgroup2":
+                    return Path(left.split(" ")[4])
+    except Exception:
+        pass
+    return None
+
+
+def _own_cgroup2_dir() -> Optional[Path]:
+    mount = _cgroup2_mount()
+    if mount is None:
+        return None
+    try:
+        with open("/proc/self/cgroup", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    rel = line.strip()[3:].lstrip("/")
+                    return mount / rel
+    except Exception:
+        pass
+    return None
+
+
+def create_suite_cgroup(tag: str) -> Optional[Path]:
+    """Create a leaf cgroup for one suite; None when cgroup v2 is unavailable or not writable."""
+    if os.name == "nt":
+        return None
+    base_env = os.environ.get(CGROUP_ROOT_ENV, "").strip()
+    base = Path(base_env) if base_env else _own_cgroup2_dir()
+    if base is None or not (base / "cgroup.procs").exists():
+        return None
+    safe_tag = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in tag)[:48]
+    cg = base / f"racb-{safe_tag}-{uuid.uuid4().hex[:8]}"
+    try:
+        cg.mkdir()
+    except Exception:
+        return None
+    if not os.access(cg / "cgroup.procs", os.W_OK):
+        remove_suite_cgroup(cg)
+        return None
+    return cg
+
+
+def remove_suite_cgroup(cg: Optional[Path]) -> None:
+    if cg is None:
+        return
+    for _ in range(20):
+        try:
+            cg.rmdir()
+            return
+        except FileNotFoundError:
+            return
+        except Exception:
+            time.sleep(0.05)
+
+
+def _cgroup_pids(cg: Optional[Path]) -> List[int]:
+    if cg is None:
+        return []
+    try:
+        return [int(x) for x in (cg / "cgroup.procs").read_text().split()]
+    except Exception:
+        return []
+
+
+def _rlimit_settings(limits: Optional[Dict[str, Any]]) -> List[Any]:
+    # (配置项, RLIMIT 常量, soft, hard)
+    if resource is None or not limits or not hasattr(resource, "prlimit"):
+        return []
+    settings: List[Any] = []
+    for key, (name, scale) in RLIMIT_KEYS.items():
+        value = limits.get(key)
+        res = getattr(resource, name, None)
+        try:
+            value = float(value) if value is not None else 0.0
+        except Exception:
+            continue
+        if res is None or value <= 0:
+            continue
+        soft = int(value * scale)
+        hard = soft + CPU_HARD_GRACE_S if key == "cpu_s" else soft
+        settings.append((key, res, soft, hard))
+    return settings
+
+
+def apply_rlimits(pid: int, limits: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply ``limits`` (keys of RLIMIT_KEYS; missing/None/<=0 means unlimited)
+    to the running process ``pid`` with prlimit(2). Returns the limits that
+    were actually set (Linux only; empty elsewhere).
+    """
+    applied: Dict[str, Any] = {}
+    for key, res, soft, hard in _rlimit_settings(limits):
+        try:
+            _, cur_hard = resource.prlimit(pid, res)
+            if cur_hard != resource.RLIM_INFINITY:
+                hard = min(hard, cur_hard)
+                soft = min(soft, hard)
+            resource.prlimit(pid, res, (soft, hard))
+            applied[key] = limits[key]  # type: ignore[index]
+        except Exception:
+            pass
+    return applied
+
+
+def join_cgroup(cg: Optional[Path], pid: int) -> bool:
+    """Move ``pid`` into the suite cgroup (written by the harness, not by the child)."""
+    if cg is None:
+        return False
+    try:
+        with open(cg / "cgroup.procs", "w") as f:
+            f.write(str(pid))
+        return True
+    except Exception:
+        return False
+
+
+def isolate_suite(proc: psutil.Popen, cg: Optional[Path] = None, limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Put a freshly started suite into its cgroup and apply its resource limits,
+    from the parent right after Popen. preexec_fn is not used on purpose: the
+    harness has threads (stdout pump, shards, telemetry server) when it spawns
+    suites, and preexec_fn can deadlock in a forked child of a threaded process.
+    The child is still in interpreter start-up at this point, before pytest
+    imports anything or starts subprocesses of its own.
+    """
+    join_cgroup(cg, proc.pid)
+    return apply_rlimits(proc.pid, limits)
+
+
+def popen_isolation_kwargs() -> Dict[str, Any]:
+    """Keyword arguments for (psutil.)Popen that start the child in a fresh session/process group."""
+    if os.name == "nt":
+        return {"creationflags": getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)}
+    return {"start_new_session": True}
+
+
+def _session_members(sid: int) -> List[psutil.Process]:
+    out: List[psutil.Process] = []
+    if os.name == "nt":
+        return out
+    for p in psutil.process_iter(["pid"]):
+        try:
+            if p.pid != os.getpid() and os.getsid(p.pid) == sid:
+                out.append(p)
+        except Exception:
+            continue
+    return out
+
+
+def _listening_sockets(p: psutil.Process) -> List[str]:
+    try:
+        conns = p.net_connections(kind="inet") if hasattr(p, "net_connections") else p.connections(kind="inet")
+    except Exception:
+        return []
+    out: List[str] = []
+    for c in conns:
+        if c.status == psutil.CONN_LISTEN and c.laddr:
+            out.append(f"{c.laddr.ip}:{c.laddr.port}")
+    return out
+
+
+def find_leaked(proc: psutil.Popen, cg: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Processes (and their listening sockets) a finished suite left behind:
+    members of its session or cgroup, plus any children still attached.
+    """
+    procs: Dict[int, psutil.Process] = {}
+    for p in _session_members(proc.pid):
+        procs[p.pid] = p
+    for pid in _cgroup_pids(cg):
+        try:
+            procs.setdefault(pid, psutil.Process(pid))
+        except Exception:
+            continue
+    try:
+        for p in proc.children(recursive=True):
+            procs.setdefault(p.pid, p)
+    except Exception:
+        pass
+    procs.pop(proc.pid, None)
+
+    leaked: List[Dict[str, Any]] = []
+    listeners: List[str] = []
+    for pid, p in sorted(procs.items()):
+        try:
+            if p.status() == psutil.STATUS_ZOMBIE:
+                continue
+            name = p.name()
+            cmdline = " ".join(p.cmdline())[:300]
+        except Exception:
+            continue
+        socks = _listening_sockets(p)
+        leaked.append({"pid": pid, "name": name, "cmdline": cmdline, "listening": socks})
+        listeners.extend(f"{s} (pid {pid})" for s in socks)
+
+    return {"leaked_processes": leaked, "leaked_listeners": listeners}
+
+
+def _kill_process_tree(proc: psutil.Popen) -> None:
+    try:
+        children = proc.children(recursive=True)
+    except Exception:
+        children = []
+    for c in children:
+        try:
+            c.kill()
+        except Exception:
+            pass
+    try:
+        proc.kill()
+    except Exception:
+        pass
+
+
+def terminate_suite(proc: psutil.Popen, cg: Optional[Path] = None, wait_s: float = 5.0) -> None:
+    """Kill everything the suite started: cgroup first, then its process group, then the visible tree."""
+    if cg is not None:
+        kill_file = cg / "cgroup.kill"
+        try:
+            if kill_file.exists():
+                kill_file.write_text("1")
+            else:
+                for pid in _cgroup_pids(cg):
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except Exception:
+                        pass
+        except Exception:
+            pass
+
+    if os.name != "nt":
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except Exception:
+            pass
+        for p in _session_members(proc.pid):
+            try:
+                p.kill()
+            except Exception:
+                pass
+
+    _kill_process_tree(proc)
+    try:
+        proc.wait(timeout=wait_s)
+    except Exception:
+        pass
+    remove_suite_cgroup(cg)
@@ -0,0 +1,405 @@
+"""
+Live telemetry for long sweeps.
+
+Every harness process keeps a small in-memory state:
+  - running suites (project/suite, elapsed vs timeout, latest sampled RSS/CPU),
+  - completed-suite latency histograms,
+  - LLM call latency histograms,
+  - harness overhead (time spent in the psutil sampling loop).
+
+When RACB_STATUS_DIR is set the state is written (atomically, throttled) to
+``<dir>/<host>-<pid>.json``. Since run_all_benchmarks runs every task in its
+own subprocess -- and queue workers may run on several hosts -- the metrics
+server aggregates all status files in the directory (plus job counts from the
+queue database, when given) on each request:
+
+  GET /metrics   Prometheus text format
+  GET /status    aggregated JSON
+
+  python -m evaluation.telemetry serve --status-dir results/telemetry --port 9464 [--queue results/queue/jobs.db]
+
+run_all_benchmarks --metrics-port N starts the same server in-process.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import psutil
+
+STATUS_DIR_ENV = "RACB_STATUS_DIR"
+METRICS_PORT_ENV = "RACB_METRICS_PORT"
+
+SUITE_BUCKETS_S: Sequence[float] = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800)
+LLM_BUCKETS_S: Sequence[float] = (1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+# 状态文件最多每隔这么多秒写一次（suite 开始/结束时总会写）
+WRITE_INTERVAL_S = 2.0
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {
+    "host": socket.gethostname(),
+    "pid": os.getpid(),
+    "started_at": time.time(),
+    "updated_at": time.time(),
+    "task": None,
+    "active_suites": {},
+    "suite_latency": {},
+    "suites_completed": {},
+    "llm_latency": {},
+    "sampler": {"seconds": 0.0, "samples": 0},
+}
+_last_write = 0.0
+_next_id = 0
+
+
+def _new_hist(buckets: Sequence[float]) -> Dict[str, Any]:
+    return {"buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+
+
+def _observe(hist: Dict[str, Any], value: float) -> None:
+    for i, b in enumerate(hist["buckets"]):
+        if value <= b:
+            hist["counts"][i] += 1
+    hist["sum"] += float(value)
+    hist["count"] += 1
+
+
+def _status_path() -> Optional[Path]:
+    d = os.environ.get(STATUS_DIR_ENV, "").strip()
+    if not d:
+        return None
+    return Path(d) / f"{_state['host']}-{_state['pid']}.json"
+
+
+def _flush(force: bool = False) -> None:
+    """Write this process's status file (caller holds _lock)."""
+    global _last_write
+    path = _status_path()
+    if path is None:
+        return
+    now = time.time()
+    if not force and now - _last_write < WRITE_INTERVAL_S:
+        return
+    _state["updated_at"] = now
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(_state, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+        _last_write = now
+    except Exception:
+        pass
+
+
+def task_started(project: str) -> None:
+    with _lock:
+        _state["task"] = {"project": project, "started_at": time.time()}
+        _flush(force=True)
+
+
+def task_finished(project: str) -> None:
+    with _lock:
+        _state["task"] = None
+        _flush(force=True)
+
+
+def suite_started(project: str, suite: str, timeout_s: float, pid: Optional[int] = None) -> int:
+    global _next_id
+    with _lock:
+        _next_id += 1
+        _state["active_suites"][str(_next_id)] = {
+            "project": project,
+            "suite": suite,
+            "pid": pid,
+            "started_at": time.time(),
+            "timeout_s": float(timeout_s),
+            "rss_mb": 0.0,
+            "cpu_percent": 0.0,
+        }
+        _flush(force=True)
+        return _next_id
+
+
+def suite_sample(suite_id: int, rss_bytes: int, cpu_percent: float, overhead_s: float) -> None:
+    with _lock:
+        s = _state["active_suites"].get(str(suite_id))
+        if s is not None:
+            s["rss_mb"] = round(rss_bytes / (1024 * 1024), 2)
+            s["cpu_percent"] = round(float(cpu_percent), 2)
+        _state["sampler"]["seconds"] += float(overhead_s)
+        _state["sampler"]["samples"] += 1
+        _flush()
+
+
+def suite_finished(suite_id: int, elapsed_s: float, outcome: str) -> None:
+    """outcome: 'passed' (rc 0), 'failed' or 'timeout'."""
+    with _lock:
+        s = _state["active_suites"].pop(str(suite_id), None)
+        suite = s["suite"] if s else "unknown"
+        _observe(_state["suite_latency"].setdefault(suite, _new_hist(SUITE_BUCKETS_S)), elapsed_s)
+        key = f"{suite}|{outcome}"
+        _state["suites_completed"][key] = _state["suites_completed"].get(key, 0) + 1
+        _flush(force=True)
+
+
+def observe_llm(model: str, seconds: float, ok: bool = True) -> None:
+    with _lock:
+        key = f"{model}|{'ok' if ok else 'error'}"
+        _observe(_state["llm_latency"].setdefault(key, _new_hist(LLM_BUCKETS_S)), seconds)
+        _flush(force=True)
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        return json.loads(json.dumps(_state, default=str))
+
+
+# ----------------------------
+# Aggregation / server
+# ----------------------------
+
+def _alive(snap: Dict[str, Any]) -> bool:
+    # 只能判断本机进程；其他主机的状态文件按原样信任
+    if snap.get("host") != socket.gethostname():
+        return True
+    try:
+        return psutil.pid_exists(int(snap.get("pid")))
+    except Exception:
+        return False
+
+
+def load_snapshots(status_dir: Path) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    if not status_dir.exists():
+        return out
+    for p in sorted(status_dir.glob("*.json")):
+        try:
+            snap = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if not _alive(snap):
+            # 进程已退出：保留累计计数，丢掉“正在运行”的部分
+            snap["active_suites"] = {}
+            snap["task"] = None
+        out.append(snap)
+    return out
+
+
+def reset_status_dir(status_dir: Path) -> None:
+    """Drop status files of processes that are gone (a new sweep starts its counters afresh)."""
+    if not status_dir.exists():
+        return
+    for p in status_dir.glob("*.json"):
+        try:
+            if not _alive(json.loads(p.read_text(encoding="utf-8"))):
+                p.unlink()
+        except Exception:
+            continue
+
+
+def _merge_hists(snaps: List[Dict[str, Any]], field: str) -> Dict[str, Dict[str, Any]]:
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snap in snaps:
+        for key, h in (snap.get(field) or {}).items():
+            m = merged.setdefault(key, _new_hist(h["buckets"]))
+            if m["buckets"] != h["buckets"]:
+                continue
+            m["counts"] = [a + b for a, b in zip(m["counts"], h["counts"])]
+            m["sum"] += h["sum"]
+            m["count"] += h["count"]
+    return merged
+
+
+def aggregate(status_dir: Path, queue_db: Optional[Path] = None) -> Dict[str, Any]:
+    snaps = load_snapshots(status_dir)
+    now = time.time()
+    running: List[Dict[str, Any]] = []
+    completed: Dict[str, int] = {}
+    sampler_s = 0.0
+    samples = 0
+    for snap in snaps:
+        for s in (snap.get("active_suites") or {}).values():
+            elapsed = now - float(s.get("started_at") or now)
+            running.append({
+                **s,
+                "host": snap.get("host"),
+                "elapsed_s": round(elapsed, 1),
+                "timeout_fraction": round(elapsed / s["timeout_s"], 3) if s.get("timeout_s") else None,
+            })
+        for k, v in (snap.get("suites_completed") or {}).items():
+            completed[k] = completed.get(k, 0) + int(v)
+        sampler_s += float((snap.get("sampler") or {}).get("seconds", 0.0))
+        samples += int((snap.get("sampler") or {}).get("samples", 0))
+    running.sort(key=lambda s: s.get("timeout_fraction") or 0.0, reverse=True)
+
+    started = min((float(s.get("started_at") or now) for s in snaps), default=now)
+    minutes = max((now - started) / 60.0, 1e-9)
+    total_completed = sum(completed.values())
+
+    queue: Optional[Dict[str, int]] = None
+    if queue_db is not None and Path(queue_db).exists():
+        try:
+            try:
+                from .job_queue import JobQueue  # type: ignore
+            except Exception:
+                from job_queue import JobQueue  # type: ignore
+            q = JobQueue(Path(queue_db))
+            queue = q.counts()
+            q.close()
+        except Exception:
+            queue = None
+
+    return {
+        "generated_at": now,
+        "processes": len(snaps),
+        "running_tasks": [dict(s["task"], host=s.get("host"), pid=s.get("pid")) for s in snaps if s.get("task")],
+        "running_suites": running,
+        "suites_completed": completed,
+        "suites_per_minute": round(total_completed / minutes, 3) if snaps else 0.0,
+        "sampler_seconds": round(sampler_s, 3),
+        "sampler_samples": samples,
+        "suite_latency": _merge_hists(snaps, "suite_latency"),
+        "llm_latency": _merge_hists(snaps, "llm_latency"),
+        "queue": queue,
+    }
+
+
+def _esc(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _labels(**kv: Any) -> str:
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in kv.items()) + "}"
+
+
+def _hist_lines(name: str, h: Dict[str, Any], **labels: Any) -> List[str]:
+    lines: List[str] = []
+    for b, c in zip(h["buckets"], h["counts"]):
+        lines.append(f"{name}_bucket{_labels(**labels, le=b)} {c}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {h['count']}")
+    lines.append(f"{name}_sum{_labels(**labels)} {h['sum']:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {h['count']}")
+    return lines
+
+
+def render_prometheus(agg: Dict[str, Any]) -> str:
+    lines: List[str] = []
+    lines += ["# HELP racb_running_suites Suites currently running.", "# TYPE racb_running_suites gauge",
+              f"racb_running_suites {len(agg['running_suites'])}"]
+
+    lines += ["# HELP racb_suite_elapsed_seconds Elapsed time of a running suite.", "# TYPE racb_suite_elapsed_seconds gauge"]
+    for s in agg["running_suites"]:
+        lb = dict(project=s.get("project"), suite=s.get("suite"), host=s.get("host"), pid=s.get("pid"))
+        lines.append(f"racb_suite_elapsed_seconds{_labels(**lb)} {s['elapsed_s']}")
+    lines += ["# HELP racb_suite_timeout_seconds Timeout of a running suite.", "# TYPE racb_suite_timeout_seconds gauge"]
+    for s in agg["running_suites"]:
+        lb = dict(project=s.get("project"), suite=s.get("suite"), host=s.get("host"), pid=s.get("pid"))
+        lines.append(f"racb_suite_timeout_seconds{_labels(**lb)} {s.get('timeout_s') or 0}")
+    lines += ["# HELP racb_suite_rss_bytes Latest sampled RSS of a running suite (process tree).", "# TYPE racb_suite_rss_bytes gauge"]
+    for s in agg["running_suites"]:
+        lb = dict(project=s.get("project"), suite=s.get("suite"), host=s.get("host"), pid=s.get("pid"))
+        lines.append(f"racb_suite_rss_bytes{_labels(**lb)} {int(float(s.get('rss_mb') or 0) * 1024 * 1024)}")
+    lines += ["# HELP racb_suite_cpu_percent Latest sampled CPU percent of a running suite.", "# TYPE racb_suite_cpu_percent gauge"]
+    for s in agg["running_suites"]:
+        lb = dict(project=s.get("project"), suite=s.get("suite"), host=s.get("host"), pid=s.get("pid"))
+        lines.append(f"racb_suite_cpu_percent{_labels(**lb)} {s.get('cpu_percent') or 0}")
+
+    lines += ["# HELP racb_suites_completed_total Completed suites by outcome.", "# TYPE racb_suites_completed_total counter"]
+    for key, v in sorted(agg["suites_completed"].items()):
+        suite, _, outcome = key.partition("|")
+        lines.append(f"racb_suites_completed_total{_labels(suite=suite, outcome=outcome)} {v}")
+
+    lines += ["# HELP racb_suite_duration_seconds Wall time of completed suites.", "# TYPE racb_suite_duration_seconds histogram"]
+    for suite, h in sorted(agg["suite_latency"].items()):
+        lines += _hist_lines("racb_suite_duration_seconds", h, suite=suite)
+
+    lines += ["# HELP racb_llm_request_duration_seconds LLM call latency.", "# TYPE racb_llm_request_duration_seconds histogram"]
+    for key, h in sorted(agg["llm_latency"].items()):
+        model, _, status = key.partition("|")
+        lines += _hist_lines("racb_llm_request_duration_seconds", h, model=model, status=status)
+
+    lines += ["# HELP racb_sampler_seconds_total Harness time spent sampling suite RSS/CPU.", "# TYPE racb_sampler_seconds_total counter",
+              f"racb_sampler_seconds_total {agg['sampler_seconds']}",
+              "# HELP racb_sampler_samples_total Number of RSS/CPU samples taken.", "# TYPE racb_sampler_samples_total counter",
+              f"racb_sampler_samples_total {agg['sampler_samples']}"]
+
+    if agg.get("queue") is not None:
+        lines += ["# HELP racb_queue_jobs Jobs in the sweep queue by status.", "# TYPE racb_queue_jobs gauge"]
+        for status, n in sorted(agg["queue"].items()):
+            lines.append(f"racb_queue_jobs{_labels(status=status)} {n}")
+
+    return "\n".join(lines) + "\n"
+
+
+def make_server(status_dir: Path, host: str = "0.0.0.0", port: int = 9464, queue_db: Optional[Path] = None) -> ThreadingHTTPServer:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            path = self.path.split("?", 1)[0].rstrip("/")
+            try:
+                agg = aggregate(status_dir, queue_db)
+            except Exception as e:
+                body, ctype, code = f"error: {e}\n".encode("utf-8"), "text/plain", 500
+            else:
+                if path == "/metrics":
+                    body, ctype, code = render_prometheus(agg).encode("utf-8"), "text/plain; version=0.0.4", 200
+                elif path in {"", "/status"}:
+                    body, ctype, code = json.dumps(agg, indent=2, default=str).encode("utf-8"), "application/json", 200
+                else:
+                    body, ctype, code = b"not found\n", "text/plain", 404
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt: str, *args: Any) -> None:
+            pass
+
+    return ThreadingHTTPServer((host, port), _Handler)
+
+
+def start_background_server(status_dir: Path, port: int, host: str = "0.0.0.0", queue_db: Optional[Path] = None) -> ThreadingHTTPServer:
+    server = make_server(status_dir, host, port, queue_db)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[INFO] metrics on http://{host}:{port}/metrics (status dir: {status_dir})")
+    return server
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="RACB telemetry server")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve")
+    p_serve.add_argument("--status-dir", default=os.environ.get(STATUS_DIR_ENV) or "results/telemetry")
+    p_serve.add_argument("--host", default="0.0.0.0")
+    p_serve.add_argument("--port", type=int, default=int(os.environ.get(METRICS_PORT_ENV) or 9464))
+    p_serve.add_argument("--queue", default=None, help="Job queue database to report depth from")
+    p_show = sub.add_parser("status")
+    p_show.add_argument("--status-dir", default=os.environ.get(STATUS_DIR_ENV) or "results/telemetry")
+    p_show.add_argument("--queue", default=None)
+    args = ap.parse_args()
+
+    queue_db = Path(args.queue) if args.queue else None
+    if args.cmd == "serve":
+        server = make_server(Path(args.status_dir), args.host, args.port, queue_db)
+        print(f"[INFO] metrics on http://{args.host}:{args.port}/metrics (status dir: {args.status_dir})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    else:
+        print(json.dumps(aggregate(Path(args.status_dir), queue_db), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Test-impact selection for the agent self-test loop (run_benchmark_s1).
+
+The fix step only rewrites the files it returns, so after each repair round
+only the agent tests that can observe those files need to run again:
+
+  - build_impact_map() maps every test file under ``_agent_tests/`` to the repo
+    files it transitively imports (import_gate.analyze_modules + its module
+    map; importing ``a.b.c`` also runs ``a`` and ``a.b``), plus the conftest.py
+    files pytest loads for it;
+  - affected_tests() picks the tests whose closure contains a changed file.
+    A changed non-Python file, or a changed helper inside the tests directory,
+    selects everything (None); tests whose closure uses dynamic imports
+    (importlib.import_module / __import__) are selected on any Python change;
+  - AgentTestSession keeps the latest per-test outcomes and merges a selective
+    rerun with the carried-over results of the tests that were not rerun.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+try:
+    from .import_gate import analyze_modules  # type: ignore
+except Exception:
+    from import_gate import analyze_modules  # type: ignore
+
+
+_DYNAMIC_IMPORT_RE = re.compile(r"\bimport_module\s*\(|\b__import__\s*\(")
+
+
+def _rel(repo_root: Path, p: Path) -> str:
+    try:
+        return p.resolve().relative_to(repo_root.resolve()).as_posix()
+    except ValueError:
+        return p.resolve().as_posix()
+
+
+def _is_test_file(p: Path) -> bool:
+    return p.suffix == ".py" and (p.name.startswith("test_") or p.name.endswith("_test.py"))
+
+
+def discover_test_files(tests_dir: Path) -> List[Path]:
+    if not tests_dir.is_dir():
+        return []
+    return sorted(
+        p for p in tests_dir.rglob("*.py")
+        if _is_test_file(p) and not any(seg in {"__pycache__", ".pytest_cache"} for seg in p.parts)
+    )
+
+
+@dataclass
+class ImpactMap:
+    repo_root: Path
+    tests_dir: str
+    # test file (repo-relative posix path) -> repo files it can observe
+    deps: Dict[str, Set[str]] = field(default_factory=dict)
+    # tests whose closure contains a dynamic import
+    dynamic: Set[str] = field(default_factory=set)
+    build_time_s: float = 0.0
+
+    @property
+    def tests(self) -> List[str]:
+        return sorted(self.deps.keys())
+
+
+def build_impact_map(repo_root: Path, tests_dir: Path) -> ImpactMap:
+    start = time.perf_counter()
+    repo_root = repo_root.resolve()
+    infos, _issues, module_map = analyze_modules(repo_root)
+    mod_of_path = {p.resolve(): m for m, p in module_map.items()}
+
+    def expand(target: str) -> Set[str]:
+        # import a.b.c 会依次执行 a/__init__.py、a/b/__init__.py、a/b/c.py
+        parts = target.split(".")
+        return {".".join(parts[:i]) for i in range(1, len(parts) + 1) if ".".join(parts[:i]) in module_map}
+
+    graph: Dict[str, Set[str]] = {}
+    for mod, info in infos.items():
+        edges: Set[str] = set()
+        for t in info.impact_imports:
+            edges |= expand(t)
+        edges |= expand(mod)
+        edges.discard(mod)
+        graph[mod] = edges
+
+    dynamic_mods: Set[str] = set()
+    for mod, path in module_map.items():
+        try:
+            if _DYNAMIC_IMPORT_RE.search(path.read_text(encoding="utf-8", errors="ignore")):
+                dynamic_mods.add(mod)
+        except Exception:
+            continue
+
+    closure_cache: Dict[str, Set[str]] = {}
+
+    def closure(root: str) -> Set[str]:
+        if root in closure_cache:
+            return closure_cache[root]
+        seen: Set[str] = set()
+        stack = [root]
+        while stack:
+            m = stack.pop()
+            if m in seen:
+                continue
+            seen.add(m)
+            stack.extend(graph.get(m, ()))
+        closure_cache[root] = seen
+        return seen
+
+    tests_dir = tests_dir.resolve()
+    impact = ImpactMap(repo_root=repo_root, tests_dir=_rel(repo_root, tests_dir))
+    for test in discover_test_files(tests_dir):
+        files: Set[str] = {_rel(repo_root, test)}
+        roots: List[str] = []
+        if test.resolve() in mod_of_path:
+            roots.append(mod_of_path[test.resolve()])
+        # pytest 为该测试加载的 conftest.py：测试目录直到仓库根
+        d = test.parent
+        while True:
+            conftest = d / "conftest.py"
+            if conftest.exists():
+                files.add(_rel(repo_root, conftest))
+                if conftest.resolve() in mod_of_path:
+                    roots.append(mod_of_path[conftest.resolve()])
+            if d == repo_root or repo_root not in d.parents:
+                break
+            d = d.parent
+        mods: Set[str] = set()
+        for r in roots:
+            mods |= closure(r)
+        files |= {_rel(repo_root, module_map[m]) for m in mods}
+        key = _rel(repo_root, test)
+        impact.deps[key] = files
+        if mods & dynamic_mods:
+            impact.dynamic.add(key)
+
+    impact.build_time_s = round(time.perf_counter() - start, 6)
+    return impact
+
+
+def affected_tests(impact: ImpactMap, changed: Iterable[str]) -> Optional[List[str]]:
+    """Test files to rerun after ``changed`` (repo-relative paths) were rewritten; None = run everything."""
+    changed = [c.replace("\\", "/") for c in changed]
+    changed = [c[2:] if c.startswith("./") else c for c in changed]
+    tests_prefix = impact.tests_dir.rstrip("/") + "/"
+    selected: Set[str] = set()
+    any_py = False
+    for c in changed:
+        if not c.endswith(".py"):
+            return None
+        any_py = True
+        if c in impact.deps:
+            selected.add(c)
+            continue
+        if c.startswith(tests_prefix):
+            # 测试目录里的 helper / conftest / 新测试文件：保守起见全部重跑
+            return None
+        for test, files in impact.deps.items():
+            if c in files:
+                selected.add(test)
+    if any_py:
+        selected |= impact.dynamic
+    return sorted(selected)
+
+
+# ----------------------------
+# Per-test outcomes (pytest_harness_plugin JSON-lines report)
+# ----------------------------
+
+def read_test_report(report_file: Path) -> Dict[str, Dict[str, Any]]:
+    """nodeid -> {"outcome": passed|failed|skipped, "crash": str} from a RACB_TEST_REPORT file."""
+    out: Dict[str, Dict[str, Any]] = {}
+    try:
+        lines = report_file.read_text(encoding="utf-8", errors="ignore").splitlines()
+    except Exception:
+        return out
+    for line in lines:
+        try:
+            rec = json.loads(line)
+        except Exception:
+            continue
+        if rec.get("event") != "report":
+            continue
+        nodeid = rec.get("nodeid") or ""
+        entry = out.setdefault(nodeid, {"outcome": "passed"})
+        outcome = rec.get("outcome")
+        if outcome == "failed":
+            entry["outcome"] = "failed"
+            if rec.get("crash") and "crash" not in entry:
+                entry["crash"] = str(rec["crash"])
+        elif outcome == "skipped" and entry["outcome"] != "failed":
+            entry["outcome"] = "skipped"
+    return out
+
+
+def _owner(nodeid: str, test_files: Iterable[str]) -> Optional[str]:
+    """Test file a nodeid belongs to (nodeids are relative to pytest's rootdir, not the repo)."""
+    path = nodeid.split("::", 1)[0].replace("\\", "/")
+    best: Optional[str] = None
+    for f in test_files:
+        if f == path or f.endswith("/" + path) or path.endswith("/" + f):
+            if best is None or len(f) > len(best):
+                best = f
+    return best
+
+
+class AgentTestSession:
+    """
+    Latest known state of every agent test file across repair rounds.
+
+    ``runner(targets)`` runs pytest on the given test files (None = whole
+    tests dir) and returns ``{"returncode", "stdout", "timeout", "tests"}``,
+    where ``tests`` is read_test_report()'s mapping.
+    """
+
+    def __init__(self, repo_root: Path, tests_dir: Path, runner: Callable[[Optional[List[Path]]], Dict[str, Any]]) -> None:
+        self.repo_root = repo_root.resolve()
+        self.tests_dir = tests_dir
+        self.runner = runner
+        # test file -> {"status": passed|failed|error, "failed": [nodeid...], "crashes": {...}, "round": k}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.history: List[Dict[str, Any]] = []
+        self.impact: Optional[ImpactMap] = None
+
+    def _record(self, result: Dict[str, Any], ran: List[str], round_no: int) -> None:
+        tests: Dict[str, Dict[str, Any]] = result.get("tests") or {}
+        per_file: Dict[str, Dict[str, Any]] = {f: {"status": "passed", "failed": [], "crashes": {}, "round": round_no, "n": 0} for f in ran}
+        for nodeid, t in tests.items():
+            owner = _owner(nodeid, ran)
+            if owner is None:
+                continue
+            rec = per_file[owner]
+            rec["n"] += 1
+            if t.get("outcome") == "failed":
+                rec["status"] = "failed"
+                rec["failed"].append(nodeid)
+                if t.get("crash"):
+                    rec["crashes"][nodeid] = t["crash"]
+        rc = int(result.get("returncode", 1))
+        for f, rec in per_file.items():
+            # 非零退出但该文件没有任何测试结果：收集/导入失败，或整个运行超时
+            if rec["n"] == 0 and rc != 0:
+                rec["status"] = "error"
+        self.files.update(per_file)
+
+    def _merged(self, result: Dict[str, Any], ran: List[str], changed: Optional[List[str]], round_no: int, start: float) -> Dict[str, Any]:
+        carried = sorted(f for f in self.files if f not in set(ran))
+        carried_failing = [f for f in carried if self.files[f]["status"] != "passed"]
+        stdout = result.get("stdout", "")
+        if carried_failing:
+            lines = ["", "[M1] Not rerun (unaffected by the last fix), still failing:"]
+            for f in carried_failing:
+                rec = self.files[f]
+                if not rec["failed"]:
+                    lines.append(f"  {f}: {rec['status']} (round {rec['round']})")
+                for nodeid in rec["failed"]:
+                    crash = rec["crashes"].get(nodeid, "")
+                    lines.append(f"  FAILED {nodeid}" + (f" - {crash}" if crash else ""))
+            stdout = stdout + "\n".join(lines) + "\n"
+        failing = sorted(f for f, rec in self.files.items() if rec["status"] != "passed")
+        rc = int(result.get("returncode", 1))
+        if result.get("timeout"):
+            merged_rc = rc
+        elif failing:
+            merged_rc = rc or 1
+        elif changed is None:
+            # 全量运行：保持 pytest 自己的退出码（例如 5 = 没有收集到测试）
+            merged_rc = rc
+        else:
+            merged_rc = 0
+        entry = {
+            "round": round_no,
+            "changed": changed,
+            "selected": ran,
+            "full": changed is None,
+            "carried_over": carried,
+            "failing_files": failing,
+            "returncode": merged_rc,
+            "elapsed_s": round(time.perf_counter() - start, 3),
+            **({"impact_build_s": self.impact.build_time_s} if self.impact is not None and changed is not None else {}),
+        }
+        self.history.append(entry)
+        return {
+            "returncode": merged_rc,
+            "stdout": stdout,
+            "timeout": bool(result.get("timeout")),
+            "selected": ran,
+            "carried_over": carried,
+        }
+
+    def run_full(self, round_no: int = 0) -> Dict[str, Any]:
+        start = time.perf_counter()
+        ran = [_rel(self.repo_root, p) for p in discover_test_files(self.tests_dir)]
+        result = self.runner(None)
+        # 全量运行后，没出现的旧文件（已删除）不再保留
+        self.files = {}
+        self._record(result, ran, round_no)
+        return self._merged(result, ran, None, round_no, start)
+
+    def run_changed(self, changed: List[str], round_no: int) -> Dict[str, Any]:
+        """Rerun only the tests affected by ``changed``; results of the others are carried over."""
+        start = time.perf_counter()
+        # 修复可能改了 import 关系：每轮按修复后的代码重建
+        self.impact = build_impact_map(self.repo_root, self.tests_dir)
+        selected = affected_tests(self.impact, changed)
+        known = set(self.impact.tests)
+        if selected is None or not self.files or any(f not in self.files for f in known):
+            # 非 Python 改动、测试目录改动、或有从未运行过的测试文件
+            return self.run_full(round_no)
+        if not selected:
+            result = {"returncode": 0, "stdout": "[M1] No agent tests affected by the changed files.\n", "timeout": False, "tests": {}}
+            return self._merged(result, [], changed, round_no, start)
+        result = self.runner([self.repo_root / s for s in selected])
+        self._record(result, selected, round_no)
+        return self._merged(result, selected, changed, round_no, start)
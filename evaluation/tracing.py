@@ -0,0 +1,210 @@
+"""
+Timeline of a sweep in Chrome's Trace Event Format.
+
+When RACB_TRACE_DIR is set, every harness process appends its events to
+``<dir>/<host>-<pid>.trace.jsonl`` (run_all_benchmarks runs each task in its
+own subprocess, so one file per process avoids any cross-process locking).
+merge_traces() combines them into a single JSON document that Perfetto
+(https://ui.perfetto.dev) or chrome://tracing open directly:
+
+  - complete spans ("X") for every stage: LLM calls, file writing, pip
+    installs, import gate, bytecode precompile, collection, each suite
+    subprocess, leak probe, scoring, results YAML;
+  - counter tracks ("C") with the sampler's RSS / CPU of each suite's
+    process tree;
+  - gaps between spans of one process are harness overhead.
+
+  python -m evaluation.tracing merge results/traces/<sweep> -o sweep.trace.json
+
+run_all_benchmarks --trace FILE sets the directory for its task subprocesses
+and merges on exit. With RACB_TRACE_DIR unset every call here is a no-op.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+TRACE_DIR_ENV = "RACB_TRACE_DIR"
+
+_lock = threading.Lock()
+_fh: Optional[TextIO] = None
+_fh_dir: Optional[str] = None
+_fh_pid: Optional[int] = None
+_named_threads: set = set()
+
+
+def trace_dir() -> Optional[Path]:
+    d = os.environ.get(TRACE_DIR_ENV, "").strip()
+    return Path(d) if d else None
+
+
+def enabled() -> bool:
+    return bool(os.environ.get(TRACE_DIR_ENV, "").strip())
+
+
+def now_us() -> float:
+    # 墙钟时间：不同进程（不同主机时钟同步的前提下）的事件能对齐到同一时间轴
+    return time.time() * 1e6
+
+
+def _process_label() -> str:
+    argv = [a for a in sys.argv if a]
+    prog = Path(argv[0]).stem if argv else "python"
+    if prog in ("-m", "__main__") and len(argv) > 1:
+        prog = argv[1]
+    return f"{prog} ({socket.gethostname()}:{os.getpid()})"
+
+
+def _open() -> Optional[TextIO]:
+    """Per-process event file (caller holds _lock); reopened after fork or when the directory changes."""
+    global _fh, _fh_dir, _fh_pid
+    d = os.environ.get(TRACE_DIR_ENV, "").strip()
+    if not d:
+        return None
+    pid = os.getpid()
+    if _fh is not None and _fh_dir == d and _fh_pid == pid:
+        return _fh
+    try:
+        path = Path(d) / f"{socket.gethostname()}-{pid}.trace.jsonl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _fh = open(path, "a", encoding="utf-8")
+    except Exception:
+        _fh = None
+        return None
+    _fh_dir, _fh_pid = d, pid
+    _named_threads.clear()
+    _fh.write(json.dumps({"ph": "M", "name": "process_name", "pid": pid, "tid": 0,
+                          "args": {"name": _process_label()}}) + "\n")
+    return _fh
+
+
+def _emit(event: Dict[str, Any]) -> None:
+    with _lock:
+        fh = _open()
+        if fh is None:
+            return
+        pid, tid = os.getpid(), threading.get_native_id()
+        event["pid"], event["tid"] = pid, tid
+        try:
+            if tid not in _named_threads:
+                _named_threads.add(tid)
+                fh.write(json.dumps({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                                     "args": {"name": threading.current_thread().name}}) + "\n")
+            fh.write(json.dumps(event, default=str) + "\n")
+            fh.flush()
+        except Exception:
+            pass
+
+
+@contextmanager
+def span(name: str, cat: str = "harness", **args: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Record the enclosed block as one complete event. The yielded dict becomes
+    the event's ``args``; callers may add outcome fields (returncode, ...) to it.
+    """
+    if not enabled():
+        yield args
+        return
+    start = now_us()
+    try:
+        yield args
+    except BaseException as e:
+        args.setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _emit({"ph": "X", "name": name, "cat": cat, "ts": round(start, 1),
+               "dur": round(now_us() - start, 1), "args": args})
+
+
+def complete(name: str, start_us: float, cat: str = "harness", **args: Any) -> None:
+    """A span from ``start_us`` (now_us() taken earlier) until now, for blocks a ``with`` does not fit."""
+    if not enabled():
+        return
+    _emit({"ph": "X", "name": name, "cat": cat, "ts": round(start_us, 1),
+           "dur": round(now_us() - start_us, 1), "args": args})
+
+
+def counter(name: str, values: Dict[str, float], cat: str = "sampler") -> None:
+    """One sample of a counter track; each key of ``values`` is a series of that track."""
+    if not enabled():
+        return
+    _emit({"ph": "C", "name": name, "cat": cat, "ts": round(now_us(), 1),
+           "args": {k: round(float(v), 3) for k, v in values.items()}})
+
+
+def instant(name: str, cat: str = "harness", **args: Any) -> None:
+    if not enabled():
+        return
+    _emit({"ph": "i", "s": "t", "name": name, "cat": cat, "ts": round(now_us(), 1), "args": args})
+
+
+# ----------------------------
+# Merge
+# ----------------------------
+
+def load_events(trace_dir: Path) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = []
+    for p in sorted(trace_dir.glob("*.trace.jsonl")):
+        try:
+            lines = p.read_text(encoding="utf-8", errors="ignore").splitlines()
+        except Exception:
+            continue
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except Exception:
+                # 进程被杀时最后一行可能不完整
+                continue
+    return events
+
+
+def merge_traces(trace_dir: Path, output: Path) -> int:
+    """Write all per-process event files under ``trace_dir`` as one trace JSON; returns the event count."""
+    events = load_events(trace_dir)
+    meta = [e for e in events if e.get("ph") == "M"]
+    timed = sorted((e for e in events if e.get("ph") != "M"), key=lambda e: e.get("ts", 0.0))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": meta + timed, "displayTimeUnit": "ms"}, f)
+    os.replace(tmp, output)
+    return len(timed)
+
+
+def reset_trace_dir(trace_dir: Path) -> None:
+    """Drop event files of an earlier sweep that used the same directory."""
+    if not trace_dir.exists():
+        return
+    for p in trace_dir.glob("*.trace.jsonl"):
+        try:
+            p.unlink()
+        except Exception:
+            continue
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Merge per-process harness traces into one Chrome trace JSON")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("merge")
+    m.add_argument("trace_dir")
+    m.add_argument("-o", "--output", default=None, help="Default: <trace_dir>.trace.json")
+    args = ap.parse_args(argv)
+
+    d = Path(args.trace_dir)
+    out = Path(args.output) if args.output else d.with_name(d.name + ".trace.json")
+    n = merge_traces(d, out)
+    print(f"Wrote {n} events to {out} (open in https://ui.perfetto.dev or chrome://tracing)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# Stegano - Stegano is a pure Python steganography module.
+# Copyright (C) 2010-2025 Cédric Bonhomme - https://www.cedricbonhomme.org
+#
+# For more information : https://github.com/cedricbonhomme/Stegano
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""Hide and reveal messages in many files at once.
+
+A manifest is a CSV file with one job per row and the columns:
+
+- command: hide or reveal;
+- input: the image or audio file;
+- output: for hide, the file to write; for reveal, an optional file where the
+  secret is written as binary (else it is in the report);
+- message or secret_file: for hide, the message or a file to hide (base64);
+- generator and shift: for lsb, the generator with its arguments separated by
+  spaces (e.g. "eratosthenes", "LFSR"), and the shift;
+- encoding: for lsb and wav (UTF-8 by default).
+
+The jobs run in a pool of processes, in no particular order: a job can not
+use the output of another one. Each process keeps the last images it decoded
+(and the sequences of the generators, see lsb.sequences), so jobs on the same
+cover image do not decode it again.
+"""
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__license__ = "GPLv3"
+
+import argparse
+import csv
+import inspect
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Dict, List, Optional, Tuple, Union
+
+from PIL import Image
+
+from stegano import lsb, red, tools, wav
+from stegano.lsb import generators
+
+METHODS = ("lsb", "red", "wav")
+
+MANIFEST_FIELDS = [
+    "command",
+    "input",
+    "output",
+    "message",
+    "secret_file",
+    "generator",
+    "shift",
+    "encoding",
+]
+
+REPORT_FIELDS = [
+    "command",
+    "input",
+    "output",
+    "status",
+    "error",
+    "seconds",
+    "input_bytes",
+    "mb_per_s",
+    "message",
+]
+
+# Decoded images kept by each process.
+IMAGE_CACHE_SIZE = 8
+
+_images: "OrderedDict[Tuple[str, int, int], Image.Image]" = OrderedDict()
+
+
+def read_manifest(manifest: Union[str, IO[str]]) -> List[Dict[str, str]]:
+    """The jobs of a manifest (CSV file), missing columns being empty."""
+    if isinstance(manifest, str):
+        with open(manifest, newline="") as f:
+            return read_manifest(f)
+    return [
+        {field: (row.get(field) or "").strip() for field in MANIFEST_FIELDS}
+        for row in csv.DictReader(manifest)
+    ]
+
+
+def _image(path: str) -> Image.Image:
+    """A copy of the decoded image (the methods close or modify it)."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    image = _images.get(key)
+    if image is None:
+        with Image.open(path) as f:
+            f.load()
+            image = f.copy()
+        _images[key] = image
+        while len(_images) > IMAGE_CACHE_SIZE:
+            _images.popitem(last=False)
+    _images.move_to_end(key)
+    return image.copy()
+
+
+def _generator_names() -> List[str]:
+    """The generators a job can name, as the -g option of stegano-lsb."""
+    return [name for name, _ in inspect.getmembers(generators, inspect.isfunction)]
+
+
+def _generator(job: Dict[str, str], image: Image.Image):
+    """The generator of a lsb job, built as stegano-lsb does."""
+    if not job["generator"]:
+        return None
+    name, *arguments = job["generator"].split()
+    if name not in _generator_names():
+        raise ValueError("Unknown generator: %s" % name)
+    if name == "LFSR" and not arguments:
+        arguments = [str(image.width * image.height)]
+    return getattr(generators, name)(*(int(a) for a in arguments))
+
+
+def _secret(job: Dict[str, str]) -> str:
+    if job["secret_file"]:
+        return tools.binary2base64(job["secret_file"])
+    return job["message"]
+
+
+def _hide(method: str, job: Dict[str, str]):
+    encoding = job["encoding"] or "UTF-8"
+    if method == "wav":
+        wav.hide(job["input"], _secret(job), job["output"], encoding)
+        return
+    image = _image(job["input"])
+    if method == "red":
+        encoded = red.hide(image, _secret(job))
+    else:
+        encoded = lsb.hide(
+            image,
+            _secret(job),
+            generator=_generator(job, image),
+            shift=int(job["shift"] or 0),
+            encoding=encoding,
+            auto_convert_rgb=True,
+        )
+    encoded.save(job["output"])
+
+
+def _reveal(method: str, job: Dict[str, str]) -> str:
+    encoding = job["encoding"] or "UTF-8"
+    if method == "wav":
+        secret = wav.reveal(job["input"], encoding)
+    elif method == "red":
+        secret = red.reveal(_image(job["input"]))
+    else:
+        image = _image(job["input"])
+        secret = lsb.reveal(
+            image,
+            generator=_generator(job, image),
+            shift=int(job["shift"] or 0),
+            encoding=encoding,
+        )
+    if job["output"]:
+        with open(job["output"], "wb") as f:
+            f.write(tools.base642binary(secret))
+        return ""
+    return secret
+
+
+def run_job(method: str, job: Dict[str, str]) -> Dict[str, Union[str, int, float]]:
+    """Run a job of the manifest and return its row of the report."""
+    row: Dict[str, Union[str, int, float]] = {field: "" for field in REPORT_FIELDS}
+    row.update(command=job["command"], input=job["input"], output=job["output"])
+    start = time.perf_counter()
+    try:
+        row["input_bytes"] = os.path.getsize(job["input"])
+        if job["command"] == "hide":
+            if not job["output"]:
+                raise ValueError("No output file to hide the message in.")
+            _hide(method, job)
+        elif job["command"] == "reveal":
+            row["message"] = _reveal(method, job)
+        else:
+            raise ValueError("Unknown command: %s" % job["command"])
+        row["status"] = "ok"
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = str(e) or type(e).__name__
+    seconds = time.perf_counter() - start
+    row["seconds"] = round(seconds, 6)
+    if row["input_bytes"] != "" and seconds > 0:
+        row["mb_per_s"] = round(int(row["input_bytes"]) / seconds / 1e6, 3)
+    return row
+
+
+def _run_jobs(method: str, jobs: List[Dict[str, str]]):
+    return [run_job(method, job) for job in jobs]
+
+
+def run(
+    method: str,
+    jobs: List[Dict[str, str]],
+    processes: Optional[int] = None,
+    report: Union[None, str, IO[str]] = None,
+) -> List[Dict[str, Union[str, int, float]]]:
+    """Run the jobs with the given method (lsb, red or wav) in a pool of
+    processes (one per CPU by default) and return the report, in the order of
+    the jobs. It is also written as CSV if report is given.
+    """
+    if method not in METHODS:
+        raise ValueError("Unknown method: %s" % method)
+
+    if processes == 1 or len(jobs) < 2:
+        rows = _run_jobs(method, jobs)
+    else:
+        workers = processes or os.cpu_count() or 1
+        # The jobs of an input go by groups to the same process, which decodes
+        # it once; the groups are small enough to keep all the processes busy.
+        size = -(-len(jobs) // (4 * workers))
+        by_input: "OrderedDict[str, List[int]]" = OrderedDict()
+        for index, job in enumerate(jobs):
+            by_input.setdefault(job["input"], []).append(index)
+        groups = [
+            indexes[start : start + size]
+            for indexes in by_input.values()
+            for start in range(0, len(indexes), size)
+        ]
+        rows_by_index: Dict[int, Dict[str, Union[str, int, float]]] = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _run_jobs,
+                [method] * len(groups),
+                [[jobs[index] for index in group] for group in groups],
+            )
+            for group, group_rows in zip(groups, results):
+                rows_by_index.update(zip(group, group_rows))
+        rows = [rows_by_index[index] for index in range(len(jobs))]
+
+    if isinstance(report, str):
+        with open(report, "w", newline="") as f:
+            _write(f, rows)
+    elif report is not None:
+        _write(report, rows)
+    return rows
+
+
+def add_parser(subparsers):
+    """Add the batch sub-command to the parser of a console."""
+    parser_batch = subparsers.add_parser("batch", help="batch help")
+    parser_batch.add_argument(
+        "-m",
+        "--manifest",
+        dest="manifest",
+        required=True,
+        help="CSV file of the jobs (command, input, output, message, secret_file,"
+        " generator, shift, encoding).",
+    )
+    parser_batch.add_argument(
+        "-r",
+        "--report",
+        dest="report",
+        default=None,
+        help="CSV file of the report (default: standard output).",
+    )
+    parser_batch.add_argument(
+        "-p",
+        "--processes",
+        dest="processes",
+        type=int,
+        default=None,
+        help="Number of processes (default: one per CPU).",
+    )
+
+
+def parse_args(method: str, parser: argparse.ArgumentParser) -> argparse.Namespace:
+    """Parse the arguments of the console of a method, and run the batch
+    sub-command if it is the one given (then exit)."""
+    arguments = parser.parse_args()
+    if arguments.command == "batch":
+        sys.exit(main(method, arguments))
+    return arguments
+
+
+def main(method: str, arguments) -> int:
+    """Run the batch sub-command, the exit status is 1 if a job failed."""
+    rows = run(
+        method,
+        read_manifest(arguments.manifest),
+        arguments.processes,
+        arguments.report or sys.stdout,
+    )
+    return int(any(row["status"] != "ok" for row in rows))
+
+
+def _write(f: IO[str], rows: List[Dict[str, Union[str, int, float]]]):
+    writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
@@ -35,7 +35,7 @@ except Exception:
 
 import argparse
 
-from stegano import tools
+from stegano import batch, tools
 
 
 class ValidateGenerator(argparse.Action):
@@ -157,7 +157,10 @@ def main():
     # Subparser: List generators
     subparsers.add_parser("list-generators", help="list-generators help")
 
-    arguments = parser.parse_args()
+    # Subparser: Batch
+    batch.add_parser(subparsers)
+
+    arguments = batch.parse_args("lsb", parser)
 
     if arguments.command != "list-generators":
         if not arguments.generator_function:
@@ -27,29 +27,51 @@ import argparse
 from PIL import Image
 
 try:
-    from stegano.steganalysis import parity
+    from stegano.steganalysis import batch, parity
 except Exception:
     print("Install Stegano: pipx install Stegano")
 
 
 def main():
     parser = argparse.ArgumentParser(prog="stegano-steganalysis-parity")
-    parser.add_argument(
+    group_input = parser.add_mutually_exclusive_group(required=True)
+    group_input.add_argument(
         "-i",
         "--input",
         dest="input_image_file",
-        required=True,
         help="Input image file.",
     )
+    group_input.add_argument(
+        "-d",
+        "--directory",
+        dest="input_directory",
+        help="Directory of images to analyse, the output is then a CSV file.",
+    )
     parser.add_argument(
         "-o",
         "--output",
         dest="output_image_file",
         required=True,
-        help="Output image file.",
+        help="Output image file (CSV file with --directory).",
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        dest="processes",
+        type=int,
+        default=None,
+        help="Number of processes for a directory (default: one per CPU).",
     )
     arguments = parser.parse_args()
 
+    if arguments.input_directory is not None:
+        batch.analyse_directory(
+            arguments.input_directory,
+            arguments.output_image_file,
+            arguments.processes,
+        )
+        return
+
     input_image_file = Image.open(arguments.input_image_file)
     output_image = parity.steganalyse(input_image_file)
     output_image.save(arguments.output_image_file)
@@ -25,7 +25,7 @@ __license__ = "GPLv3"
 import argparse
 
 try:
-    from stegano import red
+    from stegano import batch, red
 except Exception:
     print("Install stegano: sudo pip install Stegano")
 
@@ -50,7 +50,9 @@ def main():
         "-i", "--input", dest="input_image_file", help="Image file"
     )
 
-    arguments = parser.parse_args()
+    batch.add_parser(subparsers)
+
+    arguments = batch.parse_args("red", parser)
 
     if arguments.command == "hide":
         secret = red.hide(arguments.input_image_file, arguments.secret_message)
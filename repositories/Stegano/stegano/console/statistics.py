@@ -24,11 +24,12 @@ __revision__ = "$Date: 2016/08/26 $"
 __license__ = "GPLv3"
 
 import argparse
+import sys
 
 from PIL import Image
 
 try:
-    from stegano.steganalysis import statistics
+    from stegano.steganalysis import batch, statistics
 except Exception:
     print("Install Stegano: sudo pip install Stegano")
 
@@ -37,8 +38,30 @@ def main():
     parser = argparse.ArgumentParser(prog="stegano-steganalysis-parity")
     parser.add_argument("-i", "--input", dest="input_image_file", help="Image file")
     parser.add_argument("-o", "--output", dest="output_image_file", help="Image file")
+    parser.add_argument(
+        "-d",
+        "--directory",
+        dest="input_directory",
+        help="Directory of images to analyse, the output is then a CSV file.",
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        dest="processes",
+        type=int,
+        default=None,
+        help="Number of processes for a directory (default: one per CPU).",
+    )
     arguments = parser.parse_args()
 
+    if arguments.input_directory is not None:
+        batch.analyse_directory(
+            arguments.input_directory,
+            arguments.output_image_file or sys.stdout,
+            arguments.processes,
+        )
+        return
+
     input_image_file = Image.open(arguments.input_image_file)
     output_image = statistics.steganalyse(input_image_file)
     output_image.save(arguments.output_image_file)
@@ -30,7 +30,7 @@ except Exception:
 
 import argparse
 
-from stegano import tools
+from stegano import batch, tools
 
 
 def main():
@@ -97,7 +97,10 @@ def main():
         " UTF-8 (default) or UTF-32LE.",
     )
 
-    arguments = parser.parse_args()
+    # Subparser: Batch
+    batch.add_parser(subparsers)
+
+    arguments = batch.parse_args("wav", parser)
 
     if arguments.command == "hide":
         if arguments.secret_message is not None:
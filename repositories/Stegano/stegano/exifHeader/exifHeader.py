@@ -23,10 +23,134 @@ __date__ = "$Date: 2016/05/26 $"
 __revision__ = "$Date: 2017/01/18 $"
 __license__ = "GPLv3"
 
+import contextlib
+import io
+import os
+import struct
+from base64 import b64decode, b64encode
+from typing import IO, Iterator, List, Optional, Tuple
+from zlib import compress, compressobj, decompress
+
 import piexif
+from PIL import Image
 
 from stegano import tools
 
+# Bytes read at once from the secret file and the image (a multiple of 3, so
+# that the base64 of the chunks is the base64 of the file).
+CHUNK_SIZE = 3 << 16
+
+JPEG_SOI = b"\xff\xd8"
+EXIF_HEADER = b"Exif\x00\x00"
+
+
+@contextlib.contextmanager
+def _open(file, mode: str = "rb") -> Iterator[IO[bytes]]:
+    """Open a path, or use a file object (read from its start, as PIL does)."""
+    if isinstance(file, str):
+        with open(file, mode) as f:
+            yield f
+    else:
+        if "r" in mode:
+            file.seek(0)
+        yield file
+
+
+def _secret(secret_message=None, secret_file=None) -> bytes:
+    """The secret, base64 encoded and compressed. A file is read by chunks."""
+    if secret_file is None:
+        try:
+            return compress(b64encode(bytes(secret_message, "utf-8")))
+        except Exception:
+            return compress(b64encode(secret_message))
+
+    compressor = compressobj()
+    parts: List[bytes] = []
+    rest = b""
+    with open(secret_file, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            chunk = rest + chunk
+            cut = len(chunk) - len(chunk) % 3
+            parts.append(compressor.compress(b64encode(chunk[:cut])))
+            rest = chunk[cut:]
+    parts.append(compressor.compress(b64encode(rest)))
+    parts.append(compressor.flush())
+    return b"".join(parts)
+
+
+def _jpeg_segments(f: IO[bytes], stop_at_exif: bool = False) -> List[Tuple[int, bytes]]:
+    """The (marker, payload) of the segments of a JPEG file, after the SOI and
+    up to the start of scan (SOS) or end of image (EOI), excluded: the file is
+    then positioned on that marker.
+    With stop_at_exif, stops after the first EXIF segment instead.
+    """
+    segments: List[Tuple[int, bytes]] = []
+    while True:
+        marker = f.read(2)
+        while marker[1:2] == b"\xff":
+            # Fill bytes before a marker.
+            marker = marker[1:] + f.read(1)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError("Invalid JPEG file.")
+        if marker[1] in (0xDA, 0xD9):
+            f.seek(-2, 1)
+            return segments
+        if marker[1] == 0x01 or 0xD0 <= marker[1] <= 0xD7:
+            segments.append((marker[1], b""))
+            continue
+        header = f.read(2)
+        if len(header) < 2:
+            raise ValueError("Invalid JPEG file.")
+        payload = f.read(struct.unpack(">H", header)[0] - 2)
+        segments.append((marker[1], payload))
+        if stop_at_exif and marker[1] == 0xE1 and payload.startswith(EXIF_HEADER):
+            return segments
+
+
+def _is_exif(segment: Tuple[int, bytes]) -> bool:
+    return segment[0] == 0xE1 and segment[1].startswith(EXIF_HEADER)
+
+
+def _splice(input: IO[bytes], output: IO[bytes], text: bytes):
+    """Write the JPEG input to output with text as its EXIF image description,
+    by replacing its EXIF segment: the image data is copied as it is."""
+    if input.read(2) != JPEG_SOI:
+        raise ValueError("Invalid JPEG file.")
+    segments = _jpeg_segments(input)
+    exifs = [payload for marker, payload in segments if _is_exif((marker, payload))]
+
+    if exifs:
+        exif_dict = piexif.load(exifs[0])
+    else:
+        exif_dict = {}
+        exif_dict["0th"] = {}
+    exif_dict["0th"][piexif.ImageIFD.ImageDescription] = text
+    exif_bytes = piexif.dump(exif_dict)
+    if len(exif_bytes) > 0xFFFF - 2:
+        raise ValueError("EXIF data is too long")
+
+    # The EXIF segment comes after the JFIF segments, and replaces the others.
+    jfif = 0
+    while jfif < len(segments) and segments[jfif][0] == 0xE0:
+        jfif += 1
+    others = [segment for segment in segments[jfif:] if not _is_exif(segment)]
+    segments = segments[:jfif] + [(0xE1, exif_bytes)] + others
+
+    output.write(JPEG_SOI)
+    for marker, payload in segments:
+        output.write(bytes([0xFF, marker]))
+        if marker != 0x01 and not 0xD0 <= marker <= 0xD7:
+            output.write(struct.pack(">H", len(payload) + 2) + payload)
+    while chunk := input.read(CHUNK_SIZE):
+        output.write(chunk)
+
+
+def _same_file(input, output) -> bool:
+    """Whether the output path is the input path."""
+    if isinstance(input, str) and isinstance(output, str):
+        return os.path.exists(output) and os.path.samefile(input, output)
+    return False
+
 
 def hide(
     input_image_file,
@@ -35,24 +159,29 @@ def hide(
     secret_file=None,
     img_format=None,
 ):
-    """Hide a message (string) in an image."""
-    from base64 import b64encode
-    from zlib import compress
-
-    if secret_file is not None:
-        with open(secret_file, "rb") as f:
-            secret_message = f.read()
+    """Hide a message (string) in an image.
 
-    try:
-        text = compress(b64encode(bytes(secret_message, "utf-8")))
-    except Exception:
-        text = compress(b64encode(secret_message))
+    A JPEG image saved as JPEG keeps its image data: only the EXIF segment of
+    the file is replaced. Other images are saved again by PIL.
+    """
+    text = _secret(secret_message, secret_file)
 
     img = tools.open_image(input_image_file)
 
     if img_format is None:
         img_format = img.format
 
+    jpeg = img.format == "JPEG" and img_format == "JPEG"
+    if jpeg and not isinstance(input_image_file, Image.Image):
+        with _open(input_image_file) as input:
+            if _same_file(input_image_file, img_enc):
+                # Hiding in place: the input is read before being overwritten.
+                input = io.BytesIO(input.read())
+            with _open(img_enc, "wb") as output:
+                _splice(input, output, text)
+        img.close()
+        return img
+
     if "exif" in img.info:
         exif_dict = piexif.load(img.info["exif"])
     else:
@@ -66,24 +195,36 @@ def hide(
 
 
 def reveal(input_image_file):
-    """Find a message in an image."""
-    from base64 import b64decode
-    from zlib import decompress
+    """Find a message in an image.
 
-    img = tools.open_image(input_image_file)
+    The EXIF segment of a JPEG file is read without opening the image.
+    """
+    exif: Optional[bytes] = None
+    if isinstance(input_image_file, str) or hasattr(input_image_file, "read"):
+        with _open(input_image_file) as f:
+            if f.read(3) == JPEG_SOI + b"\xff":
+                f.seek(-1, 1)
+                segments = _jpeg_segments(f, stop_at_exif=True)
+                exif = b""
+                if segments and _is_exif(segments[-1]):
+                    exif = segments[-1][1]
 
-    try:
-        if img.format in ["JPEG", "TIFF"]:
-            if "exif" in img.info:
-                exif_dict = piexif.load(img.info.get("exif", b""))
-                description_key = piexif.ImageIFD.ImageDescription
-                encoded_message = exif_dict["0th"][description_key]
+    if exif is None:
+        img = tools.open_image(input_image_file)
+        try:
+            if img.format in ["JPEG", "TIFF"]:
+                exif = img.info.get("exif", b"")
             else:
-                encoded_message = b""
-        else:
-            raise ValueError("Given file is neither JPEG nor TIFF.")
-    finally:
-        img.close()
+                raise ValueError("Given file is neither JPEG nor TIFF.")
+        finally:
+            img.close()
+
+    if exif:
+        exif_dict = piexif.load(exif)
+        description_key = piexif.ImageIFD.ImageDescription
+        encoded_message = exif_dict["0th"][description_key]
+    else:
+        encoded_message = b""
 
     return b64decode(decompress(encoded_message))
 
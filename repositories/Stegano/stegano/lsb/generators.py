@@ -25,72 +25,81 @@ __license__ = "GPLv3"
 
 import itertools
 import math
-from typing import Any, Dict, Iterator, List
+from typing import Any, Iterator
 
 import cv2
 import numpy as np
 
+from . import sequences
+
 
 def identity() -> Iterator[int]:
     """f(x) = x"""
-    n = 0
-    while True:
-        yield n
-        n += 1
+    return sequences.IndexGenerator(sequences.identity)
 
 
 def triangular_numbers() -> Iterator[int]:
     """Triangular numbers: a(n) = C(n+1,2) = n(n+1)/2 = 0+1+2+...+n.
     http://oeis.org/A000217
     """
-    n = 0
-    while True:
-        yield (n * (n + 1)) // 2
-        n += 1
+
+    def numbers() -> Iterator[int]:
+        n = 0
+        while True:
+            yield (n * (n + 1)) // 2
+            n += 1
+
+    return sequences.IndexGenerator(sequences.triangular_numbers, numbers)
 
 
 def fermat() -> Iterator[int]:
     """Generate the n-th Fermat Number.
     https://oeis.org/A000215
     """
-    y = 3
-    while True:
-        yield y
-        y = pow(y - 1, 2) + 1
+
+    def numbers() -> Iterator[int]:
+        y = 3
+        while True:
+            yield y
+            y = pow(y - 1, 2) + 1
+
+    return sequences.IndexGenerator(
+        sequences.table(list(itertools.islice(numbers(), 6))), numbers
+    )
 
 
 def mersenne() -> Iterator[int]:
     """Generate 2^p - 1, where p is prime.
     https://oeis.org/A001348
     """
-    prime_numbers = eratosthenes()
-    while True:
-        yield 2 ** next(prime_numbers) - 1
+
+    def numbers() -> Iterator[int]:
+        prime_numbers = eratosthenes()
+        while True:
+            yield 2 ** next(prime_numbers) - 1
+
+    return sequences.IndexGenerator(
+        sequences.table(list(itertools.takewhile(lambda y: y < 1 << 63, numbers()))),
+        numbers,
+    )
 
 
 def eratosthenes() -> Iterator[int]:
     """Generate the prime numbers with the sieve of Eratosthenes.
     https://oeis.org/A000040
     """
-    d: Dict[int, List[int]] = {}
-    for i in itertools.count(2):
-        if i in d:
-            for j in d[i]:
-                d[i + j] = d.get(i + j, []) + [j]
-            del d[i]
-        else:
-            d[i * i] = [i]
-            yield i
+    return sequences.IndexGenerator(
+        sequences.eratosthenes, resume=sequences.eratosthenes_resume
+    )
 
 
 def composite() -> Iterator[int]:
     """Generate the composite numbers using the sieve of Eratosthenes.
     https://oeis.org/A002808
     """
-    p1 = 3
-    for p2 in eratosthenes():
-        yield from range(p1 + 1, p2)
-        p1 = p2
+    return sequences.IndexGenerator(
+        sequences.composite, resume=sequences.composite_resume
+    )
 
 
 def carmichael() -> Iterator[int]:
@@ -98,12 +107,9 @@ def carmichael() -> Iterator[int]:
     to n.
     https://oeis.org/A002997
     """
-    for m in composite():
-        for a in range(2, m):
-            if pow(a, m, m) != a:
-                break
-        else:
-            yield m
+    return sequences.IndexGenerator(
+        sequences.carmichael, resume=sequences.carmichael_resume
+    )
 
 
 def ackermann_slow(m: int, n: int) -> int:
@@ -144,29 +150,43 @@ def ackermann_fast(m: int, n: int) -> int:
 
 def ackermann(m: int) -> Iterator[int]:
     """Ackermann encapsulated in a generator."""
-    n = 0
-    while True:
-        yield ackermann_fast(m, n)
-        n += 1
+
+    def numbers() -> Iterator[int]:
+        n = 0
+        while True:
+            yield ackermann_fast(m, n)
+            n += 1
+
+    return sequences.IndexGenerator(sequences.ackermann(m), numbers)
 
 
 def fibonacci() -> Iterator[int]:
     """Generate the sequence of Fibonacci.
     https://oeis.org/A000045
     """
-    a, b = 1, 2
-    while True:
-        yield a
-        a, b = b, a + b
+
+    def numbers() -> Iterator[int]:
+        a, b = 1, 2
+        while True:
+            yield a
+            a, b = b, a + b
+
+    return sequences.IndexGenerator(
+        sequences.table(sequences.fibonacci_table()), numbers
+    )
 
 
 def log_gen() -> Iterator[int]:
     """Logarithmic generator."""
-    y = 1
-    while True:
-        adder = max(1, math.pow(10, int(math.log10(y))))
-        yield int(y)
-        y = y + int(adder)
+
+    def numbers() -> Iterator[int]:
+        y = 1
+        while True:
+            adder = max(1, math.pow(10, int(math.log10(y))))
+            yield int(y)
+            y = y + int(adder)
+
+    return sequences.IndexGenerator(sequences.log_gen, numbers)
 
 
 polys = {
@@ -208,23 +228,10 @@ def LFSR(m: int) -> Iterator[int]:
     https://en.wikipedia.org/wiki/Linear-feedback_shift_register
     """
     n: int = m.bit_length() - 1
-    # Set initial state to {1 0 0 ... 0}
-    state: List[int] = [0] * n
-    state[0] = 1
-    feedback: int = 0
-    poly: List[int] = polys[n]
-    while True:
-        # Compute the feedback bit
-        feedback = 0
-        for i in range(len(poly)):
-            feedback = feedback ^ state[poly[i] - 1]
-        # Roll the registers
-        state.pop()
-        # Add the feedback bit
-        state.insert(0, feedback)
-        # Convert the registers to an int
-        out = sum(e * (2**i) for i, e in enumerate(state))
-        yield out
+    # Initial state {1 0 0 ... 0}
+    return sequences.IndexGenerator(
+        sequences.lfsr(polys[n]), resume=sequences.lfsr_resume(polys[n])
+    )
 
 
 def shi_tomashi(
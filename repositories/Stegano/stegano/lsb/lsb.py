@@ -23,15 +23,107 @@ __date__ = "$Date: 2016/03/13 $"
 __revision__ = "$Date: 2019/05/31 $"
 __license__ = "GPLv3"
 
-from typing import IO, Iterator, Union
+import itertools
+from typing import IO, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
 
 from stegano import tools
 
 from .generators import identity
 
+# Numbers read from a generator: an array when read with its take() method.
+Numbers = Union[List[int], np.ndarray]
+
+
+def _guard(generator: Iterator[int], errors: List[Exception]) -> Iterator[int]:
+    """The numbers of the generator; an error it raises ends the iteration and
+    is appended to errors instead."""
+    while True:
+        try:
+            number = next(generator)
+        except StopIteration:
+            return
+        except Exception as error:
+            errors.append(error)
+            return
+        yield number
+
+
+def _take(
+    generator: Iterator[int], count: int, npixels: int
+) -> Tuple[Numbers, Optional[Exception]]:
+    """Take up to count numbers from the generator, in chunks, stopping after
+    the chunk holding the first number outside of the image (the pixel by
+    pixel path fails on it, and some generators grow too fast to be read
+    much further).
+    The error raised by the generator, if any, is returned with the numbers
+    read before it.
+    Chunks are read with the take() method of the generator when it has one
+    (see generators), the numbers are then an array.
+    """
+    errors: List[Exception] = []
+    source = _guard(generator, errors)
+    batch = getattr(generator, "take", None)
+    chunks: List[np.ndarray] = []
+    numbers: List[int] = []
+    read = 0
+    chunk_size = 16
+    while read < count:
+        size = min(chunk_size, count - read)
+        if batch is not None:
+            try:
+                array = batch(size)
+            except OverflowError:
+                # Numbers beyond 64 bits: one at a time from here.
+                batch = None
+                continue
+            chunks.append(array)
+            read += size
+            if array.min() < 0 or array.max() >= npixels:
+                break
+        else:
+            chunk = list(itertools.islice(source, size))
+            numbers.extend(chunk)
+            read += len(chunk)
+            if errors or not chunk or min(chunk) < 0 or max(chunk) >= npixels:
+                break
+        chunk_size *= 2
+    if chunks and not numbers:
+        return np.concatenate(chunks), None
+    if chunks:
+        numbers = np.concatenate(chunks).tolist() + numbers
+    return numbers, errors[0] if errors else None
+
+
+def _skip(generator: Iterator[int], shift: int):
+    """Skip the first shift numbers of the generator."""
+    if shift and hasattr(generator, "take"):
+        generator.take(0, shift)
+        return
+    while shift != 0:
+        next(generator)
+        shift -= 1
+
+
+def _as_list(numbers: Numbers) -> List[int]:
+    """The numbers as Python integers (as the pixel by pixel path wants)."""
+    if isinstance(numbers, np.ndarray):
+        return numbers.tolist()
+    return list(numbers)
+
+
+def _replay(numbers: Numbers, error: Optional[Exception], generator: Iterator[int]):
+    """The numbers already read, then what the generator would have given."""
+    yield from _as_list(numbers)
+    if error is not None:
+        raise error
+    yield from generator
+
 
 def hide(
-    image: Union[str, IO[bytes]],
+    image: Union[str, IO[bytes], Image.Image],
     message: str,
     generator: Union[None, Iterator[int]] = None,
     shift: int = 0,
@@ -47,10 +139,16 @@ def hide(
     if not generator:
         generator = identity()
 
-    while shift != 0:
-        next(generator)
-        shift -= 1
+    _skip(generator, shift)
+
+    # Vectorized: all the pixels of the message at once.
+    npixels = width * hider.encoded_image.height
+    numbers, error = _take(generator, hider.pixels_to_encode(), npixels)
+    if error is None and hider.encode_pixels(numbers):
+        return hider.encoded_image
 
+    # Pixel by pixel, for the cases encode_pixels does not handle.
+    generator = _replay(numbers, error, generator)
     while hider.encode_another_pixel():
         generated_number = next(generator)
 
@@ -63,7 +161,7 @@ def hide(
 
 
 def reveal(
-    encoded_image: Union[str, IO[bytes]],
+    encoded_image: Union[str, IO[bytes], Image.Image],
     generator: Union[None, Iterator[int]] = None,
     shift: int = 0,
     encoding: str = "UTF-8",
@@ -76,10 +174,33 @@ def reveal(
     if not generator:
         generator = identity()
 
-    while shift != 0:
-        next(generator)
-        shift -= 1
+    _skip(generator, shift)
 
+    # Vectorized: batches of pixels until the announced length is read.
+    # Numbers are read ahead of the pixel by pixel path, so an error of the
+    # generator is only raised if that path gets to it.
+    npixels = width * revealer.encoded_image.height
+    consumed: List[Numbers] = []
+    wanted = 64
+    while True:
+        numbers, error = _take(generator, wanted, npixels)
+        consumed.append(numbers)
+        if error is not None or len(numbers) < wanted:
+            break
+        result = revealer.decode_pixels(numbers)
+        if result == 0:
+            return revealer.secret_message
+        if result is None:
+            break
+        wanted = result
+
+    # Pixel by pixel, from the first pixel, for the cases decode_pixels does
+    # not handle.
+    generator = _replay(
+        [number for numbers in consumed for number in _as_list(numbers)],
+        error,
+        generator,
+    )
     while True:
         generated_number = next(generator)
 
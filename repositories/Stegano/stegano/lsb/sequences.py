@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+# Stegano - Stegano is a pure Python steganography module.
+# Copyright (C) 2010-2025 Cédric Bonhomme - https://www.cedricbonhomme.org
+#
+# For more information : https://github.com/cedricbonhomme/Stegano
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""Batch computation of the sequences behind stegano.lsb.generators.
+
+A sequence is given by a function ``terms(start, stop)`` returning its terms
+``start`` to ``stop - 1`` as an int64 array, or raising OverflowError when
+some of them do not fit in 64 bits. The expensive ones (sieves, LFSR) keep
+their computed prefix in a bounded in-process cache.
+"""
+
+import itertools
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterator, List, Optional
+
+import numpy as np
+
+Terms = Callable[[int, int], np.ndarray]
+
+# resume(last, count): the count terms following the term last.
+Resume = Callable[[int, int], np.ndarray]
+
+INT64_MAX = (1 << 63) - 1
+
+# Number of int64 terms (all sequences together) kept by the cache: 32 MiB.
+CACHE_SIZE = 1 << 22
+
+# Maximum number of terms read at once by next().
+BLOCK_SIZE = 1 << 16
+
+_cache: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class IndexGenerator(Iterator[int]):
+    """Iterator over the terms of a sequence, which can also give them by
+    batch with take().
+
+    numbers, if given, generates the sequence with Python integers; it is used
+    by next() past the terms which fit in 64 bits.
+    resume, if given, computes the terms following a term of the sequence; it
+    is used past the terms kept by the cache, instead of computing them from
+    the first one again.
+    """
+
+    def __init__(
+        self,
+        terms: Terms,
+        numbers: Optional[Callable[[], Iterator[int]]] = None,
+        resume: Optional[Resume] = None,
+    ):
+        self._terms = terms
+        self._numbers = numbers
+        self._resume = resume
+        self._position = 0
+        self._tail: Optional[Iterator[int]] = None
+        # Terms read ahead by next(), from position _start.
+        self._start = 0
+        self._block: List[int] = []
+        self._block_size = 16
+        # Position after the last term read, and that term.
+        self._end = 0
+        self._last = 0
+
+    def __iter__(self) -> "IndexGenerator":
+        return self
+
+    def __next__(self) -> int:
+        if self._tail is None:
+            index = self._position - self._start
+            if not 0 <= index < len(self._block):
+                self._fill()
+                index = 0
+            if self._tail is None:
+                self._position += 1
+                return self._block[index]
+        number = next(self._tail)
+        self._position += 1
+        return number
+
+    def take(self, n: int, shift: int = 0) -> np.ndarray:
+        """Skip shift numbers, then return the next n as an int64 array
+        (read-only), as shift + n calls of next() would.
+
+        Raises OverflowError, without moving, when some of the n numbers do
+        not fit in 64 bits.
+        """
+        if n < 0 or shift < 0:
+            raise ValueError("n and shift must be positive.")
+        start = self._position + shift
+        if n == 0:
+            if self._tail is not None:
+                self._tail = itertools.islice(self._tail, shift, None)
+            self._position = start
+            return np.empty(0, dtype=np.int64)
+        if self._tail is not None:
+            raise OverflowError("The sequence does not fit in 64 bits any more.")
+        terms = self._read(start, start + n)
+        self._position = start + n
+        return terms
+
+    def _fill(self) -> None:
+        """Read the next terms for next(), by blocks growing up to BLOCK_SIZE,
+        or switch to numbers past the terms which fit in 64 bits."""
+        start = self._position
+        try:
+            terms = self._read(start, start + self._block_size)
+            self._block_size = min(2 * self._block_size, BLOCK_SIZE)
+        except OverflowError:
+            try:
+                terms = self._read(start, start + 1)
+            except OverflowError:
+                if self._numbers is None:
+                    raise
+                self._tail = itertools.islice(self._numbers(), start, None)
+                return
+        self._start, self._block = start, terms.tolist()
+
+    def _read(self, start: int, stop: int) -> np.ndarray:
+        """The terms start to stop - 1, read-only."""
+        ahead = self._start <= start and self._start + len(self._block) == self._end
+        if stop <= self._end and ahead:
+            offset = start - self._start
+            terms = np.array(self._block[offset : offset + stop - start], np.int64)
+        elif self._resume is None or stop <= CACHE_SIZE or not self._end:
+            terms = self._terms(start, stop)
+        elif start >= self._end:
+            terms = self._resume(self._last, stop - self._end)[start - self._end :]
+        elif ahead:
+            terms = np.concatenate(
+                [
+                    np.array(self._block[start - self._start :], np.int64),
+                    self._resume(self._last, stop - self._end),
+                ]
+            )
+        else:
+            terms = self._terms(start, stop)
+        terms.flags.writeable = False
+        if stop > self._end:
+            self._end, self._last = stop, int(terms[-1])
+        return terms
+
+
+def clear_cache() -> None:
+    """Forget the prefixes computed so far."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _cached(
+    key: Hashable, stop: int, extend: Callable[[Optional[np.ndarray], int], np.ndarray]
+) -> np.ndarray:
+    """The first stop terms (at least) of the sequence key, computed with
+    extend(prefix, count) from the cached prefix if needed."""
+    with _cache_lock:
+        prefix = _cache.get(key)
+        if prefix is not None:
+            _cache.move_to_end(key)
+    if prefix is not None and prefix.size >= stop:
+        return prefix
+
+    # Grow geometrically, so that next() does not extend at each call.
+    count = max(stop, 2 * prefix.size if prefix is not None else 0)
+    prefix = extend(prefix, count)
+    prefix.flags.writeable = False
+    with _cache_lock:
+        if prefix.size <= CACHE_SIZE:
+            _cache[key] = prefix
+            _cache.move_to_end(key)
+            total = sum(terms.size for terms in _cache.values())
+            while total > CACHE_SIZE:
+                _, evicted = _cache.popitem(last=False)
+                total -= evicted.size
+    return prefix
+
+
+def _check(stop: int, limit: int) -> None:
+    if stop > limit:
+        raise OverflowError("Term %d of the sequence does not fit in 64 bits." % limit)
+
+
+def table(values: List[int]) -> Terms:
+    """A sequence whose terms fitting in 64 bits are values."""
+    array = np.array(values, dtype=np.int64)
+    array.flags.writeable = False
+
+    def terms(start: int, stop: int) -> np.ndarray:
+        _check(stop, array.size)
+        return array[start:stop]
+
+    return terms
+
+
+def identity(start: int, stop: int) -> np.ndarray:
+    return np.arange(start, stop, dtype=np.int64)
+
+
+def triangular_numbers(start: int, stop: int) -> np.ndarray:
+    # n(n+1) of the last term fitting in 64 bits only fits unsigned.
+    _check(stop, 1 << 32)
+    n = np.arange(start, stop, dtype=np.uint64)
+    return (n * (n + np.uint64(1)) // np.uint64(2)).astype(np.int64)
+
+
+def log_gen(start: int, stop: int) -> np.ndarray:
+    """1, 2, ..., 9, 10, 20, ..., 90, 100, 200, ..."""
+    _check(stop, 9 * 19)
+    n = np.arange(start, stop, dtype=np.int64)
+    powers = np.array([10**d for d in range(19)], dtype=np.int64)
+    return (n % 9 + 1) * powers[n // 9]
+
+
+def fibonacci_table() -> List[int]:
+    values = []
+    a, b = 1, 2
+    while a <= INT64_MAX:
+        values.append(a)
+        a, b = b, a + b
+    return values
+
+
+def ackermann(m: int) -> Terms:
+    """The terms ackermann_fast(m, n), n = 0, 1, ..."""
+    if m == 3:
+        return table([(1 << n + 3) - 3 for n in range(61)])
+    if m > 3:
+        # A(4, 2) = 2^65536 - 3 and A(5, 1) = A(4, 65533).
+        return table([[13, 65533], [65533]][m - 4] if m < 6 else [])
+    offset, factor = [(1, 1), (2, 1), (3, 2)][m]
+
+    def terms(start: int, stop: int) -> np.ndarray:
+        _check(stop, (INT64_MAX - offset) // factor)
+        return np.arange(start, stop, dtype=np.int64) * factor + offset
+
+    return terms
+
+
+def _small_primes(limit: int) -> np.ndarray:
+    """The prime numbers up to limit (included)."""
+    flags = np.ones(limit + 1, dtype=bool)
+    flags[:2] = False
+    for p in range(2, math.isqrt(limit) + 1):
+        if flags[p]:
+            flags[p * p :: p] = False
+    return np.flatnonzero(flags)
+
+
+def _segment(lo: int) -> int:
+    """End of the segment of numbers starting at lo sieved at once."""
+    return lo + max(1 << 16, min(1 << 22, lo))
+
+
+def _sieve(lo: int, hi: int) -> np.ndarray:
+    """Flags of the prime numbers in [lo, hi)."""
+    flags = np.ones(hi - lo, dtype=bool)
+    flags[: max(0, 2 - lo)] = False
+    for p in _small_primes(math.isqrt(hi - 1)).tolist():
+        start = max(p * p, -(-lo // p) * p)
+        flags[start - lo :: p] = False
+    return flags
+
+
+def _extend_sieve(
+    prefix: Optional[np.ndarray],
+    count: int,
+    first: int,
+    select: Callable[[int, int], np.ndarray],
+) -> np.ndarray:
+    """Extend prefix to count terms at least with select(lo, hi), the terms in
+    [lo, hi), segment after segment from first."""
+    parts = []
+    found = 0
+    lo = first
+    if prefix is not None and prefix.size:
+        parts.append(prefix)
+        found = prefix.size
+        lo = int(prefix[-1]) + 1
+    while found < count:
+        hi = _segment(lo)
+        part = select(lo, hi)
+        parts.append(part)
+        found += part.size
+        lo = hi
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+def _primes_in(lo: int, hi: int) -> np.ndarray:
+    return np.flatnonzero(_sieve(lo, hi)).astype(np.int64) + lo
+
+
+def _composites_in(lo: int, hi: int) -> np.ndarray:
+    return np.flatnonzero(~_sieve(lo, hi)).astype(np.int64) + lo
+
+
+def _carmichaels_in(lo: int, hi: int) -> np.ndarray:
+    """Korselt's criterion: m is composite, square-free, and p - 1 divides
+    m - 1 for every prime p dividing m (so m is odd)."""
+    m = np.arange(lo, hi, dtype=np.int64)
+    rest = m.copy()
+    factors = np.zeros(m.size, dtype=np.int8)
+    ok = (m % 2 == 1) & (m > 2)
+    for p in _small_primes(math.isqrt(hi - 1))[1:].tolist():
+        start = -(-lo // p) * p - lo
+        multiples = slice(start, None, p)
+        rest[multiples] //= p
+        factors[multiples] += 1
+        ok[multiples] &= (rest[multiples] % p != 0) & (
+            (m[multiples] - 1) % (p - 1) == 0
+        )
+    # At most one prime factor is left, greater than sqrt(m).
+    big = rest > 1
+    ok[big] &= (m[big] - 1) % (rest[big] - 1) == 0
+    factors += big
+    return m[ok & (factors > 1)]
+
+
+def _resume_sieve(select: Callable[[int, int], np.ndarray]) -> Resume:
+    def resume(last: int, count: int) -> np.ndarray:
+        return _extend_sieve(None, count, last + 1, select)[:count]
+
+    return resume
+
+
+eratosthenes_resume = _resume_sieve(_primes_in)
+composite_resume = _resume_sieve(_composites_in)
+carmichael_resume = _resume_sieve(_carmichaels_in)
+
+
+def eratosthenes(start: int, stop: int) -> np.ndarray:
+    return _cached(
+        "eratosthenes",
+        stop,
+        lambda prefix, count: _extend_sieve(prefix, count, 2, _primes_in),
+    )[start:stop]
+
+
+def composite(start: int, stop: int) -> np.ndarray:
+    return _cached(
+        "composite",
+        stop,
+        lambda prefix, count: _extend_sieve(prefix, count, 4, _composites_in),
+    )[start:stop]
+
+
+def carmichael(start: int, stop: int) -> np.ndarray:
+    return _cached(
+        "carmichael",
+        stop,
+        lambda prefix, count: _extend_sieve(prefix, count, 3, _carmichaels_in),
+    )[start:stop]
+
+
+def _lfsr_run(poly: List[int], state: int, count: int) -> np.ndarray:
+    """The count states following state of the LFSR with the taps of poly.
+
+    Bit i of a state is the feedback bit b(t - i) computed i steps before, and
+    b(k) = XOR of b(k - p) for p in poly. Over GF(2) the square of the
+    feedback polynomial is the polynomial of x^2, so b(k) = XOR of
+    b(k - 2^j p) too, once k is far enough: blocks of 2^j * min(poly) bits are
+    then computed at once.
+    """
+    n = poly[0]
+    total = n + count
+    bits = np.empty(total, dtype=np.uint8)
+    bits[:n] = [(state >> i) & 1 for i in range(n - 1, -1, -1)]
+    k, step = n, 1
+    while k < total:
+        # With the lags multiplied by step, valid from k = step * n.
+        end = total if step >= 1 << 16 else min(total, 2 * step * n)
+        while k < end:
+            size = min(step * min(poly), end - k)
+            block = bits[k - step * poly[0] : k - step * poly[0] + size].copy()
+            for p in poly[1:]:
+                block ^= bits[k - step * p : k - step * p + size]
+            bits[k : k + size] = block
+            k += size
+        if step < 1 << 16:
+            step *= 2
+
+    states = np.zeros(count, dtype=np.int64)
+    for i in range(n):
+        states |= bits[n - i : n - i + count].astype(np.int64) << i
+    return states
+
+
+def lfsr_resume(poly: List[int]) -> Resume:
+    """The states of the LFSR with the taps of poly following a state."""
+
+    def resume(last: int, count: int) -> np.ndarray:
+        return _lfsr_run(poly, last, count)
+
+    return resume
+
+
+def lfsr(poly: List[int]) -> Terms:
+    """The states of the LFSR with the taps of poly, from {1 0 0 ... 0}."""
+    resume = lfsr_resume(poly)
+
+    def extend(prefix: Optional[np.ndarray], count: int) -> np.ndarray:
+        if prefix is None or prefix.size == 0:
+            return resume(1, count)
+        return np.concatenate([prefix, resume(int(prefix[-1]), count - prefix.size)])
+
+    def terms(start: int, stop: int) -> np.ndarray:
+        return _cached(("LFSR", tuple(poly)), stop, extend)[start:stop]
+
+    return terms
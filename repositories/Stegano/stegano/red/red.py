@@ -25,10 +25,12 @@ __license__ = "GPLv3"
 
 from typing import IO, Union, cast
 
+from PIL import Image
+
 from stegano import tools
 
 
-def hide(input_image: Union[str, IO[bytes]], message: str):
+def hide(input_image: Union[str, IO[bytes], Image.Image], message: str):
     """
     Hide a message (string) in an image.
 
@@ -46,26 +48,23 @@ def hide(input_image: Union[str, IO[bytes]], message: str):
     # Use a copy of image to hide the text in
     encoded = img.copy()
     width, height = img.size
-    index = 0
-    for row in range(height):
-        for col in range(width):
-            pixel = cast(tuple[int, int, int], img.getpixel((col, row)))
-            r, g, b = pixel
-            # first value is message_length of message
-            if row == 0 and col == 0 and index < message_length:
-                asc = message_length
-            elif index <= message_length:
-                c = message[index - 1]
-                asc = ord(c)
-            else:
-                asc = r
-            encoded.putpixel((col, row), (asc, g, b))
-            index += 1
+    # Only the first message_length + 1 pixels change.
+    for index in range(min(message_length + 1, width * height)):
+        col, row = index % width, index // width
+        pixel = cast(tuple[int, int, int], img.getpixel((col, row)))
+        r, g, b = pixel
+        # first value is message_length of message
+        if index == 0:
+            asc = message_length
+        else:
+            c = message[index - 1]
+            asc = ord(c)
+        encoded.putpixel((col, row), (asc, g, b))
     img.close()
     return encoded
 
 
-def reveal(input_image: Union[str, IO[bytes]]):
+def reveal(input_image: Union[str, IO[bytes], Image.Image]):
     """
     Find a message in an image.
 
@@ -79,16 +78,14 @@ def reveal(input_image: Union[str, IO[bytes]]):
         img = img.convert("RGB")
     width, height = img.size
     message = ""
-    index = 0
-    for row in range(height):
-        for col in range(width):
-            pixel = cast(tuple[int, int, int], img.getpixel((col, row)))
-            r, g, b = pixel
-            # First pixel r value is length of message
-            if row == 0 and col == 0:
-                message_length = r
-            elif index <= message_length:
-                message += chr(r)
-            index += 1
+    # First pixel r value is length of message
+    pixel = cast(tuple[int, int, int], img.getpixel((0, 0)))
+    message_length = pixel[0]
+    # The scan stops at the end of the message.
+    for index in range(1, min(message_length + 1, width * height)):
+        col, row = index % width, index // width
+        pixel = cast(tuple[int, int, int], img.getpixel((col, row)))
+        r, g, b = pixel
+        message += chr(r)
     img.close()
     return message
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# Stegano - Stegano is a pure Python steganography module.
+# Copyright (C) 2010-2025 Cédric Bonhomme - https://www.cedricbonhomme.org
+#
+# For more information : https://github.com/cedricbonhomme/Stegano
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__license__ = "GPLv3"
+
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Dict, Iterator, List, Optional, Union
+
+from PIL import Image
+
+from stegano.steganalysis import parity, statistics
+
+EXTENSIONS = (".png", ".bmp", ".gif", ".jpg", ".jpeg", ".tif", ".tiff", ".webp")
+
+FIELDS = [
+    "path",
+    "mode",
+    "width",
+    "height",
+    "odd_red",
+    "odd_green",
+    "odd_blue",
+    "red_colours",
+    "red_most_common",
+    "red_most_common_count",
+    "error",
+]
+
+
+def images(directory: str) -> Iterator[str]:
+    """The image files of a directory tree, in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def image_statistics(path: str) -> Dict[str, Union[str, int, float]]:
+    """Statistics of the least significant bits of an image, from its parity
+    image (see parity) and the counter of its red values (see statistics).
+
+    odd_* is the share of odd values of a band: close to 0.5 in all the bands
+    when the LSB carry random data. An image which can not be read (or is too
+    large, see PIL.Image.MAX_IMAGE_PIXELS) gives a row with only its error.
+    """
+    row: Dict[str, Union[str, int, float]] = {field: "" for field in FIELDS}
+    row["path"] = path
+    try:
+        with Image.open(path) as img:
+            row["mode"] = img.mode
+            row["width"], row["height"] = img.size
+            rgb = img.convert("RGB")
+        odd = parity.steganalyse(rgb).histogram()
+        red = statistics.red_counter(rgb)
+    except Exception as e:
+        row["error"] = str(e) or type(e).__name__
+        return row
+
+    npixels = rgb.width * rgb.height or 1
+    for index, band in enumerate(("red", "green", "blue")):
+        row["odd_" + band] = round(odd[256 * index + 255] / npixels, 6)
+    row["red_colours"] = len(red)
+    if red:
+        row["red_most_common"], row["red_most_common_count"] = red.most_common(1)[0]
+    return row
+
+
+def analyse_directory(
+    directory: str, output: Union[str, IO[str]], processes: Optional[int] = None
+) -> List[Dict[str, Union[str, int, float]]]:
+    """Compute the statistics of all the images of a directory tree, in a pool
+    of processes (one per CPU by default), and write them in a CSV file.
+    """
+    paths = list(images(directory))
+    if processes == 1 or len(paths) < 2:
+        rows = [image_statistics(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            rows = list(executor.map(image_statistics, paths, chunksize=4))
+
+    if isinstance(output, str):
+        with open(output, "w", newline="") as f:
+            _write(f, rows)
+    else:
+        _write(output, rows)
+    return rows
+
+
+def _write(f: IO[str], rows: List[Dict[str, Union[str, int, float]]]):
+    writer = csv.DictWriter(f, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
@@ -27,11 +27,21 @@ from typing import cast
 
 from PIL import Image
 
+# 0 for the even values of a band, 255 for the odd ones.
+PARITY = [255 * (value % 2) for value in range(256)]
+
 
 def steganalyse(img: Image.Image) -> Image.Image:
     """
     Steganlysis of the LSB technique.
     """
+    if img.mode in ("RGB", "RGBA"):
+        # One lookup table per band, over the whole image buffer.
+        bands = [band.point(PARITY) for band in img.split()[:3]]
+        if img.mode == "RGBA":
+            bands.append(Image.new("L", img.size, 255))
+        return Image.merge(img.mode, bands)
+
     encoded = Image.new(img.mode, (img.size))
     width, height = img.size
     for row in range(height):
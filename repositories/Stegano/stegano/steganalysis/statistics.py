@@ -26,17 +26,48 @@ __license__ = "GPLv3"
 import typing
 from collections import Counter, OrderedDict
 
+import numpy as np
+
+
+def red_counter(img) -> typing.Counter[int]:
+    """Counter of the red values of a RGB image, in the order they first
+    appear (row by row), as counting the pixels one at a time would give."""
+    counts = img.histogram()[:256]
+    present = sum(1 for count in counts if count)
+    red = np.asarray(img.getchannel("R")).ravel()
+    first = np.full(256, red.size, dtype=np.int64)
+    found = 0
+    block = 1 << 16
+    # All the values usually appear in the first rows.
+    for start in range(0, red.size, block):
+        values, index = np.unique(red[start : start + block], return_index=True)
+        new = first[values] == red.size
+        first[values[new]] = index[new] + start
+        found += int(new.sum())
+        if found == present:
+            break
+    return Counter(
+        {
+            int(value): counts[value]
+            for value in np.argsort(first, kind="stable")[:present]
+        }
+    )
+
 
 def steganalyse(img):
     """
     Steganlysis of the LSB technique.
     """
-    width, height = img.size
-    colours_counter: typing.Counter[int] = Counter()
-    for row in range(height):
-        for col in range(width):
-            r, g, b = img.getpixel((col, row))
-            colours_counter[r] += 1
+    colours_counter: typing.Counter[int]
+    if img.mode == "RGB":
+        colours_counter = red_counter(img)
+    else:
+        width, height = img.size
+        colours_counter = Counter()
+        for row in range(height):
+            for col in range(width):
+                r, g, b = img.getpixel((col, row))
+                colours_counter[r] += 1
 
     most_common = colours_counter.most_common(10)
     dict_colours = OrderedDict(
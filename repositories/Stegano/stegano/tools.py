@@ -26,8 +26,9 @@ __license__ = "GPLv3"
 import base64
 import itertools
 from functools import reduce
-from typing import IO, List, Union, cast
+from typing import IO, List, Optional, Union, cast
 
+import numpy as np
 from PIL import Image
 
 ENCODINGS = {"UTF-8": 8, "UTF-32LE": 32}
@@ -64,6 +65,24 @@ def a2bits_list(chars: str, encoding: str = "UTF-8") -> List[str]:
     return [bin(ord(x))[2:].rjust(ENCODINGS[encoding], "0") for x in chars]
 
 
+def a2bits_array(chars: str, encoding: str = "UTF-8") -> np.ndarray:
+    """Convert a string to the same bits as a2bits_list, as an array of 0's
+    and 1's (uint8).
+
+    >>> a2bits_array("Hi").tolist()
+    [0, 1, 0, 0, 1, 0, 0, 0, 0, 1, 1, 0, 1, 0, 0, 1]
+    """
+    width = ENCODINGS[encoding]
+    codes = [ord(x) for x in chars]
+    if codes and max(codes) >= 1 << width:
+        # Characters wider than the encoding keep all their bits (a2bits_list).
+        return (
+            np.frombuffer("".join(a2bits_list(chars, encoding)).encode(), np.uint8) - 48
+        )
+    dtype = np.uint8 if width == 8 else np.dtype(">u4")
+    return np.unpackbits(np.array(codes, dtype=dtype).view(np.uint8))
+
+
 def bs(s: int) -> str:
     """Converts an int to its bits representation as a string of 0's and 1's."""
     return str(s) if s <= 1 else bs(s >> 1) + str(s & 1)
@@ -117,7 +136,7 @@ def open_image(fname_or_instance: Union[str, IO[bytes], Image.Image]) -> Image.I
 class Hider:
     def __init__(
         self,
-        input_image: Union[str, IO[bytes]],
+        input_image: Union[str, IO[bytes], Image.Image],
         message: str,
         encoding: str = "UTF-8",
         auto_convert_rgb: bool = False,
@@ -142,6 +161,8 @@ class Hider:
         image.close()
 
         message = str(message_length) + ":" + str(message)
+        self._message = message
+        self._encoding = encoding
         self._message_bits = "".join(a2bits_list(message, encoding))
         self._message_bits += "0" * ((3 - (len(self._message_bits) % 3)) % 3)
 
@@ -157,6 +178,50 @@ class Hider:
     def encode_another_pixel(self):
         return True if self._index + 3 <= self._len_message_bits else False
 
+    def pixels_to_encode(self) -> int:
+        """Number of pixels still needed for the message."""
+        return (self._len_message_bits - self._index) // 3
+
+    def encode_pixels(self, numbers: Union[List[int], np.ndarray]) -> bool:
+        """Encode the rest of the message at once, one pixel per number
+        (``row * width + col``), with the same result as calling encode_pixel
+        for each of them.
+
+        Returns False, without touching the image, when that is not possible
+        (too few numbers, or a number outside of the image).
+        """
+        if len(numbers) != self.pixels_to_encode():
+            return False
+        try:
+            idx = np.array(numbers, dtype=np.int64)
+        except OverflowError:
+            return False
+        width, height = self.encoded_image.size
+        if idx.size and (idx.min() < 0 or idx.max() >= width * height):
+            return False
+
+        bits = a2bits_array(self._message, self._encoding)
+        bits = np.concatenate(
+            [bits, np.zeros(self._len_message_bits - bits.size, np.uint8)]
+        )
+        bits = bits[self._index :].reshape(-1, 3)
+        if idx.size and np.bincount(idx).max() > 1:
+            # A pixel given several times keeps the last bits written to it.
+            last = np.full(width * height, -1, dtype=np.int64)
+            np.maximum.at(last, idx, np.arange(idx.size))
+            keep = last[last >= 0]
+            idx, bits = idx[keep], bits[keep]
+
+        bands = len(self.encoded_image.getbands())
+        pixels = np.frombuffer(
+            bytearray(self.encoded_image.tobytes()), dtype=np.uint8
+        ).reshape(-1, bands)
+        pixels[idx, :3] = (pixels[idx, :3] & 0xFE) | bits
+        self.encoded_image.frombytes(pixels.tobytes())
+
+        self._index = self._len_message_bits
+        return True
+
     def encode_pixel(self, coordinate: tuple):
         # Determine expected pixel format based on mode
         if self.encoded_image.mode == "RGBA":
@@ -185,7 +250,7 @@ class Hider:
 class Revealer:
     def __init__(
         self,
-        encoded_image: Union[str, IO[bytes]],
+        encoded_image: Union[str, IO[bytes], Image.Image],
         encoding: str = "UTF-8",
         close_file: bool = True,
     ):
@@ -196,6 +261,12 @@ class Revealer:
         self._limit: Union[None, int] = None
         self.secret_message = ""
         self.close_file = close_file
+        # State of decode_pixels, kept apart from decode_pixel's.
+        self._pixels: Optional[np.ndarray] = None
+        self._bits = np.zeros(0, np.uint8)
+        self._header: Optional[int] = None
+        self._skip = 0
+        self._length: Optional[int] = None
 
     def decode_pixel(self, coordinate: tuple):
         # Tell mypy that this will be a 3- or 4-tuple of ints
@@ -228,3 +299,65 @@ class Revealer:
             return True
         else:
             return False
+
+    def decode_pixels(self, numbers: Union[List[int], np.ndarray]) -> Optional[int]:
+        """Decode a batch of pixels (numbers are ``row * width + col``) at once,
+        with the same result as calling decode_pixel for each of them.
+
+        Returns 0 when the message is complete (secret_message is set), the
+        number of further pixels needed otherwise (a guess until the length
+        header is read), or None when the pixels can not be decoded this way
+        (unsupported mode, number outside of the image, malformed message);
+        decode_pixel must then be replayed from the first pixel.
+        """
+        image = self.encoded_image
+        if image.mode not in ["RGB", "RGBA"]:
+            return None
+        npixels = image.width * image.height
+        try:
+            idx = np.array(numbers, dtype=np.int64)
+        except OverflowError:
+            return None
+        if idx.size and (idx.min() < 0 or idx.max() >= npixels):
+            return None
+
+        if self._pixels is None:
+            self._pixels = np.frombuffer(image.tobytes(), dtype=np.uint8).reshape(
+                npixels, len(image.mode)
+            )
+        self._bits = np.concatenate([self._bits, (self._pixels[idx, :3] & 1).ravel()])
+
+        n = self._encoding_length
+        nchars = self._bits.size // n
+        weights = np.left_shift(1, np.arange(n - 1, -1, -1, dtype=np.int64))
+        codes = self._bits[: nchars * n].reshape(nchars, n).astype(np.int64) @ weights
+        # chr() fails on these; decode_pixel raises at the same character.
+        invalid = np.flatnonzero(codes > 0x10FFFF)
+        first_invalid = int(invalid[0]) if invalid.size else nchars
+
+        if self._header is None:
+            colon = np.flatnonzero(codes == ord(":"))
+            if not colon.size or colon[0] > first_invalid:
+                if first_invalid < nchars or self._bits.size > 3 * 4 * npixels:
+                    return None
+                return max(2 * idx.size, 64)
+            prefix = "".join(map(chr, codes[: colon[0]]))
+            if not prefix.isdigit():
+                raise IndexError("Impossible to detect message.")
+            limit = int(prefix)
+            self._header = int(colon[0]) + 1
+            self._skip = len(str(limit)) + 1
+            self._length = self._skip + limit
+            if self._length < self._header or self._length * n > 3 * 4 * npixels:
+                return None
+
+        assert self._length is not None and self._header is not None
+        if first_invalid < min(nchars, self._length):
+            return None
+        if nchars < self._length:
+            return -(-(self._length * n - self._bits.size) // 3)
+
+        self.secret_message = "".join(map(chr, codes[self._skip : self._length]))
+        if self.close_file:
+            image.close()
+        return 0
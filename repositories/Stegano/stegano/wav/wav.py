@@ -26,8 +26,14 @@ __license__ = "GPLv3"
 import wave
 from typing import IO, Union
 
+import numpy as np
+
 from stegano import tools
 
+# Bytes of frames read at once: the memory used does not depend on the size of
+# the file.
+CHUNK_SIZE = 1 << 20
+
 
 def hide(
     input_file: Union[str, IO[bytes]],
@@ -40,12 +46,13 @@ def hide(
 
     Use the lsb of each PCM encoded sample to hide the message string characters as ASCII values.
     The first eight bits are used for message_length of the string.
+    The frames are processed by chunks: the bits of the message are written
+    in the first ones, the others are copied unchanged.
     """
     message_length = len(message)
     assert message_length != 0, "message message_length is zero"
     assert message_length < 255, "message is too long"
 
-    output = wave.open(output_file, "wb")
     with wave.open(input_file, "rb") as input:
         # get .wav params
         nchannels, sampwidth, framerate, nframes, comptype, _ = input.getparams()
@@ -53,27 +60,35 @@ def hide(
 
         nsamples = nframes * nchannels
 
-        message_bits = f"{message_length:08b}" + "".join(
-            tools.a2bits_list(message, encoding)
+        message_bits = np.concatenate(
+            [
+                np.unpackbits(np.array([message_length], dtype=np.uint8)),
+                tools.a2bits_array(message, encoding),
+            ]
         )
-        assert len(message_bits) <= nsamples, "message is too long"
-
-        # copy over .wav params to output
-        output.setnchannels(nchannels)
-        output.setsampwidth(sampwidth)
-        output.setframerate(framerate)
-
-        # encode message in frames
-        frames = bytearray(input.readframes(nsamples))
-        for i in range(nsamples):
-            if i < len(message_bits):
-                if message_bits[i] == "0":
-                    frames[i] = frames[i] & ~1
-                else:
-                    frames[i] = frames[i] | 1
-
-        # write out
-        output.writeframes(frames)
+        assert message_bits.size <= nsamples, "message is too long"
+
+        with wave.open(output_file, "wb") as output:
+            # copy over .wav params to output
+            output.setnchannels(nchannels)
+            output.setsampwidth(sampwidth)
+            output.setframerate(framerate)
+            output.setnframes(nframes)
+
+            # encode message in the first frames, copy the others
+            chunk_frames = max(1, CHUNK_SIZE // (nchannels * sampwidth))
+            position = 0
+            while True:
+                frames = input.readframes(chunk_frames)
+                if not frames:
+                    break
+                if position < message_bits.size:
+                    buffer = np.frombuffer(bytearray(frames), dtype=np.uint8)
+                    bits = message_bits[position : position + buffer.size]
+                    buffer[: bits.size] = (buffer[: bits.size] & 0xFE) | bits
+                    frames = buffer.tobytes()
+                position += len(frames)
+                output.writeframesraw(frames)
 
 
 def reveal(input_file: Union[str, IO[bytes]], encoding: str = "UTF-8"):
@@ -82,31 +97,33 @@ def reveal(input_file: Union[str, IO[bytes]], encoding: str = "UTF-8"):
 
     Check the lsb of each PCM encoded sample for hidden message characters (ASCII values).
     The first eight bits are used for message_length of the string.
+    Only the frames holding the message are read.
     """
-    message = ""
     encoding_len = tools.ENCODINGS[encoding]
     with wave.open(input_file, "rb") as input:
-        nchannels, _, _, nframes, comptype, _ = input.getparams()
+        nchannels, sampwidth, _, _, comptype, _ = input.getparams()
         assert comptype == "NONE", "only uncompressed files are supported"
+        frame_size = nchannels * sampwidth
 
-        nsamples = nframes * nchannels
-        frames = bytearray(input.readframes(nsamples))
+        def read_bits(count: int) -> np.ndarray:
+            """The lsb of the next count bytes of frames (and a few more, up to
+            the end of the last frame read)."""
+            frames = input.readframes(-(-count // frame_size))
+            if len(frames) < count:
+                raise IndexError("bytearray index out of range")
+            return np.frombuffer(frames, dtype=np.uint8) & 1
 
         # Read first 8 bits for message length
-        length_bits = ""
-        for i in range(8):
-            length_bits += str(frames[i] & 1)
-        message_length = int(length_bits, 2)
+        bits = read_bits(8)
+        message_length = int(np.packbits(bits[:8])[0])
 
         # Read message bits
-        message_bits = ""
-        for i in range(8, 8 + message_length * encoding_len):
-            message_bits += str(frames[i] & 1)
+        needed = 8 + message_length * encoding_len
+        if bits.size < needed:
+            bits = np.concatenate([bits, read_bits(needed - bits.size)])
+        message_bits = bits[8:needed].reshape(message_length, encoding_len)
 
         # Convert bits to string
-        chars = [
-            chr(int(message_bits[i : i + encoding_len], 2))
-            for i in range(0, len(message_bits), encoding_len)
-        ]
-        message = "".join(chars)
-    return message
+        weights = np.left_shift(1, np.arange(encoding_len - 1, -1, -1, dtype=np.int64))
+        codes = message_bits.astype(np.int64) @ weights
+    return "".join(chr(code) for code in codes.tolist())
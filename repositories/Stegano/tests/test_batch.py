@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# Stegano - Stegano is a pure Python steganography module.
+# Copyright (C) 2010-2025 Cédric Bonhomme - https://www.cedricbonhomme.org
+#
+# For more information : https://github.com/cedricbonhomme/Stegano
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__license__ = "GPLv3"
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from stegano import batch, lsb, red, wav
+from stegano.lsb import generators
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def manifest(self, text: str):
+        return batch.read_manifest(io.StringIO(text.format(tmp=self.directory)))
+
+    def test_lsb(self):
+        jobs = self.manifest(
+            "command,input,output,message,generator,shift\n"
+            "hide,./tests/sample-files/Lenna.png,{tmp}/1.png,Hello,,\n"
+            "hide,./tests/sample-files/Lenna.png,{tmp}/2.png,Primes,eratosthenes,3\n"
+            "hide,./tests/sample-files/transparent.png,{tmp}/3.png,LFSR,LFSR,\n"
+        )
+        for processes in (1, 2):
+            rows = batch.run("lsb", jobs, processes)
+            self.assertEqual([row["status"] for row in rows], ["ok"] * 3)
+            self.assertEqual(lsb.reveal(self.path("1.png")), "Hello")
+            self.assertEqual(
+                lsb.reveal(self.path("2.png"), generators.eratosthenes(), 3), "Primes"
+            )
+            self.assertEqual(
+                lsb.reveal(self.path("3.png"), generators.LFSR(286 * 113)), "LFSR"
+            )
+
+        rows = batch.run(
+            "lsb",
+            self.manifest(
+                "command,input,generator,shift\n"
+                "reveal,{tmp}/2.png,eratosthenes,3\n"
+                "reveal,{tmp}/1.png,,\n"
+            ),
+        )
+        self.assertEqual([row["message"] for row in rows], ["Primes", "Hello"])
+
+    def test_unknown_generator(self):
+        rows = batch.run(
+            "lsb",
+            self.manifest(
+                "command,input,output,message,generator\n"
+                "hide,./tests/sample-files/Lenna.png,{tmp}/1.png,Hello,eratostenes\n"
+                "hide,./tests/sample-files/Lenna.png,{tmp}/2.png,Hello,cast\n"
+            ),
+        )
+        self.assertEqual([row["status"] for row in rows], ["error"] * 2)
+        self.assertEqual(rows[0]["error"], "Unknown generator: eratostenes")
+        self.assertEqual(rows[1]["error"], "Unknown generator: cast")
+
+    def test_red_and_wav(self):
+        rows = batch.run(
+            "red",
+            self.manifest(
+                "command,input,output,message\n"
+                "hide,./tests/sample-files/Lenna.png,{tmp}/red.png,Red\n"
+            ),
+        )
+        self.assertEqual(rows[0]["status"], "ok")
+        self.assertEqual(red.reveal(self.path("red.png")), "Red")
+
+        rows = batch.run(
+            "wav",
+            self.manifest(
+                "command,input,output,message,encoding\n"
+                "hide,./tests/sample-files/free-software-song.wav,"
+                "{tmp}/a.wav,€,UTF-32LE\n"
+            ),
+        )
+        self.assertEqual(rows[0]["status"], "ok")
+        self.assertEqual(wav.reveal(self.path("a.wav"), "UTF-32LE"), "€")
+
+    def test_secret_file(self):
+        with open(self.path("secret.bin"), "wb") as f:
+            f.write(bytes(range(256)))
+        batch.run(
+            "lsb",
+            self.manifest(
+                "command,input,output,secret_file\n"
+                "hide,./tests/sample-files/Lenna.png,{tmp}/s.png,{tmp}/secret.bin\n"
+            ),
+        )
+        batch.run(
+            "lsb",
+            self.manifest("command,input,output\nreveal,{tmp}/s.png,{tmp}/out.bin\n"),
+        )
+        with open(self.path("out.bin"), "rb") as f:
+            self.assertEqual(f.read(), bytes(range(256)))
+
+    def test_report(self):
+        report = io.StringIO()
+        rows = batch.run(
+            "red",
+            self.manifest(
+                "command,input,output,message\n"
+                "hide,./tests/sample-files/Lenna.png,{tmp}/ok.png,Red\n"
+                "hide,{tmp}/missing.png,{tmp}/ko.png,Red\n"
+                "hide,./tests/sample-files/Lenna.png,,Red\n"
+                "reveal,./tests/sample-files/Lenna.png,,\n"
+            ),
+            processes=2,
+            report=report,
+        )
+        self.assertEqual(
+            [row["status"] for row in rows], ["ok", "error", "error", "ok"]
+        )
+        self.assertEqual(rows[0]["input_bytes"], 474648)
+        self.assertGreater(float(rows[0]["mb_per_s"]), 0)
+        written = list(csv.DictReader(io.StringIO(report.getvalue())))
+        self.assertEqual(
+            [row["status"] for row in written], ["ok", "error", "error", "ok"]
+        )
+        self.assertTrue(written[1]["error"])
+
+    def test_image_cache(self):
+        first = batch._image("./tests/sample-files/Lenna.png")
+        first.putpixel((0, 0), (0, 0, 0))
+        second = batch._image("./tests/sample-files/Lenna.png")
+        self.assertNotEqual(second.getpixel((0, 0)), (0, 0, 0))
+        self.assertIn(
+            os.path.abspath("./tests/sample-files/Lenna.png"),
+            [key[0] for key in batch._images],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
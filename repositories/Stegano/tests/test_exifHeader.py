@@ -26,6 +26,10 @@ __license__ = "GPLv3"
 import io
 import os
 import unittest
+from unittest import mock
+
+import piexif
+from PIL import Image
 
 from stegano import exifHeader
 
@@ -94,7 +98,75 @@ class TestEXIFHeader(unittest.TestCase):
             clear_message = exifHeader.reveal(outputBytes)
             self.assertEqual(message, clear_message)
 
+    def test_image_data_is_kept(self):
+        """Test that hiding in a JPEG image does not encode it again."""
+        with open("./tests/sample-files/Lenna.jpg", "rb") as f:
+            original = f.read()
+        exifHeader.hide(
+            "./tests/sample-files/Lenna.jpg", "./image.jpg", secret_message="Secret"
+        )
+        with open("./image.jpg", "rb") as f:
+            encoded = f.read()
+
+        scan = original.index(b"\xff\xda")
+        self.assertTrue(encoded.endswith(original[scan:]))
+        self.assertEqual(b"Secret", exifHeader.reveal("./image.jpg"))
+
+    def test_other_exif_tags_are_kept(self):
+        image = io.BytesIO()
+        exif = piexif.dump({"0th": {piexif.ImageIFD.Make: b"Stegano"}})
+        with Image.open("./tests/sample-files/Lenna.jpg") as img:
+            img.save(image, format="JPEG", exif=exif)
+
+        for message in ["first", "second"]:
+            output = io.BytesIO()
+            exifHeader.hide(image, output, secret_message=message)
+            image = output
+
+        self.assertEqual(b"second", exifHeader.reveal(image))
+        exif_dict = piexif.load(image.getvalue())
+        self.assertEqual(b"Stegano", exif_dict["0th"][piexif.ImageIFD.Make])
+
+    def test_with_binary_file(self):
+        secret = bytes(range(256)) * 100
+        with open("./secret.bin", "wb") as f:
+            f.write(secret)
+        with mock.patch.object(exifHeader.exifHeader, "CHUNK_SIZE", 3 * 1000):
+            exifHeader.hide(
+                "./tests/sample-files/Lenna.jpg",
+                "./image.jpg",
+                secret_file="./secret.bin",
+            )
+        self.assertEqual(secret, exifHeader.reveal("./image.jpg"))
+
+    def test_reveal_reads_only_the_exif_segment(self):
+        exifHeader.hide(
+            "./tests/sample-files/Lenna.jpg", "./image.jpg", secret_message="Secret"
+        )
+        with open("./image.jpg", "rb") as f:
+            encoded = f.read()
+        # Without the image data.
+        truncated = io.BytesIO(encoded[: encoded.index(b"\xff\xdb")])
+        self.assertEqual(b"Secret", exifHeader.reveal(truncated))
+
+    def test_hide_in_place(self):
+        """Test hiding in a JPEG image written over the input image."""
+        with open("./tests/sample-files/Lenna.jpg", "rb") as f:
+            original = f.read()
+        with open("./image.jpg", "wb") as f:
+            f.write(original)
+        exifHeader.hide("./image.jpg", "./image.jpg", secret_message="Secret")
+
+        with open("./image.jpg", "rb") as f:
+            encoded = f.read()
+        self.assertTrue(encoded.endswith(original[original.index(b"\xff\xda") :]))
+        self.assertEqual(b"Secret", exifHeader.reveal("./image.jpg"))
+
     def tearDown(self):
+        try:
+            os.unlink("./secret.bin")
+        except Exception:
+            pass
         try:
             os.unlink("./image.jpg")
         except Exception:
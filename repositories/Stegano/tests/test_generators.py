@@ -25,11 +25,12 @@ __license__ = "GPLv3"
 
 import itertools
 import unittest
+from unittest import mock
 
 import cv2
 import numpy as np
 
-from stegano.lsb import generators
+from stegano.lsb import generators, sequences
 
 
 class TestGenerators(unittest.TestCase):
@@ -153,6 +154,89 @@ class TestGenerators(unittest.TestCase):
                 tuple(int(line) for line in f),
             )
 
+    def test_take(self):
+        """Test that take gives the numbers next() would give."""
+        for generator in (
+            generators.identity,
+            generators.triangular_numbers,
+            generators.fermat,
+            generators.mersenne,
+            generators.eratosthenes,
+            generators.composite,
+            generators.carmichael,
+            lambda: generators.ackermann(3),
+            generators.fibonacci,
+            generators.log_gen,
+            lambda: generators.LFSR(2**8),
+        ):
+            expected = list(itertools.islice(generator(), 20))
+            gen = generator()
+            self.assertEqual(next(gen), expected[0])
+            self.assertEqual(gen.take(3, shift=2).tolist(), expected[3:6])
+            self.assertEqual(gen.take(0, shift=1).tolist(), [])
+            self.assertEqual(next(gen), expected[7])
+            self.assertEqual(list(itertools.islice(gen, 12)), expected[8:])
+
+    def test_take_beyond_64_bits(self):
+        """Test that take does not move when the numbers do not fit in 64 bits."""
+        gen = generators.fermat()
+        with self.assertRaises(OverflowError):
+            gen.take(10)
+        self.assertEqual(next(gen), 3)
+        self.assertEqual(gen.take(5).tolist(), [5, 17, 257, 65537, 4294967297])
+        self.assertEqual(next(gen), 18446744073709551617)
+        with self.assertRaises(OverflowError):
+            gen.take(1)
+
+    def test_take_long_sequences(self):
+        """Test the sieves and the LFSR on longer runs."""
+        sequences.clear_cache()
+        with open("./tests/expected-results/carmichael") as f:
+            self.assertEqual(
+                generators.carmichael().take(33).tolist(), [int(line) for line in f]
+            )
+        primes = generators.eratosthenes().take(100000)
+        self.assertEqual(primes[-1], 1299709)
+        composites = generators.composite().take(100000)
+        self.assertEqual(
+            np.union1d(primes, composites)[: 100000 - 2].tolist(),
+            list(range(2, 100000)),
+        )
+
+        # {1 0 0 ... 0} comes back after 2^n - 1 steps.
+        states = generators.LFSR(2**20).take(2**20 + 1)
+        self.assertEqual(np.unique(states[:-2]).size, 2**20 - 1)
+        self.assertEqual(states[2**20 - 2], 1)
+        self.assertEqual(states[-2:].tolist(), states[:2].tolist())
+
+    def test_beyond_cache(self):
+        """Test that the numbers past the cache follow the ones read before."""
+        for generator in (
+            generators.eratosthenes,
+            generators.composite,
+            lambda: generators.LFSR(2**12),
+        ):
+            sequences.clear_cache()
+            expected = generator().take(3000).tolist()
+            with mock.patch.object(sequences, "CACHE_SIZE", 100):
+                sequences.clear_cache()
+                gen = generator()
+                numbers = list(itertools.islice(gen, 130))
+                numbers += gen.take(500).tolist()
+                numbers += list(itertools.islice(gen, 1000))
+                numbers += gen.take(400, shift=5).tolist()
+                numbers += list(itertools.islice(gen, 900))
+            self.assertEqual(numbers, expected[:1630] + expected[1635:2935])
+
+    def test_take_cache(self):
+        """Test that the computed prefixes are shared and not writable."""
+        sequences.clear_cache()
+        first = generators.eratosthenes().take(1000)
+        second = generators.eratosthenes().take(500, shift=500)
+        self.assertTrue(np.shares_memory(first, second))
+        with self.assertRaises(ValueError):
+            first[0] = 0
+
     def test_shi_tomashi(self):
         """Test the Shi Tomashi generator"""
 
@@ -28,7 +28,7 @@ import os
 import unittest
 from unittest.mock import patch
 
-from stegano import lsb
+from stegano import lsb, tools
 from stegano.lsb import generators
 
 
@@ -237,6 +237,73 @@ class TestLSB(unittest.TestCase):
                 generators.unknown_generator(),  # type: ignore
             )
 
+    def _hide_pixel_by_pixel(self, image, message, generator, encoding="UTF-8"):
+        hider = tools.Hider(image, message, encoding)
+        width = hider.encoded_image.width
+        while hider.encode_another_pixel():
+            generated_number = next(generator)
+            hider.encode_pixel((generated_number % width, generated_number // width))
+        return hider.encoded_image
+
+    def test_vectorized_hide_is_bit_identical(self):
+        long_message = "Hello World! " * 5
+        cases = [
+            (
+                "./tests/sample-files/Lenna.png",
+                generators.identity,
+                long_message,
+                "UTF-8",
+            ),
+            (
+                "./tests/sample-files/Lenna.png",
+                generators.eratosthenes,
+                long_message,
+                "UTF-32LE",
+            ),
+            (
+                "./tests/sample-files/transparent.png",
+                generators.triangular_numbers,
+                long_message,
+                "UTF-8",
+            ),
+            (
+                "./tests/sample-files/transparent.png",
+                generators.fibonacci,
+                "foo",
+                "UTF-8",
+            ),
+        ]
+        for image, generator, message, encoding in cases:
+            secret = lsb.hide(image, message, generator(), encoding=encoding)
+            expected = self._hide_pixel_by_pixel(image, message, generator(), encoding)
+            self.assertEqual(secret.mode, expected.mode)
+            self.assertEqual(secret.tobytes(), expected.tobytes())
+
+    def test_hide_with_repeated_pixels(self):
+        # LFSR(2**5) cycles through 31 pixels: later bits overwrite earlier ones.
+        message = "Hello World!"
+        secret = lsb.hide(
+            "./tests/sample-files/Lenna.png", message, generators.LFSR(2**5)
+        )
+        expected = self._hide_pixel_by_pixel(
+            "./tests/sample-files/Lenna.png", message, generators.LFSR(2**5)
+        )
+        self.assertEqual(secret.tobytes(), expected.tobytes())
+
+    def test_hide_with_pixel_outside_of_image(self):
+        with self.assertRaises(IndexError):
+            lsb.hide(
+                "./tests/sample-files/Lenna.png", "Hello World!", generators.fermat()
+            )
+
+    def test_reveal_long_message(self):
+        with open("./tests/sample-files/lorem_ipsum.txt") as f:
+            message = f.read()
+        secret = lsb.hide("./tests/sample-files/Lenna.png", message)
+        secret.save("./image.png")
+
+        self.assertEqual(lsb.reveal("./image.png"), message)
+
     def tearDown(self):
         try:
             os.unlink("./image.png")
@@ -25,6 +25,8 @@ __license__ = "GPLv3"
 import os
 import unittest
 
+from PIL import Image
+
 from stegano import red
 
 
@@ -53,6 +55,23 @@ class TestRed(unittest.TestCase):
         with self.assertRaises(AssertionError):
             red.hide("./tests/sample-files/Lenna.png", message)
 
+    def test_only_message_pixels_change(self):
+        image = Image.open("./tests/sample-files/Lenna.png")
+        secret = red.hide(image.copy(), "foo")
+
+        original = list(image.getdata())
+        encoded = list(secret.getdata())
+        self.assertEqual([r for r, g, b in encoded[:4]], [3, ord("f"), ord("o"), 111])
+        self.assertEqual(
+            [(g, b) for r, g, b in encoded], [(g, b) for r, g, b in original]
+        )
+        self.assertEqual(encoded[4:], original[4:])
+
+    def test_reveal_in_small_image(self):
+        image = Image.new("RGB", (2, 2), (200, 0, 0))
+        image.putpixel((0, 0), (10, 0, 0))
+        self.assertEqual(red.reveal(image), chr(200) * 3)
+
     def tearDown(self):
         try:
             os.unlink("./image.png")
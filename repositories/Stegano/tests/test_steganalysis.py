@@ -24,12 +24,19 @@ __date__ = "$Date: 2019/06/06 $"
 __revision__ = "$Date: 2019/06/06 $"
 __license__ = "GPLv3"
 
+import csv
+import io
+import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 
+import numpy as np
 from PIL import Image, ImageChops
 
 from stegano import lsb
-from stegano.steganalysis import parity, statistics
+from stegano.steganalysis import batch, parity, statistics
 
 
 class TestSteganalysis(unittest.TestCase):
@@ -61,6 +68,59 @@ class TestSteganalysis(unittest.TestCase):
         file.close()
         self.assertEqual(stats, target)
 
+    def test_statistics_ties(self):
+        """Test that red values with the same count keep the order in which
+        they appear"""
+        red = np.array([[5, 3, 9, 3], [9, 5, 1, 7]], dtype=np.uint8)
+        image = Image.fromarray(np.dstack([red, red, red]))
+        self.assertEqual(
+            statistics.steganalyse(image),
+            ([1, 7, 5, 3, 9], [(5, 2), (3, 2), (9, 2), (1, 1), (7, 1)]),
+        )
+
+    def test_batch(self):
+        """Test stegano.steganalysis.batch on a directory tree"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        os.mkdir(os.path.join(directory, "sub"))
+        shutil.copy("./tests/sample-files/Lenna.png", directory)
+        shutil.copy(
+            "./tests/sample-files/transparent.png", os.path.join(directory, "sub")
+        )
+        with open(os.path.join(directory, "sub", "broken.png"), "w") as f:
+            f.write("not an image")
+        with open(os.path.join(directory, "notes.txt"), "w") as f:
+            f.write("not an image either")
+
+        output = io.StringIO()
+        rows = batch.analyse_directory(directory, output, processes=2)
+        self.assertEqual(rows, batch.analyse_directory(directory, io.StringIO(), 1))
+        self.assertEqual(
+            [os.path.relpath(str(row["path"]), directory) for row in rows],
+            [
+                "Lenna.png",
+                os.path.join("sub", "broken.png"),
+                os.path.join("sub", "transparent.png"),
+            ],
+        )
+        lenna, broken, _ = rows
+        self.assertEqual((lenna["width"], lenna["height"]), (512, 512))
+        self.assertEqual(
+            (lenna["red_most_common"], lenna["red_most_common_count"]), (224, 4327)
+        )
+        self.assertTrue(broken["error"])
+
+        written = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(len(written), 3)
+        self.assertEqual(written[0]["odd_red"], str(lenna["odd_red"]))
+
+    def test_batch_too_large_image(self):
+        """Test that an image PIL refuses to decode gives a row with an error"""
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            row = batch.image_statistics("./tests/sample-files/Lenna.png")
+        self.assertIn("decompression bomb", str(row["error"]))
+        self.assertEqual(row["odd_red"], "")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -56,6 +56,15 @@ class TestTools(unittest.TestCase):
             ],
         )
 
+    def test_a2bits_array(self):
+        for message in ["Hello World!", "I love 🍕 and 🍫!", "é"]:
+            for encoding in ["UTF-8", "UTF-32LE"]:
+                bits = tools.a2bits_array(message, encoding)
+                self.assertEqual(
+                    "".join(map(str, bits.tolist())),
+                    "".join(tools.a2bits_list(message, encoding)),
+                )
+
     def test_a2bits_list_UTF32LE(self):
         list_of_bits = tools.a2bits_list("Hello World!", "UTF-32LE")
         self.assertEqual(
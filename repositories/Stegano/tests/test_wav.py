@@ -24,6 +24,8 @@ __license__ = "GPLv3"
 
 import os
 import unittest
+import wave
+from unittest import mock
 
 from stegano import wav
 
@@ -51,6 +53,49 @@ class TestWav(unittest.TestCase):
         with self.assertRaises(AssertionError):
             wav.hide("./tests/sample-files/free-software-song.wav", message, "./audio.wav")
 
+    def test_hide_by_chunks(self):
+        """Test that only the lsb of the first bytes change, whatever the size of
+        the chunks."""
+        message = "Hello World! ünïcode"
+        with wave.open("./tests/sample-files/free-software-song.wav", "rb") as f:
+            original = f.readframes(f.getnframes())
+        bits = 8 * (len(message) + 1)
+
+        for chunk_size in (1, 7, 4096, wav.wav.CHUNK_SIZE):
+            with mock.patch.object(wav.wav, "CHUNK_SIZE", chunk_size):
+                wav.hide(
+                    "./tests/sample-files/free-software-song.wav",
+                    message,
+                    "./audio.wav",
+                )
+            self.assertEqual(message, wav.reveal("./audio.wav"))
+            with wave.open("./audio.wav", "rb") as f:
+                self.assertEqual(f.getnframes(), len(original) // 2)
+                frames = f.readframes(f.getnframes())
+            self.assertEqual(frames[bits:], original[bits:])
+            self.assertTrue(
+                all(a >> 1 == b >> 1 for a, b in zip(frames[:bits], original[:bits]))
+            )
+
+    def test_hide_and_reveal_utf32(self):
+        message = "a€☃"
+        wav.hide(
+            "./tests/sample-files/free-software-song.wav",
+            message,
+            "./audio.wav",
+            encoding="UTF-32LE",
+        )
+        self.assertEqual(message, wav.reveal("./audio.wav", encoding="UTF-32LE"))
+
+    def test_reveal_too_short(self):
+        with wave.open("./audio.wav", "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(1)
+            f.setframerate(8000)
+            f.writeframes(bytes([0, 0, 0, 0, 1, 0, 1, 1, 0, 0]))
+        with self.assertRaises(IndexError):
+            wav.reveal("./audio.wav")
+
     def tearDown(self):
         try:
             os.unlink("./audio.wav")
@@ -7,6 +7,8 @@ from typing import Any, Dict, Tuple
 
 import pytest
 
+from racb_target import repo_root_override
+
 # Decide whether to test the reference implementation or the generated one
 TARGET_ENV = "CACHETOOLS_TARGET"
 TARGET_REFERENCE_VALUE = "reference"
@@ -15,7 +17,10 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 
 target = os.getenv(TARGET_ENV, "generated")
 
-if target == TARGET_REFERENCE_VALUE:
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    sys.path.insert(0, str(_racb_root))
+elif target == TARGET_REFERENCE_VALUE:
     # Reference: put ./repositories/cachetools on sys.path
     sys.path.insert(0, str(ROOT_DIR / "repositories" / "cachetools"))
 else:
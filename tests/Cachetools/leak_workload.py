@@ -0,0 +1,35 @@
+"""
+Leak-probe workload for Cachetools (task YAML: leak_probe).
+
+One iteration pushes a batch of fresh keys through bounded caches. Eviction
+must release the evicted entries, so retained memory stays flat once the
+caches are full.
+"""
+
+import sys
+
+from racb_target import repo_root_override
+
+_racb_root = repo_root_override("cachetools")
+if _racb_root is not None and str(_racb_root) not in sys.path:
+    sys.path.insert(0, str(_racb_root))
+
+from cachetools import LFUCache, LRUCache, TTLCache  # type: ignore  # noqa: E402
+
+BATCH = 200
+
+
+def setup() -> dict:
+    return {
+        "caches": [LRUCache(maxsize=128), LFUCache(maxsize=128), TTLCache(maxsize=128, ttl=600)],
+        "next": 0,
+    }
+
+
+def workload(state: dict) -> None:
+    start = state["next"]
+    for cache in state["caches"]:
+        for i in range(start, start + BATCH):
+            cache[f"key-{i}"] = [i] * 4
+            cache.get(f"key-{i - 1}")
+    state["next"] = start + BATCH
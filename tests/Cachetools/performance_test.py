@@ -3,6 +3,8 @@ import sys
 import time
 from pathlib import Path
 
+from racb_target import repo_root_override
+
 ROOT_DIR = Path(__file__).resolve().parents[2]
 
 TARGET_ENV = "CACHETOOLS_TARGET"
@@ -10,7 +12,10 @@ TARGET_REFERENCE_VALUE = "reference"
 
 target = os.getenv(TARGET_ENV, "generated")
 
-if target == TARGET_REFERENCE_VALUE:
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    sys.path.insert(0, str(_racb_root))
+elif target == TARGET_REFERENCE_VALUE:
     sys.path.insert(0, str(ROOT_DIR / "repositories" / "cachetools"))
 else:
     sys.path.insert(0, str(ROOT_DIR / "generation" / "Cachetools"))
@@ -7,6 +7,8 @@ from typing import List
 
 import pytest
 
+from racb_target import repo_root_override
+
 
 def _ensure_celery_importable() -> None:
     """
@@ -19,10 +21,16 @@ def _ensure_celery_importable() -> None:
     except Exception:
         pass
 
-    root = Path(__file__).resolve().parents[2]
-    ref_repo = root / "repositories" / "celery"
-    if ref_repo.exists():
-        sys.path.insert(0, str(ref_repo))
+    override = repo_root_override()
+    if override is not None:
+        # Under the harness never fall back to the reference repo.
+        if str(override) not in sys.path:
+            sys.path.insert(0, str(override))
+    else:
+        root = Path(__file__).resolve().parents[2]
+        ref_repo = root / "repositories" / "celery"
+        if ref_repo.exists():
+            sys.path.insert(0, str(ref_repo))
 
     import celery  # noqa: F401
 
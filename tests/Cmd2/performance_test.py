@@ -8,10 +8,15 @@ from typing import Optional
 
 import io
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 target = os.environ.get("CMD2_TARGET", "generated").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "cmd2"
 else:
     REPO_ROOT = ROOT / "generation" / "cmd2"
@@ -7,12 +7,17 @@ from pathlib import Path
 
 import pytest
 
+from racb_target import repo_root_override
+
 # Root directory of the benchmark project
 ROOT = Path(__file__).resolve().parents[2]
 
 # Decide whether to test the reference repository or the generated one.
 target = os.environ.get("DATEUTIL_TARGET", "reference").lower()
-if target == "reference":
+_racb_root = repo_root_override("dateutil")
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     # The source package lives under src/dateutil in the reference repo.
     REPO_ROOT = ROOT / "repositories" / "dateutil" / "src"
 else:
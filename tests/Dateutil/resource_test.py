@@ -6,10 +6,15 @@ import sys
 from pathlib import Path
 from typing import List
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 target = os.environ.get("DATEUTIL_TARGET", "reference").lower()
-if target == "reference":
+_racb_root = repo_root_override("dateutil")
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "dateutil" / "src"
 else:
     REPO_ROOT = ROOT / "generation" / "Dateutil"
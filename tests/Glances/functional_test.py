@@ -4,6 +4,8 @@ import sys
 from pathlib import Path
 from typing import Dict, Iterable, List, Tuple
 
+from racb_target import repo_root_override
+
 
 def _project_root() -> Path:
     # tests/Glances/functional_test.py -> parents[2] == project root
@@ -11,7 +13,7 @@ def _project_root() -> Path:
 
 
 def _repo_root() -> Path:
-    return _project_root() / "repositories" / "glances"
+    return repo_root_override() or (_project_root() / "repositories" / "glances")
 
 
 def _pkg_root() -> Path:
@@ -4,13 +4,15 @@ import time
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+from racb_target import repo_root_override
+
 
 def _project_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
 
 def _repo_root() -> Path:
-    return _project_root() / "repositories" / "glances"
+    return repo_root_override() or (_project_root() / "repositories" / "glances")
 
 
 def _pkg_root() -> Path:
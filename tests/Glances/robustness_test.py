@@ -3,13 +3,15 @@ from pathlib import Path
 
 import pytest
 
+from racb_target import repo_root_override
+
 
 def _project_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
 
 def _repo_root() -> Path:
-    return _project_root() / "repositories" / "glances"
+    return repo_root_override() or (_project_root() / "repositories" / "glances")
 
 
 def _ensure_repo_on_syspath() -> None:
@@ -7,10 +7,15 @@ from pathlib import Path
 
 import pandas as pd  # type: ignore
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 target = os.environ.get("LIFELINES_TARGET", "reference").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "lifelines"
 else:
     REPO_ROOT = ROOT / "generation" / "Lifelines"
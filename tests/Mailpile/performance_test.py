@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import os
 import shutil
 import string
@@ -48,7 +49,9 @@ def _ensure_py3_converted_repo(repo_root: Path) -> Path:
     cache_root = (ROOT / ".converted" / "Mailpile").resolve()
     cache_root.mkdir(parents=True, exist_ok=True)
 
-    safe_name = "reference" if "repositories" in repo_root.parts else "generated"
+    # 按仓库路径区分缓存：不同模型的生成仓库可以同时评测，互不覆盖
+    kind = "reference" if "repositories" in repo_root.parts else "generated"
+    safe_name = f"{kind}-{hashlib.sha1(str(repo_root).encode('utf-8')).hexdigest()[:10]}"
     out_root = (cache_root / safe_name).resolve()
 
     stamp = out_root / ".racb_py3_stamp"
@@ -6,12 +6,17 @@ import time
 from pathlib import Path
 import textwrap
 
+from racb_target import repo_root_override
+
 # Root directory of the benchmark project
 ROOT = Path(__file__).resolve().parents[2]
 
 # Decide whether to test the reference repository or the generated one.
 target = os.environ.get("MARKDOWN_TARGET", "reference").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "markdown"
 else:
     # This should be the path where generated Markdown repositories are stored.
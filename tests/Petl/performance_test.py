@@ -10,10 +10,15 @@ from typing import Any, Dict, List
 
 import pytest
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 TARGET_ENV = os.getenv("PETL_TARGET", "reference")
-if TARGET_ENV == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif TARGET_ENV == "reference":
     REPO_ROOT = ROOT / "repositories" / "Petl"
 elif TARGET_ENV == "generation":
     REPO_ROOT = ROOT / "generation" / "Petl"
@@ -6,11 +6,16 @@ from pathlib import Path
 
 import pytest
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 # Decide whether to test the reference repo or a generated repo.
 target = os.environ.get("PYGMENTS_TARGET", "reference").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "pygments"
 else:
     REPO_ROOT = ROOT / "generation" / "Pygments"
@@ -4,10 +4,15 @@ import os
 import sys
 from pathlib import Path
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 target = os.environ.get("PYGMENTS_TARGET", "reference").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "pygments"
 else:
     REPO_ROOT = ROOT / "generation" / "Pygments"
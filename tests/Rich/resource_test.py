@@ -5,10 +5,15 @@ from pathlib import Path
 
 import psutil  # type: ignore
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 TARGET = os.environ.get("RICH_TARGET", "generated").lower()
-if TARGET == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif TARGET == "reference":
     REPO_ROOT = ROOT / "repositories" / "rich"
 elif TARGET == "generated":
     REPO_ROOT = ROOT / "generation" / "Rich"
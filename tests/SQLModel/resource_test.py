@@ -6,10 +6,15 @@ from typing import Optional
 
 import psutil
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 target = os.environ.get("SQLMODEL_TARGET", "generated").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "SQLModel"
 else:
     REPO_ROOT = ROOT / "generation" / "SQLModel"
@@ -4,10 +4,15 @@ from pathlib import Path
 
 import psutil  # type: ignore
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 target = os.environ.get("SCHEDULE_TARGET", "generated").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "schedule"
 else:
     REPO_ROOT = ROOT / "generation" / "Schedule"
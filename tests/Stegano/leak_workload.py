@@ -0,0 +1,28 @@
+"""
+Leak-probe workload for Stegano (task YAML: leak_probe).
+
+One iteration hides a short message in a small in-memory RGB image with the
+LSB backend and reveals it again; a backend that keeps per-call state alive
+(caches of images, generator state, ...) shows up as per-iteration growth.
+"""
+
+import sys
+
+from PIL import Image  # type: ignore
+
+from racb_target import repo_root_override
+
+_racb_root = repo_root_override()
+if _racb_root is not None and str(_racb_root) not in sys.path:
+    sys.path.insert(0, str(_racb_root))
+
+from stegano import lsb  # type: ignore  # noqa: E402
+
+MESSAGE = "leak probe message"
+
+
+def workload() -> None:
+    # hide() 会关闭传入的图像：每次迭代新建一张
+    cover = Image.new("RGB", (64, 64), color=(120, 80, 200))
+    secret = lsb.hide(cover, MESSAGE)
+    assert lsb.reveal(secret) == MESSAGE
@@ -4,11 +4,16 @@ import time
 import statistics
 from pathlib import Path
 
+from racb_target import repo_root_override, scratch_dir
+
 #   <root>/tests/Stegano/performance_test.py
 ROOT = Path(__file__).resolve().parents[2]
 
 target = os.environ.get("STEGANO_TARGET", "generated").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "Stegano"
 else:
     REPO_ROOT = ROOT / "generation" / "Stegano"
@@ -34,9 +39,7 @@ def _ensure_sample_files_exist() -> None:
 def _measure_hide_reveal(iterations: int = 10):
     _ensure_sample_files_exist()
 
-    tmp_dir = ROOT / "tmp_perf"
-    tmp_dir.mkdir(parents=True, exist_ok=True)
-    output_img = tmp_dir / "Lenna-lsb-perf.png"
+    output_img = scratch_dir("perf") / "Lenna-lsb-perf.png"
 
     hide_times = []
     reveal_times = []
@@ -30,6 +30,7 @@ if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 from stegano import lsb  # type: ignore
+from racb_target import scratch_dir
 
 REFERENCE_ROOT = ROOT / "repositories" / "Stegano"
 SAMPLE_FILES = REFERENCE_ROOT / "tests" / "sample-files"
@@ -50,7 +51,7 @@ def test_resource_usage_smoke() -> None:
     rss_before = proc.memory_info().rss
 
     secret = "resource secret"
-    out = REPO_ROOT / "tmp_resource.png"
+    out = scratch_dir("resource") / "tmp_resource.png"
 
     encoded_img = lsb.hide(str(LENNA_PNG), secret)  # returns PIL.Image
     encoded_img.save(str(out))
@@ -5,11 +5,16 @@ import sys
 import time
 from pathlib import Path
 
+from racb_target import repo_root_override
+
 ROOT = Path(__file__).resolve().parents[2]
 
 # Decide whether to test the reference repo or a generated repo.
 target = os.environ.get("TERMGRAPH_TARGET", "reference").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "termgraph"
 else:
     REPO_ROOT = ROOT / "generation" / "Termgraph"
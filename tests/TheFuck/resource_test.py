@@ -8,8 +8,13 @@ from typing import List, Optional
 
 import pytest
 
+from racb_target import repo_root_override
+
 
 def _repo_root() -> str:
+    override = repo_root_override()
+    if override is not None:
+        return str(override)
     here = os.path.abspath(os.path.dirname(__file__))
     return os.path.abspath(os.path.join(here, "..", ".."))
 
@@ -4,11 +4,16 @@ import os
 import sys
 from pathlib import Path
 
+from racb_target import repo_root_override
+
 # Root directory of the benchmark project
 ROOT = Path(__file__).resolve().parents[2]
 
 target = os.environ.get("TYPER_TARGET", "reference").lower()
-if target == "reference":
+_racb_root = repo_root_override()
+if _racb_root is not None:
+    REPO_ROOT = _racb_root
+elif target == "reference":
     REPO_ROOT = ROOT / "repositories" / "typer"
 else:
     REPO_ROOT = ROOT / "generation" / "Typer"
@@ -0,0 +1,24 @@
+"""Task clones of cached venvs (evaluation.dep_env)."""
+
+from __future__ import annotations
+
+import os
+
+from evaluation.dep_env import _hardlink_tree
+
+
+def test_hardlink_clone_copies_site_packages(tmp_path):
+    src = tmp_path / "cache"
+    pkg = src / "lib" / "python3.11" / "site-packages" / "pkg"
+    pkg.mkdir(parents=True)
+    (pkg / "data.txt").write_text("cached")
+    (src / "bin").mkdir()
+    (src / "bin" / "tool").write_text("#!/bin/sh\n")
+
+    dst = tmp_path / "task"
+    _hardlink_tree(src, dst)
+    with open(dst / "lib" / "python3.11" / "site-packages" / "pkg" / "data.txt", "w") as f:
+        f.write("changed by the task")
+
+    assert (pkg / "data.txt").read_text() == "cached"
+    assert os.stat(dst / "bin" / "tool").st_ino == os.stat(src / "bin" / "tool").st_ino
@@ -0,0 +1,24 @@
+"""Idempotent enqueue of evaluation.job_queue.JobQueue."""
+
+from __future__ import annotations
+
+from evaluation.job_queue import JobQueue
+
+HANDLER = "evaluation.run_all_benchmarks:run_queued_task"
+
+
+def test_failed_job_is_reset_with_the_new_payload(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db")
+    assert queue.enqueue("m|eval_only|P|a", HANDLER, {"generated_root": "old"}, max_attempts=1)
+    job = queue.lease("w1")
+    queue.fail(job["id"], "w1", "boom", retry=False)
+
+    assert not queue.enqueue("m|eval_only|P|a", HANDLER, {"generated_root": "new"})
+    job = queue.lease("w2")
+    assert job["payload"] == {"generated_root": "new"}
+    queue.complete(job["id"], "w2", {"score": 1})
+
+    # 已完成的 job 不会被新 payload 覆盖；配置变了应使用新的 key
+    assert not queue.enqueue("m|eval_only|P|a", HANDLER, {"generated_root": "other"})
+    assert queue.jobs(["m|eval_only|P|a"])[0]["payload"] == {"generated_root": "new"}
+    queue.close()
@@ -0,0 +1,61 @@
+"""Resource-limit classification of failed suites (evaluation.measure_generated)."""
+
+from __future__ import annotations
+
+import errno
+import textwrap
+
+from evaluation.measure_generated import (
+    DEFAULT_RESOURCE_LIMITS,
+    _classify_limit_violation,
+    _run_pytest_with_sampling_and_stream,
+)
+
+MB = 1024 * 1024
+
+
+def _report(*exceptions):
+    return {"crashes": [], "exceptions": [{"type": t, "errno": e} for t, e in exceptions]}
+
+
+def test_failures_mentioning_limits_are_not_violations():
+    report = _report(("AssertionError", None), ("OSError", None))
+    report["crashes"] = ["AssertionError: expected MemoryError to be raised", "OSError: File too large for format"]
+    assert _classify_limit_violation(1, report, DEFAULT_RESOURCE_LIMITS) is None
+
+
+def test_errno_and_signal_evidence():
+    limits = dict(DEFAULT_RESOURCE_LIMITS, cpu_s=60)
+    assert _classify_limit_violation(1, _report(("OSError", errno.EFBIG)), limits) == "fsize_limit"
+    assert _classify_limit_violation(1, _report(("OSError", errno.EMFILE)), limits) == "nofile_limit"
+    assert _classify_limit_violation(-24, _report(), limits) == "cpu_limit"
+
+
+def test_memory_error_needs_vms_near_the_limit():
+    limits = dict(DEFAULT_RESOURCE_LIMITS)
+    report = _report(("MemoryError", None))
+    assert _classify_limit_violation(1, report, limits, peak_vms_bytes=200 * MB) is None
+    peak = int(0.9 * limits["address_space_mb"] * MB)
+    assert _classify_limit_violation(1, report, limits, peak_vms_bytes=peak) == "oom_limit"
+
+
+def test_failing_suite_that_mentions_memory_error(tmp_path, monkeypatch):
+    suite = tmp_path / "functional_test.py"
+    suite.write_text(textwrap.dedent(
+        """
+        def test_handles_memoryerror():
+            print("MemoryError: out of memory; OSError: File too large")
+            assert 1 == 2, "expected MemoryError to be raised"
+
+
+        def test_format_error():
+            raise OSError("File too large for format")
+        """
+    ))
+    monkeypatch.setenv("RACB_QUIET", "1")
+    res = _run_pytest_with_sampling_and_stream(
+        suite, tmp_path, {}, timeout_s=120, resource_limits=dict(DEFAULT_RESOURCE_LIMITS)
+    )
+    assert res["failed"] == 2
+    assert "MemoryError" in res["stdout"]
+    assert "failure_class" not in res
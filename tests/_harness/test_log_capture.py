@@ -0,0 +1,39 @@
+"""Memory bound of evaluation.log_capture.LogCapture."""
+
+from __future__ import annotations
+
+import io
+
+from evaluation.log_capture import LogCapture, read_log_text
+
+BLOB = 50 * 1024 * 1024
+
+
+def test_single_oversized_line_is_truncated(tmp_path):
+    cap = LogCapture(tmp_path / "suite.log", max_bytes=1024 * 1024, keep_bytes=4096, echo=False)
+    cap.write("collected 1 item\n")
+    cap.write("x" * BLOB)
+    cap.write("\n1 passed in 0.01s\n")
+    cap.close()
+
+    text = cap.text()
+    assert len(text) <= 4096 + 100
+    assert cap.dropped_bytes > BLOB - 4096
+    assert text.startswith("collected 1 item\n")
+    assert text.endswith("\n1 passed in 0.01s\n")
+
+    on_disk = read_log_text(cap.path)
+    assert len(on_disk) <= 1024 * 1024 + 4096 + 100
+    assert on_disk.endswith("1 passed in 0.01s\n")
+
+
+def test_pump_reads_by_chunks():
+    sizes = []
+    cap = LogCapture(None, keep_bytes=4096, echo=False)
+    write = cap.write
+    cap.write = lambda text: (sizes.append(len(text)), write(text))  # type: ignore[method-assign]
+    cap.pump(io.BytesIO(b"x" * (1024 * 1024) + b"\r\ndone\r\n"))
+
+    assert max(sizes) <= 1 << 16
+    assert cap.text().endswith("\ndone\n")
+    assert "\r" not in cap.text()
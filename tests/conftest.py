@@ -0,0 +1,48 @@
+"""
+Shared pytest setup for the benchmark suites under tests/.
+
+Makes tests/racb_target.py importable at module level from every suite
+(``from racb_target import repo_root_override, scratch_dir``) and exposes the
+same information as fixtures, plus ``racb_leak_probe`` (evaluation/leak_probe.py)
+for in-suite memory-growth checks.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import pytest
+
+_TESTS_DIR = str(Path(__file__).resolve().parent)
+if _TESTS_DIR not in sys.path:
+    sys.path.insert(0, _TESTS_DIR)
+
+from racb_target import repo_root_override, scratch_dir  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def racb_repo_root() -> Optional[Path]:
+    """Repository under test as given by the harness (None outside the harness)."""
+    return repo_root_override()
+
+
+@pytest.fixture
+def racb_scratch_dir(request) -> Path:
+    """Per-test subdirectory of the run's scratch dir."""
+    name = re.sub(r"[^\w.-]+", "_", request.node.name)[:80]
+    return scratch_dir(name)
+
+
+@pytest.fixture
+def racb_leak_probe() -> Callable[..., Dict[str, Any]]:
+    """
+    ``racb_leak_probe(workload, iterations=200, warmup=20, setup=None)`` runs
+    ``workload`` under tracemalloc/RSS tracking and returns leak_bytes_per_iter,
+    rss_bytes_per_iter and the top allocating call sites.
+    """
+    from evaluation.leak_probe import probe
+
+    return probe
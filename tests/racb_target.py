@@ -0,0 +1,67 @@
+"""
+Target resolution shared by the benchmark suites under tests/<Project>/.
+
+The harness (evaluation/measure_generated.py, evaluation/measure_reference.py)
+exports for every suite subprocess:
+
+  RACB_REPO_ROOT     root of the repository under test (generated or reference)
+  RACB_SCRATCH_DIR   writable directory private to this run / suite
+
+Suites prefer these over their historical layout (repositories/<name> vs
+generation/<Project> selected by <PROJECT>_TARGET), so any number of repos of
+the same project -- e.g. every model under Exp1/<model>/generation -- can be
+evaluated at the same time without copying them into generation/.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+
+REPO_ROOT_ENV = "RACB_REPO_ROOT"
+SCRATCH_DIR_ENV = "RACB_SCRATCH_DIR"
+
+_fallback_scratch: Optional[Path] = None
+
+
+def repo_root_override(package: Optional[str] = None) -> Optional[Path]:
+    """
+    RACB_REPO_ROOT when the harness set it, else None (use the suite's own default).
+
+    With ``package`` the import root is returned instead: ``<root>/src`` for a
+    src layout (``<root>/src/<package>`` present, ``<root>/<package>`` absent).
+    """
+    value = os.environ.get(REPO_ROOT_ENV, "").strip()
+    if not value:
+        return None
+    root = Path(value).resolve()
+    if package and not (root / package).exists() and (root / "src" / package).exists():
+        return root / "src"
+    return root
+
+
+def scratch_dir(*parts: str) -> Path:
+    """
+    Writable directory for files a suite produces (created on demand).
+
+    RACB_SCRATCH_DIR when set; otherwise a temp dir private to this process
+    (removed at exit), never a fixed path shared with other runs.
+    """
+    global _fallback_scratch
+    value = os.environ.get(SCRATCH_DIR_ENV, "").strip()
+    if value:
+        base = Path(value)
+    else:
+        if _fallback_scratch is None:
+            _fallback_scratch = Path(tempfile.mkdtemp(prefix="racb-scratch-"))
+            atexit.register(shutil.rmtree, str(_fallback_scratch), True)
+        base = _fallback_scratch
+    d = base.joinpath(*parts)
+    d.mkdir(parents=True, exist_ok=True)
+    return d